@@ -2,22 +2,45 @@
 Algoritmo de Geração de Dieta Personalizada
 """
 
-import random
 import math
+import random
 from datetime import date, datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import structlog
+import numpy as np
 from dataclasses import dataclass
 
 from models.plan import (
     DietPlan, Meal, FoodItem, MealType, GoalType,
-    DietPreferences, AlgorithmConfig
+    DietPreferences, AlgorithmConfig, algorithm_config_from_user
 )
 from config.settings import get_settings
-from adapters.taco_data_adapter import TacoDataAdapter
+from algorithms.food_matrix import FoodMatrix
+from algorithms.quantity_optimizer import QuantityOptimizer, get_quantity_optimizer
+from algorithms.restriction_index import CompiledRestrictions
+from algorithms.seeding import derived_hash, plan_input_hash, recorded_input_hash, seeded_rng, week_input_hash
+from services.content_templates import get_content_templates
+from services.food_catalog import CatalogSnapshot, FoodCatalog, get_food_catalog
+from services.metrics import PlanMetrics, get_plan_metrics
+from services.plan_cache import PlanCache, get_plan_cache
+from services.plan_codec import PlanCodecError, StoredPlan, encode_plan_document, encode_plan_update
+from services.plan_executor import PlanExecutor, get_plan_executor
+from services.presentation_inputs import (
+    PRESENTATION_INPUTS_COLLECTION, PLAN_SECTIONS,
+    mark_presentation_inputs_changed, section_tokens
+)
 
 logger = structlog.get_logger(__name__)
 
+# Penalidade no score de seleção por uso anterior do alimento na semana
+WEEKLY_VARIETY_PENALTY = 0.25
+
+# Limites da meta de uma refeição regenerada em relação à meta nominal
+MEAL_REBALANCE_BOUNDS = (0.5, 1.5)
+
+# Campos reescritos quando apenas uma refeição muda
+MEAL_UPDATE_FIELDS = ("meals", "total_calories", "total_protein", "total_carbs", "total_fat")
+
 @dataclass
 class NutritionalTarget:
     """Alvo nutricional para uma refeição"""
@@ -27,30 +50,29 @@ class NutritionalTarget:
     fat: float
     tolerance: float = 0.1  # ±10% de tolerância
 
-@dataclass
-class FoodCandidate:
-    """Candidato a alimento para uma refeição"""
-    food_id: str
-    name: str
-    calories_per_100g: float
-    protein_per_100g: float
-    carbs_per_100g: float
-    fat_per_100g: float
-    category: str
-    preparation_time: int
-    cost_level: str
-    availability_score: float
-    preference_score: float
-
 class DietGenerator:
     """Gerador de planos de dieta personalizados"""
     
-    def __init__(self, content_service, firebase_service):
+    def __init__(
+        self,
+        content_service,
+        firebase_service,
+        food_catalog: Optional[FoodCatalog] = None,
+        quantity_optimizer: Optional[QuantityOptimizer] = None,
+        plan_cache: Optional[PlanCache] = None,
+        plan_executor: Optional[PlanExecutor] = None,
+        metrics: Optional[PlanMetrics] = None
+    ):
         self.content_service = content_service
         self.firebase_service = firebase_service
         self.settings = get_settings()
         self.diet_config = self.settings.diet_algorithm_config
-        self.taco_adapter = TacoDataAdapter()
+        self.food_catalog = food_catalog or get_food_catalog(content_service)
+        self.quantity_optimizer = quantity_optimizer or get_quantity_optimizer()
+        self.plan_cache = plan_cache or get_plan_cache()
+        self.plan_executor = plan_executor or get_plan_executor()
+        self.metrics = metrics or get_plan_metrics()
+        self.templates = get_content_templates()
         
     async def generate_diet_plan(
         self, 
@@ -72,70 +94,442 @@ class DietGenerator:
         logger.info("Iniciando geração de plano de dieta", 
                    user_id=user_id, date=target_date)
         
+        metrics = self.metrics
+        generation = metrics.generation("diet")
         try:
-            # 1. Verificar se já existe plano para a data
-            existing_plan = await self._get_existing_plan(user_id, target_date)
-            if existing_plan and not self._should_regenerate_plan(existing_plan, algorithm_config):
+            # 1. Cache de planos: repetições do mesmo dia não acessam o Firestore
+            #    (a versão do catálogo faz parte das entradas)
+            with metrics.stage("diet", "catalog"):
+                catalog = await self.food_catalog.get_snapshot()
+            with metrics.stage("diet", "cache_lookup"):
+                cached_plan = await self.plan_cache.get(
+                    "diet", user_id, target_date, algorithm_config, catalog.version
+                )
+            if cached_plan:
+                generation.outcome = "cache_hit"
+                return cached_plan
+            
+            # 2. Verificar se já existe plano para a data (mesmas entradas = mesmo plano)
+            input_hash = plan_input_hash("diet", user_id, target_date, algorithm_config, catalog.version)
+            with metrics.stage("diet", "existing_plan"):
+                existing_plan = await self._get_existing_plan(user_id, target_date)
+            if existing_plan and not self._should_regenerate_plan(existing_plan, algorithm_config, input_hash):
                 logger.info("Plano existente encontrado", user_id=user_id)
-                return existing_plan
+                diet_plan = existing_plan.load()
+                with metrics.stage("diet", "cache_store"):
+                    await self.plan_cache.set("diet", diet_plan, algorithm_config, catalog.version)
+                generation.outcome = "existing"
+                return diet_plan
             
-            # 2. Obter dados do usuário e preferências
-            user_data = await self._get_user_data(user_id)
-            diet_preferences = algorithm_config.diet_preferences
+            # 3. Obter dados do usuário
+            with metrics.stage("diet", "user_load"):
+                user_data = await self._get_user_data(user_id)
             
-            # 3. Calcular distribuição calórica por refeição
-            meal_targets = self._calculate_meal_targets(algorithm_config)
+            # 4. Gerar refeições e montar o plano (no pool de processos, se ativo)
+            diet_plan = await self.build_diet_plan(user_id, target_date, algorithm_config, user_data, catalog)
             
-            # 4. Obter alimentos disponíveis do Content Service
-            available_foods = await self._get_available_foods(diet_preferences)
-            
-            # 5. Gerar refeições
-            meals = []
-            for meal_type, target in meal_targets.items():
-                meal = await self._generate_meal(
-                    meal_type, target, available_foods, 
-                    diet_preferences, user_data
-                )
-                meals.append(meal)
-            
-            # 6. Calcular totais do plano
-            total_calories, total_protein, total_carbs, total_fat = self._calculate_totals(meals)
-            
-            # 7. Ajustar se necessário
-            if self._needs_adjustment(total_calories, algorithm_config.target_calories):
-                meals = await self._adjust_plan(meals, algorithm_config, available_foods)
-                total_calories, total_protein, total_carbs, total_fat = self._calculate_totals(meals)
-            
-            # 8. Criar plano final
-            diet_plan = DietPlan(
-                user_id=user_id,
-                date=target_date,
-                goal=algorithm_config.goal,
-                target_calories=algorithm_config.target_calories,
-                target_protein=algorithm_config.target_protein,
-                target_carbs=algorithm_config.target_carbs,
-                target_fat=algorithm_config.target_fat,
-                meals=meals,
-                total_calories=total_calories,
-                total_protein=total_protein,
-                total_carbs=total_carbs,
-                total_fat=total_fat,
-                water_intake_ml=self._calculate_water_intake(algorithm_config),
-                notes=self._generate_diet_notes(algorithm_config, diet_preferences)
-            )
-            
-            # 9. Salvar no Firestore
-            await self._save_diet_plan(diet_plan)
+            # 5. Salvar no Firestore e no cache
+            with metrics.stage("diet", "save"):
+                await self._save_diet_plan(diet_plan)
+            with metrics.stage("diet", "cache_store"):
+                await self.plan_cache.set("diet", diet_plan, algorithm_config, catalog.version)
             
             logger.info("Plano de dieta gerado com sucesso", 
-                       user_id=user_id, total_calories=total_calories)
+                       user_id=user_id, total_calories=diet_plan.total_calories)
             
             return diet_plan
             
         except Exception as e:
+            generation.outcome = "error"
             logger.error("Erro ao gerar plano de dieta", 
                         user_id=user_id, error=str(e))
             raise
+        
+        finally:
+            generation.observe()
+    
+    async def generate_diet_week(
+        self,
+        user_id: str,
+        week_start: date,
+        algorithm_config: AlgorithmConfig
+    ) -> List[DietPlan]:
+        """
+        Gera os planos de dieta dos sete dias de uma semana em lote
+        
+        Usuário, catálogo e metas por refeição são carregados uma única vez,
+        a variedade entre os dias é incentivada penalizando alimentos já usados
+        e todos os planos novos são gravados em um único batch do Firestore.
+        
+        Args:
+            user_id: ID do usuário
+            week_start: Primeiro dia da semana
+            algorithm_config: Configuração do algoritmo
+            
+        Returns:
+            List[DietPlan]: Planos da semana ordenados por data
+        """
+        logger.info("Iniciando geração semanal de planos de dieta", 
+                   user_id=user_id, week_start=week_start)
+        
+        metrics = self.metrics
+        generation = metrics.generation("diet_week")
+        try:
+            dates = [week_start + timedelta(days=offset) for offset in range(7)]
+            
+            # 1. Planos existentes da semana em uma única leitura
+            with metrics.stage("diet_week", "existing_plan"):
+                existing_plans = await self._get_existing_plans(user_id, dates)
+            
+            # 2. Montar os dias sem plano válido (no pool de processos, se ativo)
+            with metrics.stage("diet_week", "user_load"):
+                user_data = await self._get_user_data(user_id)
+            with metrics.stage("diet_week", "catalog"):
+                catalog = await self.food_catalog.get_snapshot()
+            plans, new_plans = await self._build_diet_week(
+                user_id, dates, algorithm_config, user_data, existing_plans, catalog
+            )
+            
+            # 3. Gravar todos os planos novos de uma vez
+            if new_plans:
+                with metrics.stage("diet_week", "save"):
+                    await self._save_diet_plans_batch(new_plans)
+            else:
+                generation.outcome = "existing"
+            
+            with metrics.stage("diet_week", "cache_store"):
+                for plan in plans:
+                    await self.plan_cache.set("diet", plan, algorithm_config, catalog.version)
+            
+            logger.info("Planos de dieta semanais gerados", 
+                       user_id=user_id,
+                       generated=len(new_plans),
+                       reused=len(plans) - len(new_plans))
+            
+            return plans
+            
+        except Exception as e:
+            generation.outcome = "error"
+            logger.error("Erro ao gerar planos de dieta semanais", 
+                        user_id=user_id, error=str(e))
+            raise
+        
+        finally:
+            generation.observe()
+    
+    async def regenerate_meal(
+        self,
+        user_id: str,
+        target_date: date,
+        meal_type: MealType,
+        algorithm_config: Optional[AlgorithmConfig] = None,
+        exclude_foods: Optional[List[str]] = None
+    ) -> DietPlan:
+        """
+        Regenera uma única refeição do plano gravado
+        
+        As demais refeições são mantidas sem alteração: o rebalanceamento é
+        feito redimensionando a refeição nova, que recebe o orçamento restante
+        do dia (metas diárias menos as refeições mantidas, limitado a
+        ``MEAL_REBALANCE_BOUNDS`` da meta nominal). A diferença que exceder
+        esses limites fica nos totais do dia em vez de alterar refeições que
+        o usuário não pediu para trocar. Apenas as refeições e os totais são
+        gravados (update parcial do documento). Sem plano gravado válido para
+        a configuração, o dia inteiro é gerado.
+        
+        Args:
+            user_id: ID do usuário
+            target_date: Data do plano
+            meal_type: Refeição a regenerar
+            algorithm_config: Configuração do algoritmo (padrão: a do documento do usuário)
+            exclude_foods: IDs de alimentos a evitar (padrão: os da refeição atual)
+            
+        Returns:
+            DietPlan: Plano atualizado
+        """
+        logger.info("Regenerando refeição", user_id=user_id, date=target_date, meal_type=meal_type)
+        
+        metrics = self.metrics
+        generation = metrics.generation("diet_meal")
+        try:
+            with metrics.stage("diet_meal", "user_load"):
+                user_data = await self._get_user_data(user_id)
+            algorithm_config = algorithm_config or algorithm_config_from_user(user_id, user_data)
+            if algorithm_config is None:
+                raise ValueError("Configuração de planos do usuário não encontrada")
+            
+            with metrics.stage("diet_meal", "existing_plan"):
+                stored_plan = await self._get_existing_plan(user_id, target_date)
+            with metrics.stage("diet_meal", "catalog"):
+                catalog = await self.food_catalog.get_snapshot()
+            input_hash = plan_input_hash("diet", user_id, target_date, algorithm_config, catalog.version)
+            if not stored_plan or self._should_regenerate_plan(stored_plan, algorithm_config, input_hash):
+                generation.outcome = "full_day"
+                return await self.generate_diet_plan(user_id, target_date, algorithm_config)
+            
+            diet_plan = stored_plan.load()
+            if not any(meal.meal_type == meal_type for meal in diet_plan.meals):
+                raise ValueError(f"Refeição {meal_type.value} não faz parte do plano")
+            
+            with metrics.stage("diet_meal", "assembly"):
+                updated_plan = self.compose_meal_update(
+                    diet_plan, meal_type, algorithm_config, user_data, catalog, exclude_foods
+                )
+            
+            with metrics.stage("diet_meal", "save"):
+                await self._update_diet_meals(updated_plan, stored_plan.compact)
+            with metrics.stage("diet_meal", "cache_store"):
+                # Só a dieta deste dia muda: as demais instâncias (e o tracking)
+                # descartam apenas essa chave; os outros dias seguem em cache
+                await self.plan_cache.invalidate_day("diet", user_id, target_date)
+                await self.plan_cache.set("diet", updated_plan, algorithm_config, catalog.version)
+            
+            logger.info("Refeição regenerada", 
+                       user_id=user_id, meal_type=meal_type, total_calories=updated_plan.total_calories)
+            
+            return updated_plan
+            
+        except Exception as e:
+            generation.outcome = "error"
+            logger.error("Erro ao regenerar refeição", 
+                        user_id=user_id, meal_type=meal_type, error=str(e))
+            raise
+        
+        finally:
+            generation.observe()
+    
+    async def build_diet_plan(
+        self,
+        user_id: str,
+        target_date: date,
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        catalog: Optional[CatalogSnapshot] = None
+    ) -> DietPlan:
+        """Monta o plano de dieta de um dia sem consultar nem persistir no Firestore"""
+        if catalog is None:
+            with self.metrics.stage("diet", "catalog"):
+                catalog = await self.food_catalog.get_snapshot()
+        
+        with self.metrics.stage("diet", "assembly"):
+            if self.plan_executor.active:
+                return await self.plan_executor.compose_diet_plan(
+                    user_id, target_date, algorithm_config, user_data, catalog.version
+                )
+            return self.compose_diet_plan(user_id, target_date, algorithm_config, user_data, catalog)
+    
+    async def _build_diet_week(
+        self,
+        user_id: str,
+        dates: List[date],
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        existing_plans: Dict[date, DietPlan],
+        catalog: CatalogSnapshot
+    ) -> Tuple[List[DietPlan], List[DietPlan]]:
+        """Monta os dias da semana sem plano válido, no pool de processos se ativo"""
+        with self.metrics.stage("diet_week", "assembly"):
+            if self.plan_executor.active:
+                return await self.plan_executor.compose_diet_week(
+                    user_id, dates, algorithm_config, user_data, existing_plans, catalog.version
+                )
+            return self.compose_diet_week(user_id, dates, algorithm_config, user_data, existing_plans, catalog)
+    
+    def compose_diet_plan(
+        self,
+        user_id: str,
+        target_date: date,
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        catalog: CatalogSnapshot
+    ) -> DietPlan:
+        """
+        Núcleo de CPU da geração de um dia (sem I/O)
+        
+        Calcula as metas por refeição, filtra o catálogo pelas restrições,
+        seleciona os alimentos e otimiza as quantidades.
+        """
+        meal_targets = self._calculate_meal_targets(algorithm_config)
+        food_matrix = self._candidate_foods(catalog, algorithm_config.diet_preferences)
+        return self._build_diet_plan(
+            user_id, target_date, algorithm_config,
+            meal_targets, food_matrix, user_data, catalog.version
+        )
+    
+    def compose_diet_week(
+        self,
+        user_id: str,
+        dates: List[date],
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        existing_plans: Dict[date, DietPlan],
+        catalog: CatalogSnapshot
+    ) -> Tuple[List[DietPlan], List[DietPlan]]:
+        """
+        Núcleo de CPU da geração semanal (sem I/O)
+        
+        Returns:
+            Tuple[List[DietPlan], List[DietPlan]]: Planos de todos os dias e apenas os novos
+        """
+        meal_targets = self._calculate_meal_targets(algorithm_config)
+        food_matrix = self._candidate_foods(catalog, algorithm_config.diet_preferences)
+        
+        # Controle de repetição entre os dias (usos por posição no catálogo)
+        food_columns = catalog.food_columns
+        usage = np.zeros(len(food_columns), dtype=np.float64)
+        varied = algorithm_config.diet_preferences.style == "varied"
+        
+        # Dias penalizados pela variedade dependem da semana: hash derivado do início dela
+        week_start = dates[0] if varied and dates else None
+        
+        plans = []
+        new_plans = []
+        for target_date in dates:
+            existing_plan = existing_plans.get(target_date)
+            input_hash = plan_input_hash("diet", user_id, target_date, algorithm_config, catalog.version)
+            if existing_plan and not self._should_regenerate_plan(existing_plan, algorithm_config, input_hash):
+                plan = existing_plan
+            else:
+                plan = self._build_diet_plan(
+                    user_id, target_date, algorithm_config,
+                    meal_targets, food_matrix, user_data, catalog.version,
+                    food_penalty=usage[food_matrix.positions] * WEEKLY_VARIETY_PENALTY if varied else None,
+                    week_start=week_start
+                )
+                new_plans.append(plan)
+            
+            for meal in plan.meals:
+                for food in meal.foods:
+                    position = food_columns.position(food.food_id)
+                    if position is not None:
+                        usage[position] += 1
+            plans.append(plan)
+        
+        logger.info("Variedade da semana", user_id=user_id, distinct_foods=int(np.count_nonzero(usage)))
+        return plans, new_plans
+    
+    def compose_meal_update(
+        self,
+        diet_plan: DietPlan,
+        meal_type: MealType,
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        catalog: CatalogSnapshot,
+        exclude_foods: Optional[List[str]] = None
+    ) -> DietPlan:
+        """Núcleo de CPU da regeneração de uma refeição (sem I/O)"""
+        position = next(index for index, meal in enumerate(diet_plan.meals) if meal.meal_type == meal_type)
+        current_meal = diet_plan.meals[position]
+        kept_meals = diet_plan.meals[:position] + diet_plan.meals[position + 1:]
+        
+        nominal = self._calculate_meal_targets(algorithm_config)[meal_type]
+        target = self._remaining_meal_target(diet_plan, kept_meals, nominal)
+        
+        # Alimentos a evitar (por padrão, trocar os da refeição atual)
+        current_foods = [food.food_id for food in current_meal.foods]
+        excluded_ids = set(current_foods if exclude_foods is None else exclude_foods)
+        food_matrix = self._candidate_foods(catalog, algorithm_config.diet_preferences)
+        excluded = food_matrix.id_mask(excluded_ids)
+        
+        # Semente derivada do plano e da refeição atual: regenerações sucessivas variam
+        rng = seeded_rng(derived_hash(diet_plan.input_hash or "", meal_type.value, *sorted(current_foods)))
+        meal = self._generate_meal(
+            meal_type, target, food_matrix,
+            algorithm_config.diet_preferences, user_data, rng, excluded=excluded
+        )
+        
+        meals = list(diet_plan.meals)
+        meals[position] = meal
+        total_calories, total_protein, total_carbs, total_fat = self._calculate_totals(meals)
+        return diet_plan.model_copy(update={
+            "meals": meals,
+            "total_calories": total_calories,
+            "total_protein": total_protein,
+            "total_carbs": total_carbs,
+            "total_fat": total_fat,
+            "updated_at": datetime.utcnow()
+        })
+    
+    def _remaining_meal_target(
+        self,
+        diet_plan: DietPlan,
+        kept_meals: List[Meal],
+        nominal: NutritionalTarget
+    ) -> NutritionalTarget:
+        """Orçamento do dia que sobra para a refeição regenerada, limitado em torno da meta nominal"""
+        low, high = MEAL_REBALANCE_BOUNDS
+        kept_totals = self._calculate_totals(kept_meals)
+        daily_targets = (
+            diet_plan.target_calories, diet_plan.target_protein,
+            diet_plan.target_carbs, diet_plan.target_fat
+        )
+        nominal_values = (nominal.calories, nominal.protein, nominal.carbs, nominal.fat)
+        
+        calories, protein, carbs, fat = (
+            min(max(daily - kept, value * low), value * high)
+            for daily, kept, value in zip(daily_targets, kept_totals, nominal_values)
+        )
+        return NutritionalTarget(
+            calories=calories, protein=protein, carbs=carbs, fat=fat,
+            tolerance=nominal.tolerance
+        )
+    
+    def _build_diet_plan(
+        self,
+        user_id: str,
+        target_date: date,
+        algorithm_config: AlgorithmConfig,
+        meal_targets: Dict[MealType, NutritionalTarget],
+        food_matrix: FoodMatrix,
+        user_data: dict,
+        catalog_version: Optional[str] = None,
+        food_penalty: Optional[np.ndarray] = None,
+        week_start: Optional[date] = None
+    ) -> DietPlan:
+        """Monta as refeições e o plano de um dia a partir de dados já carregados"""
+        diet_preferences = algorithm_config.diet_preferences
+        
+        # RNG derivado das entradas: mesmas entradas geram o mesmo plano
+        input_hash = plan_input_hash("diet", user_id, target_date, algorithm_config, catalog_version)
+        if week_start is not None:
+            input_hash = week_input_hash(input_hash, week_start)
+        rng = seeded_rng(input_hash)
+        
+        meals = []
+        for meal_type, target in meal_targets.items():
+            meal = self._generate_meal(
+                meal_type, target, food_matrix, 
+                diet_preferences, user_data, rng, food_penalty
+            )
+            meals.append(meal)
+        
+        # Calcular totais do plano
+        total_calories, total_protein, total_carbs, total_fat = self._calculate_totals(meals)
+        
+        # Quantidades já otimizadas por refeição; apenas registrar desvios
+        if self._needs_adjustment(total_calories, algorithm_config.target_calories):
+            logger.warning("Plano fora da tolerância calórica",
+                          user_id=user_id,
+                          total_calories=total_calories,
+                          target_calories=algorithm_config.target_calories)
+        
+        return DietPlan(
+            user_id=user_id,
+            date=target_date,
+            goal=algorithm_config.goal,
+            target_calories=algorithm_config.target_calories,
+            target_protein=algorithm_config.target_protein,
+            target_carbs=algorithm_config.target_carbs,
+            target_fat=algorithm_config.target_fat,
+            meals=meals,
+            total_calories=total_calories,
+            total_protein=total_protein,
+            total_carbs=total_carbs,
+            total_fat=total_fat,
+            water_intake_ml=self._calculate_water_intake(algorithm_config),
+            notes=self._generate_diet_notes(algorithm_config, diet_preferences),
+            input_hash=recorded_input_hash(input_hash)
+        )
     
     def _calculate_meal_targets(self, config: AlgorithmConfig) -> Dict[MealType, NutritionalTarget]:
         """Calcula alvos nutricionais para cada refeição"""
@@ -171,153 +565,120 @@ class DietGenerator:
         
         return targets
     
-    async def _get_available_foods(self, preferences: DietPreferences) -> List[FoodCandidate]:
-        """Obtém alimentos disponíveis do Content Service usando adaptador TACO"""
+    def _candidate_foods(self, catalog: CatalogSnapshot, preferences: DietPreferences) -> FoodMatrix:
+        """Candidatos do catálogo TACO (colunas montadas uma vez por snapshot) permitidos pelas preferências"""
         try:
-            # Buscar todos os alimentos da Base TACO
-            foods_response = await self.content_service.search_foods("")
-            taco_foods = foods_response.get("data", [])
-            
-            logger.info("Alimentos obtidos da Base TACO", count=len(taco_foods))
-            
-            # Converter dados da TACO para formato esperado
-            converted_foods = self.taco_adapter.convert_foods_from_taco(taco_foods)
-            
-            candidates = []
-            for food in converted_foods:
-                # Filtrar por restrições dietéticas
-                if self._food_matches_restrictions(food, preferences):
-                    candidate = FoodCandidate(
-                        food_id=food["id"],
-                        name=food["name"],
-                        calories_per_100g=food["nutrition"]["calories"],
-                        protein_per_100g=food["nutrition"]["protein"],
-                        carbs_per_100g=food["nutrition"]["carbs"],
-                        fat_per_100g=food["nutrition"]["fat"],
-                        category=food.get("category", "outros"),
-                        preparation_time=food.get("preparation_time", 15),
-                        cost_level=food.get("cost_level", "medium"),
-                        availability_score=food.get("availability_score", 0.8),
-                        preference_score=self._calculate_preference_score(food, preferences)
-                    )
-                    candidates.append(candidate)
-            
-            # Ordenar por score de preferência
-            candidates.sort(key=lambda x: x.preference_score, reverse=True)
+            # Restrições compiladas uma vez e aplicadas ao catálogo inteiro via máscaras de bits
+            restriction_index = catalog.restriction_index
+            restrictions = restriction_index.compile(preferences)
+            allowed = restriction_index.allowed_mask(restrictions)
+            
+            # Por plano, apenas o vetor de preferência e a indexação pelos permitidos
+            preference = self._preference_scores(catalog, preferences, restrictions)
+            food_matrix = catalog.food_columns.candidates(allowed, preference)
             
             logger.info("Alimentos disponíveis processados", 
-                       taco_count=len(taco_foods),
-                       converted_count=len(converted_foods),
-                       candidates_count=len(candidates))
-            return candidates
+                       catalog_version=catalog.version,
+                       catalog_count=len(catalog),
+                       candidates_count=len(food_matrix))
+            return food_matrix
             
         except Exception as e:
             logger.error("Erro ao obter alimentos da Base TACO", error=str(e))
             raise
     
-    def _food_matches_restrictions(self, food: dict, preferences: DietPreferences) -> bool:
-        """Verifica se o alimento atende às restrições dietéticas"""
-        # Verificar alergias
-        for allergy in preferences.allergies:
-            if allergy.lower() in food.get("allergens", []):
-                return False
-        
-        # Verificar restrições dietéticas
-        food_tags = food.get("dietary_tags", [])
-        for restriction in preferences.dietary_restrictions:
-            if restriction == "vegetarian" and "meat" in food_tags:
-                return False
-            elif restriction == "vegan" and ("meat" in food_tags or "dairy" in food_tags):
-                return False
-            elif restriction == "gluten_free" and "gluten" in food_tags:
-                return False
-            elif restriction == "lactose_free" and "lactose" in food_tags:
-                return False
-        
-        # Verificar alimentos não desejados
-        if food["name"].lower() in [disliked.lower() for disliked in preferences.disliked_foods]:
-            return False
-        
-        return True
-    
-    def _calculate_preference_score(self, food: dict, preferences: DietPreferences) -> float:
-        """Calcula score de preferência para um alimento"""
-        score = 0.5  # Score base
+    def _preference_scores(
+        self,
+        catalog: CatalogSnapshot,
+        preferences: DietPreferences,
+        restrictions: CompiledRestrictions
+    ) -> np.ndarray:
+        """Score de preferência de cada alimento do catálogo"""
+        columns = catalog.food_columns
+        score = np.full(len(columns), 0.5)  # Score base
         
         # Bonus por alimentos preferidos
-        if food["name"].lower() in [preferred.lower() for preferred in preferences.preferred_foods]:
-            score += 0.3
+        score[catalog.restriction_index.name_mask(restrictions.preferred_names)] += 0.3
         
         # Bonus por tempo de preparo
-        prep_time = food.get("preparation_time", 15)
-        if preferences.cooking_time_preference == "quick" and prep_time <= 15:
-            score += 0.1
-        elif preferences.cooking_time_preference == "medium" and 15 < prep_time <= 45:
-            score += 0.1
-        elif preferences.cooking_time_preference == "elaborate" and prep_time > 45:
-            score += 0.1
+        prep_time = columns.preparation_time
+        if preferences.cooking_time_preference == "quick":
+            score[prep_time <= 15] += 0.1
+        elif preferences.cooking_time_preference == "medium":
+            score[(prep_time > 15) & (prep_time <= 45)] += 0.1
+        elif preferences.cooking_time_preference == "elaborate":
+            score[prep_time > 45] += 0.1
         
         # Bonus por nível de custo
-        cost_level = food.get("cost_level", "medium")
-        if cost_level == preferences.budget_level:
-            score += 0.1
+        score[columns.cost_levels == preferences.budget_level] += 0.1
         
         # Penalty por baixa disponibilidade
-        availability = food.get("availability_score", 0.8)
-        score *= availability
+        score *= columns.availability
         
-        return min(score, 1.0)
+        return np.minimum(score, 1.0)
     
-    async def _generate_meal(
+    def _generate_meal(
         self, 
         meal_type: MealType, 
         target: NutritionalTarget,
-        available_foods: List[FoodCandidate],
+        food_matrix: FoodMatrix,
         preferences: DietPreferences,
-        user_data: dict
+        user_data: dict,
+        rng: random.Random,
+        food_penalty: Optional[np.ndarray] = None,
+        excluded: Optional[np.ndarray] = None
     ) -> Meal:
         """Gera uma refeição específica"""
         
         # Filtrar alimentos apropriados para esta refeição
-        suitable_foods = self._filter_foods_for_meal(meal_type, available_foods)
+        suitable = food_matrix.meal_mask(meal_type)
+        if excluded is not None:
+            suitable = suitable & ~excluded
         
-        # Algoritmo de montagem da refeição
-        # 1. Priorizar proteína
-        protein_foods = [f for f in suitable_foods if f.protein_per_100g >= 15]
-        selected_foods = []
+        # Algoritmo de montagem da refeição (índices na matriz de alimentos)
+        selected: List[int] = []
         
-        # Selecionar fonte principal de proteína
-        if protein_foods:
-            protein_source = self._select_food_by_priority(protein_foods, target.protein, "protein")
-            if protein_source:
-                selected_foods.append(protein_source)
+        def remaining_mask(nutrient_mask):
+            mask = suitable & nutrient_mask
+            mask[selected] = False
+            return mask
+        
+        # 1. Priorizar proteína - selecionar fonte principal
+        protein_source = food_matrix.select_by_priority(
+            remaining_mask(food_matrix.protein >= 15), target.protein, "protein", food_penalty, rng
+        )
+        if protein_source is not None:
+            selected.append(protein_source)
         
         # 2. Adicionar carboidratos
-        remaining_carbs = target.carbs - sum(f.carbs for f in selected_foods)
+        remaining_carbs = target.carbs - food_matrix.carbs[selected].sum()
         if remaining_carbs > 5:  # Se ainda precisamos de carboidratos significativos
-            carb_foods = [f for f in suitable_foods if f.carbs_per_100g >= 20 and f not in selected_foods]
-            carb_source = self._select_food_by_priority(carb_foods, remaining_carbs, "carbs")
-            if carb_source:
-                selected_foods.append(carb_source)
+            carb_source = food_matrix.select_by_priority(
+                remaining_mask(food_matrix.carbs >= 20), remaining_carbs, "carbs", food_penalty, rng
+            )
+            if carb_source is not None:
+                selected.append(carb_source)
         
         # 3. Adicionar gorduras
-        remaining_fat = target.fat - sum(f.fat for f in selected_foods)
+        remaining_fat = target.fat - food_matrix.fat[selected].sum()
         if remaining_fat > 2:  # Se ainda precisamos de gorduras
-            fat_foods = [f for f in suitable_foods if f.fat_per_100g >= 10 and f not in selected_foods]
-            fat_source = self._select_food_by_priority(fat_foods, remaining_fat, "fat")
-            if fat_source:
-                selected_foods.append(fat_source)
+            fat_source = food_matrix.select_by_priority(
+                remaining_mask(food_matrix.fat >= 10), remaining_fat, "fat", food_penalty, rng
+            )
+            if fat_source is not None:
+                selected.append(fat_source)
         
         # 4. Completar com alimentos complementares
-        remaining_calories = target.calories - sum(f.calories_per_100g for f in selected_foods)
+        remaining_calories = target.calories - food_matrix.calories[selected].sum()
         if remaining_calories > 50:
-            complementary_foods = [f for f in suitable_foods if f not in selected_foods]
-            complement = self._select_food_by_priority(complementary_foods, remaining_calories, "calories")
-            if complement:
-                selected_foods.append(complement)
+            complement = food_matrix.select_by_priority(
+                remaining_mask(True), remaining_calories, "calories", food_penalty, rng
+            )
+            if complement is not None:
+                selected.append(complement)
         
         # Calcular quantidades otimizadas
-        food_items = self._optimize_quantities(selected_foods, target)
+        food_items = self._optimize_quantities(food_matrix, selected, target)
         
         # Calcular totais da refeição
         total_calories = sum(item.calories for item in food_items)
@@ -338,124 +699,51 @@ class DietGenerator:
             total_protein=total_protein,
             total_carbs=total_carbs,
             total_fat=total_fat,
-            preparation_time=max(food.preparation_time for food in selected_foods) if selected_foods else 15,
+            preparation_time=int(food_matrix.preparation_time[selected].max()) if selected else 15,
             instructions=instructions,
             tips=tips
         )
     
-    def _filter_foods_for_meal(self, meal_type: MealType, foods: List[FoodCandidate]) -> List[FoodCandidate]:
-        """Filtra alimentos apropriados para um tipo de refeição"""
-        meal_categories = {
-            MealType.CAFE_DA_MANHA: ["frutas", "cereais", "laticínios", "ovos", "pães"],
-            MealType.LANCHE_MANHA: ["frutas", "oleaginosas", "laticínios", "barras"],
-            MealType.ALMOCO: ["carnes", "peixes", "cereais", "vegetais", "leguminosas"],
-            MealType.LANCHE_TARDE: ["frutas", "oleaginosas", "laticínios", "barras"],
-            MealType.JANTAR: ["carnes", "peixes", "vegetais", "leguminosas", "cereais"],
-            MealType.CEIA: ["laticínios", "oleaginosas", "proteínas"]
-        }
-        
-        appropriate_categories = meal_categories.get(meal_type, [])
-        
-        return [
-            food for food in foods 
-            if food.category in appropriate_categories or "universal" in food.category
-        ]
-    
-    def _select_food_by_priority(
-        self, 
-        foods: List[FoodCandidate], 
-        target_amount: float, 
-        nutrient: str
-    ) -> Optional[FoodCandidate]:
-        """Seleciona alimento baseado na prioridade e adequação nutricional"""
-        if not foods:
-            return None
-        
-        # Calcular score para cada alimento
-        scored_foods = []
-        for food in foods:
-            nutrient_per_100g = getattr(food, f"{nutrient}_per_100g")
-            
-            # Score baseado na adequação nutricional
-            adequacy_score = min(nutrient_per_100g / max(target_amount, 1), 2.0)
-            
-            # Score final combina adequação e preferência
-            final_score = (adequacy_score * 0.7) + (food.preference_score * 0.3)
-            
-            scored_foods.append((food, final_score))
-        
-        # Ordenar por score e adicionar aleatoriedade para variedade
-        scored_foods.sort(key=lambda x: x[1], reverse=True)
-        
-        # Selecionar entre os top 3 para adicionar variedade
-        top_foods = scored_foods[:3]
-        weights = [food[1] for food in top_foods]
-        
-        if weights:
-            selected = random.choices(top_foods, weights=weights, k=1)[0]
-            return selected[0]
-        
-        return None
-    
     def _optimize_quantities(
         self, 
-        selected_foods: List[FoodCandidate], 
+        food_matrix: FoodMatrix, 
+        selected: List[int],
         target: NutritionalTarget
     ) -> List[FoodItem]:
-        """Otimiza as quantidades dos alimentos selecionados"""
-        if not selected_foods:
+        """Otimiza as quantidades dos alimentos selecionados para os alvos da refeição"""
+        if not selected:
             return []
         
-        food_items = []
+        selected_foods = [food_matrix.food(index) for index in selected]
+        macros = food_matrix.macros[selected]
         
-        # Algoritmo simples de otimização
-        # Para cada alimento, calcular quantidade baseada na contribuição proporcional
-        total_priority_score = sum(food.preference_score for food in selected_foods)
+        quantities = self.quantity_optimizer.optimize(
+            macros,
+            [food_matrix.category(index) for index in selected],
+            (target.calories, target.protein, target.carbs, target.fat),
+            target.tolerance
+        )
         
-        for food in selected_foods:
-            # Calcular contribuição proporcional baseada no score
-            proportion = food.preference_score / total_priority_score if total_priority_score > 0 else 1.0 / len(selected_foods)
-            
-            # Calcular quantidade inicial baseada nas calorias alvo
-            target_calories_for_food = target.calories * proportion
-            quantity_grams = (target_calories_for_food / food.calories_per_100g) * 100
-            
-            # Ajustar para quantidades práticas
-            quantity_grams = self._round_to_practical_quantity(quantity_grams, food.category)
-            
+        food_items = []
+        for food, food_macros, quantity_grams in zip(selected_foods, macros.tolist(), quantities.tolist()):
             # Calcular valores nutricionais finais
-            multiplier = quantity_grams / 100
+            calories, protein, carbs, fat = [value * quantity_grams / 100 for value in food_macros]
             
             food_item = FoodItem(
-                food_id=food.food_id,
-                name=food.name,
+                food_id=food["id"],
+                name=food["name"],
                 quantity=quantity_grams,
                 unit="gramas",
-                calories=food.calories_per_100g * multiplier,
-                protein=food.protein_per_100g * multiplier,
-                carbs=food.carbs_per_100g * multiplier,
-                fat=food.fat_per_100g * multiplier
+                calories=calories,
+                protein=protein,
+                carbs=carbs,
+                fat=fat
             )
             
             food_items.append(food_item)
         
         return food_items
     
-    def _round_to_practical_quantity(self, quantity: float, category: str) -> float:
-        """Arredonda para quantidades práticas baseadas na categoria"""
-        practical_rounds = {
-            "frutas": 50,      # Múltiplos de 50g
-            "vegetais": 50,    # Múltiplos de 50g
-            "carnes": 25,      # Múltiplos de 25g
-            "cereais": 25,     # Múltiplos de 25g
-            "laticínios": 50,  # Múltiplos de 50g
-            "oleaginosas": 10, # Múltiplos de 10g
-            "default": 25      # Padrão
-        }
-        
-        round_to = practical_rounds.get(category, practical_rounds["default"])
-        return round(quantity / round_to) * round_to
-    
     def _calculate_totals(self, meals: List[Meal]) -> Tuple[float, float, float, float]:
         """Calcula totais nutricionais do plano"""
         total_calories = sum(meal.total_calories for meal in meals)
@@ -471,83 +759,59 @@ class DietGenerator:
         difference = abs(actual_calories - target_calories) / target_calories
         return difference > tolerance
     
-    async def _adjust_plan(
-        self, 
-        meals: List[Meal], 
-        config: AlgorithmConfig,
-        available_foods: List[FoodCandidate]
-    ) -> List[Meal]:
-        """Ajusta o plano para atingir os alvos nutricionais"""
-        # Implementação simplificada - ajustar quantidades proporcionalmente
-        current_calories = sum(meal.total_calories for meal in meals)
-        target_calories = config.target_calories
-        
-        adjustment_factor = target_calories / current_calories if current_calories > 0 else 1.0
-        
-        adjusted_meals = []
-        for meal in meals:
-            adjusted_foods = []
-            for food in meal.foods:
-                # Ajustar quantidade
-                new_quantity = food.quantity * adjustment_factor
-                new_quantity = self._round_to_practical_quantity(new_quantity, "default")
-                
-                # Recalcular valores nutricionais
-                multiplier = new_quantity / 100
-                adjusted_food = FoodItem(
-                    food_id=food.food_id,
-                    name=food.name,
-                    quantity=new_quantity,
-                    unit=food.unit,
-                    calories=food.calories * adjustment_factor,
-                    protein=food.protein * adjustment_factor,
-                    carbs=food.carbs * adjustment_factor,
-                    fat=food.fat * adjustment_factor
-                )
-                adjusted_foods.append(adjusted_food)
-            
-            # Recalcular totais da refeição
-            total_calories = sum(item.calories for item in adjusted_foods)
-            total_protein = sum(item.protein for item in adjusted_foods)
-            total_carbs = sum(item.carbs for item in adjusted_foods)
-            total_fat = sum(item.fat for item in adjusted_foods)
-            
-            adjusted_meal = Meal(
-                meal_type=meal.meal_type,
-                name=meal.name,
-                time_suggestion=meal.time_suggestion,
-                foods=adjusted_foods,
-                total_calories=total_calories,
-                total_protein=total_protein,
-                total_carbs=total_carbs,
-                total_fat=total_fat,
-                preparation_time=meal.preparation_time,
-                instructions=meal.instructions,
-                tips=meal.tips
-            )
-            adjusted_meals.append(adjusted_meal)
-        
-        return adjusted_meals
-    
     # Métodos auxiliares
     
-    async def _get_existing_plan(self, user_id: str, target_date: date) -> Optional[DietPlan]:
-        """Busca plano existente no Firestore"""
+    async def _get_existing_plan(self, user_id: str, target_date: date) -> Optional[StoredPlan]:
+        """Busca plano existente no Firestore (corpo decodificado apenas se reutilizado)"""
         try:
             doc_ref = self.firebase_service.db.collection("diet_plans").document(f"{user_id}_{target_date}")
             doc = await doc_ref.get()
             
             if doc.exists:
-                data = doc.to_dict()
-                return DietPlan(**data)
+                return StoredPlan("diet", doc.to_dict())
             
             return None
         except Exception as e:
             logger.error("Erro ao buscar plano existente", error=str(e))
             return None
     
-    def _should_regenerate_plan(self, existing_plan: DietPlan, config: AlgorithmConfig) -> bool:
+    async def _get_existing_plans(self, user_id: str, dates: List[date]) -> Dict[date, DietPlan]:
+        """Busca planos existentes de várias datas em uma única leitura"""
+        try:
+            collection = self.firebase_service.db.collection("diet_plans")
+            doc_refs = [collection.document(f"{user_id}_{target_date}") for target_date in dates]
+            
+            plans = {}
+            async for doc in self.firebase_service.db.get_all(doc_refs):
+                if doc.exists:
+                    try:
+                        plan = StoredPlan("diet", doc.to_dict()).load()
+                    except PlanCodecError as e:
+                        logger.warning("Plano existente ignorado", doc_id=doc.id, error=str(e))
+                        continue
+                    plans[plan.date] = plan
+            
+            return plans
+        except Exception as e:
+            logger.error("Erro ao buscar planos existentes", user_id=user_id, error=str(e))
+            return {}
+    
+    def _should_regenerate_plan(
+        self,
+        existing_plan: DietPlan,
+        config: AlgorithmConfig,
+        input_hash: Optional[str] = None
+    ) -> bool:
         """Verifica se deve regenerar um plano existente"""
+        # Planos com hash de entrada só são regenerados se as entradas mudaram
+        # (inclusive dias gerados dentro de qualquer semana que contenha a data)
+        if existing_plan.input_hash and input_hash:
+            if existing_plan.input_hash == input_hash:
+                return False
+            return existing_plan.input_hash not in {
+                week_input_hash(input_hash, existing_plan.date - timedelta(days=offset)) for offset in range(7)
+            }
+        
         # Regenerar se as metas calóricas mudaram significativamente
         calorie_difference = abs(existing_plan.target_calories - config.target_calories)
         if calorie_difference > 100:  # Diferença maior que 100 calorias
@@ -645,52 +909,12 @@ class DietGenerator:
             return "Siga as instruções de preparo de cada alimento."
         
         # Instruções básicas baseadas no tipo de refeição
-        instructions = {
-            MealType.CAFE_DA_MANHA: "Prepare os alimentos frescos. Consuma logo após o preparo.",
-            MealType.LANCHE_MANHA: "Pode ser preparado com antecedência. Mantenha refrigerado se necessário.",
-            MealType.ALMOCO: "Cozinhe os alimentos adequadamente. Tempere a gosto.",
-            MealType.LANCHE_TARDE: "Prepare na hora do consumo para manter a qualidade.",
-            MealType.JANTAR: "Prefira preparações mais leves. Evite frituras.",
-            MealType.CEIA: "Opte por alimentos de fácil digestão."
-        }
-        
-        return instructions.get(meal_type, "Siga as instruções de preparo adequadas.")
+        return self.templates.meal_instructions.get(meal_type, "Siga as instruções de preparo adequadas.")
     
     def _generate_meal_tips(self, meal_type: MealType, target: NutritionalTarget, user_data: dict) -> List[str]:
         """Gera dicas personalizadas para a refeição"""
-        tips = []
-        
         # Dicas baseadas no tipo de refeição
-        meal_tips = {
-            MealType.CAFE_DA_MANHA: [
-                "Inclua proteína para manter a saciedade",
-                "Hidrate-se bem ao acordar"
-            ],
-            MealType.LANCHE_MANHA: [
-                "Combine proteína com carboidrato",
-                "Mantenha porções moderadas"
-            ],
-            MealType.ALMOCO: [
-                "Mastigue bem os alimentos",
-                "Inclua vegetais para fibras"
-            ],
-            MealType.LANCHE_TARDE: [
-                "Evite açúcares simples em excesso",
-                "Prefira alimentos naturais"
-            ],
-            MealType.JANTAR: [
-                "Evite refeições muito pesadas",
-                "Jante pelo menos 2h antes de dormir"
-            ],
-            MealType.CEIA: [
-                "Opte por proteínas de digestão lenta",
-                "Mantenha porções pequenas"
-            ]
-        }
-        
-        tips.extend(meal_tips.get(meal_type, []))
-        
-        return tips[:2]  # Máximo 2 dicas por refeição
+        return list(self.templates.meal_tips.get(meal_type, ())[:2])  # Máximo 2 dicas por refeição
     
     async def _save_diet_plan(self, diet_plan: DietPlan):
         """Salva o plano de dieta no Firestore"""
@@ -698,16 +922,57 @@ class DietGenerator:
             doc_id = f"{diet_plan.user_id}_{diet_plan.date}"
             doc_ref = self.firebase_service.db.collection("diet_plans").document(doc_id)
             
-            # Converter para dict
-            plan_data = diet_plan.dict()
-            plan_data["created_at"] = datetime.utcnow()
-            plan_data["updated_at"] = datetime.utcnow()
-            
-            await doc_ref.set(plan_data)
+            await doc_ref.set(self.plan_document(diet_plan))
+            await mark_presentation_inputs_changed(self.firebase_service.db, diet_plan.user_id, PLAN_SECTIONS)
             
             logger.info("Plano de dieta salvo", user_id=diet_plan.user_id, date=diet_plan.date)
             
         except Exception as e:
             logger.error("Erro ao salvar plano de dieta", error=str(e))
             raise
-
+    
+    async def _save_diet_plans_batch(self, diet_plans: List[DietPlan]):
+        """Salva vários planos de dieta em um único batch do Firestore"""
+        try:
+            collection = self.firebase_service.db.collection("diet_plans")
+            batch = self.firebase_service.db.batch()
+            
+            for diet_plan in diet_plans:
+                doc_ref = collection.document(f"{diet_plan.user_id}_{diet_plan.date}")
+                batch.set(doc_ref, self.plan_document(diet_plan))
+            
+            inputs_ref = self.firebase_service.db.collection(PRESENTATION_INPUTS_COLLECTION).document(diet_plans[0].user_id)
+            batch.set(inputs_ref, section_tokens(PLAN_SECTIONS), merge=True)
+            
+            await batch.commit()
+            
+            logger.info("Planos de dieta salvos em batch", 
+                       user_id=diet_plans[0].user_id, count=len(diet_plans))
+            
+        except Exception as e:
+            logger.error("Erro ao salvar planos de dieta em batch", error=str(e))
+            raise
+    
+    async def _update_diet_meals(self, diet_plan: DietPlan, compact: bool):
+        """Grava apenas refeições e totais do plano (update parcial, no formato do documento)"""
+        try:
+            doc_ref = self.firebase_service.db.collection("diet_plans").document(f"{diet_plan.user_id}_{diet_plan.date}")
+            
+            fields = encode_plan_update("diet", diet_plan, MEAL_UPDATE_FIELDS, compact)
+            fields["updated_at"] = diet_plan.updated_at
+            
+            await doc_ref.update(fields)
+            await mark_presentation_inputs_changed(self.firebase_service.db, diet_plan.user_id, PLAN_SECTIONS)
+            
+            logger.info("Refeições do plano atualizadas", user_id=diet_plan.user_id, date=diet_plan.date)
+            
+        except Exception as e:
+            logger.error("Erro ao atualizar refeições do plano", error=str(e))
+            raise
+    
+    def plan_document(self, diet_plan: DietPlan) -> dict:
+        """Converte o plano no documento gravado no Firestore"""
+        plan_data = encode_plan_document("diet", diet_plan)
+        plan_data["created_at"] = datetime.utcnow()
+        plan_data["updated_at"] = datetime.utcnow()
+        return plan_data
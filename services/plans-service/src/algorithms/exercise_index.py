@@ -0,0 +1,95 @@
+"""
+Índice de exercícios por padrão de movimento, grupo muscular e dificuldade
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from models.plan import DifficultyLevel
+
+# Ordem dos níveis de dificuldade
+DIFFICULTY_ORDER: Dict[DifficultyLevel, int] = {
+    DifficultyLevel.BEGINNER: 0,
+    DifficultyLevel.INTERMEDIATE: 1,
+    DifficultyLevel.ADVANCED: 2,
+    DifficultyLevel.EXPERT: 3
+}
+
+
+def allowed_difficulties(user_level: DifficultyLevel) -> Tuple[DifficultyLevel, ...]:
+    """Dificuldades apropriadas para o usuário (até 1 nível acima do seu)"""
+    max_level = DIFFICULTY_ORDER[user_level] + 1
+    return tuple(level for level, order in DIFFICULTY_ORDER.items() if order <= max_level)
+
+
+class ExerciseIndex:
+    """
+    Candidatos a exercício agrupados por (padrão de movimento, músculo, dificuldade)
+
+    Cada grupo é mantido ordenado por ``effectiveness_rating * safety_rating``
+    (decrescente, preservando a ordem original em empates), de forma que o
+    preenchimento de um slot consulta apenas os grupos relevantes e percorre
+    cada um até o primeiro exercício ainda não usado.
+    """
+
+    def __init__(self, candidates: Sequence):
+        self.size = len(candidates)
+        self.movement_patterns: Set[str] = set()
+
+        buckets: Dict[Tuple[str, str, DifficultyLevel], List[Tuple[float, int, object]]] = defaultdict(list)
+        for position, exercise in enumerate(candidates):
+            rank = -(exercise.effectiveness_rating * exercise.safety_rating)
+            self.movement_patterns.add(exercise.movement_pattern)
+            for muscle in set(exercise.muscle_groups):
+                buckets[(exercise.movement_pattern, muscle, exercise.difficulty)].append(
+                    (rank, position, exercise)
+                )
+
+        for bucket in buckets.values():
+            bucket.sort(key=lambda entry: (entry[0], entry[1]))
+        self._buckets = dict(buckets)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def best_for_slot(
+        self,
+        movement_type: str,
+        muscle_groups: Iterable[str],
+        user_level: DifficultyLevel,
+        used_exercises: Set[str]
+    ):
+        """
+        Melhor exercício ainda não usado para um slot
+
+        Args:
+            movement_type: Padrão de movimento do slot ("any" aceita todos)
+            muscle_groups: Grupos musculares aceitos pelo slot
+            user_level: Nível de experiência do usuário
+            used_exercises: IDs de exercícios já usados na sessão
+
+        Returns:
+            Optional[ExerciseCandidate]: Exercício de maior score ou None
+        """
+        patterns = self.movement_patterns if movement_type == "any" else (movement_type,)
+        difficulties = allowed_difficulties(user_level)
+
+        best: Optional[Tuple[float, int, object]] = None
+        for pattern in patterns:
+            for muscle in muscle_groups:
+                for difficulty in difficulties:
+                    head = self._first_unused(self._buckets.get((pattern, muscle, difficulty)), used_exercises)
+                    if head is not None and (best is None or head[:2] < best[:2]):
+                        best = head
+
+        return best[2] if best else None
+
+    @staticmethod
+    def _first_unused(bucket: Optional[List[Tuple[float, int, object]]], used_exercises: Set[str]):
+        """Primeiro exercício do grupo que ainda não foi usado"""
+        if not bucket:
+            return None
+        for entry in bucket:
+            if entry[2].exercise_id not in used_exercises:
+                return entry
+        return None
@@ -0,0 +1,209 @@
+"""
+Matriz colunar de alimentos para montagem vetorizada de refeições
+"""
+
+import random
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from models.plan import MealType
+
+# Categorias apropriadas para cada tipo de refeição
+MEAL_CATEGORIES: Dict[MealType, List[str]] = {
+    MealType.CAFE_DA_MANHA: ["frutas", "cereais", "laticínios", "ovos", "pães"],
+    MealType.LANCHE_MANHA: ["frutas", "oleaginosas", "laticínios", "barras"],
+    MealType.ALMOCO: ["carnes", "peixes", "cereais", "vegetais", "leguminosas"],
+    MealType.LANCHE_TARDE: ["frutas", "oleaginosas", "laticínios", "barras"],
+    MealType.JANTAR: ["carnes", "peixes", "vegetais", "leguminosas", "cereais"],
+    MealType.CEIA: ["laticínios", "oleaginosas", "proteínas"]
+}
+
+# Quantidade de finalistas sorteados na seleção por prioridade
+TOP_K_SELECTION = 3
+
+
+class FoodColumns:
+    """
+    Colunas do catálogo de alimentos inteiro, construídas uma vez por snapshot
+
+    Cada nutriente (por 100g), tempo de preparo, nível de custo e
+    disponibilidade é um array NumPy alinhado com ``foods``; as máscaras de
+    categoria por refeição são memoizadas aqui e compartilhadas por todos os
+    planos gerados a partir do mesmo snapshot.
+    """
+
+    def __init__(self, foods: Sequence[Mapping[str, Any]]):
+        self.foods = tuple(foods)
+        self.size = len(self.foods)
+
+        nutrition = [food["nutrition"] for food in self.foods]
+        self.calories = self._column((n["calories"] for n in nutrition), np.float64)
+        self.protein = self._column((n["protein"] for n in nutrition), np.float64)
+        self.carbs = self._column((n["carbs"] for n in nutrition), np.float64)
+        self.fat = self._column((n["fat"] for n in nutrition), np.float64)
+        self.preparation_time = self._column((f.get("preparation_time", 15) for f in self.foods), np.int64)
+        self.availability = self._column((f.get("availability_score", 0.8) for f in self.foods), np.float64)
+        self.cost_levels = np.array([f.get("cost_level", "medium") for f in self.foods], dtype=object)
+        self.cost_levels.setflags(write=False)
+
+        # Categorias codificadas como inteiros para comparação vetorizada
+        self.categories = tuple(food.get("category", "outros") for food in self.foods)
+        self.category_names = sorted(set(self.categories))
+        self._category_index = {name: code for code, name in enumerate(self.category_names)}
+        self.category_codes = self._column((self._category_index[name] for name in self.categories), np.int64)
+        self._universal = np.array(["universal" in name for name in self.category_names], dtype=bool)
+
+        self._id_positions = {food["id"]: position for position, food in enumerate(self.foods)}
+        self._meal_masks: Dict[MealType, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _column(self, values: Iterable, dtype) -> np.ndarray:
+        column = np.fromiter(values, dtype=dtype, count=self.size)
+        column.setflags(write=False)
+        return column
+
+    def id_mask(self, food_ids: Iterable[str]) -> np.ndarray:
+        """Máscara dos alimentos do catálogo com os IDs informados"""
+        mask = np.zeros(self.size, dtype=bool)
+        positions = [self._id_positions[food_id] for food_id in food_ids if food_id in self._id_positions]
+        mask[positions] = True
+        return mask
+
+    def position(self, food_id: str) -> Optional[int]:
+        """Posição de um alimento no catálogo (None se ausente)"""
+        return self._id_positions.get(food_id)
+
+    def meal_mask(self, meal_type: MealType) -> np.ndarray:
+        """Máscara dos alimentos apropriados para um tipo de refeição (memoizada)"""
+        mask = self._meal_masks.get(meal_type)
+        if mask is None:
+            allowed = self._universal.copy()
+            for category in MEAL_CATEGORIES.get(meal_type, []):
+                code = self._category_index.get(category)
+                if code is not None:
+                    allowed[code] = True
+            mask = allowed[self.category_codes] if self.size else np.zeros(0, dtype=bool)
+            mask.setflags(write=False)
+            self._meal_masks[meal_type] = mask
+        return mask
+
+    def candidates(self, allowed: np.ndarray, preference: np.ndarray) -> "FoodMatrix":
+        """
+        Candidatos de um plano: alimentos permitidos, ordenados por preferência
+
+        Args:
+            allowed: Máscara dos alimentos permitidos (tamanho do catálogo)
+            preference: Score de preferência de cada alimento do catálogo
+
+        Returns:
+            FoodMatrix: Visão das colunas restrita aos candidatos
+        """
+        positions = np.flatnonzero(allowed)
+        positions = positions[np.argsort(-preference[positions], kind="stable")]
+        return FoodMatrix(self, positions, preference[positions])
+
+
+class FoodMatrix:
+    """
+    Representação colunar dos candidatos a alimento de um plano
+
+    Visão de ``FoodColumns`` restrita às posições permitidas pelas
+    preferências do usuário: filtros por refeição, cálculo de adequação e
+    seleção top-k são operações vetorizadas, e montar a visão custa apenas
+    indexação NumPy, sem percorrer o catálogo em Python.
+    """
+
+    def __init__(self, columns: FoodColumns, positions: np.ndarray, preference: np.ndarray):
+        self.columns = columns
+        self.positions = positions
+        self.size = len(positions)
+
+        self.calories = columns.calories[positions]
+        self.protein = columns.protein[positions]
+        self.carbs = columns.carbs[positions]
+        self.fat = columns.fat[positions]
+        self.preference = preference
+        self.preparation_time = columns.preparation_time[positions]
+
+        # Vetores de macronutrientes (calorias, proteína, carboidratos, gordura) por alimento
+        self.macros = np.column_stack((self.calories, self.protein, self.carbs, self.fat))
+
+        self._meal_masks: Dict[MealType, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def column(self, nutrient: str) -> np.ndarray:
+        """Retorna a coluna de um nutriente (calories, protein, carbs, fat)"""
+        return getattr(self, nutrient)
+
+    def food(self, index: int) -> Mapping[str, Any]:
+        """Alimento do catálogo no índice da matriz"""
+        return self.columns.foods[self.positions[index]]
+
+    def category(self, index: int) -> str:
+        """Categoria do alimento no índice da matriz"""
+        return self.columns.categories[self.positions[index]]
+
+    def id_mask(self, food_ids: Iterable[str]) -> np.ndarray:
+        """Máscara dos candidatos com os IDs informados"""
+        return self.columns.id_mask(food_ids)[self.positions]
+
+    def meal_mask(self, meal_type: MealType) -> np.ndarray:
+        """Máscara dos candidatos apropriados para um tipo de refeição (memoizada)"""
+        mask = self._meal_masks.get(meal_type)
+        if mask is None:
+            mask = self.columns.meal_mask(meal_type)[self.positions]
+            mask.setflags(write=False)
+            self._meal_masks[meal_type] = mask
+        return mask
+
+    def select_by_priority(
+        self,
+        mask: np.ndarray,
+        target_amount: float,
+        nutrient: str,
+        penalty: Optional[np.ndarray] = None,
+        rng: Optional[random.Random] = None
+    ) -> Optional[int]:
+        """
+        Seleciona o índice de um alimento baseado na prioridade e adequação nutricional
+
+        Args:
+            mask: Máscara booleana dos alimentos elegíveis
+            target_amount: Quantidade alvo do nutriente
+            nutrient: Nutriente usado no cálculo de adequação
+            penalty: Penalidade por alimento subtraída do score (ex.: repetição na semana)
+            rng: Gerador aleatório do plano (semeado no modo determinístico)
+
+        Returns:
+            Optional[int]: Índice do alimento na matriz ou None se não houver elegíveis
+        """
+        eligible = np.flatnonzero(mask)
+        if eligible.size == 0:
+            return None
+
+        # Score de adequação nutricional combinado com preferência
+        adequacy = np.minimum(self.column(nutrient)[eligible] / max(target_amount, 1), 2.0)
+        scores = adequacy * 0.7 + self.preference[eligible] * 0.3
+        if penalty is not None:
+            scores = np.maximum(scores - penalty[eligible], 0.0)
+
+        # Top-k sem ordenar o catálogo inteiro
+        k = min(TOP_K_SELECTION, eligible.size)
+        if eligible.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+        else:
+            top = np.argsort(-scores, kind="stable")
+
+        # Sortear entre os finalistas para adicionar variedade
+        weights = scores[top].tolist()
+        if sum(weights) <= 0:
+            return int(eligible[top[0]])
+
+        choice = (rng or random).choices(range(len(weights)), weights=weights, k=1)[0]
+        return int(eligible[top[choice]])
@@ -0,0 +1,257 @@
+"""
+Otimizador de quantidades de alimentos por mínimos quadrados limitados
+"""
+
+from operator import mul
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Múltiplos práticos de porção (gramas) por categoria
+PRACTICAL_ROUNDS: Dict[str, int] = {
+    "frutas": 50,      # Múltiplos de 50g
+    "vegetais": 50,    # Múltiplos de 50g
+    "carnes": 25,      # Múltiplos de 25g
+    "cereais": 25,     # Múltiplos de 25g
+    "laticínios": 50,  # Múltiplos de 50g
+    "oleaginosas": 10, # Múltiplos de 10g
+    "default": 25      # Padrão
+}
+
+# Peso de cada alvo (calorias, proteína, carboidratos, gordura) no ajuste
+DEFAULT_MACRO_WEIGHTS = (3.0, 1.0, 0.5, 0.5)
+
+# Porção máxima de um único alimento em uma refeição (gramas)
+MAX_PORTION_GRAMS = 400
+
+# Limite de passos da correção gulosa após o arredondamento
+MAX_ROUNDING_STEPS = 12
+
+
+def practical_step(category: str) -> int:
+    """Múltiplo prático de porção para uma categoria"""
+    return PRACTICAL_ROUNDS.get(category, PRACTICAL_ROUNDS["default"])
+
+
+class QuantityOptimizer:
+    """
+    Ajusta as quantidades dos alimentos de uma refeição aos quatro alvos nutricionais
+
+    Resolve ``min ||W (A x - b) / b||²`` com ``x`` limitado entre uma porção
+    prática e ``MAX_PORTION_GRAMS``, onde as colunas de ``A`` são os vetores
+    de macronutrientes (por 100g) dos alimentos selecionados. Uma refeição tem
+    no máximo quatro alimentos, então o sistema 4 x k é resolvido em forma
+    fechada pelas equações normais (k x k) com conjunto ativo de limites, em
+    Python puro: nesse tamanho o custo de chamada do numpy/scipy domina.
+    A solução contínua é arredondada para múltiplos práticos e, apenas se
+    algum macro ficar fora da tolerância, refinada por uma busca gulosa de
+    ±1 porção, dispensando o reajuste global do plano.
+    """
+
+    def __init__(
+        self,
+        macro_weights: Sequence[float] = DEFAULT_MACRO_WEIGHTS,
+        max_portion_grams: float = MAX_PORTION_GRAMS
+    ):
+        self.macro_weights = tuple(float(weight) for weight in macro_weights)
+        self.max_portion_grams = max_portion_grams
+
+    def optimize(
+        self,
+        macros_per_100g: np.ndarray,
+        categories: Sequence[str],
+        targets: Sequence[float],
+        tolerance: float = 0.0
+    ) -> np.ndarray:
+        """
+        Calcula as quantidades (gramas) dos alimentos selecionados
+
+        Args:
+            macros_per_100g: Matriz (alimentos x 4) com calorias, proteína, carboidratos e gordura
+            categories: Categoria de cada alimento (define o múltiplo prático)
+            targets: Alvos de calorias, proteína, carboidratos e gordura da refeição
+            tolerance: Erro relativo aceito em cada macro após o arredondamento
+                (dentro dele a busca gulosa é dispensada)
+
+        Returns:
+            np.ndarray: Quantidade em gramas de cada alimento, em múltiplos práticos
+        """
+        if len(categories) == 0:
+            return np.zeros(0, dtype=np.float64)
+
+        steps = [float(practical_step(category)) for category in categories]
+        upper = [max(self.max_portion_grams // step * step, step) for step in steps]
+
+        # Linhas normalizadas pelo alvo para que cada macro pese de forma comparável
+        scale = [weight / max(float(target), 1.0) for weight, target in zip(self.macro_weights, targets)]
+        columns = [
+            [value / 100.0 * row_scale for value, row_scale in zip(food_macros, scale)]
+            for food_macros in np.asarray(macros_per_100g, dtype=np.float64).tolist()
+        ]
+        goal = [float(target) * row_scale for target, row_scale in zip(targets, scale)]
+
+        grams = self._solve(columns, goal, steps, upper)
+        return np.array(self._round_to_portions(columns, goal, grams, steps, upper, tolerance))
+
+    def _solve(
+        self,
+        columns: List[List[float]],
+        goal: List[float],
+        lower: List[float],
+        upper: List[float]
+    ) -> List[float]:
+        """
+        Solução contínua limitada do ajuste de macronutrientes (conjunto ativo)
+
+        Resolve as equações normais dos alimentos livres; quantidades fora dos
+        limites são fixadas no limite violado e limites cujo gradiente aponta
+        para dentro do intervalo são liberados, até nenhuma troca ocorrer.
+        """
+        count = len(columns)
+        gram = [[_dot(left, right) for right in columns] for left in columns]
+        projection = [_dot(column, goal) for column in columns]
+        grams = list(lower)
+        free = list(range(count))
+        fixed: List[int] = []
+
+        for _ in range(3 * count):
+            if free:
+                rhs = [projection[i] - sum([gram[i][j] * grams[j] for j in fixed]) for i in free]
+                solution = _solve_symmetric([[gram[i][j] for j in free] for i in free], rhs)
+                still_free = []
+                for index, value in zip(free, solution):
+                    if value < lower[index]:
+                        grams[index] = lower[index]
+                        fixed.append(index)
+                    elif value > upper[index]:
+                        grams[index] = upper[index]
+                        fixed.append(index)
+                    else:
+                        grams[index] = value
+                        still_free.append(index)
+                if len(still_free) < len(free):
+                    free = still_free
+                    continue
+
+            # Liberar o limite cujo gradiente mais aponta para dentro do intervalo
+            released, best = None, 1e-12
+            for index in fixed:
+                if lower[index] == upper[index]:
+                    continue
+                gradient = _dot(gram[index], grams) - projection[index]
+                pull = -gradient if grams[index] == lower[index] else gradient
+                if pull > best:
+                    released, best = index, pull
+            if released is None:
+                break
+            fixed.remove(released)
+            free.append(released)
+
+        return grams
+
+    def _round_to_portions(
+        self,
+        columns: List[List[float]],
+        goal: List[float],
+        grams: List[float],
+        steps: List[float],
+        upper: List[float],
+        tolerance: float
+    ) -> List[float]:
+        """Arredonda para porções práticas e corrige o erro com passos de ±1 porção"""
+        grams = [
+            min(max(round(quantity / step) * step, step), limit)
+            for quantity, step, limit in zip(grams, steps, upper)
+        ]
+        residual = [-value for value in goal]
+        for column, quantity in zip(columns, grams):
+            residual = [value + coefficient * quantity for value, coefficient in zip(residual, column)]
+
+        # Erro relativo de cada macro (as linhas estão escaladas por peso / alvo)
+        if all(abs(value) <= tolerance * weight for value, weight in zip(residual, self.macro_weights)):
+            return grams
+        error = _dot(residual, residual)
+
+        for _ in range(MAX_ROUNDING_STEPS):
+            best_move = None
+            best_error = error
+            for index, (column, step) in enumerate(zip(columns, steps)):
+                for move in (step, -step):
+                    quantity = grams[index] + move
+                    if quantity < step or quantity > upper[index]:
+                        continue
+                    candidate = [value + coefficient * move for value, coefficient in zip(residual, column)]
+                    candidate_error = _dot(candidate, candidate)
+                    if candidate_error < best_error:
+                        best_move, best_error, best_residual = (index, move), candidate_error, candidate
+            if best_move is None:
+                break
+
+            index, move = best_move
+            grams[index] += move
+            residual, error = best_residual, best_error
+
+        return grams
+
+
+def _dot(left: Sequence[float], right: Sequence[float]) -> float:
+    return sum(map(mul, left, right))
+
+
+def _solve_symmetric(matrix: List[List[float]], rhs: List[float]) -> List[float]:
+    """Resolve o sistema simétrico k x k (k <= 4): forma fechada até 3 x 3, eliminação de Gauss acima"""
+    size = len(rhs)
+    # Regularização mínima: alimentos com macros proporcionais tornam o sistema singular
+    ridge = 1e-9 * max(max(matrix[i][i] for i in range(size)), 1e-12)
+    if size == 1:
+        return [rhs[0] / (matrix[0][0] + ridge)]
+    if size == 2:
+        (a, b), (_, d) = matrix
+        a += ridge
+        d += ridge
+        determinant = a * d - b * b
+        return [(d * rhs[0] - b * rhs[1]) / determinant, (a * rhs[1] - b * rhs[0]) / determinant]
+    if size == 3:
+        (a, b, c), (_, d, e), (_, _, f) = matrix
+        a += ridge
+        d += ridge
+        f += ridge
+        # Cofatores da matriz simétrica (regra de Cramer)
+        ca, cb, cc = d * f - e * e, c * e - b * f, b * e - c * d
+        cd, ce, cf = a * f - c * c, b * c - a * e, a * d - b * b
+        determinant = a * ca + b * cb + c * cc
+        x, y, z = rhs
+        return [
+            (ca * x + cb * y + cc * z) / determinant,
+            (cb * x + cd * y + ce * z) / determinant,
+            (cc * x + ce * y + cf * z) / determinant
+        ]
+
+    rows = [row[:] + [value] for row, value in zip(matrix, rhs)]
+    for i in range(size):
+        rows[i][i] += ridge
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row: abs(rows[row][column]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        pivot_row = rows[column]
+        for row in range(column + 1, size):
+            factor = rows[row][column] / pivot_row[column]
+            if factor:
+                rows[row] = [a - factor * b for a, b in zip(rows[row], pivot_row)]
+
+    solution = [0.0] * size
+    for row in range(size - 1, -1, -1):
+        value = rows[row][size] - _dot(rows[row][row + 1:size], solution[row + 1:])
+        solution[row] = value / rows[row][row]
+    return solution
+
+
+_default_optimizer: Optional[QuantityOptimizer] = None
+
+
+def get_quantity_optimizer() -> QuantityOptimizer:
+    """Retorna o otimizador padrão do processo"""
+    global _default_optimizer
+    if _default_optimizer is None:
+        _default_optimizer = QuantityOptimizer()
+    return _default_optimizer
@@ -0,0 +1,111 @@
+"""
+Índice de restrições alimentares baseado em máscaras de bits
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Mapping, Sequence
+
+import numpy as np
+
+from models.plan import DietPreferences
+
+# Tags dietéticas proibidas por restrição do usuário
+RESTRICTION_FORBIDDEN_TAGS: Dict[str, tuple] = {
+    "vegetarian": ("meat",),
+    "vegan": ("meat", "dairy"),
+    "gluten_free": ("gluten",),
+    "lactose_free": ("lactose",)
+}
+
+
+def normalize_food_name(name: str) -> str:
+    """Normaliza nome de alimento para comparação"""
+    return name.lower()
+
+
+@dataclass(frozen=True)
+class CompiledRestrictions:
+    """Preferências do usuário compiladas contra o vocabulário do índice"""
+    forbidden_mask: int
+    disliked_names: FrozenSet[str]
+    preferred_names: FrozenSet[str] = frozenset()
+
+
+class RestrictionIndex:
+    """
+    Máscaras de tags dietéticas e alergênicos de cada alimento do catálogo
+
+    Construído uma vez por snapshot do catálogo. Cada tag ou alergênico
+    presente no catálogo recebe um bit; um alimento é permitido quando
+    ``mascara_do_alimento & mascara_proibida == 0`` e seu nome não está na
+    lista de alimentos rejeitados.
+    """
+
+    def __init__(self, foods: Sequence[Mapping]):
+        self._tag_bits: Dict[str, int] = {}
+        self._allergen_bits: Dict[str, int] = {}
+        self._name_positions: Dict[str, List[int]] = defaultdict(list)
+
+        masks = []
+        for position, food in enumerate(foods):
+            mask = 0
+            for tag in food.get("dietary_tags", ()):
+                mask |= self._bit(self._tag_bits, tag)
+            for allergen in food.get("allergens", ()):
+                mask |= self._bit(self._allergen_bits, allergen)
+            masks.append(mask)
+            self._name_positions[normalize_food_name(food["name"])].append(position)
+
+        # Vocabulários pequenos cabem em 64 bits; acima disso usa inteiros Python
+        dtype = np.uint64 if self._bit_count <= 64 else object
+        self.masks = np.array(masks, dtype=dtype)
+        self.masks.setflags(write=False)
+        self.size = len(masks)
+
+    @property
+    def _bit_count(self) -> int:
+        return len(self._tag_bits) + len(self._allergen_bits)
+
+    def _bit(self, vocabulary: Dict[str, int], name: str) -> int:
+        """Retorna o bit de uma tag/alergênico, registrando-o se novo"""
+        bit = vocabulary.get(name)
+        if bit is None:
+            bit = 1 << self._bit_count
+            vocabulary[name] = bit
+        return bit
+
+    def compile(self, preferences: DietPreferences) -> CompiledRestrictions:
+        """Compila as preferências do usuário em máscara proibida + nomes rejeitados e preferidos"""
+        forbidden = 0
+
+        for allergy in preferences.allergies:
+            forbidden |= self._allergen_bits.get(allergy.lower(), 0)
+
+        for restriction in preferences.dietary_restrictions:
+            for tag in RESTRICTION_FORBIDDEN_TAGS.get(restriction, ()):
+                forbidden |= self._tag_bits.get(tag, 0)
+
+        disliked = frozenset(normalize_food_name(name) for name in preferences.disliked_foods)
+        preferred = frozenset(normalize_food_name(name) for name in preferences.preferred_foods)
+        return CompiledRestrictions(forbidden_mask=forbidden, disliked_names=disliked, preferred_names=preferred)
+
+    def allowed_mask(self, restrictions: CompiledRestrictions) -> np.ndarray:
+        """Máscara booleana dos alimentos permitidos em todo o catálogo"""
+        if restrictions.forbidden_mask:
+            forbidden = np.array(restrictions.forbidden_mask, dtype=self.masks.dtype)
+            allowed = (self.masks & forbidden) == 0
+        else:
+            allowed = np.ones(self.size, dtype=bool)
+
+        allowed[self.name_mask(restrictions.disliked_names)] = False
+        return allowed
+
+    def name_mask(self, names: FrozenSet[str]) -> np.ndarray:
+        """Máscara dos alimentos cujo nome normalizado está em ``names``"""
+        mask = np.zeros(self.size, dtype=bool)
+        for name in names:
+            positions = self._name_positions.get(name)
+            if positions:
+                mask[positions] = True
+        return mask
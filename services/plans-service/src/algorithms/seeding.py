@@ -0,0 +1,82 @@
+"""
+Semeadura determinística da geração de planos
+"""
+
+import hashlib
+import json
+import random
+from datetime import date
+from typing import Optional
+
+from config.settings import get_settings
+from models.plan import AlgorithmConfig
+
+# Versão dos algoritmos de geração; alterar invalida os hashes de entrada
+ALGORITHM_VERSION = "2025.1"
+
+
+def config_hash(config: Optional[AlgorithmConfig]) -> str:
+    """Hash canônico da configuração do algoritmo (sem metadados de data)"""
+    if config is None:
+        return "-"
+    payload = json.dumps(
+        config.model_dump(exclude={"created_at", "updated_at"}),
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def plan_input_hash(
+    kind: str,
+    user_id: str,
+    target_date: date,
+    config: Optional[AlgorithmConfig] = None,
+    content_version: Optional[str] = None
+) -> str:
+    """
+    Hash das entradas de uma geração
+
+    Args:
+        kind: Tipo de plano ("diet", "workout", "presentation")
+        user_id: ID do usuário
+        target_date: Data do plano
+        config: Configuração do algoritmo
+        content_version: Versão do conteúdo usado (catálogo de alimentos ou
+            biblioteca de exercícios); uma atualização do conteúdo muda o hash
+
+    Returns:
+        str: Hash hexadecimal que identifica o resultado esperado
+    """
+    key = "|".join((
+        ALGORITHM_VERSION, kind, user_id, target_date.isoformat(), config_hash(config), content_version or "-"
+    ))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def recorded_input_hash(input_hash: str) -> Optional[str]:
+    """
+    Hash gravado no plano gerado
+
+    Sem semeadura o plano não é reproduzível a partir das entradas: nenhum hash
+    é gravado e a decisão de regenerar volta a usar as metas do plano.
+    """
+    return input_hash if get_settings().seeded_generation else None
+
+
+def derived_hash(input_hash: str, *parts: str) -> str:
+    """Hash de uma geração derivada de um plano (ex.: regeneração de uma refeição)"""
+    key = "|".join((input_hash, *parts))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def week_input_hash(input_hash: str, week_start: date) -> str:
+    """Hash de um dia gerado dentro de uma semana (seleção penalizada pelos dias anteriores)"""
+    return derived_hash(input_hash, "week", week_start.isoformat())
+
+
+def seeded_rng(input_hash: str) -> random.Random:
+    """RNG da geração: semeado pelo hash de entrada no modo determinístico"""
+    if not get_settings().seeded_generation:
+        return random.Random()
+    return random.Random(int(input_hash, 16))
@@ -5,19 +5,32 @@ Algoritmo de Geração de Treino Personalizado
 import random
 import math
 from datetime import date, datetime, timedelta, time
-from typing import List, Dict, Optional, Tuple, Set
+from typing import List, Dict, Optional, Tuple, Set, FrozenSet, Mapping, Sequence
 import structlog
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
+from functools import lru_cache
+from types import MappingProxyType
 
 from models.plan import (
     WorkoutPlan, WorkoutSession, Exercise, ExerciseSet, Warmup, WarmupExercise,
     WorkoutType, DifficultyLevel, GoalType, WorkoutPreferences, AlgorithmConfig
 )
 from config.settings import get_settings
+from algorithms.exercise_index import ExerciseIndex
+from algorithms.seeding import plan_input_hash, recorded_input_hash, seeded_rng
+from services.exercise_library import ExerciseLibrary, ExerciseSnapshot, get_exercise_library
+from services.metrics import PlanMetrics, get_plan_metrics
+from services.plan_cache import PlanCache, get_plan_cache
+from services.plan_codec import StoredPlan, encode_plan_document
+from services.plan_executor import PlanExecutor, get_plan_executor
+from services.presentation_inputs import PLAN_SECTIONS, mark_presentation_inputs_changed
 
 logger = structlog.get_logger(__name__)
 
+# Perfis (versão, local, equipamentos) com índice de exercícios em cache
+EXERCISE_INDEX_CACHE_SIZE = 128
+
 class MuscleGroup(str, Enum):
     """Grupos musculares"""
     PEITO = "peito"
@@ -58,36 +71,276 @@ class ExerciseCandidate:
     location_compatibility: List[str]  # gym, home, outdoor
     time_efficiency: float  # 0-1
 
-@dataclass
+@dataclass(frozen=True)
 class WorkoutTemplate:
     """Template de treino para um dia específico"""
     name: str
-    muscle_groups_focus: List[str]
+    muscle_groups_focus: Sequence[str]
     workout_type: WorkoutType
     target_duration_minutes: int
-    exercise_slots: List[Dict]  # Slots para exercícios com critérios
+    exercise_slots: Sequence[Mapping]  # Slots para exercícios com critérios
     warmup_type: str
     intensity_level: float  # 0-1
 
+def _freeze_template(template: WorkoutTemplate) -> WorkoutTemplate:
+    """Converte listas e slots do template em estruturas somente leitura"""
+    return replace(
+        template,
+        muscle_groups_focus=tuple(template.muscle_groups_focus),
+        exercise_slots=tuple(
+            MappingProxyType({**slot, "muscle_groups": tuple(slot["muscle_groups"])})
+            for slot in template.exercise_slots
+        )
+    )
+
+def _create_full_body_split() -> List[WorkoutTemplate]:
+    """Cria split de corpo inteiro (1 dia)"""
+    return [
+        WorkoutTemplate(
+            name="Full Body",
+            muscle_groups_focus=[
+                MuscleGroup.PEITO, MuscleGroup.COSTAS, MuscleGroup.QUADRICEPS,
+                MuscleGroup.OMBROS, MuscleGroup.CORE
+            ],
+            workout_type=WorkoutType.STRENGTH,
+            target_duration_minutes=60,
+            exercise_slots=[
+                {"type": "compound", "muscle_groups": ["peito", "ombros", "triceps"], "sets": 3},
+                {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 3},
+                {"type": "compound", "muscle_groups": ["quadriceps", "gluteos"], "sets": 3},
+                {"type": "compound", "muscle_groups": ["posterior", "gluteos"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["ombros"], "sets": 2},
+                {"type": "isolation", "muscle_groups": ["core"], "sets": 2}
+            ],
+            warmup_type="full_body",
+            intensity_level=0.7
+        )
+    ]
+
+def _create_upper_lower_split() -> List[WorkoutTemplate]:
+    """Cria split superior/inferior (2 dias)"""
+    return [
+        WorkoutTemplate(
+            name="Upper Body",
+            muscle_groups_focus=[
+                MuscleGroup.PEITO, MuscleGroup.COSTAS, MuscleGroup.OMBROS,
+                MuscleGroup.BICEPS, MuscleGroup.TRICEPS
+            ],
+            workout_type=WorkoutType.STRENGTH,
+            target_duration_minutes=60,
+            exercise_slots=[
+                {"type": "compound", "muscle_groups": ["peito", "ombros", "triceps"], "sets": 4},
+                {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["ombros"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["biceps"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["triceps"], "sets": 3}
+            ],
+            warmup_type="upper_body",
+            intensity_level=0.8
+        ),
+        WorkoutTemplate(
+            name="Lower Body",
+            muscle_groups_focus=[
+                MuscleGroup.QUADRICEPS, MuscleGroup.POSTERIOR, MuscleGroup.GLUTEOS,
+                MuscleGroup.PANTURRILHAS, MuscleGroup.CORE
+            ],
+            workout_type=WorkoutType.STRENGTH,
+            target_duration_minutes=60,
+            exercise_slots=[
+                {"type": "compound", "muscle_groups": ["quadriceps", "gluteos"], "sets": 4},
+                {"type": "compound", "muscle_groups": ["posterior", "gluteos"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["quadriceps"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["posterior"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["panturrilhas"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["core"], "sets": 3}
+            ],
+            warmup_type="lower_body",
+            intensity_level=0.8
+        )
+    ]
+
+def _create_push_pull_legs_split() -> List[WorkoutTemplate]:
+    """Cria split push/pull/legs (3 dias)"""
+    return [
+        WorkoutTemplate(
+            name="Push (Empurrar)",
+            muscle_groups_focus=[
+                MuscleGroup.PEITO, MuscleGroup.OMBROS, MuscleGroup.TRICEPS
+            ],
+            workout_type=WorkoutType.STRENGTH,
+            target_duration_minutes=60,
+            exercise_slots=[
+                {"type": "compound", "muscle_groups": ["peito", "ombros", "triceps"], "sets": 4},
+                {"type": "compound", "muscle_groups": ["ombros", "triceps"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["peito"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["ombros"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["triceps"], "sets": 3}
+            ],
+            warmup_type="upper_body",
+            intensity_level=0.85
+        ),
+        WorkoutTemplate(
+            name="Pull (Puxar)",
+            muscle_groups_focus=[
+                MuscleGroup.COSTAS, MuscleGroup.BICEPS, MuscleGroup.ANTEBRACOS
+            ],
+            workout_type=WorkoutType.STRENGTH,
+            target_duration_minutes=60,
+            exercise_slots=[
+                {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 4},
+                {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["costas"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["biceps"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["antebracos"], "sets": 2}
+            ],
+            warmup_type="upper_body",
+            intensity_level=0.85
+        ),
+        WorkoutTemplate(
+            name="Legs (Pernas)",
+            muscle_groups_focus=[
+                MuscleGroup.QUADRICEPS, MuscleGroup.POSTERIOR, MuscleGroup.GLUTEOS,
+                MuscleGroup.PANTURRILHAS, MuscleGroup.CORE
+            ],
+            workout_type=WorkoutType.STRENGTH,
+            target_duration_minutes=70,
+            exercise_slots=[
+                {"type": "compound", "muscle_groups": ["quadriceps", "gluteos"], "sets": 4},
+                {"type": "compound", "muscle_groups": ["posterior", "gluteos"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["quadriceps"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["posterior"], "sets": 3},
+                {"type": "isolation", "muscle_groups": ["panturrilhas"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["core"], "sets": 3}
+            ],
+            warmup_type="lower_body",
+            intensity_level=0.85
+        )
+    ]
+
+def _create_upper_lower_push_pull_split() -> List[WorkoutTemplate]:
+    """Cria split upper/lower/push/pull (4 dias)"""
+    upper_lower = _create_upper_lower_split()
+    push_pull = _create_push_pull_legs_split()[:2]  # Apenas push e pull
+    return upper_lower + push_pull
+
+def _create_push_pull_legs_upper_lower_split() -> List[WorkoutTemplate]:
+    """Cria split push/pull/legs/upper/lower (5 dias)"""
+    ppl = _create_push_pull_legs_split()
+    upper_lower = _create_upper_lower_split()
+    return ppl + upper_lower
+
+def _create_push_pull_legs_x2_split() -> List[WorkoutTemplate]:
+    """Cria split push/pull/legs repetido (6 dias)"""
+    ppl = _create_push_pull_legs_split()
+    return ppl + ppl  # Repetir o ciclo
+
+def _create_daily_specialization_split() -> List[WorkoutTemplate]:
+    """Cria split de especialização diária (7 dias)"""
+    return [
+        WorkoutTemplate(
+            name="Peito Especialização",
+            muscle_groups_focus=[MuscleGroup.PEITO, MuscleGroup.TRICEPS],
+            workout_type=WorkoutType.STRENGTH,
+            target_duration_minutes=60,
+            exercise_slots=[
+                {"type": "compound", "muscle_groups": ["peito", "triceps"], "sets": 5},
+                {"type": "isolation", "muscle_groups": ["peito"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["peito"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["triceps"], "sets": 3}
+            ],
+            warmup_type="upper_body",
+            intensity_level=0.9
+        ),
+        WorkoutTemplate(
+            name="Costas Especialização",
+            muscle_groups_focus=[MuscleGroup.COSTAS, MuscleGroup.BICEPS],
+            workout_type=WorkoutType.STRENGTH,
+            target_duration_minutes=60,
+            exercise_slots=[
+                {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 5},
+                {"type": "isolation", "muscle_groups": ["costas"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["costas"], "sets": 4},
+                {"type": "isolation", "muscle_groups": ["biceps"], "sets": 3}
+            ],
+            warmup_type="upper_body",
+            intensity_level=0.9
+        ),
+        # Adicionar mais especializações...
+    ]
+
+# Registro imutável de splits por número de dias disponíveis
+TRAINING_SPLITS: Mapping[int, Tuple[WorkoutTemplate, ...]] = MappingProxyType({
+    days: tuple(_freeze_template(template) for template in builder())
+    for days, builder in {
+        1: _create_full_body_split,
+        2: _create_upper_lower_split,
+        3: _create_push_pull_legs_split,
+        4: _create_upper_lower_push_pull_split,
+        5: _create_push_pull_legs_upper_lower_split,
+        6: _create_push_pull_legs_x2_split,
+        7: _create_daily_specialization_split
+    }.items()
+})
+
+@lru_cache(maxsize=EXERCISE_INDEX_CACHE_SIZE)
+def _build_exercise_index(snapshot: ExerciseSnapshot, location: str, equipment: FrozenSet[str]) -> ExerciseIndex:
+    """Filtra, converte e indexa os exercícios de um perfil (local, equipamentos) de uma versão da biblioteca"""
+    candidates = []
+    for exercise in snapshot.exercises:
+        # Filtrar por local e equipamento
+        if location not in exercise.get("location_compatibility", ["gym"]):
+            continue
+        required_equipment = exercise.get("equipment", "bodyweight")
+        if required_equipment != "bodyweight" and required_equipment not in equipment:
+            continue
+        
+        candidates.append(ExerciseCandidate(
+            exercise_id=exercise["id"],
+            name=exercise["name"],
+            muscle_groups=exercise["muscle_groups"],
+            primary_muscle=exercise["muscle_groups"][0] if exercise["muscle_groups"] else "",
+            secondary_muscles=exercise["muscle_groups"][1:] if len(exercise["muscle_groups"]) > 1 else [],
+            equipment=required_equipment,
+            difficulty=DifficultyLevel(exercise.get("difficulty", "intermediate")),
+            movement_pattern=exercise.get("movement_pattern", "compound"),
+            safety_rating=exercise.get("safety_rating", 0.8),
+            effectiveness_rating=exercise.get("effectiveness_rating", 0.7),
+            location_compatibility=exercise.get("location_compatibility", ["gym"]),
+            time_efficiency=exercise.get("time_efficiency", 0.7)
+        ))
+    
+    # Ordenar por efetividade e segurança
+    candidates.sort(key=lambda x: (x.effectiveness_rating * x.safety_rating), reverse=True)
+    
+    logger.info("Exercícios indexados",
+               version=snapshot.version,
+               location=location,
+               count=len(candidates))
+    return ExerciseIndex(candidates)
+
 class WorkoutGenerator:
     """Gerador de planos de treino personalizados"""
     
-    def __init__(self, content_service, firebase_service):
+    def __init__(
+        self,
+        content_service,
+        firebase_service,
+        exercise_library: Optional[ExerciseLibrary] = None,
+        plan_cache: Optional[PlanCache] = None,
+        plan_executor: Optional[PlanExecutor] = None,
+        metrics: Optional[PlanMetrics] = None
+    ):
         self.content_service = content_service
         self.firebase_service = firebase_service
         self.settings = get_settings()
         self.workout_config = self.settings.workout_algorithm_config
+        self.exercise_library = exercise_library or get_exercise_library(content_service)
+        self.plan_cache = plan_cache or get_plan_cache()
+        self.plan_executor = plan_executor or get_plan_executor()
+        self.metrics = metrics or get_plan_metrics()
         
-        # Definir splits de treino
-        self.training_splits = {
-            1: self._create_full_body_split(),
-            2: self._create_upper_lower_split(),
-            3: self._create_push_pull_legs_split(),
-            4: self._create_upper_lower_push_pull_split(),
-            5: self._create_push_pull_legs_upper_lower_split(),
-            6: self._create_push_pull_legs_x2_split(),
-            7: self._create_daily_specialization_split()
-        }
+        # Splits de treino pré-construídos (compartilhados, imutáveis)
+        self.training_splits = TRAINING_SPLITS
     
     async def generate_workout_plan(
         self, 
@@ -109,247 +362,160 @@ class WorkoutGenerator:
         logger.info("Iniciando geração de plano de treino", 
                    user_id=user_id, date=target_date)
         
+        metrics = self.metrics
+        generation = metrics.generation("workout")
         try:
-            # 1. Verificar se já existe plano para a data
-            existing_plan = await self._get_existing_plan(user_id, target_date)
-            if existing_plan and not self._should_regenerate_plan(existing_plan, algorithm_config):
-                logger.info("Plano de treino existente encontrado", user_id=user_id)
-                return existing_plan
-            
-            # 2. Obter dados do usuário e preferências
-            user_data = await self._get_user_data(user_id)
-            workout_preferences = algorithm_config.workout_preferences
-            
-            # 3. Determinar se é dia de treino ou descanso
-            is_rest_day = self._is_rest_day(target_date, workout_preferences)
-            
-            if is_rest_day:
-                return await self._create_rest_day_plan(user_id, target_date, algorithm_config)
-            
-            # 4. Selecionar split de treino baseado nos dias disponíveis
-            available_days = len(workout_preferences.available_days)
-            split_templates = self.training_splits.get(available_days, self.training_splits[3])
-            
-            # 5. Determinar qual template usar para este dia
-            day_of_week = target_date.strftime("%A").lower()
-            workout_template = self._select_template_for_day(day_of_week, split_templates, workout_preferences)
-            
-            # 6. Obter exercícios disponíveis do Content Service
-            available_exercises = await self._get_available_exercises(workout_preferences)
-            
-            # 7. Gerar sessões de treino
-            sessions = []
-            if workout_template:
-                session = await self._generate_workout_session(
-                    workout_template, available_exercises, algorithm_config, user_data
+            # 1. Cache de planos: repetições do mesmo dia não acessam o Firestore
+            #    (a versão da biblioteca de exercícios faz parte das entradas)
+            with metrics.stage("workout", "exercise_library"):
+                snapshot = await self.exercise_library.get_snapshot()
+            with metrics.stage("workout", "cache_lookup"):
+                cached_plan = await self.plan_cache.get(
+                    "workout", user_id, target_date, algorithm_config, snapshot.version
                 )
-                sessions.append(session)
-            
-            # 8. Calcular duração total
-            total_duration = sum(session.estimated_duration_minutes for session in sessions)
-            
-            # 9. Obter dados de performance anterior
-            last_performance = await self._get_last_performance(user_id, workout_template.name if workout_template else "")
-            
-            # 10. Criar plano final
-            workout_plan = WorkoutPlan(
-                user_id=user_id,
-                date=target_date,
-                goal=algorithm_config.goal,
-                sessions=sessions,
-                total_estimated_duration_minutes=total_duration,
-                rest_day=False,
-                last_performance=last_performance,
-                notes=self._generate_workout_notes(algorithm_config, workout_preferences)
-            )
-            
-            # 11. Salvar no Firestore
-            await self._save_workout_plan(workout_plan)
+            if cached_plan:
+                generation.outcome = "cache_hit"
+                return cached_plan
+            
+            # 2. Verificar se já existe plano para a data (mesmas entradas = mesmo plano)
+            input_hash = plan_input_hash("workout", user_id, target_date, algorithm_config, snapshot.version)
+            with metrics.stage("workout", "existing_plan"):
+                existing_plan = await self._get_existing_plan(user_id, target_date)
+            if existing_plan and not self._should_regenerate_plan(existing_plan, algorithm_config, input_hash):
+                logger.info("Plano de treino existente encontrado", user_id=user_id)
+                workout_plan = existing_plan.load()
+                with metrics.stage("workout", "cache_store"):
+                    await self.plan_cache.set("workout", workout_plan, algorithm_config, snapshot.version)
+                generation.outcome = "existing"
+                return workout_plan
+            
+            # 3. Obter dados do usuário
+            with metrics.stage("workout", "user_load"):
+                user_data = await self._get_user_data(user_id)
+            
+            # 4. Montar o plano do dia (treino ou descanso; descanso não é persistido)
+            workout_plan = await self.build_workout_plan(user_id, target_date, algorithm_config, user_data, snapshot)
+            if workout_plan.rest_day:
+                with metrics.stage("workout", "cache_store"):
+                    await self.plan_cache.set("workout", workout_plan, algorithm_config, snapshot.version)
+                generation.outcome = "rest_day"
+                return workout_plan
+            
+            # 5. Salvar no Firestore e no cache
+            with metrics.stage("workout", "save"):
+                await self._save_workout_plan(workout_plan)
+            with metrics.stage("workout", "cache_store"):
+                await self.plan_cache.set("workout", workout_plan, algorithm_config, snapshot.version)
             
             logger.info("Plano de treino gerado com sucesso", 
-                       user_id=user_id, total_duration=total_duration)
+                       user_id=user_id, total_duration=workout_plan.total_estimated_duration_minutes)
             
             return workout_plan
             
         except Exception as e:
+            generation.outcome = "error"
             logger.error("Erro ao gerar plano de treino", 
                         user_id=user_id, error=str(e))
             raise
+        
+        finally:
+            generation.observe()
     
-    def _create_full_body_split(self) -> List[WorkoutTemplate]:
-        """Cria split de corpo inteiro (1 dia)"""
-        return [
-            WorkoutTemplate(
-                name="Full Body",
-                muscle_groups_focus=[
-                    MuscleGroup.PEITO, MuscleGroup.COSTAS, MuscleGroup.QUADRICEPS,
-                    MuscleGroup.OMBROS, MuscleGroup.CORE
-                ],
-                workout_type=WorkoutType.STRENGTH,
-                target_duration_minutes=60,
-                exercise_slots=[
-                    {"type": "compound", "muscle_groups": ["peito", "ombros", "triceps"], "sets": 3},
-                    {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 3},
-                    {"type": "compound", "muscle_groups": ["quadriceps", "gluteos"], "sets": 3},
-                    {"type": "compound", "muscle_groups": ["posterior", "gluteos"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["ombros"], "sets": 2},
-                    {"type": "isolation", "muscle_groups": ["core"], "sets": 2}
-                ],
-                warmup_type="full_body",
-                intensity_level=0.7
-            )
-        ]
-    
-    def _create_upper_lower_split(self) -> List[WorkoutTemplate]:
-        """Cria split superior/inferior (2 dias)"""
-        return [
-            WorkoutTemplate(
-                name="Upper Body",
-                muscle_groups_focus=[
-                    MuscleGroup.PEITO, MuscleGroup.COSTAS, MuscleGroup.OMBROS,
-                    MuscleGroup.BICEPS, MuscleGroup.TRICEPS
-                ],
-                workout_type=WorkoutType.STRENGTH,
-                target_duration_minutes=60,
-                exercise_slots=[
-                    {"type": "compound", "muscle_groups": ["peito", "ombros", "triceps"], "sets": 4},
-                    {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["ombros"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["biceps"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["triceps"], "sets": 3}
-                ],
-                warmup_type="upper_body",
-                intensity_level=0.8
-            ),
-            WorkoutTemplate(
-                name="Lower Body",
-                muscle_groups_focus=[
-                    MuscleGroup.QUADRICEPS, MuscleGroup.POSTERIOR, MuscleGroup.GLUTEOS,
-                    MuscleGroup.PANTURRILHAS, MuscleGroup.CORE
-                ],
-                workout_type=WorkoutType.STRENGTH,
-                target_duration_minutes=60,
-                exercise_slots=[
-                    {"type": "compound", "muscle_groups": ["quadriceps", "gluteos"], "sets": 4},
-                    {"type": "compound", "muscle_groups": ["posterior", "gluteos"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["quadriceps"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["posterior"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["panturrilhas"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["core"], "sets": 3}
-                ],
-                warmup_type="lower_body",
-                intensity_level=0.8
+    async def build_workout_plan(
+        self,
+        user_id: str,
+        target_date: date,
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        snapshot: Optional[ExerciseSnapshot] = None
+    ) -> WorkoutPlan:
+        """Monta o plano de treino de um dia sem persistir"""
+        workout_preferences = algorithm_config.workout_preferences
+        if snapshot is None:
+            with self.metrics.stage("workout", "exercise_library"):
+                snapshot = await self.exercise_library.get_snapshot()
+        
+        # 1. Determinar se é dia de treino ou descanso
+        if self._is_rest_day(target_date, workout_preferences):
+            rest_plan = self._create_rest_day_plan(user_id, target_date, algorithm_config)
+            rest_plan.input_hash = recorded_input_hash(
+                plan_input_hash("workout", user_id, target_date, algorithm_config, snapshot.version)
             )
-        ]
+            return rest_plan
+        
+        # 2. Selecionar e prescrever os exercícios (no pool de processos, se ativo)
+        if self.plan_executor.active:
+            with self.metrics.stage("workout", "assembly"):
+                workout_plan = await self.plan_executor.compose_workout_plan(
+                    user_id, target_date, algorithm_config, user_data, snapshot.version
+                )
+        else:
+            with self.metrics.stage("workout", "exercise_library"):
+                exercise_index = _build_exercise_index(
+                    snapshot, workout_preferences.location, frozenset(workout_preferences.equipment_available)
+                )
+            with self.metrics.stage("workout", "assembly"):
+                workout_plan = self.compose_workout_plan(
+                    user_id, target_date, algorithm_config, user_data, exercise_index, snapshot.version
+                )
+        
+        # 3. Obter dados de performance anterior
+        workout_name = workout_plan.sessions[0].name if workout_plan.sessions else ""
+        with self.metrics.stage("workout", "last_performance"):
+            workout_plan.last_performance = await self._get_last_performance(user_id, workout_name)
+        
+        return workout_plan
     
-    def _create_push_pull_legs_split(self) -> List[WorkoutTemplate]:
-        """Cria split push/pull/legs (3 dias)"""
-        return [
-            WorkoutTemplate(
-                name="Push (Empurrar)",
-                muscle_groups_focus=[
-                    MuscleGroup.PEITO, MuscleGroup.OMBROS, MuscleGroup.TRICEPS
-                ],
-                workout_type=WorkoutType.STRENGTH,
-                target_duration_minutes=60,
-                exercise_slots=[
-                    {"type": "compound", "muscle_groups": ["peito", "ombros", "triceps"], "sets": 4},
-                    {"type": "compound", "muscle_groups": ["ombros", "triceps"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["peito"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["ombros"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["triceps"], "sets": 3}
-                ],
-                warmup_type="upper_body",
-                intensity_level=0.85
-            ),
-            WorkoutTemplate(
-                name="Pull (Puxar)",
-                muscle_groups_focus=[
-                    MuscleGroup.COSTAS, MuscleGroup.BICEPS, MuscleGroup.ANTEBRACOS
-                ],
-                workout_type=WorkoutType.STRENGTH,
-                target_duration_minutes=60,
-                exercise_slots=[
-                    {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 4},
-                    {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["costas"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["biceps"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["antebracos"], "sets": 2}
-                ],
-                warmup_type="upper_body",
-                intensity_level=0.85
-            ),
-            WorkoutTemplate(
-                name="Legs (Pernas)",
-                muscle_groups_focus=[
-                    MuscleGroup.QUADRICEPS, MuscleGroup.POSTERIOR, MuscleGroup.GLUTEOS,
-                    MuscleGroup.PANTURRILHAS, MuscleGroup.CORE
-                ],
-                workout_type=WorkoutType.STRENGTH,
-                target_duration_minutes=70,
-                exercise_slots=[
-                    {"type": "compound", "muscle_groups": ["quadriceps", "gluteos"], "sets": 4},
-                    {"type": "compound", "muscle_groups": ["posterior", "gluteos"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["quadriceps"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["posterior"], "sets": 3},
-                    {"type": "isolation", "muscle_groups": ["panturrilhas"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["core"], "sets": 3}
-                ],
-                warmup_type="lower_body",
-                intensity_level=0.85
+    def compose_workout_plan(
+        self,
+        user_id: str,
+        target_date: date,
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        exercise_index: ExerciseIndex,
+        library_version: Optional[str] = None
+    ) -> WorkoutPlan:
+        """
+        Núcleo de CPU da geração de um dia de treino (sem I/O)
+        
+        Escolhe o split e o template do dia, seleciona os exercícios no índice
+        e gera as séries; a performance anterior é preenchida por quem chama.
+        """
+        workout_preferences = algorithm_config.workout_preferences
+        
+        # RNG derivado das entradas: mesmas entradas geram o mesmo plano
+        input_hash = plan_input_hash("workout", user_id, target_date, algorithm_config, library_version)
+        rng = seeded_rng(input_hash)
+        
+        # 1. Selecionar split de treino baseado nos dias disponíveis
+        available_days = len(workout_preferences.available_days)
+        split_templates = self.training_splits.get(available_days, self.training_splits[3])
+        
+        # 2. Determinar qual template usar para este dia
+        day_of_week = target_date.strftime("%A").lower()
+        workout_template = self._select_template_for_day(day_of_week, split_templates, workout_preferences)
+        
+        # 3. Gerar sessões de treino
+        sessions = []
+        if workout_template:
+            session = self._generate_workout_session(
+                workout_template, exercise_index, algorithm_config, user_data, target_date, rng
             )
-        ]
-    
-    def _create_upper_lower_push_pull_split(self) -> List[WorkoutTemplate]:
-        """Cria split upper/lower/push/pull (4 dias)"""
-        upper_lower = self._create_upper_lower_split()
-        push_pull = self._create_push_pull_legs_split()[:2]  # Apenas push e pull
-        return upper_lower + push_pull
-    
-    def _create_push_pull_legs_upper_lower_split(self) -> List[WorkoutTemplate]:
-        """Cria split push/pull/legs/upper/lower (5 dias)"""
-        ppl = self._create_push_pull_legs_split()
-        upper_lower = self._create_upper_lower_split()
-        return ppl + upper_lower
-    
-    def _create_push_pull_legs_x2_split(self) -> List[WorkoutTemplate]:
-        """Cria split push/pull/legs repetido (6 dias)"""
-        ppl = self._create_push_pull_legs_split()
-        return ppl + ppl  # Repetir o ciclo
-    
-    def _create_daily_specialization_split(self) -> List[WorkoutTemplate]:
-        """Cria split de especialização diária (7 dias)"""
-        return [
-            WorkoutTemplate(
-                name="Peito Especialização",
-                muscle_groups_focus=[MuscleGroup.PEITO, MuscleGroup.TRICEPS],
-                workout_type=WorkoutType.STRENGTH,
-                target_duration_minutes=60,
-                exercise_slots=[
-                    {"type": "compound", "muscle_groups": ["peito", "triceps"], "sets": 5},
-                    {"type": "isolation", "muscle_groups": ["peito"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["peito"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["triceps"], "sets": 3}
-                ],
-                warmup_type="upper_body",
-                intensity_level=0.9
-            ),
-            WorkoutTemplate(
-                name="Costas Especialização",
-                muscle_groups_focus=[MuscleGroup.COSTAS, MuscleGroup.BICEPS],
-                workout_type=WorkoutType.STRENGTH,
-                target_duration_minutes=60,
-                exercise_slots=[
-                    {"type": "compound", "muscle_groups": ["costas", "biceps"], "sets": 5},
-                    {"type": "isolation", "muscle_groups": ["costas"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["costas"], "sets": 4},
-                    {"type": "isolation", "muscle_groups": ["biceps"], "sets": 3}
-                ],
-                warmup_type="upper_body",
-                intensity_level=0.9
-            ),
-            # Adicionar mais especializações...
-        ]
+            sessions.append(session)
+        
+        # 4. Calcular duração total
+        total_duration = sum(session.estimated_duration_minutes for session in sessions)
+        
+        return WorkoutPlan(
+            user_id=user_id,
+            date=target_date,
+            goal=algorithm_config.goal,
+            sessions=sessions,
+            total_estimated_duration_minutes=total_duration,
+            rest_day=False,
+            notes=self._generate_workout_notes(algorithm_config, workout_preferences),
+            input_hash=recorded_input_hash(input_hash)
+        )
     
     def _is_rest_day(self, target_date: date, preferences: WorkoutPreferences) -> bool:
         """Determina se é dia de descanso"""
@@ -358,7 +524,7 @@ class WorkoutGenerator:
         
         return day_name not in available_days
     
-    async def _create_rest_day_plan(
+    def _create_rest_day_plan(
         self, 
         user_id: str, 
         target_date: date, 
@@ -389,7 +555,7 @@ class WorkoutGenerator:
     def _select_template_for_day(
         self, 
         day_of_week: str, 
-        templates: List[WorkoutTemplate],
+        templates: Sequence[WorkoutTemplate],
         preferences: WorkoutPreferences
     ) -> Optional[WorkoutTemplate]:
         """Seleciona template apropriado para o dia da semana"""
@@ -410,63 +576,38 @@ class WorkoutGenerator:
         template_index = day_mapping.get(day_of_week, 0) % len(templates)
         return templates[template_index]
     
-    async def _get_available_exercises(self, preferences: WorkoutPreferences) -> List[ExerciseCandidate]:
-        """Obtém exercícios disponíveis do Content Service"""
+    async def warm_exercise_index(
+        self,
+        preferences: WorkoutPreferences,
+        library_version: Optional[str] = None
+    ) -> ExerciseIndex:
+        """
+        Carrega a biblioteca e monta o índice de exercícios para o local e equipamentos do usuário
+        
+        O índice fica no cache de ``_build_exercise_index``: montagens seguintes
+        com o mesmo snapshot e preferências o reutilizam. Com ``library_version``
+        (processos do pool), a biblioteca é revalidada se o snapshot local
+        estiver em outra versão.
+        """
         try:
-            # Buscar exercícios
-            exercises_response = await self.content_service.get_exercises()
-            exercises = exercises_response.get("exercises", [])
-            
-            candidates = []
-            for exercise in exercises:
-                # Filtrar por local e equipamento
-                if self._exercise_matches_preferences(exercise, preferences):
-                    candidate = ExerciseCandidate(
-                        exercise_id=exercise["id"],
-                        name=exercise["name"],
-                        muscle_groups=exercise["muscle_groups"],
-                        primary_muscle=exercise["muscle_groups"][0] if exercise["muscle_groups"] else "",
-                        secondary_muscles=exercise["muscle_groups"][1:] if len(exercise["muscle_groups"]) > 1 else [],
-                        equipment=exercise.get("equipment", "bodyweight"),
-                        difficulty=DifficultyLevel(exercise.get("difficulty", "intermediate")),
-                        movement_pattern=exercise.get("movement_pattern", "compound"),
-                        safety_rating=exercise.get("safety_rating", 0.8),
-                        effectiveness_rating=exercise.get("effectiveness_rating", 0.7),
-                        location_compatibility=exercise.get("location_compatibility", ["gym"]),
-                        time_efficiency=exercise.get("time_efficiency", 0.7)
-                    )
-                    candidates.append(candidate)
-            
-            # Ordenar por efetividade e segurança
-            candidates.sort(key=lambda x: (x.effectiveness_rating * x.safety_rating), reverse=True)
-            
-            logger.info("Exercícios disponíveis obtidos", count=len(candidates))
-            return candidates
-            
+            snapshot = await self.exercise_library.get_snapshot()
+            if library_version is not None and snapshot.version != library_version:
+                snapshot = await self.exercise_library.refresh()
+            return _build_exercise_index(
+                snapshot, preferences.location, frozenset(preferences.equipment_available)
+            )
         except Exception as e:
             logger.error("Erro ao obter exercícios", error=str(e))
             raise
     
-    def _exercise_matches_preferences(self, exercise: dict, preferences: WorkoutPreferences) -> bool:
-        """Verifica se o exercício atende às preferências"""
-        # Verificar local
-        exercise_locations = exercise.get("location_compatibility", ["gym"])
-        if preferences.location not in exercise_locations:
-            return False
-        
-        # Verificar equipamento disponível
-        required_equipment = exercise.get("equipment", "bodyweight")
-        if required_equipment != "bodyweight" and required_equipment not in preferences.equipment_available:
-            return False
-        
-        return True
-    
-    async def _generate_workout_session(
+    def _generate_workout_session(
         self,
         template: WorkoutTemplate,
-        available_exercises: List[ExerciseCandidate],
+        exercise_index: ExerciseIndex,
         config: AlgorithmConfig,
-        user_data: dict
+        user_data: dict,
+        target_date: date,
+        rng: random.Random
     ) -> WorkoutSession:
         """Gera uma sessão de treino baseada no template"""
         
@@ -479,7 +620,7 @@ class WorkoutGenerator:
         
         for slot in template.exercise_slots:
             exercise = self._select_exercise_for_slot(
-                slot, available_exercises, used_exercises, config
+                slot, exercise_index, used_exercises, config, rng
             )
             if exercise:
                 exercises.append(exercise)
@@ -489,7 +630,7 @@ class WorkoutGenerator:
         estimated_duration = self._calculate_session_duration(exercises, warmup)
         
         return WorkoutSession(
-            session_id=f"{config.user_id}_{template.name}_{datetime.utcnow().strftime('%Y%m%d')}",
+            session_id=f"{config.user_id}_{template.name}_{target_date.strftime('%Y%m%d')}",
             name=template.name,
             workout_type=template.workout_type,
             muscle_groups_focus=template.muscle_groups_focus,
@@ -506,41 +647,22 @@ class WorkoutGenerator:
     def _select_exercise_for_slot(
         self,
         slot: Dict,
-        available_exercises: List[ExerciseCandidate],
+        exercise_index: ExerciseIndex,
         used_exercises: Set[str],
-        config: AlgorithmConfig
+        config: AlgorithmConfig,
+        rng: random.Random
     ) -> Optional[Exercise]:
         """Seleciona exercício apropriado para um slot específico"""
         
-        # Filtrar exercícios candidatos
-        candidates = []
-        for exercise in available_exercises:
-            if exercise.exercise_id in used_exercises:
-                continue
-            
-            # Verificar tipo de movimento
-            if slot["type"] != "any" and exercise.movement_pattern != slot["type"]:
-                continue
-            
-            # Verificar grupos musculares
-            slot_muscles = slot["muscle_groups"]
-            if not any(muscle in exercise.muscle_groups for muscle in slot_muscles):
-                continue
-            
-            # Verificar dificuldade
-            if not self._is_appropriate_difficulty(exercise.difficulty, config.experience_level):
-                continue
-            
-            candidates.append(exercise)
-        
-        if not candidates:
+        # Melhor candidato do índice por movimento, músculo e dificuldade
+        selected_candidate = exercise_index.best_for_slot(
+            slot["type"], slot["muscle_groups"], config.experience_level, used_exercises
+        )
+        if selected_candidate is None:
             return None
         
-        # Selecionar melhor candidato
-        selected_candidate = max(candidates, key=lambda x: x.effectiveness_rating * x.safety_rating)
-        
         # Gerar sets para o exercício
-        sets = self._generate_exercise_sets(selected_candidate, slot, config)
+        sets = self._generate_exercise_sets(selected_candidate, slot, config, rng)
         
         return Exercise(
             exercise_id=selected_candidate.exercise_id,
@@ -558,7 +680,8 @@ class WorkoutGenerator:
         self,
         exercise: ExerciseCandidate,
         slot: Dict,
-        config: AlgorithmConfig
+        config: AlgorithmConfig,
+        rng: random.Random
     ) -> List[ExerciseSet]:
         """Gera séries para um exercício"""
         
@@ -576,12 +699,12 @@ class WorkoutGenerator:
         
         # Determinar descanso entre séries
         rest_range = intensity_config["rest_between_sets"]
-        rest_seconds = random.randint(rest_range["min"], rest_range["max"])
+        rest_seconds = rng.randint(rest_range["min"], rest_range["max"])
         
         sets = []
         for i in range(num_sets):
             # Variar repetições dentro do range
-            reps = random.randint(rep_range[0], rep_range[1])
+            reps = rng.randint(rep_range[0], rep_range[1])
             
             # Ajustar peso baseado na série (pirâmide)
             weight_factor = 1.0 - (i * 0.05)  # Reduzir 5% a cada série
@@ -617,21 +740,6 @@ class WorkoutGenerator:
             notes="Aquecimento é essencial para prevenir lesões e melhorar performance"
         )
     
-    def _is_appropriate_difficulty(self, exercise_difficulty: DifficultyLevel, user_level: DifficultyLevel) -> bool:
-        """Verifica se a dificuldade do exercício é apropriada"""
-        difficulty_order = {
-            DifficultyLevel.BEGINNER: 0,
-            DifficultyLevel.INTERMEDIATE: 1,
-            DifficultyLevel.ADVANCED: 2,
-            DifficultyLevel.EXPERT: 3
-        }
-        
-        exercise_level = difficulty_order[exercise_difficulty]
-        user_level_num = difficulty_order[user_level]
-        
-        # Permitir exercícios até 1 nível acima do usuário
-        return exercise_level <= user_level_num + 1
-    
     def _calculate_session_duration(self, exercises: List[Exercise], warmup: Warmup) -> int:
         """Calcula duração estimada da sessão"""
         warmup_duration = warmup.total_duration_minutes if warmup else 0
@@ -716,23 +824,31 @@ class WorkoutGenerator:
     
     # Métodos auxiliares (similares ao diet_generator)
     
-    async def _get_existing_plan(self, user_id: str, target_date: date) -> Optional[WorkoutPlan]:
-        """Busca plano existente no Firestore"""
+    async def _get_existing_plan(self, user_id: str, target_date: date) -> Optional[StoredPlan]:
+        """Busca plano existente no Firestore (corpo decodificado apenas se reutilizado)"""
         try:
             doc_ref = self.firebase_service.db.collection("workout_plans").document(f"{user_id}_{target_date}")
             doc = await doc_ref.get()
             
             if doc.exists:
-                data = doc.to_dict()
-                return WorkoutPlan(**data)
+                return StoredPlan("workout", doc.to_dict())
             
             return None
         except Exception as e:
             logger.error("Erro ao buscar plano de treino existente", error=str(e))
             return None
     
-    def _should_regenerate_plan(self, existing_plan: WorkoutPlan, config: AlgorithmConfig) -> bool:
+    def _should_regenerate_plan(
+        self,
+        existing_plan: WorkoutPlan,
+        config: AlgorithmConfig,
+        input_hash: Optional[str] = None
+    ) -> bool:
         """Verifica se deve regenerar um plano existente"""
+        # Planos com hash de entrada só são regenerados se as entradas mudaram
+        if existing_plan.input_hash and input_hash:
+            return existing_plan.input_hash != input_hash
+        
         # Regenerar se o objetivo mudou
         if existing_plan.goal != config.goal:
             return True
@@ -778,18 +894,21 @@ class WorkoutGenerator:
             logger.error("Erro ao obter performance anterior", error=str(e))
             return None
     
+    def plan_document(self, workout_plan: WorkoutPlan) -> dict:
+        """Converte o plano no documento gravado no Firestore"""
+        plan_data = encode_plan_document("workout", workout_plan)
+        plan_data["created_at"] = datetime.utcnow()
+        plan_data["updated_at"] = datetime.utcnow()
+        return plan_data
+    
     async def _save_workout_plan(self, workout_plan: WorkoutPlan):
         """Salva o plano de treino no Firestore"""
         try:
             doc_id = f"{workout_plan.user_id}_{workout_plan.date}"
             doc_ref = self.firebase_service.db.collection("workout_plans").document(doc_id)
             
-            # Converter para dict
-            plan_data = workout_plan.dict()
-            plan_data["created_at"] = datetime.utcnow()
-            plan_data["updated_at"] = datetime.utcnow()
-            
-            await doc_ref.set(plan_data)
+            await doc_ref.set(self.plan_document(workout_plan))
+            await mark_presentation_inputs_changed(self.firebase_service.db, workout_plan.user_id, PLAN_SECTIONS)
             
             logger.info("Plano de treino salvo", user_id=workout_plan.user_id, date=workout_plan.date)
             
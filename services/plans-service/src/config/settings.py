@@ -36,6 +36,12 @@ class Settings(BaseSettings):
     cache_ttl: int = int(os.getenv("CACHE_TTL", "3600"))  # 1 hora
     redis_url: Optional[str] = os.getenv("REDIS_URL")
     
+    # Pub/Sub (eventos de perfil publicados pelo users-service)
+    pubsub_subscription_user_events: Optional[str] = os.getenv("PUBSUB_SUBSCRIPTION_USER_EVENTS")
+    
+    # Métricas Prometheus em /metrics (sem custo quando desabilitadas)
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
     # Logging
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     log_format: str = "json"
@@ -53,6 +59,12 @@ class Settings(BaseSettings):
     content_service_url: str = os.getenv("CONTENT_SERVICE_URL", "https://content-service-278319877545.southamerica-east1.run.app")
     users_service_url: str = os.getenv("USERS_SERVICE_URL", "http://localhost:8081")
     
+    # Geração determinística: RNG derivado de (usuário, data, versão do algoritmo, configuração)
+    seeded_generation: bool = os.getenv("SEEDED_GENERATION", "true").lower() == "true"
+    
+    # Tabelas de textos (mensagens, dicas, marcos); padrão: src/data/content_templates.json
+    content_templates_path: Optional[str] = os.getenv("CONTENT_TEMPLATES_PATH")
+    
     # Configurações de algoritmos de dieta
     diet_algorithm_config: Dict = {
         # Distribuição de calorias por refeição (%)
@@ -261,6 +273,14 @@ class Settings(BaseSettings):
             "include_progress_tracking": True,
             "show_weekly_summary": True,
             "motivational_frequency": "daily"
+        },
+        
+        # Timeout por fonte de dados da apresentação (segundos)
+        "source_timeouts": {
+            "default": 1.5,
+            "user_data": 3.0,           # Sem usuário a apresentação perde a personalização
+            "diet_plan": 2.5,
+            "workout_plan": 2.5
         }
     }
     
@@ -273,6 +293,51 @@ class Settings(BaseSettings):
         "presentation_ttl": 1800        # 30 minutos
     }
     
+    # Cache de planos gerados (memória do processo + Redis)
+    plan_cache_config: Dict = {
+        "memory_max_entries": int(os.getenv("PLAN_CACHE_MEMORY_ENTRIES", "2048")),
+        "memory_ttl": 600,              # 10 minutos no cache local
+        "invalidation_channel": "plans:invalidate"  # Canal Redis entre instâncias
+    }
+    
+    # Cliente HTTP do Content Service (pool compartilhado)
+    content_client_config: Dict = {
+        "timeout_seconds": 10.0,
+        "connect_timeout_seconds": 3.0,
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+        "max_retries": 2                # Apenas falhas de transporte
+    }
+    
+    # Pool de processos para o núcleo de CPU da geração (0 = no próprio loop)
+    executor_config: Dict = {
+        "max_workers": int(os.getenv("PLAN_EXECUTOR_WORKERS", "2")),
+        "start_method": "spawn",        # Workers não herdam threads/conexões da API
+        "task_timeout": 30.0            # Segundos por plano no pool
+    }
+    
+    # Formato dos planos gravados no Firestore
+    plan_storage_config: Dict = {
+        "format": os.getenv("PLAN_STORAGE_FORMAT", "full"),             # "full" (plan.dict()) ou "compact"
+        "compression": os.getenv("PLAN_STORAGE_COMPRESSION", "zstd"),   # Corpo compacto: "zstd" ou "none"
+        "compression_level": 3
+    }
+    
+    # Cronograma semanal em streaming
+    weekly_stream_config: Dict = {
+        "max_concurrent_days": 3        # Dias gerados ao mesmo tempo por requisição
+    }
+    
+    # Pré-computação noturna de planos
+    precompute_config: Dict = {
+        "max_workers": int(os.getenv("PRECOMPUTE_WORKERS", "4")),   # Processos geradores
+        "shard_size": 25,               # Usuários por tarefa enviada ao pool
+        "max_in_flight": 8,             # Tarefas simultâneas no pool
+        "batch_size": 400,              # Documentos por commit (limite Firestore: 500)
+        "progress_every": 500,          # Usuários entre logs de progresso
+        "start_method": "spawn"         # Workers não herdam threads/conexões da API
+    }
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -2,18 +2,28 @@
 EvolveYou Plans Service - Fábrica de Planos Personalizados
 """
 
+import asyncio
 import logging
 import structlog
 from contextlib import asynccontextmanager
-from datetime import datetime
-from fastapi import FastAPI, HTTPException, Depends, Request
+from typing import List
+from datetime import date, datetime
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 # Configurações e dependências
 from config.settings import get_settings
 from services.firebase_service import FirebaseService
 from services.plan_service import PlanService
+from services.plan_precompute import PlanPrecomputer
+from services.plan_cache import get_plan_cache
+from services.content_client import get_content_client
+from services.food_catalog import get_food_catalog
+from services.plan_executor import get_plan_executor
+from services.metrics import get_plan_metrics
+from services.user_events import UserEventsSubscriber
+from services.weekly_stream import STREAM_FORMATS, WeeklyPlanStream, week_start_for
 from middleware.logging import setup_logging, LoggingMiddleware
 from middleware.auth import AuthMiddleware
 from middleware.rate_limit import RateLimitMiddleware
@@ -22,7 +32,7 @@ from middleware.rate_limit import RateLimitMiddleware
 from models.plan import (
     DietPlanResponse, WorkoutPlanResponse, 
     PresentationResponse, WeeklyScheduleResponse,
-    ErrorResponse
+    ErrorResponse, MealType
 )
 
 # Configurar logging estruturado
@@ -32,6 +42,22 @@ logger = structlog.get_logger(__name__)
 # Instâncias globais de serviços
 firebase_service = FirebaseService()
 plan_service = PlanService()
+plan_precomputer = PlanPrecomputer(firebase_service)
+plan_cache = get_plan_cache()
+content_client = get_content_client()
+food_catalog = get_food_catalog(content_client)
+plan_executor = get_plan_executor()
+plan_metrics = get_plan_metrics()
+plan_metrics.track_cache(
+    "plan", plan_cache.get_stats,
+    hits=("memory_hits", "redis_hits"), lookups=("memory_hits", "redis_hits", "misses")
+)
+plan_metrics.track_cache(
+    "content", content_client.get_stats,
+    hits=("coalesced", "not_modified"), lookups=("requests", "coalesced")
+)
+user_events = UserEventsSubscriber(plan_cache, firebase_service)
+_precompute_task: asyncio.Task = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -46,6 +72,25 @@ async def lifespan(app: FastAPI):
         await firebase_service.initialize()
         logger.info("Firebase inicializado com sucesso")
         
+        # Cliente do Content Service e catálogo de alimentos compartilhado
+        await content_client.initialize()
+        try:
+            await food_catalog.load()
+        except Exception as e:
+            # O catálogo é carregado no primeiro uso se o Content Service estiver indisponível
+            logger.warning("Catálogo de alimentos não carregado na inicialização", error=str(e))
+        food_catalog.start_background_refresh()
+        
+        # Pool de processos para a montagem dos planos (workers com catálogo carregado)
+        try:
+            await plan_executor.start()
+        except Exception as e:
+            logger.warning("Pool de geração indisponível, planos montados no loop", error=str(e))
+        
+        # Inicializar cache de planos e invalidação por eventos de perfil
+        await plan_cache.initialize()
+        user_events.start()
+        
         # Inicializar Plan Service
         await plan_service.initialize(firebase_service)
         logger.info("Plan Service inicializado com sucesso")
@@ -62,6 +107,11 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Finalizando Plans Service")
+    user_events.stop()
+    plan_executor.shutdown()
+    await food_catalog.stop()
+    await content_client.close()
+    await plan_cache.close()
     await firebase_service.close()
     await plan_service.close()
 
@@ -178,12 +228,20 @@ async def get_metrics():
         metrics = await plan_service.get_metrics()
         return {
             "timestamp": datetime.utcnow().isoformat(),
-            "metrics": metrics
+            "metrics": metrics,
+            "plan_cache": plan_cache.get_stats(),
+            "content_client": content_client.get_stats(),
+            "plan_executor": plan_executor.get_stats()
         }
     except Exception as e:
         logger.error("Erro ao obter métricas", error=str(e))
         raise HTTPException(status_code=500, detail="Erro ao obter métricas")
 
+@app.get("/metrics/prometheus")
+async def get_prometheus_metrics():
+    """Métricas no formato Prometheus (etapas da geração e caches)"""
+    return Response(plan_metrics.render(), media_type=plan_metrics.content_type)
+
 # Rotas principais da API
 
 @app.get("/plan/diet", response_model=DietPlanResponse)
@@ -216,6 +274,47 @@ async def get_diet_plan(
         logger.error("Erro ao gerar plano de dieta", user_id=user["user_id"], error=str(e))
         raise HTTPException(status_code=500, detail="Erro ao gerar plano de dieta")
 
+@app.post("/plan/diet/meals/{meal_type}/regenerate", response_model=DietPlanResponse)
+async def regenerate_diet_meal(
+    meal_type: MealType,
+    plan_date: str = Query(None, alias="date"),
+    exclude_foods: List[str] = Query(None),
+    user: dict = Depends(get_current_user),
+    service: PlanService = Depends(get_plan_service)
+):
+    """
+    Regenera uma refeição do plano de dieta, mantendo as demais
+    
+    - **meal_type**: Refeição a regenerar (ex.: `almoco`)
+    - **date**: Data do plano (formato YYYY-MM-DD). Se não informado, usa data atual
+    - **exclude_foods**: IDs de alimentos a evitar. Se não informado, troca os alimentos atuais da refeição
+    """
+    try:
+        target_date = date.fromisoformat(plan_date) if plan_date else date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data inválida (use YYYY-MM-DD)")
+    
+    try:
+        logger.info("Regenerando refeição", user_id=user["user_id"], date=target_date, meal_type=meal_type)
+        
+        diet_plan = await service.diet_generator.regenerate_meal(
+            user_id=user["user_id"],
+            target_date=target_date,
+            meal_type=meal_type,
+            exclude_foods=exclude_foods
+        )
+        
+        return DietPlanResponse(
+            data=diet_plan,
+            message="Refeição regenerada com sucesso"
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Erro ao regenerar refeição", user_id=user["user_id"], error=str(e))
+        raise HTTPException(status_code=500, detail="Erro ao regenerar refeição")
+
 @app.get("/plan/workout", response_model=WorkoutPlanResponse)
 async def get_workout_plan(
     date: str = None,
@@ -306,6 +405,35 @@ async def get_weekly_schedule(
         logger.error("Erro ao gerar cronograma semanal", user_id=user["user_id"], error=str(e))
         raise HTTPException(status_code=500, detail="Erro ao gerar cronograma semanal")
 
+@app.get("/plan/weekly-schedule/stream")
+async def stream_weekly_schedule(
+    week_start: str = None,
+    stream_format: str = Query("ndjson", alias="format"),
+    user: dict = Depends(get_current_user),
+    service: PlanService = Depends(get_plan_service)
+):
+    """
+    Retorna os planos da semana em streaming, cada dia assim que fica pronto
+    
+    - **week_start**: Data de início da semana (formato YYYY-MM-DD). Se não informado, usa semana atual
+    - **format**: `ndjson` (padrão, um evento JSON por linha) ou `sse`
+    """
+    if stream_format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato inválido (use ndjson ou sse)")
+    try:
+        start = week_start_for(week_start)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data inválida (use YYYY-MM-DD)")
+    
+    logger.info("Transmitindo cronograma semanal", user_id=user["user_id"], week_start=start)
+    
+    stream = WeeklyPlanStream(service.diet_generator, service.workout_generator, firebase_service)
+    return StreamingResponse(
+        stream.encode(user["user_id"], start, stream_format),
+        media_type=STREAM_FORMATS[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Rotas administrativas (opcional)
 
 @app.post("/admin/regenerate-plans")
@@ -339,6 +467,51 @@ async def regenerate_user_plans(
         logger.error("Erro ao regenerar planos", target_user_id=user_id, error=str(e))
         raise HTTPException(status_code=500, detail="Erro ao regenerar planos")
 
+@app.post("/admin/precompute-plans")
+async def precompute_plans(
+    target_date: str = None,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Inicia a pré-computação dos planos de todos os usuários ativos (apenas para administradores)
+    
+    - **target_date**: Data dos planos (formato YYYY-MM-DD). Se não informado, usa o dia seguinte
+    """
+    global _precompute_task
+    
+    if not user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    
+    if _precompute_task and not _precompute_task.done():
+        raise HTTPException(status_code=409, detail="Pré-computação já em andamento")
+    
+    try:
+        parsed_date = date.fromisoformat(target_date) if target_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data inválida")
+    
+    logger.info("Iniciando pré-computação de planos", target_date=target_date, admin_user=user["user_id"])
+    _precompute_task = asyncio.create_task(plan_precomputer.run(parsed_date))
+    
+    return {
+        "success": True,
+        "message": "Pré-computação iniciada"
+    }
+
+@app.get("/admin/precompute-plans/status")
+async def precompute_plans_status(user: dict = Depends(get_current_user)):
+    """
+    Progresso e vazão da última pré-computação (apenas para administradores)
+    """
+    if not user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    
+    stats = plan_precomputer.stats
+    return {
+        "success": True,
+        "details": stats.to_dict() if stats else None
+    }
+
 if __name__ == "__main__":
     import uvicorn
     settings = get_settings()
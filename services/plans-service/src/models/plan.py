@@ -85,6 +85,7 @@ class DietPlan(BaseModel):
     total_fat: float = Field(..., ge=0)
     water_intake_ml: Optional[int] = Field(None, ge=0)
     notes: Optional[str] = None
+    input_hash: Optional[str] = None  # Hash das entradas da geração (reprodutibilidade)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
 
@@ -155,6 +156,7 @@ class WorkoutPlan(BaseModel):
     active_recovery: Optional[str] = None
     last_performance: Optional[Dict[str, Any]] = None
     notes: Optional[str] = None
+    input_hash: Optional[str] = None  # Hash das entradas da geração (reprodutibilidade)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
 
@@ -191,6 +193,7 @@ class PlanPresentation(BaseModel):
     weekly_progress_summary: Optional[str] = None
     next_milestone: Optional[str] = None
     encouragement_note: str
+    degraded_sources: List[str] = Field(default_factory=list)  # Fontes indisponíveis (apresentação parcial)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 # Modelos para Resumo Semanal
@@ -268,6 +271,13 @@ class AlgorithmConfig(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
 
+def algorithm_config_from_user(user_id: str, user_data: Dict[str, Any]) -> Optional[AlgorithmConfig]:
+    """Configuração de algoritmo salva no documento do usuário (None se ausente)"""
+    config_data = user_data.get("algorithm_config")
+    if not config_data:
+        return None
+    return AlgorithmConfig(**{**config_data, "user_id": user_id})
+
 # Modelos de Resposta da API
 
 class DietPlanResponse(BaseModel):
@@ -0,0 +1,162 @@
+"""
+Cliente HTTP do Content Service compartilhado pelo processo
+"""
+
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+import structlog
+import httpx
+
+from config.settings import get_settings
+
+logger = structlog.get_logger(__name__)
+
+RequestKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+def _request_key(path: str, params: Optional[Dict[str, Any]]) -> RequestKey:
+    """Identidade de uma requisição GET (caminho + parâmetros ordenados)"""
+    return path, tuple(sorted((params or {}).items()))
+
+
+class ContentClient:
+    """
+    Cliente do Content Service com pool de conexões e coalescência de requisições
+
+    Um único ``httpx.AsyncClient`` mantém as conexões abertas entre requisições.
+    GETs idênticos em andamento compartilham a mesma tarefa (single-flight), de
+    modo que uma rajada de gerações dispara uma só busca do catálogo. Cada
+    resposta com ``ETag`` é guardada e revalidada com ``If-None-Match``: um 304
+    devolve o payload já recebido sem nova transferência.
+
+    Os payloads retornados são compartilhados e devem ser tratados como somente leitura.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.settings = get_settings()
+        self.config = self.settings.content_client_config
+        self.base_url = (base_url or self.settings.content_service_url).rstrip("/")
+        self.transport = transport
+        self.max_retries = self.config["max_retries"]
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[RequestKey, asyncio.Task] = {}
+        self._validators: Dict[RequestKey, Tuple[str, Dict[str, Any]]] = {}
+        self.stats = {"requests": 0, "coalesced": 0, "not_modified": 0}
+
+    async def initialize(self):
+        """Abre o pool de conexões"""
+        self._get_client()
+        logger.info("Cliente do Content Service inicializado", base_url=self.base_url)
+
+    async def close(self):
+        """Fecha o pool de conexões"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Cliente compartilhado, criado no primeiro uso"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(
+                    self.config["timeout_seconds"],
+                    connect=self.config["connect_timeout_seconds"]
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.config["max_connections"],
+                    max_keepalive_connections=self.config["max_keepalive_connections"]
+                ),
+                transport=self.transport
+            )
+        return self._client
+
+    async def search_foods(self, query: str = "") -> Dict[str, Any]:
+        """
+        Busca alimentos (consulta vazia retorna o catálogo completo)
+
+        Returns:
+            Dict: Resposta do Content Service com ``version`` (ETag se ausente no corpo)
+        """
+        params = {"search": query} if query else None
+        return await self._get("/foods", params)
+
+    async def get_exercises(self) -> Dict[str, Any]:
+        """Biblioteca de exercícios com ``version`` (ETag se ausente no corpo)"""
+        return await self._get("/exercises")
+
+    async def health_check(self) -> bool:
+        """Verifica se o Content Service responde"""
+        try:
+            response = await self._get_client().get("/health")
+            return response.status_code == 200
+        except httpx.HTTPError as e:
+            logger.warning("Falha no health check do Content Service", error=str(e))
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de requisições, coalescências e respostas 304"""
+        return {**self.stats, "in_flight": len(self._inflight), "validators": len(self._validators)}
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET com single-flight: chamadores simultâneos aguardam a mesma tarefa"""
+        key = _request_key(path, params)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, path, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+
+        # shield: o cancelamento de um chamador não interrompe a busca dos demais
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: RequestKey, path: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Executa o GET condicional com retry em falhas de transporte"""
+        cached = self._validators.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.stats["requests"] += 1
+                response = await self._get_client().get(path, params=params, headers=headers)
+                break
+            except httpx.TransportError as e:
+                logger.warning("Falha na requisição ao Content Service",
+                              path=path,
+                              attempt=attempt + 1,
+                              error=str(e))
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(0.2 * 2 ** attempt)  # Backoff exponencial
+
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return cached[1]
+
+        response.raise_for_status()
+        payload = response.json()
+
+        etag = response.headers.get("etag")
+        if etag:
+            payload.setdefault("version", etag)
+            self._validators[key] = (etag, payload)
+        return payload
+
+
+# Instância compartilhada pelo processo
+_content_client: Optional[ContentClient] = None
+
+
+def get_content_client() -> ContentClient:
+    """Retorna o cliente do Content Service compartilhado, criando-o no primeiro uso"""
+    global _content_client
+    if _content_client is None:
+        _content_client = ContentClient()
+    return _content_client
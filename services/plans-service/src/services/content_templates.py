@@ -0,0 +1,175 @@
+"""
+Tabelas de textos (mensagens, dicas, marcos, instruções) carregadas uma vez por processo
+"""
+
+import hashlib
+import json
+import random
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+import structlog
+from jinja2 import Template
+
+from config.settings import get_settings
+from models.plan import DailyTip, GoalType, MealType
+
+logger = structlog.get_logger(__name__)
+
+# Arquivo padrão, editável sem alteração de código
+DEFAULT_TEMPLATES_PATH = Path(__file__).resolve().parent.parent / "data" / "content_templates.json"
+
+# Tabelas de textos de plano de versões anteriores, no diretório do arquivo de templates
+# (planos compactos gravados com elas continuam legíveis)
+PLAN_TEXTS_ARCHIVE_NAME = "plan_texts_archive.json"
+
+
+@dataclass(frozen=True)
+class GoalTips:
+    """Dicas diárias de um objetivo separadas por prioridade"""
+    high_priority: Tuple[DailyTip, ...]
+    low_priority: Tuple[DailyTip, ...]
+
+    def select(self, rng: random.Random) -> List[DailyTip]:
+        """Uma dica de alta prioridade e uma de baixa (quando houver)"""
+        selected = []
+        if self.high_priority:
+            selected.append(rng.choice(self.high_priority))
+        if self.low_priority and len(selected) < 2:
+            selected.append(rng.choice(self.low_priority))
+        return selected
+
+
+@dataclass(frozen=True)
+class ContentTemplates:
+    """
+    Tabelas imutáveis indexadas por objetivo / tipo de refeição
+
+    Os templates Jinja são compilados na carga; por chamada resta apenas a
+    consulta à tabela, a escolha com o RNG semeado e a renderização.
+    """
+    motivational_messages: Mapping[GoalType, Tuple[Template, ...]]
+    daily_summaries: Mapping[str, Template]
+    daily_tips: Mapping[GoalType, GoalTips]
+    milestones: Mapping[GoalType, Tuple[str, ...]]
+    encouragements: Mapping[str, Tuple[Template, ...]]
+    meal_instructions: Mapping[MealType, str]
+    meal_tips: Mapping[MealType, Tuple[str, ...]]
+    plan_texts: Tuple[str, ...] = ()
+    plan_texts_version: str = ""
+    plan_text_tables: Mapping[str, Tuple[str, ...]] = field(default_factory=lambda: MappingProxyType({}))
+
+    @staticmethod
+    def for_goal(table: Mapping, goal: GoalType):
+        """Entrada do objetivo, com ``manter_peso`` como padrão"""
+        return table.get(goal, table[GoalType.MANTER_PESO])
+
+
+def _by_goal(raw: Dict[str, object], convert) -> Mapping[GoalType, object]:
+    return MappingProxyType({GoalType(goal): convert(value) for goal, value in raw.items()})
+
+
+def _by_meal(raw: Dict[str, object], convert) -> Mapping[MealType, object]:
+    return MappingProxyType({MealType(meal): convert(value) for meal, value in raw.items()})
+
+
+def _compile(texts) -> Tuple[Template, ...]:
+    return tuple(Template(text) for text in texts)
+
+
+def _goal_tips(raw_tips) -> GoalTips:
+    tips = [DailyTip(**tip) for tip in raw_tips]
+    return GoalTips(
+        high_priority=tuple(tip for tip in tips if tip.priority == 1),
+        low_priority=tuple(tip for tip in tips if tip.priority == 2)
+    )
+
+
+def _plan_texts(raw: Dict[str, object]) -> Tuple[str, ...]:
+    """Textos copiados para os planos (instruções e dicas de refeição), em ordem estável"""
+    texts = set(raw["meal_instructions"].values())
+    for tips in raw["meal_tips"].values():
+        texts.update(tips)
+    return tuple(sorted(texts))
+
+
+def _plan_texts_version(plan_texts: Tuple[str, ...]) -> str:
+    return hashlib.sha256(json.dumps(plan_texts, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def _load_plan_texts_archive(archive_path: Path) -> Dict[str, Tuple[str, ...]]:
+    if not archive_path.exists():
+        return {}
+    with open(archive_path, encoding="utf-8") as archive_file:
+        return {version: tuple(texts) for version, texts in json.load(archive_file).items()}
+
+
+def archive_plan_texts(path: Optional[Path] = None) -> str:
+    """
+    Arquiva a tabela de textos de plano atual junto do arquivo de templates
+
+    Deve ser executado a cada mudança nas instruções ou dicas de refeição,
+    antes do deploy: planos gravados com a tabela anterior seguem legíveis.
+
+    Returns:
+        str: Versão arquivada
+    """
+    path = Path(path or DEFAULT_TEMPLATES_PATH)
+    templates = load_content_templates(path)
+    archive_path = path.parent / PLAN_TEXTS_ARCHIVE_NAME
+    archive = {version: list(texts) for version, texts in templates.plan_text_tables.items()}
+    with open(archive_path, "w", encoding="utf-8") as archive_file:
+        json.dump(archive, archive_file, ensure_ascii=False, indent=2, sort_keys=True)
+        archive_file.write("\n")
+    logger.info("Textos de plano arquivados", path=str(archive_path), version=templates.plan_texts_version)
+    return templates.plan_texts_version
+
+
+def load_content_templates(path: Optional[Path] = None) -> ContentTemplates:
+    """
+    Carrega e compila as tabelas de um arquivo JSON
+
+    Args:
+        path: Arquivo de templates (padrão: ``data/content_templates.json``)
+
+    Returns:
+        ContentTemplates: Tabelas imutáveis
+    """
+    path = Path(path or DEFAULT_TEMPLATES_PATH)
+    with open(path, encoding="utf-8") as templates_file:
+        raw = json.load(templates_file)
+
+    plan_texts = _plan_texts(raw)
+    plan_texts_version = _plan_texts_version(plan_texts)
+    plan_text_tables = _load_plan_texts_archive(path.parent / PLAN_TEXTS_ARCHIVE_NAME)
+    if plan_texts_version not in plan_text_tables:
+        logger.warning("Tabela de textos de plano atual não arquivada", version=plan_texts_version)
+    plan_text_tables[plan_texts_version] = plan_texts
+    
+    templates = ContentTemplates(
+        motivational_messages=_by_goal(raw["motivational_messages"], _compile),
+        daily_summaries=MappingProxyType({key: Template(text) for key, text in raw["daily_summaries"].items()}),
+        daily_tips=_by_goal(raw["daily_tips"], _goal_tips),
+        milestones=_by_goal(raw["milestones"], tuple),
+        encouragements=MappingProxyType({key: _compile(texts) for key, texts in raw["encouragements"].items()}),
+        meal_instructions=_by_meal(raw["meal_instructions"], str),
+        meal_tips=_by_meal(raw["meal_tips"], tuple),
+        plan_texts=plan_texts,
+        plan_texts_version=plan_texts_version,
+        plan_text_tables=MappingProxyType(plan_text_tables)
+    )
+
+    logger.info("Templates de conteúdo carregados", path=str(path))
+    return templates
+
+
+@lru_cache(maxsize=1)
+def get_content_templates() -> ContentTemplates:
+    """Tabelas compartilhadas pelo processo (arquivo em ``CONTENT_TEMPLATES_PATH`` se definido)"""
+    return load_content_templates(get_settings().content_templates_path)
+
+
+if __name__ == "__main__":
+    archive_plan_texts(get_settings().content_templates_path)
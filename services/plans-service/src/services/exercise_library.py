@@ -0,0 +1,93 @@
+"""
+Biblioteca de exercícios em memória compartilhada pelo processo
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import structlog
+
+from config.settings import get_settings
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True, eq=False)
+class ExerciseSnapshot:
+    """Versão imutável da biblioteca de exercícios do Content Service"""
+    version: str
+    exercises: Tuple[Mapping[str, Any], ...]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+
+def _fingerprint(exercises: List[Dict]) -> str:
+    """Gera versão determinística da biblioteca quando o Content Service não informa uma"""
+    digest = hashlib.sha1()
+    for exercise in exercises:
+        digest.update(repr(sorted(exercise.items())).encode("utf-8"))
+    return f"fp-{len(exercises)}-{digest.hexdigest()[:16]}"
+
+
+class ExerciseLibrary:
+    """
+    Exercícios buscados do Content Service e reaproveitados entre requisições
+
+    O snapshot é revalidado após ``content_data_ttl``; se a versão não mudou,
+    o mesmo objeto é mantido para que caches derivados continuem válidos.
+    """
+
+    def __init__(self, content_service, ttl_seconds: Optional[int] = None):
+        self.content_service = content_service
+        self.ttl_seconds = ttl_seconds or get_settings().cache_config["content_data_ttl"]
+        self._snapshot: Optional[ExerciseSnapshot] = None
+        self._checked_at = 0.0
+        self._load_lock = asyncio.Lock()
+
+    async def get_snapshot(self) -> ExerciseSnapshot:
+        """Retorna o snapshot atual, recarregando-o se expirado"""
+        if self._snapshot is None or self._expired():
+            async with self._load_lock:
+                if self._snapshot is None or self._expired():
+                    await self._load()
+        return self._snapshot
+
+    async def refresh(self) -> ExerciseSnapshot:
+        """Revalida a biblioteca imediatamente, sem esperar o TTL"""
+        async with self._load_lock:
+            await self._load()
+        return self._snapshot
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._checked_at > self.ttl_seconds
+
+    async def _load(self):
+        """Busca os exercícios e publica um novo snapshot se a versão mudou"""
+        response = await self.content_service.get_exercises()
+        exercises = response.get("exercises", [])
+        version = response.get("version") or _fingerprint(exercises)
+        self._checked_at = time.monotonic()
+
+        if self._snapshot is not None and self._snapshot.version == version:
+            return
+
+        self._snapshot = ExerciseSnapshot(version=version, exercises=tuple(exercises))
+        logger.info("Biblioteca de exercícios carregada", version=version, count=len(exercises))
+
+
+# Instância compartilhada pelo processo
+_exercise_library: Optional[ExerciseLibrary] = None
+
+
+def get_exercise_library(content_service=None) -> ExerciseLibrary:
+    """Retorna a biblioteca compartilhada, criando-a no primeiro uso"""
+    global _exercise_library
+    if _exercise_library is None:
+        if content_service is None:
+            raise RuntimeError("Biblioteca de exercícios não inicializada")
+        _exercise_library = ExerciseLibrary(content_service)
+    return _exercise_library
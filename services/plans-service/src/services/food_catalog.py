@@ -0,0 +1,168 @@
+"""
+Catálogo de alimentos em memória compartilhado pelo processo
+"""
+
+import asyncio
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import structlog
+
+from adapters.taco_data_adapter import TacoDataAdapter
+from algorithms.food_matrix import FoodColumns
+from algorithms.restriction_index import RestrictionIndex
+from config.settings import get_settings
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Versão imutável do catálogo de alimentos já convertido da TACO"""
+    version: str
+    foods: Tuple[Mapping[str, Any], ...]
+    restriction_index: RestrictionIndex
+    food_columns: FoodColumns
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+
+    def __len__(self) -> int:
+        return len(self.foods)
+
+
+def _freeze_food(food: Dict[str, Any]) -> Mapping[str, Any]:
+    """Converte um alimento em estrutura somente leitura"""
+    frozen = {}
+    for key, value in food.items():
+        if isinstance(value, dict):
+            value = MappingProxyType(dict(value))
+        elif isinstance(value, list):
+            value = tuple(value)
+        frozen[key] = value
+    return MappingProxyType(frozen)
+
+
+def _fingerprint(taco_foods: List[Dict]) -> str:
+    """Gera versão determinística do catálogo quando o Content Service não informa uma"""
+    digest = hashlib.sha1()
+    for food in taco_foods:
+        digest.update(str(food.get("codigo", "")).encode("utf-8"))
+        digest.update(repr(sorted(food.get("composicao", {}).items())).encode("utf-8"))
+    return f"fp-{len(taco_foods)}-{digest.hexdigest()[:16]}"
+
+
+class FoodCatalog:
+    """
+    Catálogo de alimentos convertido uma única vez e compartilhado entre requisições
+
+    O snapshot é carregado na inicialização (ou no primeiro uso) e substituído
+    atomicamente por uma tarefa em segundo plano quando a versão do conteúdo muda.
+    """
+
+    def __init__(self, content_service, refresh_interval_seconds: Optional[int] = None):
+        self.content_service = content_service
+        self.taco_adapter = TacoDataAdapter()
+        self.refresh_interval_seconds = (
+            refresh_interval_seconds or get_settings().cache_config["content_data_ttl"]
+        )
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._load_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        """Snapshot atual (None se ainda não carregado)"""
+        return self._snapshot
+
+    async def get_snapshot(self) -> CatalogSnapshot:
+        """Retorna o snapshot atual, carregando o catálogo no primeiro uso"""
+        if self._snapshot is None:
+            async with self._load_lock:
+                if self._snapshot is None:
+                    await self._load()
+        return self._snapshot
+
+    async def load(self) -> CatalogSnapshot:
+        """Carrega o catálogo (usado na inicialização do serviço)"""
+        async with self._load_lock:
+            await self._load()
+        return self._snapshot
+
+    async def refresh(self) -> bool:
+        """
+        Recarrega o catálogo se a versão do conteúdo mudou
+
+        Uma única busca decide e, se preciso, monta o novo snapshot: com ETag
+        ela é condicional (304 sem transferência); sem ETag o mesmo payload
+        fornece a versão e os alimentos, sem um segundo download.
+
+        Returns:
+            bool: True se um novo snapshot foi publicado
+        """
+        async with self._load_lock:
+            previous_version = self._snapshot.version if self._snapshot is not None else None
+            await self._load()
+            return self._snapshot.version != previous_version
+
+    def start_background_refresh(self):
+        """Inicia tarefa periódica de atualização do catálogo"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Interrompe a tarefa de atualização em segundo plano"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self):
+        """Loop de atualização periódica"""
+        while True:
+            await asyncio.sleep(self.refresh_interval_seconds)
+            try:
+                if await self.refresh():
+                    logger.info("Catálogo de alimentos atualizado", version=self._snapshot.version)
+            except Exception as e:
+                logger.error("Erro ao atualizar catálogo de alimentos", error=str(e))
+
+    async def _load(self):
+        """Busca o catálogo e, se a versão mudou, converte e publica um novo snapshot"""
+        foods_response = await self.content_service.search_foods("")
+        taco_foods = foods_response.get("data", [])
+        version = foods_response.get("version") or _fingerprint(taco_foods)
+
+        if self._snapshot is not None and self._snapshot.version == version:
+            return
+
+        converted_foods = self.taco_adapter.convert_foods_from_taco(taco_foods)
+        foods = tuple(_freeze_food(food) for food in converted_foods)
+        self._snapshot = CatalogSnapshot(
+            version=version,
+            foods=foods,
+            restriction_index=RestrictionIndex(foods),
+            food_columns=FoodColumns(foods)
+        )
+
+        logger.info("Catálogo de alimentos carregado",
+                   version=version,
+                   taco_count=len(taco_foods),
+                   converted_count=len(converted_foods))
+
+
+# Instância compartilhada pelo processo
+_food_catalog: Optional[FoodCatalog] = None
+
+
+def get_food_catalog(content_service=None) -> FoodCatalog:
+    """Retorna o catálogo compartilhado, criando-o no primeiro uso"""
+    global _food_catalog
+    if _food_catalog is None:
+        if content_service is None:
+            raise RuntimeError("Catálogo de alimentos não inicializado")
+        _food_catalog = FoodCatalog(content_service)
+    return _food_catalog
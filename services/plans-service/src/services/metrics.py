@@ -0,0 +1,193 @@
+"""
+Métricas Prometheus da geração de planos
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+import structlog
+
+try:
+    from prometheus_client import CollectorRegistry, Histogram, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+from config.settings import get_settings
+
+logger = structlog.get_logger(__name__)
+
+# Limites dos histogramas (segundos): de leituras em cache a gerações lentas
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _StageTimer:
+    """Mede um bloco e registra a duração no histograma da etapa"""
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _GenerationTimer:
+    """Mede uma geração completa; ``outcome`` é definido por quem chama"""
+    __slots__ = ("_metrics", "_plan", "_start", "outcome")
+
+    def __init__(self, metrics: "PlanMetrics", plan: str):
+        self._metrics = metrics
+        self._plan = plan
+        self._start = time.perf_counter()
+        self.outcome = "generated"
+
+    def observe(self):
+        self._metrics._generation_seconds.labels(self._plan, self.outcome).observe(
+            time.perf_counter() - self._start
+        )
+
+
+class _NoopTimer:
+    """Timer compartilhado quando as métricas estão desabilitadas"""
+    __slots__ = ("outcome",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def observe(self):
+        pass
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _CacheStatsCollector:
+    """Exporta, no momento da coleta, os contadores que os caches já mantêm"""
+
+    def __init__(self):
+        self._caches: Dict[str, Tuple[Callable[[], Dict[str, Any]], Sequence[str], Sequence[str]]] = {}
+
+    def add(self, cache: str, stats: Callable[[], Dict[str, Any]], hits: Sequence[str], lookups: Sequence[str]):
+        self._caches[cache] = (stats, hits, lookups)
+
+    def collect(self):
+        events = CounterMetricFamily(
+            "plans_cache_events", "Eventos dos caches do Plans Service", labels=["cache", "event"]
+        )
+        ratio = GaugeMetricFamily(
+            "plans_cache_hit_ratio", "Fração das consultas atendidas pelo cache", labels=["cache"]
+        )
+        for cache, (stats_fn, hits, lookups) in self._caches.items():
+            stats = stats_fn()
+            for event in dict.fromkeys((*hits, *lookups)):
+                events.add_metric([cache, event], stats.get(event, 0))
+            total = sum(stats.get(key, 0) for key in lookups)
+            ratio.add_metric([cache], sum(stats.get(key, 0) for key in hits) / total if total else 0.0)
+        yield events
+        yield ratio
+
+
+class PlanMetrics:
+    """
+    Histogramas por etapa da geração de planos e taxas de acerto dos caches
+
+    Cada etapa (cache, plano existente, usuário, catálogo, montagem, gravação)
+    é medida com ``stage``; ``generation`` mede a chamada inteira por
+    resultado (cache, existente, gerado, erro). Os caches são lidos apenas na
+    coleta. Desabilitado (``METRICS_ENABLED=false`` ou sem prometheus_client),
+    todos os timers são um objeto compartilhado sem efeito.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        requested = get_settings().metrics_enabled if enabled is None else enabled
+        if requested and not PROMETHEUS_AVAILABLE:
+            logger.warning("prometheus_client não instalado, métricas desabilitadas")
+        self.enabled = requested and PROMETHEUS_AVAILABLE
+        self.registry = None
+
+        if self.enabled:
+            self.registry = CollectorRegistry()
+            self._stage_seconds = Histogram(
+                "plans_generation_stage_seconds",
+                "Duração de cada etapa da geração de planos",
+                ["plan", "stage"],
+                buckets=STAGE_BUCKETS,
+                registry=self.registry
+            )
+            self._generation_seconds = Histogram(
+                "plans_generation_seconds",
+                "Duração total da geração de planos por resultado",
+                ["plan", "outcome"],
+                buckets=STAGE_BUCKETS,
+                registry=self.registry
+            )
+            self._caches = _CacheStatsCollector()
+            self.registry.register(self._caches)
+            self._stage_children: Dict[Tuple[str, str], Any] = {}
+
+    def stage(self, plan: str, stage: str):
+        """Context manager que mede uma etapa (``with metrics.stage("diet", "save"):``)"""
+        if not self.enabled:
+            return _NOOP_TIMER
+        child = self._stage_children.get((plan, stage))
+        if child is None:
+            child = self._stage_seconds.labels(plan, stage)
+            self._stage_children[(plan, stage)] = child
+        return _StageTimer(child)
+
+    def generation(self, plan: str):
+        """Timer da geração inteira; chamar ``observe()`` ao final"""
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _GenerationTimer(self, plan)
+
+    def track_cache(
+        self,
+        cache: str,
+        stats: Callable[[], Dict[str, Any]],
+        hits: Sequence[str],
+        lookups: Sequence[str]
+    ):
+        """
+        Exporta os contadores de um cache e sua taxa de acerto
+
+        Args:
+            cache: Nome do cache no label
+            stats: Função que retorna os contadores atuais
+            hits: Contadores que representam acertos
+            lookups: Contadores cuja soma é o total de consultas
+        """
+        if self.enabled:
+            self._caches.add(cache, stats, hits, lookups)
+
+    def render(self) -> bytes:
+        """Métricas no formato de exposição do Prometheus"""
+        if not self.enabled:
+            return b""
+        return generate_latest(self.registry)
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPE_LATEST
+
+
+# Instância compartilhada pelo processo
+_plan_metrics: Optional[PlanMetrics] = None
+
+
+def get_plan_metrics() -> PlanMetrics:
+    """Retorna as métricas compartilhadas, criando-as no primeiro uso"""
+    global _plan_metrics
+    if _plan_metrics is None:
+        _plan_metrics = PlanMetrics()
+    return _plan_metrics
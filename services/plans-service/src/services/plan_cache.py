@@ -0,0 +1,324 @@
+"""
+Cache de planos gerados em dois níveis (memória do processo + Redis)
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Optional, Set, Tuple, Type, Union
+import structlog
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from algorithms.seeding import plan_input_hash
+from config.settings import get_settings
+from models.plan import AlgorithmConfig, DietPlan, WorkoutPlan
+
+logger = structlog.get_logger(__name__)
+
+Plan = Union[DietPlan, WorkoutPlan]
+
+# Entrada do nível local: instante de expiração (monotônico) e plano
+MemoryEntry = Tuple[float, Plan]
+
+# Modelo de cada tipo de plano armazenado
+PLAN_MODELS: Dict[str, Type[Plan]] = {
+    "diet": DietPlan,
+    "workout": WorkoutPlan
+}
+
+
+def plan_cache_key(
+    kind: str,
+    user_id: str,
+    target_date: date,
+    config: AlgorithmConfig,
+    content_version: Optional[str] = None
+) -> str:
+    """Chave do plano: usuário, data e hash das entradas (configuração e versão do conteúdo)"""
+    input_hash = plan_input_hash(kind, user_id, target_date, config, content_version)
+    return _plan_key(kind, user_id, target_date, input_hash)
+
+
+def _plan_key(kind: str, user_id: str, target_date: date, input_hash: str) -> str:
+    return f"plan:{kind}:{user_id}:{target_date.isoformat()}:{input_hash}"
+
+
+def _day_prefix(kind: str, user_id: str, target_date: date) -> str:
+    """Prefixo comum às chaves de um tipo de plano em um dia (qualquer hash)"""
+    return f"plan:{kind}:{user_id}:{target_date.isoformat()}:"
+
+
+def day_invalidation_message(kind: str, user_id: str, target_date: date) -> str:
+    """
+    Mensagem de invalidação restrita a um dia
+
+    As invalidações por usuário publicam apenas o ID; as de um dia publicam
+    este JSON, distinguível pelo ``{`` inicial (IDs de usuário não começam
+    com ``{``). O tracking-service ouve o mesmo canal.
+    """
+    return json.dumps({"user_id": user_id, "kind": kind, "date": target_date.isoformat()})
+
+
+def _user_keys_key(user_id: str) -> str:
+    """Conjunto Redis com as chaves de plano de um usuário"""
+    return f"plan-keys:{user_id}"
+
+
+class PlanCache:
+    """
+    Cache de ``DietPlan`` / ``WorkoutPlan`` endereçado pelo conteúdo das entradas
+
+    O nível local guarda os próprios objetos (LRU com TTL curto), evitando
+    leitura no Firestore e reconstrução do modelo; o Redis guarda o JSON do
+    plano por ``cache_ttl`` e é compartilhado entre instâncias. Como a chave
+    inclui o hash da configuração, mudanças de perfil que alteram a
+    configuração geram novas chaves; ``invalidate_user`` remove as entradas
+    antigas em todos os níveis e avisa as demais instâncias pelo Redis, e
+    ``invalidate_day`` faz o mesmo apenas para um tipo de plano em um dia.
+
+    Os planos retornados são compartilhados e devem ser tratados como somente leitura.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, memory_ttl: Optional[int] = None):
+        self.settings = get_settings()
+        config = self.settings.plan_cache_config
+        self.max_entries = max_entries or config["memory_max_entries"]
+        self.memory_ttl = memory_ttl or config["memory_ttl"]
+        self.redis_ttl = self.settings.cache_ttl
+        self.channel = config["invalidation_channel"]
+
+        self.redis_client = None
+        self.use_redis = REDIS_AVAILABLE and self.settings.redis_url is not None
+        self._memory: "OrderedDict[str, MemoryEntry]" = OrderedDict()
+        self._user_keys: Dict[str, Set[str]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self.stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+
+    async def initialize(self):
+        """Conecta ao Redis e passa a ouvir invalidações de outras instâncias"""
+        if not self.use_redis:
+            logger.info("Cache de planos apenas em memória (Redis não configurado)")
+            return
+        try:
+            self.redis_client = aioredis.from_url(self.settings.redis_url, decode_responses=True)
+            await self.redis_client.ping()
+            self._listener = asyncio.create_task(self._listen_invalidations())
+            logger.info("Cache de planos Redis inicializado")
+        except Exception as e:
+            logger.warning("Falha ao conectar Redis, cache de planos apenas em memória", error=str(e))
+            self.redis_client = None
+            self.use_redis = False
+
+    async def close(self):
+        """Encerra o listener e a conexão com o Redis"""
+        if self._listener:
+            self._listener.cancel()
+        if self.redis_client:
+            await self.redis_client.close()
+
+    async def get(
+        self,
+        kind: str,
+        user_id: str,
+        target_date: date,
+        config: AlgorithmConfig,
+        content_version: Optional[str] = None
+    ) -> Optional[Plan]:
+        """
+        Busca um plano no cache
+
+        Args:
+            kind: Tipo de plano ("diet" ou "workout")
+            user_id: ID do usuário
+            target_date: Data do plano
+            config: Configuração do algoritmo usada na geração
+            content_version: Versão do catálogo ou da biblioteca de exercícios atual
+
+        Returns:
+            Optional[Plan]: Plano em cache ou None
+        """
+        key = plan_cache_key(kind, user_id, target_date, config, content_version)
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, plan = entry
+            if time.monotonic() < expires_at:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return plan
+            self._evict(key)
+
+        if self.redis_client:
+            try:
+                raw = await self.redis_client.get(key)
+                if raw:
+                    plan = PLAN_MODELS[kind](**json.loads(raw))
+                    self._remember(key, user_id, plan)
+                    self.stats["redis_hits"] += 1
+                    return plan
+            except Exception as e:
+                logger.warning("Erro ao ler plano do Redis", key=key, error=str(e))
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, kind: str, plan: Plan, config: AlgorithmConfig, content_version: Optional[str] = None):
+        """
+        Armazena um plano nos dois níveis
+
+        A chave usa o hash com que o plano foi gerado: dias montados dentro de
+        uma semana (com penalidade de variedade) têm hash próprio e não ocupam
+        a chave do mesmo dia gerado isoladamente. Planos sem hash gravado
+        (geração sem semeadura) usam o hash das entradas atuais.
+        """
+        input_hash = plan.input_hash or plan_input_hash(kind, plan.user_id, plan.date, config, content_version)
+        key = _plan_key(kind, plan.user_id, plan.date, input_hash)
+        self._remember(key, plan.user_id, plan)
+
+        if self.redis_client:
+            try:
+                payload = json.dumps(plan.model_dump(), default=str)
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.setex(key, self.redis_ttl, payload)
+                    pipe.sadd(_user_keys_key(plan.user_id), key)
+                    pipe.expire(_user_keys_key(plan.user_id), self.redis_ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning("Erro ao gravar plano no Redis", key=key, error=str(e))
+
+    async def invalidate_user(self, user_id: str) -> int:
+        """
+        Remove todos os planos de um usuário e avisa as demais instâncias
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        removed = self._forget_user(user_id)
+
+        if self.redis_client:
+            try:
+                keys = await self.redis_client.smembers(_user_keys_key(user_id))
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    if keys:
+                        pipe.delete(*keys)
+                    pipe.delete(_user_keys_key(user_id))
+                    pipe.publish(self.channel, user_id)
+                    await pipe.execute()
+                removed += len(keys)
+            except Exception as e:
+                logger.warning("Erro ao invalidar planos no Redis", user_id=user_id, error=str(e))
+
+        logger.info("Cache de planos invalidado", user_id=user_id, removed=removed)
+        return removed
+
+    async def invalidate_day(self, kind: str, user_id: str, target_date: date) -> int:
+        """
+        Remove os planos de um tipo em um dia do usuário e avisa as demais instâncias
+
+        Os demais dias e tipos do usuário continuam em cache.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        removed = self._forget_day(kind, user_id, target_date)
+
+        if self.redis_client:
+            try:
+                prefix = _day_prefix(kind, user_id, target_date)
+                keys = [
+                    key for key in await self.redis_client.smembers(_user_keys_key(user_id))
+                    if key.startswith(prefix)
+                ]
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    if keys:
+                        pipe.delete(*keys)
+                        pipe.srem(_user_keys_key(user_id), *keys)
+                    pipe.publish(self.channel, day_invalidation_message(kind, user_id, target_date))
+                    await pipe.execute()
+                removed += len(keys)
+            except Exception as e:
+                logger.warning("Erro ao invalidar planos do dia no Redis",
+                               user_id=user_id, kind=kind, date=target_date, error=str(e))
+
+        logger.info("Cache de planos do dia invalidado", user_id=user_id, kind=kind, date=target_date, removed=removed)
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de acerto e ocupação do cache"""
+        return {**self.stats, "memory_entries": len(self._memory), "redis": self.redis_client is not None}
+
+    def _remember(self, key: str, user_id: str, plan: Plan):
+        """Insere no nível local respeitando o limite de entradas"""
+        self._memory[key] = (time.monotonic() + self.memory_ttl, plan)
+        self._memory.move_to_end(key)
+        self._user_keys.setdefault(user_id, set()).add(key)
+        while len(self._memory) > self.max_entries:
+            self._evict(next(iter(self._memory)))
+
+    def _evict(self, key: str):
+        """Remove uma chave do nível local e do índice por usuário"""
+        entry = self._memory.pop(key, None)
+        if entry is None:
+            return
+        user_keys = self._user_keys.get(entry[1].user_id)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[entry[1].user_id]
+
+    def _forget_user(self, user_id: str) -> int:
+        """Remove as entradas locais de um usuário"""
+        keys = self._user_keys.pop(user_id, set())
+        for key in keys:
+            self._memory.pop(key, None)
+        return len(keys)
+
+    def _forget_day(self, kind: str, user_id: str, target_date: date) -> int:
+        """Remove as entradas locais de um tipo de plano em um dia do usuário"""
+        prefix = _day_prefix(kind, user_id, target_date)
+        keys = [key for key in self._user_keys.get(user_id, ()) if key.startswith(prefix)]
+        for key in keys:
+            self._evict(key)
+        return len(keys)
+
+    def _apply_invalidation(self, data: str):
+        """Aplica ao nível local uma mensagem do canal de invalidação (usuário ou dia)"""
+        if data.startswith("{"):
+            day = json.loads(data)
+            self._forget_day(day["kind"], day["user_id"], date.fromisoformat(day["date"]))
+        else:
+            self._forget_user(data)
+
+    async def _listen_invalidations(self):
+        """Descarta do nível local os usuários e dias invalidados por outras instâncias"""
+        pubsub = self.redis_client.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self._apply_invalidation(message["data"])
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Listener de invalidação do cache de planos encerrado", error=str(e))
+        finally:
+            await pubsub.close()
+
+
+# Instância compartilhada pelo processo
+_plan_cache: Optional[PlanCache] = None
+
+
+def get_plan_cache() -> PlanCache:
+    """Retorna o cache de planos compartilhado, criando-o no primeiro uso"""
+    global _plan_cache
+    if _plan_cache is None:
+        _plan_cache = PlanCache()
+    return _plan_cache
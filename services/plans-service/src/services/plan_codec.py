@@ -0,0 +1,458 @@
+"""
+Formato compacto dos planos gravados no Firestore
+"""
+
+from datetime import date, datetime, time
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+import msgpack
+import structlog
+from pydantic import create_model
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+from config.settings import get_settings
+from models.plan import (
+    DietPlan, DifficultyLevel, Exercise, ExerciseSet, FoodItem, Meal, MealType,
+    Warmup, WarmupExercise, WorkoutPlan, WorkoutSession, WorkoutType
+)
+from services.content_templates import get_content_templates
+
+logger = structlog.get_logger(__name__)
+
+Plan = Union[DietPlan, WorkoutPlan]
+
+# Marca dos documentos no formato compacto
+COMPACT_FORMAT = "compact-v1"
+
+# Corpos decodificados mantidos em memória (leituras repetidas do mesmo plano)
+DECODED_BODY_CACHE_SIZE = 256
+
+# Tipos de campo do corpo compacto
+_VALUE = "value"    # Número, booleano ou estrutura livre, gravado como está
+_TEXT = "text"      # Referência à tabela de textos do documento ou dos templates
+_TEXTS = "texts"    # Lista de referências de texto
+_TIME = "time"      # Horário (ISO) como referência de texto
+
+
+class PlanCodecError(Exception):
+    """Documento compacto que não pode ser decodificado por este processo"""
+
+
+class _Schema:
+    """
+    Ordem e tipo dos campos de um modelo no corpo compacto
+
+    Os nomes dos campos não são gravados: cada modelo vira uma lista na ordem
+    de declaração. Campos novos devem ser adicionados ao final do modelo
+    (documentos antigos ficam com o valor padrão); remover ou reordenar
+    campos exige um novo ``COMPACT_FORMAT``.
+    """
+
+    def __init__(self, model, kinds: Dict[str, Any], exclude: Tuple[str, ...] = ()):
+        self.model = model
+        self.fields = tuple(name for name in model.model_fields if name not in exclude)
+        self.kinds = tuple(kinds.get(name, _VALUE) for name in self.fields)
+        # Na decodificação só os campos de texto e os aninhados precisam de conversão
+        self.converted = tuple(
+            (position, kind) for position, kind in enumerate(self.kinds) if kind is not _VALUE
+        )
+
+    def defaults(self, start: int) -> Dict[str, Any]:
+        """Valores padrão dos campos a partir de ``start`` (ausentes em documentos antigos)"""
+        model_fields = self.model.model_fields
+        return {
+            name: model_fields[name].get_default(call_default_factory=True)
+            for name in self.fields[start:]
+        }
+
+
+def _construct(model, fields: Dict[str, Any]):
+    """
+    Instância do modelo com os campos já completos, sem validação
+
+    Equivale a ``model_construct`` sem a resolução de aliases e defaults por
+    campo, que dominava o custo da leitura (os modelos dos planos não têm
+    aliases e os defaults ausentes são preenchidos por ``_Schema.defaults``).
+    """
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", fields)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(fields))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _enum(cls):
+    return ("enum", cls)
+
+
+def _many(schema: _Schema):
+    return ("many", schema)
+
+
+def _one(schema: _Schema):
+    return ("one", schema)
+
+
+_FOOD = _Schema(FoodItem, {"food_id": _TEXT, "name": _TEXT, "unit": _TEXT})
+_MEAL = _Schema(Meal, {
+    "meal_type": _enum(MealType),
+    "name": _TEXT,
+    "time_suggestion": _TIME,
+    "foods": _many(_FOOD),
+    "instructions": _TEXT,
+    "tips": _TEXTS
+})
+_SET = _Schema(ExerciseSet, {"notes": _TEXT})
+_EXERCISE = _Schema(Exercise, {
+    "exercise_id": _TEXT,
+    "name": _TEXT,
+    "muscle_groups": _TEXTS,
+    "equipment": _TEXT,
+    "difficulty": _enum(DifficultyLevel),
+    "sets": _many(_SET),
+    "instructions": _TEXT,
+    "tips": _TEXTS,
+    "video_url": _TEXT,
+    "image_url": _TEXT,
+    "safety_notes": _TEXTS
+})
+_WARMUP_EXERCISE = _Schema(WarmupExercise, {"name": _TEXT, "instructions": _TEXT, "video_url": _TEXT})
+_WARMUP = _Schema(Warmup, {"exercises": _many(_WARMUP_EXERCISE), "notes": _TEXT})
+_SESSION = _Schema(WorkoutSession, {
+    "session_id": _TEXT,
+    "name": _TEXT,
+    "workout_type": _enum(WorkoutType),
+    "muscle_groups_focus": _TEXTS,
+    "difficulty": _enum(DifficultyLevel),
+    "warmup": _one(_WARMUP),
+    "exercises": _many(_EXERCISE),
+    "cooldown_notes": _TEXT,
+    "equipment_needed": _TEXTS,
+    "location": _TEXT,
+    "notes": _TEXT
+})
+
+# Campos mantidos como campos comuns do documento (consultas e leitura sem decodificar o corpo)
+DIET_HEADER = (
+    "user_id", "date", "goal",
+    "target_calories", "target_protein", "target_carbs", "target_fat",
+    "total_calories", "total_protein", "total_carbs", "total_fat",
+    "water_intake_ml", "input_hash", "created_at", "updated_at"
+)
+WORKOUT_HEADER = (
+    "user_id", "date", "goal", "total_estimated_duration_minutes",
+    "rest_day", "input_hash", "created_at", "updated_at"
+)
+
+_PLAN_SCHEMAS: Dict[str, Tuple[_Schema, Tuple[str, ...]]] = {
+    "diet": (
+        _Schema(DietPlan, {"meals": _many(_MEAL), "notes": _TEXT}, exclude=DIET_HEADER),
+        DIET_HEADER
+    ),
+    "workout": (
+        _Schema(WorkoutPlan, {"sessions": _many(_SESSION), "active_recovery": _TEXT, "notes": _TEXT},
+                exclude=WORKOUT_HEADER),
+        WORKOUT_HEADER
+    )
+}
+
+
+class _Encoder:
+    """Converte modelos em listas, com textos repetidos gravados uma única vez"""
+
+    def __init__(self, template_ids: Dict[str, int]):
+        self.template_ids = template_ids
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self.uses_templates = False
+
+    def text(self, value: str) -> int:
+        """Textos de template viram ``-(id + 1)``; os demais, índice na tabela do documento"""
+        template_id = self.template_ids.get(value)
+        if template_id is not None:
+            self.uses_templates = True
+            return -template_id - 1
+        ref = self._string_ids.get(value)
+        if ref is None:
+            ref = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return ref
+
+    def model(self, schema: _Schema, obj) -> List[Any]:
+        values = []
+        for name, kind in zip(schema.fields, schema.kinds):
+            value = getattr(obj, name)
+            if value is None or kind is _VALUE:
+                values.append(value)
+            elif kind is _TEXT:
+                values.append(self.text(value))
+            elif kind is _TEXTS:
+                values.append([self.text(item) for item in value])
+            elif kind is _TIME:
+                values.append(self.text(value.isoformat()))
+            else:
+                tag, arg = kind
+                if tag == "enum":
+                    values.append(self.text(value.value if isinstance(value, Enum) else value))
+                elif tag == "many":
+                    values.append([self.model(arg, item) for item in value])
+                else:
+                    values.append(self.model(arg, value))
+        return values
+
+
+class _Decoder:
+    """
+    Reconstrói os modelos sem revalidar o corpo
+
+    O corpo foi produzido por ``_Encoder`` a partir de modelos já validados,
+    então os modelos são montados sem validação (``_construct``); só textos,
+    enums e horários são convertidos. O cabeçalho, editável fora do codec, é
+    validado.
+    """
+
+    def __init__(self, strings: List[str], template_texts: Tuple[str, ...]):
+        # Índices negativos contam do fim: ``table[-(id + 1)]`` é ``template_texts[id]``
+        self.table = strings + list(reversed(template_texts))
+
+    def fields(self, schema: _Schema, values: List[Any]) -> Dict[str, Any]:
+        """Campos de um modelo, já convertidos (``values`` é convertida no lugar)"""
+        table = self.table
+        count = len(values)
+        for position, kind in schema.converted:
+            if position >= count:
+                break
+            value = values[position]
+            if value is None:
+                continue
+            if kind is _TEXT:
+                values[position] = table[value]
+            elif kind is _TEXTS:
+                values[position] = [table[ref] for ref in value]
+            elif kind is _TIME:
+                values[position] = time.fromisoformat(table[value])
+            else:
+                tag, arg = kind
+                if tag == "enum":
+                    values[position] = arg(table[value])
+                elif tag == "many":
+                    values[position] = [_construct(arg.model, self.fields(arg, item)) for item in value]
+                else:
+                    values[position] = _construct(arg.model, self.fields(arg, value))
+
+        fields = dict(zip(schema.fields, values))
+        if count < len(schema.fields):
+            fields.update(schema.defaults(count))
+        return fields
+
+
+def _packable(value: Any) -> Any:
+    """Valores livres (ex.: ``last_performance``) que o msgpack não serializa"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def _as_date(value: Any) -> Any:
+    """Campo ``date`` do cabeçalho como ``date`` (o Firestore devolve datetime)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+@lru_cache(maxsize=None)
+def _header_model(kind: str):
+    """Modelo só com os campos do cabeçalho do plano, para validá-los sem o corpo"""
+    schema, header_fields = _PLAN_SCHEMAS[kind]
+    fields = schema.model.model_fields
+    return create_model(
+        f"{schema.model.__name__}Header",
+        **{name: (fields[name].annotation, fields[name]) for name in header_fields}
+    )
+
+
+def _decode_header(kind: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    header = {name: data.get(name) for name in _PLAN_SCHEMAS[kind][1]}
+    header["date"] = _as_date(header["date"])
+    return dict(_header_model(kind).model_validate(header).__dict__)
+
+
+@lru_cache(maxsize=2)
+def _template_ids(plan_texts: Tuple[str, ...]) -> Dict[str, int]:
+    return {text: template_id for template_id, text in enumerate(plan_texts)}
+
+
+@lru_cache(maxsize=None)
+def _body_encoding(compression: str) -> str:
+    """Codificação efetiva do corpo (avisa uma vez se o zstd pedido não estiver instalado)"""
+    if compression == "zstd":
+        if ZSTD_AVAILABLE:
+            return "msgpack+zstd"
+        logger.warning("zstandard não instalado, planos compactos gravados sem compressão")
+    return "msgpack"
+
+
+def encode_compact(kind: str, plan: Plan, compression: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Documento compacto de um plano
+
+    Cabeçalho em campos comuns e o restante em ``body``: listas msgpack sem
+    nomes de campo, textos repetidos (unidades, grupos musculares, dicas)
+    gravados uma vez e textos de template (instruções e dicas de refeição)
+    referenciados pelo índice na tabela ``plan_texts``.
+
+    Args:
+        kind: Tipo de plano ("diet" ou "workout")
+        plan: Plano a gravar
+        compression: "zstd" ou "none" (padrão: ``plan_storage_config``)
+
+    Returns:
+        Dict: Documento pronto para o Firestore
+    """
+    config = get_settings().plan_storage_config
+    schema, header_fields = _PLAN_SCHEMAS[kind]
+    templates = get_content_templates()
+
+    encoder = _Encoder(_template_ids(templates.plan_texts))
+    values = encoder.model(schema, plan)
+    body = msgpack.packb([encoder.strings, values], use_bin_type=True, default=_packable)
+
+    encoding = _body_encoding(compression or config["compression"])
+    if encoding == "msgpack+zstd":
+        body = zstandard.ZstdCompressor(level=config["compression_level"]).compress(body)
+
+    document = {name: getattr(plan, name) for name in header_fields}
+    document.update({
+        "storage_format": COMPACT_FORMAT,
+        "body_encoding": encoding,
+        "body": body,
+        "text_version": templates.plan_texts_version if encoder.uses_templates else None
+    })
+    return document
+
+
+@lru_cache(maxsize=None)
+def _decompressor() -> "zstandard.ZstdDecompressor":
+    return zstandard.ZstdDecompressor()
+
+
+def _template_texts(text_version: Optional[str]) -> Tuple[str, ...]:
+    """Tabela de textos de template da versão gravada no documento"""
+    templates = get_content_templates()
+    if not text_version:
+        return templates.plan_texts
+    texts = templates.plan_text_tables.get(text_version)
+    if texts is None:
+        raise PlanCodecError(f"Versão dos templates de texto desconhecida: {text_version}")
+    return texts
+
+
+@lru_cache(maxsize=DECODED_BODY_CACHE_SIZE)
+def _decode_body(kind: str, body: bytes, encoding: Optional[str], text_version: Optional[str]) -> Dict[str, Any]:
+    """
+    Campos do corpo de um documento compacto, decodificados uma vez por conteúdo
+
+    Os planos são tratados como imutáveis (atualizações usam ``model_copy``),
+    então os modelos aninhados decodificados podem ser compartilhados entre
+    leituras do mesmo corpo.
+    """
+    if encoding == "msgpack+zstd":
+        if not ZSTD_AVAILABLE:
+            raise PlanCodecError("Plano comprimido com zstd e zstandard não instalado")
+        body = _decompressor().decompress(body)
+
+    strings, values = msgpack.unpackb(body, raw=False)
+    decoder = _Decoder(strings, _template_texts(text_version))
+    return decoder.fields(_PLAN_SCHEMAS[kind][0], values)
+
+
+def decode_compact(kind: str, data: Dict[str, Any], header: Optional[Dict[str, Any]] = None) -> Plan:
+    """Reconstrói o plano de um documento compacto (``header``: cabeçalho já validado)"""
+    fields = dict(_decode_body(kind, data["body"], data.get("body_encoding"), data.get("text_version")))
+    fields.update(header or _decode_header(kind, data))
+    return _construct(_PLAN_SCHEMAS[kind][0].model, fields)
+
+
+def encode_plan_document(kind: str, plan: Plan) -> Dict[str, Any]:
+    """Documento do plano no formato configurado (``PLAN_STORAGE_FORMAT``)"""
+    if get_settings().plan_storage_config["format"] == "compact":
+        return encode_compact(kind, plan)
+    return plan.dict()
+
+
+def encode_plan_update(kind: str, plan: Plan, fields: Tuple[str, ...], compact: bool) -> Dict[str, Any]:
+    """
+    Campos de um update parcial no mesmo formato do documento gravado
+
+    No formato compacto, campos do cabeçalho são gravados diretamente e os
+    demais reescrevem apenas o corpo.
+    """
+    if not compact:
+        return plan.dict(include=set(fields))
+
+    document = encode_compact(kind, plan)
+    header_fields = _PLAN_SCHEMAS[kind][1]
+    update = {name: document[name] for name in fields if name in header_fields}
+    if any(name not in header_fields for name in fields):
+        for name in ("storage_format", "body_encoding", "body", "text_version"):
+            update[name] = document[name]
+    return update
+
+
+class StoredPlan:
+    """
+    Plano lido do Firestore, em formato completo ou compacto
+
+    Os campos do cabeçalho (usuário, data, objetivo, metas, totais, hash das
+    entradas, datas) ficam disponíveis como atributos sem decodificar o corpo,
+    o que basta para decidir se o plano deve ser regenerado; ``load()``
+    reconstrói o modelo completo uma única vez. Documentos compactos gravados
+    com versões anteriores dos templates de texto são lidos com a tabela
+    arquivada da versão; só uma versão ausente do arquivo é rejeitada
+    (``PlanCodecError``) e tratada como ausente.
+    """
+
+    def __init__(self, kind: str, data: Dict[str, Any]):
+        self.kind = kind
+        self.compact = data.get("storage_format") == COMPACT_FORMAT
+        self._data = data
+        self._plan: Optional[Plan] = None
+
+        if self.compact:
+            _template_texts(data.get("text_version"))
+            self._header = _decode_header(kind, data)
+        else:
+            self._header = {**data, "date": _as_date(data.get("date"))}
+
+    def __getattr__(self, name: str) -> Any:
+        header = self.__dict__.get("_header")
+        if header is None:
+            raise AttributeError(name)
+        if name in header:
+            return header[name]
+
+        # Documentos gravados antes de um campo existir: usar o default do modelo
+        field = _PLAN_SCHEMAS[self.kind][0].model.model_fields.get(name)
+        if field is None or field.is_required():
+            raise AttributeError(name)
+        return field.get_default(call_default_factory=True)
+
+    def load(self) -> Plan:
+        """Modelo completo do plano"""
+        if self._plan is None:
+            if self.compact:
+                self._plan = decode_compact(self.kind, self._data, self._header)
+            else:
+                self._plan = _PLAN_SCHEMAS[self.kind][0].model(**self._data)
+        return self._plan
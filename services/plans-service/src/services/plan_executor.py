@@ -0,0 +1,278 @@
+"""
+Pool de processos para o núcleo de CPU da geração de planos
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import structlog
+
+from config.settings import get_settings
+from models.plan import AlgorithmConfig, DietPlan, WorkoutPlan
+
+logger = structlog.get_logger(__name__)
+
+
+class PlanComputeContext:
+    """Geradores de um processo do pool, com catálogo e exercícios já carregados"""
+
+    def __init__(self, diet_generator, workout_generator):
+        self.diet_generator = diet_generator
+        self.workout_generator = workout_generator
+
+
+async def default_compute_context() -> PlanComputeContext:
+    """Carrega catálogo de alimentos e biblioteca de exercícios do Content Service"""
+    from algorithms.diet_generator import DietGenerator
+    from algorithms.workout_generator import WorkoutGenerator
+    from services.content_client import ContentClient
+    from services.exercise_library import ExerciseLibrary
+    from services.food_catalog import FoodCatalog
+
+    content_client = ContentClient()
+    food_catalog = FoodCatalog(content_client)
+    exercise_library = ExerciseLibrary(content_client)
+    await food_catalog.load()
+    await exercise_library.get_snapshot()
+
+    # Dentro do worker o cálculo é sempre local
+    inline = PlanExecutor(max_workers=0)
+    return PlanComputeContext(
+        DietGenerator(content_client, None, food_catalog=food_catalog, plan_executor=inline),
+        WorkoutGenerator(content_client, None, exercise_library=exercise_library, plan_executor=inline)
+    )
+
+
+# Estado de cada processo do pool (um loop e um contexto por processo)
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_context: Optional[PlanComputeContext] = None
+
+
+def _init_worker(context_factory: Callable[[], Awaitable[PlanComputeContext]]):
+    """Inicializador dos processos do pool: carrega os dados antes da primeira tarefa"""
+    global _worker_loop, _worker_context
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    _worker_context = _worker_loop.run_until_complete(context_factory())
+
+
+def _warm_up() -> bool:
+    """Tarefa vazia usada para iniciar os processos na subida do serviço"""
+    return _worker_context is not None
+
+
+def _food_snapshot(catalog_version: str):
+    """Snapshot do catálogo do worker na mesma versão do processo principal"""
+    catalog = _worker_context.diet_generator.food_catalog
+    snapshot = _worker_loop.run_until_complete(catalog.get_snapshot())
+    if snapshot.version != catalog_version:
+        _worker_loop.run_until_complete(catalog.refresh())
+        snapshot = catalog.snapshot
+    return snapshot
+
+
+def _compose_diet_plan(
+    user_id: str,
+    target_date: date,
+    algorithm_config: AlgorithmConfig,
+    user_data: dict,
+    catalog_version: str
+) -> DietPlan:
+    """Monta um plano de dieta dentro de um processo do pool"""
+    generator = _worker_context.diet_generator
+    catalog = _food_snapshot(catalog_version)
+    return generator.compose_diet_plan(user_id, target_date, algorithm_config, user_data, catalog)
+
+
+def _compose_diet_week(
+    user_id: str,
+    dates: List[date],
+    algorithm_config: AlgorithmConfig,
+    user_data: dict,
+    existing_plans: Dict[date, DietPlan],
+    catalog_version: str
+) -> Tuple[List[DietPlan], List[DietPlan]]:
+    """Monta os planos de dieta da semana dentro de um processo do pool"""
+    generator = _worker_context.diet_generator
+    catalog = _food_snapshot(catalog_version)
+    return generator.compose_diet_week(user_id, dates, algorithm_config, user_data, existing_plans, catalog)
+
+
+def _compose_workout_plan(
+    user_id: str,
+    target_date: date,
+    algorithm_config: AlgorithmConfig,
+    user_data: dict,
+    library_version: str
+) -> WorkoutPlan:
+    """Monta um plano de treino dentro de um processo do pool"""
+    generator = _worker_context.workout_generator
+    exercise_index = _worker_loop.run_until_complete(
+        generator.warm_exercise_index(algorithm_config.workout_preferences, library_version)
+    )
+    return generator.compose_workout_plan(
+        user_id, target_date, algorithm_config, user_data, exercise_index, library_version
+    )
+
+
+class PlanExecutor:
+    """
+    Executa a montagem de planos (seleção de alimentos e exercícios, otimização
+    de quantidades) em um pool de processos
+
+    Cada processo carrega o catálogo de alimentos e a biblioteca de exercícios
+    no inicializador; por tarefa trafegam apenas as entradas (configuração,
+    dados do usuário, versão do catálogo) e o plano pronto. O I/O (Firestore,
+    cache, Content Service) continua no loop da aplicação, que fica livre para
+    atender outras requisições durante o cálculo. Com ``max_workers=0`` ou antes
+    de ``start`` o executor fica inativo e os geradores calculam no próprio loop.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        context_factory: Callable[[], Awaitable[PlanComputeContext]] = default_compute_context
+    ):
+        config = get_settings().executor_config
+        self.max_workers = config["max_workers"] if max_workers is None else max_workers
+        self.start_method = config["start_method"]
+        self.task_timeout = config["task_timeout"]
+        self.context_factory = context_factory
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.stats = {"tasks": 0, "failures": 0, "timeouts": 0, "restarts": 0}
+
+    @property
+    def active(self) -> bool:
+        """True se as tarefas são enviadas ao pool"""
+        return self._pool is not None
+
+    async def start(self):
+        """Cria o pool e inicia todos os processos (dados carregados antes do primeiro plano)"""
+        if self.max_workers <= 0 or self._pool is not None:
+            return
+        self._pool = self._create_pool()
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*(
+                loop.run_in_executor(self._pool, _warm_up) for _ in range(self.max_workers)
+            ))
+        except Exception:
+            self.shutdown(wait=False)
+            raise
+        logger.info("Pool de geração de planos iniciado", max_workers=self.max_workers)
+
+    def shutdown(self, wait: bool = True):
+        """Encerra o pool (as próximas gerações voltam a ser locais)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    async def compose_diet_plan(
+        self,
+        user_id: str,
+        target_date: date,
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        catalog_version: str
+    ) -> DietPlan:
+        """Plano de dieta de um dia montado no pool"""
+        return await self._submit(
+            _compose_diet_plan, user_id, target_date, algorithm_config, user_data, catalog_version
+        )
+
+    async def compose_diet_week(
+        self,
+        user_id: str,
+        dates: List[date],
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        existing_plans: Dict[date, DietPlan],
+        catalog_version: str
+    ) -> Tuple[List[DietPlan], List[DietPlan]]:
+        """Planos de dieta da semana montados no pool (todos os dias e apenas os novos)"""
+        return await self._submit(
+            _compose_diet_week, user_id, dates, algorithm_config, user_data, existing_plans, catalog_version
+        )
+
+    async def compose_workout_plan(
+        self,
+        user_id: str,
+        target_date: date,
+        algorithm_config: AlgorithmConfig,
+        user_data: dict,
+        library_version: str
+    ) -> WorkoutPlan:
+        """Plano de treino de um dia montado no pool (sem performance anterior)"""
+        return await self._submit(
+            _compose_workout_plan, user_id, target_date, algorithm_config, user_data, library_version
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de tarefas, falhas e tempos esgotados do pool"""
+        return {**self.stats, "active": self.active, "max_workers": self.max_workers}
+
+    async def _submit(self, fn: Callable, *args):
+        """
+        Envia uma tarefa ao pool, recriando-o se um processo morrer ou travar
+
+        Esgotado ``task_timeout``, a tarefa ainda na fila é cancelada; se já
+        foi entregue a um processo, o pool é encerrado (o processo continuaria
+        calculando um plano que ninguém vai ler) e recriado. As tarefas que
+        estavam nesse pool são reenviadas uma vez ao pool novo.
+        """
+        self.stats["tasks"] += 1
+        for attempt in range(2):
+            pool = self._pool
+            try:
+                future = pool.submit(fn, *args)
+                return await asyncio.wait_for(asyncio.wrap_future(future), self.task_timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                future.cancel()
+                if future.running() and pool is self._pool:
+                    logger.error("Tarefa do pool de planos excedeu o tempo limite, recriando o pool",
+                                 timeout=self.task_timeout)
+                    self._restart(terminate=True)
+                raise
+            except BrokenProcessPool:
+                if attempt == 0 and pool is not self._pool and self._pool is not None:
+                    continue
+                self.stats["failures"] += 1
+                logger.error("Pool de geração de planos interrompido, recriando")
+                if pool is self._pool:
+                    self._restart()
+                raise
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(self.context_factory,)
+        )
+
+    def _restart(self, terminate: bool = False):
+        """Substitui um pool quebrado ou travado; os processos novos recarregam os dados"""
+        pool = self._pool
+        processes = list((pool._processes or {}).values()) if terminate and pool is not None else []
+        self.shutdown(wait=False)
+        # ProcessPoolExecutor não encerra tarefas em execução (terminate_workers só no Python 3.14)
+        for process in processes:
+            process.terminate()
+        self._pool = self._create_pool()
+        self.stats["restarts"] += 1
+
+
+# Instância compartilhada pelo processo
+_plan_executor: Optional[PlanExecutor] = None
+
+
+def get_plan_executor() -> PlanExecutor:
+    """Retorna o executor compartilhado (inativo até ``start``)"""
+    global _plan_executor
+    if _plan_executor is None:
+        _plan_executor = PlanExecutor()
+    return _plan_executor
@@ -0,0 +1,369 @@
+"""
+Pré-computação em lote dos planos do dia seguinte para todos os usuários ativos
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import structlog
+
+from config.settings import get_settings
+from models.plan import AlgorithmConfig, algorithm_config_from_user
+from services.presentation_inputs import PRESENTATION_INPUTS_COLLECTION, PLAN_SECTIONS, section_tokens
+
+logger = structlog.get_logger(__name__)
+
+# Limite de operações por batch do Firestore
+FIRESTORE_BATCH_LIMIT = 500
+
+# (usuário, coleção, id do documento, dados)
+PlanDocument = Tuple[str, str, str, Dict[str, Any]]
+
+# Lote de usuários: (user_id, dados do usuário)
+UserShard = List[Tuple[str, Dict[str, Any]]]
+
+
+@dataclass
+class ShardResult:
+    """Resultado do processamento de um lote de usuários"""
+    documents: List[PlanDocument] = field(default_factory=list)
+    generated: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+@dataclass
+class PrecomputeStats:
+    """Contadores de progresso e vazão de uma execução"""
+    target_date: date
+    users_seen: int = 0
+    users_generated: int = 0
+    users_skipped: int = 0
+    users_failed: int = 0
+    documents_written: int = 0
+    batches_committed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def users_processed(self) -> int:
+        return self.users_generated + self.users_skipped + self.users_failed
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def users_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.users_processed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "target_date": self.target_date.isoformat(),
+            "running": self.finished_at is None,
+            "users_seen": self.users_seen,
+            "users_processed": self.users_processed,
+            "users_generated": self.users_generated,
+            "users_skipped": self.users_skipped,
+            "users_failed": self.users_failed,
+            "documents_written": self.documents_written,
+            "batches_committed": self.batches_committed,
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "users_per_second": round(self.users_per_second, 2)
+        }
+
+
+class PlanWorkerContext:
+    """Geradores usados por um processo de pré-computação"""
+
+    def __init__(
+        self,
+        diet_generator,
+        workout_generator,
+        config_loader: Callable[[str, Dict[str, Any]], Optional[AlgorithmConfig]] = algorithm_config_from_user
+    ):
+        self.diet_generator = diet_generator
+        self.workout_generator = workout_generator
+        self.config_loader = config_loader
+
+    async def process_shard(self, shard: UserShard, target_date: date) -> ShardResult:
+        """Gera os planos de dieta e treino de um lote de usuários sem gravar"""
+        result = ShardResult()
+        doc_suffix = target_date.isoformat()
+
+        for user_id, user_data in shard:
+            try:
+                config = self.config_loader(user_id, user_data)
+                if config is None:
+                    result.skipped += 1
+                    continue
+
+                diet_plan = await self.diet_generator.build_diet_plan(user_id, target_date, config, user_data)
+                workout_plan = await self.workout_generator.build_workout_plan(user_id, target_date, config, user_data)
+
+                result.documents.extend([
+                    (user_id, "diet_plans", f"{user_id}_{doc_suffix}", self.diet_generator.plan_document(diet_plan)),
+                    (user_id, "workout_plans", f"{user_id}_{doc_suffix}", self.workout_generator.plan_document(workout_plan)),
+                    (user_id, PRESENTATION_INPUTS_COLLECTION, user_id, section_tokens(PLAN_SECTIONS))
+                ])
+                result.generated += 1
+
+            except Exception as e:
+                logger.error("Erro ao pré-computar planos", user_id=user_id, error=str(e))
+                result.failed += 1
+
+        return result
+
+
+async def default_worker_context() -> PlanWorkerContext:
+    """Inicializa Firebase e geradores da mesma forma que a aplicação"""
+    from services.firebase_service import FirebaseService
+    from services.plan_service import PlanService
+
+    firebase_service = FirebaseService()
+    await firebase_service.initialize()
+
+    plan_service = PlanService()
+    await plan_service.initialize(firebase_service)
+
+    return PlanWorkerContext(plan_service.diet_generator, plan_service.workout_generator)
+
+
+# Estado de cada processo do pool (um loop e um contexto por processo)
+_worker_factory: Optional[Callable[[], Awaitable[PlanWorkerContext]]] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_context: Optional[PlanWorkerContext] = None
+
+
+def _init_worker(context_factory: Callable[[], Awaitable[PlanWorkerContext]]):
+    """Inicializador dos processos do pool"""
+    global _worker_factory, _worker_loop
+    _worker_factory = context_factory
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+
+def _run_shard(shard: UserShard, target_date: date) -> ShardResult:
+    """Processa um lote dentro de um processo do pool"""
+    global _worker_context
+    if _worker_context is None:
+        _worker_context = _worker_loop.run_until_complete(_worker_factory())
+    return _worker_loop.run_until_complete(_worker_context.process_shard(shard, target_date))
+
+
+class _BatchWriter:
+    """
+    Acumula documentos e grava em batches do Firestore
+
+    Um batch recusado é descartado (não volta à fila) e os usuários com
+    documentos nele passam de gerados para falhos, uma única vez cada.
+    """
+
+    def __init__(self, db, batch_size: int, stats: PrecomputeStats):
+        self.db = db
+        self.batch_size = min(batch_size, FIRESTORE_BATCH_LIMIT)
+        self.stats = stats
+        self._pending: List[PlanDocument] = []
+        self._failed_users: Set[str] = set()
+        self._lock = asyncio.Lock()
+
+    async def add(self, documents: List[PlanDocument]):
+        async with self._lock:
+            self._pending.extend(documents)
+            while len(self._pending) >= self.batch_size:
+                documents, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+                await self._commit(documents)
+
+    async def flush(self):
+        async with self._lock:
+            if self._pending:
+                documents, self._pending = self._pending, []
+                await self._commit(documents)
+
+    async def _commit(self, documents: List[PlanDocument]):
+        batch = self.db.batch()
+        for _, collection, doc_id, data in documents:
+            # Versões de entrada da apresentação são mescladas; planos são substituídos
+            merge = collection == PRESENTATION_INPUTS_COLLECTION
+            batch.set(self.db.collection(collection).document(doc_id), data, merge=merge)
+
+        try:
+            await batch.commit()
+        except Exception as e:
+            users = {user_id for user_id, *_ in documents} - self._failed_users
+            self._failed_users.update(users)
+            self.stats.users_generated -= len(users)
+            self.stats.users_failed += len(users)
+            logger.error("Erro ao gravar batch de planos",
+                        documents=len(documents), users=len(users), error=str(e))
+            return
+
+        self.stats.documents_written += len(documents)
+        self.stats.batches_committed += 1
+
+
+class PlanPrecomputer:
+    """
+    Pré-computa os planos do dia seguinte para todos os usuários ativos
+
+    Os usuários são lidos em streaming da coleção ``users`` e agrupados em
+    lotes enviados a um pool de processos, com número limitado de lotes em
+    andamento. Os planos gerados voltam ao processo principal e são gravados
+    em batches do Firestore. Com ``max_workers=0`` os lotes são processados
+    no próprio loop, o que permite testes com um Firestore em memória.
+    """
+
+    def __init__(
+        self,
+        firebase_service,
+        context_factory: Callable[[], Awaitable[PlanWorkerContext]] = default_worker_context,
+        max_workers: Optional[int] = None,
+        shard_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ):
+        config = get_settings().precompute_config
+        self.firebase_service = firebase_service
+        self.context_factory = context_factory
+        self.max_workers = config["max_workers"] if max_workers is None else max_workers
+        self.shard_size = shard_size or config["shard_size"]
+        self.max_in_flight = max_in_flight or config["max_in_flight"]
+        self.batch_size = batch_size or config["batch_size"]
+        self.progress_every = config["progress_every"]
+        self.start_method = config["start_method"]
+        self.stats: Optional[PrecomputeStats] = None
+
+    async def run(self, target_date: Optional[date] = None) -> PrecomputeStats:
+        """Executa a pré-computação para a data alvo (padrão: amanhã)"""
+        target_date = target_date or date.today() + timedelta(days=1)
+        stats = PrecomputeStats(target_date=target_date)
+        self.stats = stats
+
+        logger.info("Iniciando pré-computação de planos",
+                   target_date=target_date,
+                   max_workers=self.max_workers,
+                   shard_size=self.shard_size)
+
+        writer = _BatchWriter(self.firebase_service.db, self.batch_size, stats)
+        executor = None
+        inline_context = None
+
+        if self.max_workers > 0:
+            # spawn: os workers não herdam o processo da API (clientes gRPC/Firestore, threads)
+            executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(self.context_factory,)
+            )
+        else:
+            inline_context = await self.context_factory()
+
+        try:
+            slots = asyncio.Semaphore(self.max_in_flight)
+            pending = set()
+
+            async for shard in self._stream_user_shards(stats):
+                await slots.acquire()
+                task = asyncio.create_task(
+                    self._process_shard(shard, target_date, executor, inline_context, writer, slots)
+                )
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            if pending:
+                await asyncio.gather(*pending)
+            await writer.flush()
+
+        finally:
+            if executor:
+                # Aguardar a saída dos workers fora do loop
+                await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+            stats.finished_at = time.monotonic()
+
+        logger.info("Pré-computação de planos concluída", **stats.to_dict())
+        return stats
+
+    async def _stream_user_shards(self, stats: PrecomputeStats):
+        """Lê os usuários ativos em streaming e os agrupa em lotes"""
+        query = self.firebase_service.db.collection("users").where("is_active", "==", True)
+
+        shard: UserShard = []
+        async for doc in query.stream():
+            stats.users_seen += 1
+            shard.append((doc.id, doc.to_dict()))
+            if len(shard) >= self.shard_size:
+                yield shard
+                shard = []
+
+        if shard:
+            yield shard
+
+    async def _process_shard(
+        self,
+        shard: UserShard,
+        target_date: date,
+        executor: Optional[ProcessPoolExecutor],
+        inline_context: Optional[PlanWorkerContext],
+        writer: _BatchWriter,
+        slots: asyncio.Semaphore
+    ):
+        """Gera um lote (no pool ou no loop atual) e envia os documentos ao writer"""
+        try:
+            try:
+                if executor:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(executor, _run_shard, shard, target_date)
+                else:
+                    result = await inline_context.process_shard(shard, target_date)
+            except Exception as e:
+                logger.error("Erro ao processar lote de usuários", shard_size=len(shard), error=str(e))
+                result = ShardResult(failed=len(shard))
+
+            # Contabilizar antes de gravar: um batch recusado move seus usuários de gerados para falhos
+            self._record(result)
+            await writer.add(result.documents)
+
+        finally:
+            slots.release()
+
+    def _record(self, result: ShardResult):
+        """Soma o resultado de um lote às estatísticas, com log a cada ``progress_every`` usuários"""
+        stats = self.stats
+        previous = stats.users_processed
+        stats.users_generated += result.generated
+        stats.users_skipped += result.skipped
+        stats.users_failed += result.failed
+
+        if previous // self.progress_every != stats.users_processed // self.progress_every:
+            logger.info("Progresso da pré-computação", **stats.to_dict())
+
+
+async def _main():
+    """Ponto de entrada de linha de comando"""
+    from services.firebase_service import FirebaseService
+
+    parser = argparse.ArgumentParser(description="Pré-computa planos do dia seguinte")
+    parser.add_argument("--date", help="Data alvo (YYYY-MM-DD). Padrão: amanhã")
+    parser.add_argument("--workers", type=int, help="Processos geradores (0 = no próprio processo)")
+    args = parser.parse_args()
+
+    firebase_service = FirebaseService()
+    await firebase_service.initialize()
+    try:
+        precomputer = PlanPrecomputer(firebase_service, max_workers=args.workers)
+        target_date = date.fromisoformat(args.date) if args.date else None
+        stats = await precomputer.run(target_date)
+        return 0 if stats.users_failed == 0 else 1
+    finally:
+        await firebase_service.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(_main()))
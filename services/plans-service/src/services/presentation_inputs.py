@@ -0,0 +1,41 @@
+"""
+Versões das entradas das apresentações materializadas
+"""
+
+import uuid
+from typing import Dict, Iterable
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Documento por usuário com a versão atual das entradas de cada seção
+PRESENTATION_INPUTS_COLLECTION = "presentation_inputs"
+
+# Seções da apresentação e o que as invalida:
+#   profile -> dados do usuário (objetivo, nome); invalida todas as seções
+#   plans   -> planos de dieta/treino do dia (resumo e destaques)
+#   metrics -> pesagens e planos da semana (métricas, resumo semanal, marco)
+PRESENTATION_SECTIONS = ("profile", "plans", "metrics")
+
+# Seções afetadas pela gravação de um plano (destaques e métricas da semana)
+PLAN_SECTIONS = ("plans", "metrics")
+
+
+def section_tokens(sections: Iterable[str]) -> Dict[str, str]:
+    """Nova versão (token único) para as seções informadas"""
+    token = uuid.uuid4().hex
+    return {section: token for section in sections}
+
+
+async def mark_presentation_inputs_changed(db, user_id: str, sections: Iterable[str] = PRESENTATION_SECTIONS):
+    """
+    Registra que as entradas das seções mudaram para o usuário
+
+    Falhas são apenas registradas: a apresentação materializada também
+    expira por tempo (``presentation_ttl``).
+    """
+    try:
+        doc_ref = db.collection(PRESENTATION_INPUTS_COLLECTION).document(user_id)
+        await doc_ref.set(section_tokens(sections), merge=True)
+    except Exception as e:
+        logger.warning("Erro ao versionar entradas da apresentação", user_id=user_id, error=str(e))
@@ -2,20 +2,46 @@
 Serviço de Apresentação Personalizada de Planos
 """
 
+import asyncio
 import random
-from datetime import date, datetime, timedelta
-from typing import List, Dict, Optional
+import time
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, List, Dict, Optional, Set, Tuple
 import structlog
-from jinja2 import Template
 
 from models.plan import (
     PlanPresentation, DailyTip, ProgressMetric, GoalType, 
     DietPlan, WorkoutPlan, AlgorithmConfig
 )
 from config.settings import get_settings
+from algorithms.seeding import ALGORITHM_VERSION, plan_input_hash, seeded_rng
+from services.content_templates import get_content_templates
+from services.plan_codec import StoredPlan
+from services.presentation_inputs import PRESENTATION_INPUTS_COLLECTION, PRESENTATION_SECTIONS
+from services.user_week_window import UserWeekWindow
 
 logger = structlog.get_logger(__name__)
 
+# Campos da apresentação produzidos por cada seção
+SECTION_FIELDS = {
+    "profile": ("user_name", "goal", "motivational_message", "daily_tips"),
+    "plans": ("daily_summary", "diet_highlights", "workout_highlights"),
+    "metrics": ("progress_metrics", "weekly_progress_summary", "next_milestone", "encouragement_note")
+}
+
+# Seção alimentada por cada fonte de dados
+SOURCE_SECTIONS = {
+    "user_data": "profile",
+    "diet_plan": "plans",
+    "workout_plan": "plans",
+    "weight": "metrics",
+    "diet_week": "metrics",
+    "workout_week": "metrics"
+}
+
+# Metadados gravados junto da apresentação materializada
+MATERIALIZATION_FIELDS = ("section_versions", "algorithm_version", "materialized_at")
+
 class PresentationService:
     """Serviço para gerar apresentações personalizadas dos planos"""
     
@@ -24,11 +50,8 @@ class PresentationService:
         self.settings = get_settings()
         self.presentation_config = self.settings.presentation_config
         
-        # Templates de mensagens motivacionais
-        self.motivational_templates = self._load_motivational_templates()
-        
-        # Templates de resumos diários
-        self.summary_templates = self._load_summary_templates()
+        # Tabelas de textos compartilhadas (mensagens, resumos, dicas, marcos)
+        self.templates = get_content_templates()
     
     async def generate_plan_presentation(
         self,
@@ -52,129 +75,217 @@ class PresentationService:
         logger.info("Gerando apresentação do plano", user_id=user_id, date=target_date)
         
         try:
-            # 1. Obter dados do usuário
-            user_data = await self._get_user_data(user_id)
-            user_name = user_data.get("name", "").split()[0] if user_data.get("name") else None
-            goal = GoalType(user_data.get("goal", "manter_peso"))
-            
-            # 2. Obter planos se não fornecidos
-            if not diet_plan:
-                diet_plan = await self._get_diet_plan(user_id, target_date)
-            if not workout_plan:
-                workout_plan = await self._get_workout_plan(user_id, target_date)
-            
-            # 3. Gerar mensagem motivacional personalizada
-            motivational_message = self._generate_motivational_message(user_name, goal, user_data)
-            
-            # 4. Gerar resumo diário
-            daily_summary = self._generate_daily_summary(diet_plan, workout_plan, goal)
-            
-            # 5. Gerar destaques da dieta
-            diet_highlights = self._generate_diet_highlights(diet_plan, goal) if diet_plan else []
-            
-            # 6. Gerar destaques do treino
-            workout_highlights = self._generate_workout_highlights(workout_plan, goal) if workout_plan else []
-            
-            # 7. Calcular métricas de progresso
-            progress_metrics = await self._calculate_progress_metrics(user_id, target_date, user_data)
-            
-            # 8. Gerar dicas diárias
-            daily_tips = self._generate_daily_tips(goal, target_date, user_data)
-            
-            # 9. Gerar resumo semanal (se aplicável)
-            weekly_summary = await self._generate_weekly_progress_summary(user_id, target_date)
-            
-            # 10. Definir próximo marco
-            next_milestone = self._generate_next_milestone(goal, user_data, progress_metrics)
-            
-            # 11. Gerar nota de encorajamento
-            encouragement_note = self._generate_encouragement_note(goal, progress_metrics, user_name)
+            # 1. Apresentação materializada e versões das entradas (uma leitura em lote)
+            stored, stored_meta, input_versions = await self._get_materialized_presentation(user_id, target_date)
+            stale = self._stale_sections(stored, stored_meta, input_versions)
+            if diet_plan or workout_plan:
+                stale.add("plans")  # Planos recebidos do chamador
+            if not stale:
+                logger.info("Apresentação materializada servida", user_id=user_id)
+                return stored
+            
+            # 2. Carregar em paralelo apenas as fontes das seções desatualizadas
+            #    (planos da semana: uma consulta por coleção, métricas derivadas em memória)
+            week_window = UserWeekWindow(self.firebase_service, user_id, target_date)
+            loaders = {}
+            if "profile" in stale:
+                loaders["user_data"] = (lambda: self._get_user_data(user_id), {})
+            if "plans" in stale and not diet_plan:
+                loaders["diet_plan"] = (lambda: self._get_diet_plan(user_id, target_date), None)
+            if "plans" in stale and not workout_plan:
+                loaders["workout_plan"] = (lambda: self._get_workout_plan(user_id, target_date), None)
+            if "metrics" in stale:
+                loaders["weight"] = (lambda: self._get_weight_progress(user_id, target_date), None)
+                loaders["diet_week"] = (week_window.load_diet_plans, None)
+                loaders["workout_week"] = (week_window.load_workout_plans, None)
+            
+            sources, degraded_sources = await self._load_sources(loaders)
+            user_data = sources.get("user_data", {})
+            
+            # 3. Seção de perfil: nome, objetivo, mensagem motivacional e dicas diárias
+            if "profile" in stale:
+                user_name = user_data.get("name", "").split()[0] if user_data.get("name") else None
+                goal = GoalType(user_data.get("goal", "manter_peso"))
+                rng = self._section_rng("profile", user_id, target_date)
+                sections = {
+                    "user_name": user_name,
+                    "goal": goal,
+                    "motivational_message": self._generate_motivational_message(user_name, goal, user_data, rng),
+                    "daily_tips": self._generate_daily_tips(goal, target_date, user_data, rng)
+                }
+            else:
+                sections = {name: getattr(stored, name) for name in SECTION_FIELDS["profile"]}
+            goal, user_name = sections["goal"], sections["user_name"]
+            
+            # 4. Seção de planos: resumo diário e destaques de dieta e treino
+            if "plans" in stale:
+                diet_plan = diet_plan or sources.get("diet_plan")
+                workout_plan = workout_plan or sources.get("workout_plan")
+                sections.update({
+                    "daily_summary": self._generate_daily_summary(diet_plan, workout_plan, goal),
+                    "diet_highlights": self._generate_diet_highlights(diet_plan, goal) if diet_plan else [],
+                    "workout_highlights": self._generate_workout_highlights(workout_plan, goal) if workout_plan else []
+                })
+            else:
+                sections.update({name: getattr(stored, name) for name in SECTION_FIELDS["plans"]})
+            
+            # 5. Seção de métricas: progresso, resumo semanal, próximo marco e encorajamento
+            if "metrics" in stale:
+                progress_metrics = self._build_progress_metrics(
+                    sources["weight"], week_window.adherence_metrics(),
+                    week_window.calorie_metrics(), week_window.workout_frequency()
+                )
+                rng = self._section_rng("metrics", user_id, target_date)
+                sections.update({
+                    "progress_metrics": progress_metrics,
+                    "weekly_progress_summary": self._generate_weekly_progress_summary(target_date, week_window.weekly_data()),
+                    "next_milestone": self._generate_next_milestone(goal, user_data, progress_metrics, rng),
+                    "encouragement_note": self._generate_encouragement_note(goal, progress_metrics, user_name, rng)
+                })
+            else:
+                sections.update({name: getattr(stored, name) for name in SECTION_FIELDS["metrics"]})
+            
+            # Fontes degradadas das seções reaproveitadas continuam registradas
+            if stored:
+                degraded_sources += [
+                    source for source in stored.degraded_sources
+                    if SOURCE_SECTIONS.get(source) not in stale
+                ]
             
             presentation = PlanPresentation(
                 user_id=user_id,
                 date=target_date,
-                user_name=user_name,
-                goal=goal,
-                motivational_message=motivational_message,
-                daily_summary=daily_summary,
-                diet_highlights=diet_highlights,
-                workout_highlights=workout_highlights,
-                progress_metrics=progress_metrics,
-                daily_tips=daily_tips,
-                weekly_progress_summary=weekly_summary,
-                next_milestone=next_milestone,
-                encouragement_note=encouragement_note
+                degraded_sources=degraded_sources,
+                **sections
             )
             
-            # 12. Salvar apresentação para cache
-            await self._save_presentation(presentation)
+            # 6. Materializar com as versões das entradas usadas
+            full_rebuild = stale == set(PRESENTATION_SECTIONS)
+            await self._save_presentation(
+                presentation,
+                input_versions,
+                time.time() if full_rebuild else stored_meta["materialized_at"]
+            )
             
-            logger.info("Apresentação gerada com sucesso", user_id=user_id)
+            logger.info("Apresentação gerada com sucesso", 
+                       user_id=user_id, sections=sorted(stale), degraded_sources=degraded_sources)
             return presentation
             
         except Exception as e:
             logger.error("Erro ao gerar apresentação", user_id=user_id, error=str(e))
             raise
     
-    def _load_motivational_templates(self) -> Dict[GoalType, List[str]]:
-        """Carrega templates de mensagens motivacionais"""
-        return {
-            GoalType.PERDER_PESO: [
-                "Olá {{name}}! 🔥 Hoje é mais um dia para se aproximar do seu peso ideal! Cada escolha saudável conta!",
-                "Bom dia, {{name}}! 💪 Você está no caminho certo para transformar seu corpo. Vamos queimar calorias hoje!",
-                "{{name}}, sua determinação é inspiradora! 🌟 Hoje vamos focar no déficit calórico e exercícios eficientes!",
-                "Oi {{name}}! ⚡ Lembre-se: cada dia é uma nova oportunidade de se tornar a melhor versão de si mesmo!",
-                "{{name}}, você está mais forte que ontem! 🚀 Vamos manter o foco na sua jornada de emagrecimento!"
-            ],
-            GoalType.GANHAR_MASSA: [
-                "E aí, {{name}}! 🏗️ Hoje vamos construir músculos! Cada treino e refeição te aproxima do seu objetivo!",
-                "Bom dia, {{name}}! 💪 Hora de alimentar seus músculos e treinar com intensidade para o crescimento!",
-                "{{name}}, seu corpo está se transformando! 📈 Consistência é a chave para o ganho de massa muscular!",
-                "Olá {{name}}! 🔨 Músculos são construídos na academia e na cozinha. Vamos dar tudo hoje!",
-                "{{name}}, cada repetição conta! ⚡ Seu futuro eu mais forte agradece pelo esforço de hoje!"
-            ],
-            GoalType.AUMENTAR_FORCA: [
-                "{{name}}, hoje vamos quebrar limites! 💥 Força não é só física, é mental. Você consegue!",
-                "Bom dia, {{name}}! ⚡ Cada série te torna mais forte que ontem. Vamos superar recordes!",
-                "Olá {{name}}! 🔨 A força verdadeira vem da consistência. Hoje é dia de evoluir!",
-                "{{name}}, você é mais forte do que imagina! 🚀 Vamos provar isso no treino de hoje!",
-                "E aí, {{name}}! 💪 Força é conquistada rep por rep, série por série. Vamos nessa!"
-            ],
-            GoalType.MELHORAR_RESISTENCIA: [
-                "{{name}}, resistência é sobre não desistir! 🏃 Hoje vamos aumentar sua capacidade cardiovascular!",
-                "Bom dia, {{name}}! ❤️ Cada batimento do coração te torna mais resistente. Vamos treinar!",
-                "Olá {{name}}! 🌟 Sua capacidade é maior do que você imagina. Vamos descobrir juntos!",
-                "{{name}}, a resistência se constrói passo a passo! 🚀 Hoje vamos mais longe que ontem!",
-                "E aí, {{name}}! ⚡ Seu corpo é uma máquina incrível. Vamos otimizar sua performance!"
-            ],
-            GoalType.MANTER_PESO: [
-                "{{name}}, manter é tão desafiador quanto conquistar! 🎯 Parabéns pela consistência!",
-                "Bom dia, {{name}}! ⚖️ Você encontrou o equilíbrio perfeito. Vamos manter essa harmonia!",
-                "Olá {{name}}! 🔄 Consistência é sua maior aliada na manutenção. Continue assim!",
-                "{{name}}, você é um exemplo de disciplina! 🌟 Hoje vamos manter o que conquistou!",
-                "E aí, {{name}}! 💪 Manutenção é sobre estilo de vida saudável. Você dominou isso!"
+    async def _get_materialized_presentation(
+        self,
+        user_id: str,
+        target_date: date
+    ) -> Tuple[Optional[PlanPresentation], Dict[str, Any], Dict[str, Any]]:
+        """
+        Lê a apresentação materializada e as versões atuais das entradas do usuário
+        
+        Returns:
+            Tuple: (apresentação salva ou None, metadados de materialização, versões das entradas)
+        """
+        try:
+            db = self.firebase_service.db
+            presentation_id = f"{user_id}_{target_date}"
+            refs = [
+                db.collection("plan_presentations").document(presentation_id),
+                db.collection(PRESENTATION_INPUTS_COLLECTION).document(user_id)
             ]
-        }
+            
+            stored, meta, input_versions = None, {}, {}
+            async for doc in db.get_all(refs):
+                if not doc.exists:
+                    continue
+                if doc.id == presentation_id:
+                    data = doc.to_dict()
+                    meta = {key: data.pop(key, None) for key in MATERIALIZATION_FIELDS}
+                    stored = PlanPresentation(**data)
+                else:
+                    input_versions = doc.to_dict()
+            
+            return stored, meta, input_versions
+        except Exception as e:
+            logger.warning("Erro ao ler apresentação materializada", user_id=user_id, error=str(e))
+            return None, {}, {}
     
-    def _load_summary_templates(self) -> Dict[str, str]:
-        """Carrega templates de resumos diários"""
-        return {
-            "diet_workout": "Hoje você tem um plano completo: {{diet_calories}} calorias distribuídas em {{meal_count}} refeições e {{workout_duration}} minutos de treino focado em {{muscle_groups}}.",
-            "diet_only": "Seu plano nutricional de hoje inclui {{diet_calories}} calorias em {{meal_count}} refeições balanceadas para {{goal_description}}.",
-            "workout_only": "Treino de {{workout_duration}} minutos focado em {{muscle_groups}} te espera hoje. {{workout_type}} será o foco!",
-            "rest_day": "Hoje é seu dia de recuperação! {{active_recovery}} Lembre-se: o descanso é quando seus músculos crescem.",
-            "no_plans": "Vamos planejar seu dia! Que tal começar definindo suas metas de alimentação e exercícios?"
-        }
+    def _stale_sections(
+        self,
+        stored: Optional[PlanPresentation],
+        meta: Dict[str, Any],
+        input_versions: Dict[str, Any]
+    ) -> Set[str]:
+        """Seções cujas entradas mudaram desde a materialização"""
+        all_sections = set(PRESENTATION_SECTIONS)
+        ttl = self.settings.cache_config["presentation_ttl"]
+        
+        if (stored is None
+                or meta.get("algorithm_version") != ALGORITHM_VERSION
+                or time.time() - (meta.get("materialized_at") or 0) > ttl):
+            return all_sections
+        
+        seen_versions = meta.get("section_versions") or {}
+        stale = {section for section in all_sections if input_versions.get(section) != seen_versions.get(section)}
+        
+        # Seções montadas com fontes indisponíveis são refeitas
+        stale.update(SOURCE_SECTIONS[source] for source in stored.degraded_sources if source in SOURCE_SECTIONS)
+        
+        # O perfil (objetivo, nome) alimenta todas as seções
+        return all_sections if "profile" in stale else stale
+    
+    def _section_rng(self, section: str, user_id: str, target_date: date) -> random.Random:
+        """RNG de uma seção: a seção refeita isoladamente produz o mesmo texto"""
+        return seeded_rng(plan_input_hash(f"presentation:{section}", user_id, target_date))
+    
+    async def _load_sources(
+        self,
+        loaders: Dict[str, Tuple[Callable[[], Awaitable[Any]], Any]]
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Executa as consultas independentes em paralelo, cada uma com seu timeout
+        
+        Uma fonte que excede o timeout ou falha assume o valor padrão, de forma
+        que a apresentação é montada com os dados disponíveis.
+        
+        Args:
+            loaders: Nome da fonte -> (função de carga, valor padrão)
+            
+        Returns:
+            Tuple[Dict[str, Any], List[str]]: Resultados por fonte e fontes degradadas
+        """
+        timeouts = self.presentation_config["source_timeouts"]
+        
+        async def load(name: str, loader: Callable[[], Awaitable[Any]], default: Any):
+            try:
+                return await asyncio.wait_for(loader(), timeout=timeouts.get(name, timeouts["default"])), False
+            except asyncio.TimeoutError:
+                logger.warning("Fonte da apresentação excedeu o timeout", source=name)
+            except Exception as e:
+                logger.warning("Fonte da apresentação indisponível", source=name, error=str(e))
+            return default, True
+        
+        names = list(loaders)
+        outcomes = await asyncio.gather(*(load(name, *loaders[name]) for name in names))
+        
+        results = {name: value for name, (value, _) in zip(names, outcomes)}
+        degraded = [name for name, (_, failed) in zip(names, outcomes) if failed]
+        return results, degraded
     
-    def _generate_motivational_message(self, user_name: Optional[str], goal: GoalType, user_data: dict) -> str:
+    def _generate_motivational_message(
+        self,
+        user_name: Optional[str],
+        goal: GoalType,
+        user_data: dict,
+        rng: random.Random
+    ) -> str:
         """Gera mensagem motivacional personalizada"""
-        templates = self.motivational_templates.get(goal, self.motivational_templates[GoalType.MANTER_PESO])
-        template_str = random.choice(templates)
+        templates = self.templates.for_goal(self.templates.motivational_messages, goal)
+        template = rng.choice(templates)
         
         # Usar nome ou tratamento genérico
         name = user_name if user_name else "Guerreiro(a)"
         
-        template = Template(template_str)
         return template.render(name=name)
     
     def _generate_daily_summary(self, diet_plan: Optional[DietPlan], workout_plan: Optional[WorkoutPlan], goal: GoalType) -> str:
@@ -219,9 +330,7 @@ class PresentationService:
             template_key = "no_plans"
             context = {}
         
-        template_str = self.summary_templates[template_key]
-        template = Template(template_str)
-        return template.render(**context)
+        return self.templates.daily_summaries[template_key].render(**context)
     
     def _generate_diet_highlights(self, diet_plan: DietPlan, goal: GoalType) -> List[str]:
         """Gera destaques do plano de dieta"""
@@ -290,13 +399,18 @@ class PresentationService:
         
         return highlights[:4]  # Máximo 4 destaques
     
-    async def _calculate_progress_metrics(self, user_id: str, target_date: date, user_data: dict) -> List[ProgressMetric]:
-        """Calcula métricas de progresso do usuário"""
+    def _build_progress_metrics(
+        self,
+        weight_data: Optional[dict],
+        adherence_data: Optional[dict],
+        calorie_data: Optional[dict],
+        workout_data: Optional[dict]
+    ) -> List[ProgressMetric]:
+        """Monta as métricas de progresso a partir das fontes já carregadas"""
         metrics = []
         
         try:
             # Métrica de peso (se disponível)
-            weight_data = await self._get_weight_progress(user_id, target_date)
             if weight_data:
                 metrics.append(ProgressMetric(
                     metric_name="Peso",
@@ -308,7 +422,6 @@ class PresentationService:
                 ))
             
             # Métrica de aderência aos planos
-            adherence_data = await self._get_adherence_metrics(user_id, target_date)
             if adherence_data:
                 metrics.append(ProgressMetric(
                     metric_name="Aderência aos Planos",
@@ -319,7 +432,6 @@ class PresentationService:
                 ))
             
             # Métrica de calorias médias
-            calorie_data = await self._get_calorie_metrics(user_id, target_date)
             if calorie_data:
                 metrics.append(ProgressMetric(
                     metric_name="Calorias Médias",
@@ -330,7 +442,6 @@ class PresentationService:
                 ))
             
             # Métrica de treinos por semana
-            workout_data = await self._get_workout_frequency(user_id, target_date)
             if workout_data:
                 metrics.append(ProgressMetric(
                     metric_name="Treinos por Semana",
@@ -345,67 +456,24 @@ class PresentationService:
         
         return metrics[:3]  # Máximo 3 métricas principais
     
-    def _generate_daily_tips(self, goal: GoalType, target_date: date, user_data: dict) -> List[DailyTip]:
+    def _generate_daily_tips(
+        self,
+        goal: GoalType,
+        target_date: date,
+        user_data: dict,
+        rng: random.Random
+    ) -> List[DailyTip]:
         """Gera dicas diárias personalizadas"""
-        tips_database = {
-            GoalType.PERDER_PESO: [
-                DailyTip(category="nutrition", title="Hidratação", content="Beba água antes das refeições para aumentar a saciedade", priority=1),
-                DailyTip(category="training", title="Cardio", content="Inclua 10 minutos de caminhada após as refeições", priority=2),
-                DailyTip(category="lifestyle", title="Sono", content="Durma 7-8 horas para otimizar hormônios da saciedade", priority=1),
-                DailyTip(category="motivation", title="Progresso", content="Tire fotos do progresso, não apenas se pese", priority=2)
-            ],
-            GoalType.GANHAR_MASSA: [
-                DailyTip(category="nutrition", title="Proteína", content="Consuma proteína a cada 3-4 horas para síntese muscular", priority=1),
-                DailyTip(category="training", title="Sobrecarga", content="Aumente gradualmente peso ou repetições", priority=1),
-                DailyTip(category="lifestyle", title="Recuperação", content="Durma 8-9 horas para máxima recuperação muscular", priority=1),
-                DailyTip(category="motivation", title="Paciência", content="Ganho de massa é processo lento, seja consistente", priority=2)
-            ],
-            GoalType.AUMENTAR_FORCA: [
-                DailyTip(category="training", title="Técnica", content="Priorize técnica perfeita antes de aumentar carga", priority=1),
-                DailyTip(category="training", title="Descanso", content="Descanse 2-3 minutos entre séries pesadas", priority=1),
-                DailyTip(category="nutrition", title="Energia", content="Consuma carboidratos antes do treino de força", priority=2),
-                DailyTip(category="lifestyle", title="Registro", content="Anote seus pesos para acompanhar progressão", priority=2)
-            ],
-            GoalType.MELHORAR_RESISTENCIA: [
-                DailyTip(category="training", title="Progressão", content="Aumente gradualmente duração ou intensidade", priority=1),
-                DailyTip(category="nutrition", title="Hidratação", content="Mantenha-se hidratado durante exercícios longos", priority=1),
-                DailyTip(category="training", title="Variedade", content="Alterne entre diferentes tipos de cardio", priority=2),
-                DailyTip(category="lifestyle", title="Recuperação", content="Inclua dias de recuperação ativa", priority=2)
-            ],
-            GoalType.MANTER_PESO: [
-                DailyTip(category="lifestyle", title="Equilíbrio", content="Mantenha flexibilidade na dieta sem exageros", priority=1),
-                DailyTip(category="training", title="Variedade", content="Varie treinos para manter motivação", priority=2),
-                DailyTip(category="nutrition", title="Monitoramento", content="Monitore peso semanalmente, não diariamente", priority=2),
-                DailyTip(category="motivation", title="Sustentabilidade", content="Foque em hábitos sustentáveis a longo prazo", priority=1)
-            ]
-        }
-        
-        goal_tips = tips_database.get(goal, tips_database[GoalType.MANTER_PESO])
-        
-        # Selecionar 2-3 dicas aleatórias, priorizando as de alta prioridade
-        high_priority = [tip for tip in goal_tips if tip.priority == 1]
-        low_priority = [tip for tip in goal_tips if tip.priority == 2]
-        
-        selected_tips = []
-        if high_priority:
-            selected_tips.append(random.choice(high_priority))
-        if low_priority and len(selected_tips) < 2:
-            selected_tips.append(random.choice(low_priority))
-        
-        return selected_tips
+        # Uma dica de alta prioridade e uma de baixa, escolhidas pelo RNG semeado
+        return self.templates.for_goal(self.templates.daily_tips, goal).select(rng)
     
-    async def _generate_weekly_progress_summary(self, user_id: str, target_date: date) -> Optional[str]:
+    def _generate_weekly_progress_summary(self, target_date: date, weekly_data: Optional[dict]) -> Optional[str]:
         """Gera resumo de progresso semanal"""
         try:
             # Verificar se é domingo (fim de semana)
             if target_date.weekday() != 6:  # 6 = domingo
                 return None
             
-            week_start = target_date - timedelta(days=6)
-            
-            # Obter dados da semana
-            weekly_data = await self._get_weekly_data(user_id, week_start, target_date)
-            
             if not weekly_data:
                 return None
             
@@ -433,40 +501,23 @@ class PresentationService:
             logger.error("Erro ao gerar resumo semanal", error=str(e))
             return None
     
-    def _generate_next_milestone(self, goal: GoalType, user_data: dict, metrics: List[ProgressMetric]) -> str:
+    def _generate_next_milestone(
+        self,
+        goal: GoalType,
+        user_data: dict,
+        metrics: List[ProgressMetric],
+        rng: random.Random
+    ) -> str:
         """Gera próximo marco/objetivo"""
-        milestones = {
-            GoalType.PERDER_PESO: [
-                "Perder mais 1kg nas próximas 2 semanas",
-                "Completar 5 treinos na próxima semana",
-                "Manter déficit calórico por 7 dias consecutivos"
-            ],
-            GoalType.GANHAR_MASSA: [
-                "Ganhar 0.5kg de massa muscular no próximo mês",
-                "Aumentar carga em 5% nos exercícios principais",
-                "Manter superávit calórico por 2 semanas"
-            ],
-            GoalType.AUMENTAR_FORCA: [
-                "Aumentar 5kg no supino nas próximas 3 semanas",
-                "Completar todas as séries com carga atual",
-                "Melhorar técnica em exercícios compostos"
-            ],
-            GoalType.MELHORAR_RESISTENCIA: [
-                "Correr 5km sem parar nas próximas 4 semanas",
-                "Aumentar duração do cardio em 10 minutos",
-                "Reduzir frequência cardíaca de repouso"
-            ],
-            GoalType.MANTER_PESO: [
-                "Manter peso estável por mais 2 semanas",
-                "Experimentar 3 novos exercícios este mês",
-                "Manter aderência de 85% aos planos"
-            ]
-        }
-        
-        goal_milestones = milestones.get(goal, milestones[GoalType.MANTER_PESO])
-        return random.choice(goal_milestones)
+        return rng.choice(self.templates.for_goal(self.templates.milestones, goal))
     
-    def _generate_encouragement_note(self, goal: GoalType, metrics: List[ProgressMetric], user_name: Optional[str]) -> str:
+    def _generate_encouragement_note(
+        self,
+        goal: GoalType,
+        metrics: List[ProgressMetric],
+        user_name: Optional[str],
+        rng: random.Random
+    ) -> str:
         """Gera nota de encorajamento personalizada"""
         name = user_name if user_name else "Guerreiro(a)"
         
@@ -474,198 +525,79 @@ class PresentationService:
         positive_trends = sum(1 for metric in metrics if metric.trend == "up")
         
         if positive_trends >= 2:
-            encouragements = [
-                f"Parabéns, {name}! Seus resultados mostram progresso consistente! 🌟",
-                f"{name}, você está no caminho certo! Continue com essa dedicação! 🚀",
-                f"Excelente trabalho, {name}! Seus esforços estão dando frutos! 💪"
-            ]
+            encouragements = self.templates.encouragements["consistent"]
         elif positive_trends == 1:
-            encouragements = [
-                f"{name}, você está evoluindo! Pequenos passos levam a grandes conquistas! 📈",
-                f"Continue assim, {name}! O progresso está acontecendo! ⭐",
-                f"{name}, cada dia é uma vitória! Você está mais forte! 💪"
-            ]
+            encouragements = self.templates.encouragements["progressing"]
         else:
-            encouragements = [
-                f"{name}, lembre-se: progresso não é sempre linear. Continue firme! 🔥",
-                f"Não desista, {name}! Os melhores resultados vêm da consistência! 💪",
-                f"{name}, você é mais forte do que qualquer desafio! Vamos juntos! 🌟"
-            ]
+            encouragements = self.templates.encouragements["steady"]
         
-        return random.choice(encouragements)
+        return rng.choice(encouragements).render(name=name)
     
     # Métodos auxiliares para obter dados
     
     async def _get_user_data(self, user_id: str) -> dict:
-        """Obtém dados do usuário"""
-        try:
-            doc_ref = self.firebase_service.db.collection("users").document(user_id)
-            doc = await doc_ref.get()
-            return doc.to_dict() if doc.exists else {}
-        except Exception as e:
-            logger.error("Erro ao obter dados do usuário", error=str(e))
-            return {}
+        """Obtém dados do usuário (erros seguem para _load_sources)"""
+        doc_ref = self.firebase_service.db.collection("users").document(user_id)
+        doc = await doc_ref.get()
+        return doc.to_dict() if doc.exists else {}
     
     async def _get_diet_plan(self, user_id: str, target_date: date) -> Optional[DietPlan]:
-        """Obtém plano de dieta"""
-        try:
-            doc_ref = self.firebase_service.db.collection("diet_plans").document(f"{user_id}_{target_date}")
-            doc = await doc_ref.get()
-            if doc.exists:
-                return DietPlan(**doc.to_dict())
-            return None
-        except Exception as e:
-            logger.error("Erro ao obter plano de dieta", error=str(e))
-            return None
+        """Obtém plano de dieta (erros seguem para _load_sources)"""
+        doc_ref = self.firebase_service.db.collection("diet_plans").document(f"{user_id}_{target_date}")
+        doc = await doc_ref.get()
+        if doc.exists:
+            return StoredPlan("diet", doc.to_dict()).load()
+        return None
     
     async def _get_workout_plan(self, user_id: str, target_date: date) -> Optional[WorkoutPlan]:
-        """Obtém plano de treino"""
-        try:
-            doc_ref = self.firebase_service.db.collection("workout_plans").document(f"{user_id}_{target_date}")
-            doc = await doc_ref.get()
-            if doc.exists:
-                return WorkoutPlan(**doc.to_dict())
-            return None
-        except Exception as e:
-            logger.error("Erro ao obter plano de treino", error=str(e))
-            return None
+        """Obtém plano de treino (erros seguem para _load_sources)"""
+        doc_ref = self.firebase_service.db.collection("workout_plans").document(f"{user_id}_{target_date}")
+        doc = await doc_ref.get()
+        if doc.exists:
+            return StoredPlan("workout", doc.to_dict()).load()
+        return None
     
     async def _get_weight_progress(self, user_id: str, target_date: date) -> Optional[dict]:
-        """Obtém progresso de peso"""
-        try:
-            # Buscar últimas medições de peso
-            query = (self.firebase_service.db.collection("weight_measurements")
-                    .where("user_id", "==", user_id)
-                    .order_by("date", direction="desc")
-                    .limit(2))
-            
-            docs = await query.get()
-            
-            if len(docs) >= 1:
-                current = docs[0].to_dict()
-                previous = docs[1].to_dict() if len(docs) > 1 else None
-                
-                result = {"current": current["weight"]}
-                
-                if previous:
-                    change = current["weight"] - previous["weight"]
-                    result["percentage_change"] = (change / previous["weight"]) * 100
-                    result["trend"] = "down" if change < -0.1 else "up" if change > 0.1 else "stable"
-                
-                return result
-            
-            return None
-        except Exception as e:
-            logger.error("Erro ao obter progresso de peso", error=str(e))
-            return None
-    
-    async def _get_adherence_metrics(self, user_id: str, target_date: date) -> Optional[dict]:
-        """Obtém métricas de aderência"""
-        try:
-            # Calcular aderência dos últimos 7 dias
-            week_start = target_date - timedelta(days=6)
-            
-            # Contar planos seguidos vs. planos criados
-            plans_query = (self.firebase_service.db.collection("diet_plans")
-                          .where("user_id", "==", user_id)
-                          .where("date", ">=", week_start)
-                          .where("date", "<=", target_date))
-            
-            plans_docs = await plans_query.get()
-            
-            if plans_docs:
-                total_plans = len(plans_docs)
-                # Simular aderência baseada em dados disponíveis
-                adherence = min(0.9, total_plans / 7.0)  # Máximo 90%
-                
-                return {"current": adherence}
-            
-            return None
-        except Exception as e:
-            logger.error("Erro ao obter métricas de aderência", error=str(e))
-            return None
-    
-    async def _get_calorie_metrics(self, user_id: str, target_date: date) -> Optional[dict]:
-        """Obtém métricas de calorias"""
-        try:
-            # Buscar planos dos últimos 7 dias
-            week_start = target_date - timedelta(days=6)
-            
-            query = (self.firebase_service.db.collection("diet_plans")
-                    .where("user_id", "==", user_id)
-                    .where("date", ">=", week_start)
-                    .where("date", "<=", target_date))
-            
-            docs = await query.get()
-            
-            if docs:
-                calories = [doc.to_dict()["total_calories"] for doc in docs]
-                average = sum(calories) / len(calories)
-                
-                return {
-                    "average": average,
-                    "target": calories[-1] if calories else None,  # Última meta
-                    "trend": "stable"
-                }
-            
-            return None
-        except Exception as e:
-            logger.error("Erro ao obter métricas de calorias", error=str(e))
-            return None
-    
-    async def _get_workout_frequency(self, user_id: str, target_date: date) -> Optional[dict]:
-        """Obtém frequência de treinos"""
-        try:
-            # Contar treinos da semana atual
-            week_start = target_date - timedelta(days=target_date.weekday())
-            
-            query = (self.firebase_service.db.collection("workout_plans")
-                    .where("user_id", "==", user_id)
-                    .where("date", ">=", week_start)
-                    .where("date", "<=", target_date)
-                    .where("rest_day", "==", False))
+        """Obtém progresso de peso (erros seguem para _load_sources)"""
+        # Buscar últimas medições de peso
+        query = (self.firebase_service.db.collection("weight_measurements")
+                .where("user_id", "==", user_id)
+                .order_by("date", direction="desc")
+                .limit(2))
+        
+        docs = await query.get()
+        
+        if len(docs) >= 1:
+            current = docs[0].to_dict()
+            previous = docs[1].to_dict() if len(docs) > 1 else None
             
-            docs = await query.get()
+            result = {"current": current["weight"]}
             
-            return {
-                "current": len(docs),
-                "target": 4  # Meta padrão de 4 treinos por semana
-            }
-            
-        except Exception as e:
-            logger.error("Erro ao obter frequência de treinos", error=str(e))
-            return None
-    
-    async def _get_weekly_data(self, user_id: str, week_start: date, week_end: date) -> Optional[dict]:
-        """Obtém dados da semana"""
-        try:
-            # Buscar dados da semana
-            workouts_query = (self.firebase_service.db.collection("workout_plans")
-                             .where("user_id", "==", user_id)
-                             .where("date", ">=", week_start)
-                             .where("date", "<=", week_end)
-                             .where("rest_day", "==", False))
-            
-            workout_docs = await workouts_query.get()
-            
-            return {
-                "workouts_completed": len(workout_docs),
-                "diet_adherence": 0.8,  # Simular 80% de aderência
-                "weight_change": None  # Seria calculado com dados reais
-            }
+            if previous:
+                change = current["weight"] - previous["weight"]
+                result["percentage_change"] = (change / previous["weight"]) * 100
+                result["trend"] = "down" if change < -0.1 else "up" if change > 0.1 else "stable"
             
-        except Exception as e:
-            logger.error("Erro ao obter dados semanais", error=str(e))
-            return None
+            return result
+        
+        return None
     
-    async def _save_presentation(self, presentation: PlanPresentation):
-        """Salva apresentação no cache"""
+    async def _save_presentation(
+        self,
+        presentation: PlanPresentation,
+        section_versions: Dict[str, Any],
+        materialized_at: float
+    ):
+        """Materializa a apresentação com as versões das entradas usadas em cada seção"""
         try:
             doc_id = f"{presentation.user_id}_{presentation.date}"
             doc_ref = self.firebase_service.db.collection("plan_presentations").document(doc_id)
             
             presentation_data = presentation.dict()
             presentation_data["created_at"] = datetime.utcnow()
+            presentation_data["section_versions"] = section_versions
+            presentation_data["algorithm_version"] = ALGORITHM_VERSION
+            presentation_data["materialized_at"] = materialized_at
             
             await doc_ref.set(presentation_data)
             
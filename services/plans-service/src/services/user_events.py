@@ -0,0 +1,80 @@
+"""
+Assinatura dos eventos de perfil publicados pelo users-service
+"""
+
+import asyncio
+import json
+from typing import Optional
+import structlog
+
+try:
+    from google.cloud import pubsub_v1
+    PUBSUB_AVAILABLE = True
+except ImportError:
+    PUBSUB_AVAILABLE = False
+
+from config.settings import get_settings
+from services.plan_cache import PlanCache
+from services.presentation_inputs import mark_presentation_inputs_changed
+
+logger = structlog.get_logger(__name__)
+
+# Eventos que alteram as entradas da geração de planos
+PROFILE_EVENTS = {"onboarding_completed", "user_updated", "user_deactivated"}
+
+
+class UserEventsSubscriber:
+    """Invalida planos em cache e apresentações quando o perfil de um usuário muda"""
+
+    def __init__(self, plan_cache: PlanCache, firebase_service):
+        self.plan_cache = plan_cache
+        self.firebase_service = firebase_service
+        self.settings = get_settings()
+        self._future = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        """Inicia o streaming pull da assinatura configurada"""
+        subscription = self.settings.pubsub_subscription_user_events
+        if not subscription or not PUBSUB_AVAILABLE:
+            logger.info("Assinatura de eventos de usuário não configurada")
+            return
+
+        self._loop = asyncio.get_running_loop()
+        subscriber = pubsub_v1.SubscriberClient()
+        path = subscriber.subscription_path(self.settings.firebase_project_id, subscription)
+        self._future = subscriber.subscribe(path, callback=self._on_message)
+        logger.info("Assinatura de eventos de usuário iniciada", subscription=subscription)
+
+    def stop(self):
+        """Encerra o streaming pull"""
+        if self._future:
+            self._future.cancel()
+            self._future = None
+
+    def _on_message(self, message):
+        """Callback do Pub/Sub (executado em thread do cliente)"""
+        try:
+            event = json.loads(message.data.decode("utf-8"))
+        except ValueError:
+            logger.warning("Evento de usuário inválido descartado", message_id=message.message_id)
+            message.ack()
+            return
+
+        user_id = event.get("user_id")
+        message.ack()
+        if event.get("event_type") in PROFILE_EVENTS and user_id:
+            # Não bloqueia a thread do cliente: a invalidação segue no loop da aplicação
+            future = asyncio.run_coroutine_threadsafe(self._invalidate(user_id), self._loop)
+            future.add_done_callback(lambda done: self._log_failure(done, user_id))
+
+    @staticmethod
+    def _log_failure(future, user_id: str):
+        """Registra falhas da invalidação (o evento já foi confirmado; o TTL do cache limita o atraso)"""
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Erro ao invalidar cache de planos", user_id=user_id, error=str(future.exception()))
+
+    async def _invalidate(self, user_id: str):
+        """Descarta os planos em cache e marca todas as seções da apresentação"""
+        await self.plan_cache.invalidate_user(user_id)
+        await mark_presentation_inputs_changed(self.firebase_service.db, user_id)
@@ -0,0 +1,122 @@
+"""
+Janela semanal de planos do usuário carregada uma vez por requisição
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Dias cobertos pela janela (data alvo inclusa)
+WINDOW_DAYS = 7
+
+# Meta padrão de treinos por semana
+WEEKLY_WORKOUT_TARGET = 4
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """Normaliza o campo ``date`` de um documento (date, datetime ou ISO)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+class UserWeekWindow:
+    """
+    Planos de dieta e treino dos últimos 7 dias de um usuário
+
+    Cada coleção é consultada uma única vez para a união dos intervalos usados
+    pela apresentação (últimos 7 dias e semana corrente, que está contida
+    neles); aderência, médias calóricas, frequência de treinos e resumo semanal
+    são derivados dessa fatia em memória. Uma coleção que não foi carregada
+    (timeout ou erro) deixa as métricas que dependem dela como ``None``.
+    """
+
+    def __init__(self, firebase_service, user_id: str, target_date: date):
+        self.firebase_service = firebase_service
+        self.user_id = user_id
+        self.target_date = target_date
+        self.start_date = target_date - timedelta(days=WINDOW_DAYS - 1)
+        self.diet_plans: Optional[List[Dict[str, Any]]] = None
+        self.workout_plans: Optional[List[Dict[str, Any]]] = None
+
+    async def load_diet_plans(self) -> List[Dict[str, Any]]:
+        """Carrega os planos de dieta da janela"""
+        self.diet_plans = await self._query("diet_plans")
+        return self.diet_plans
+
+    async def load_workout_plans(self) -> List[Dict[str, Any]]:
+        """Carrega os planos de treino da janela"""
+        self.workout_plans = await self._query("workout_plans")
+        return self.workout_plans
+
+    async def _query(self, collection: str) -> List[Dict[str, Any]]:
+        """Consulta a coleção no intervalo da janela, ordenando por data"""
+        query = (self.firebase_service.db.collection(collection)
+                .where("user_id", "==", self.user_id)
+                .where("date", ">=", self.start_date)
+                .where("date", "<=", self.target_date))
+
+        docs = await query.get()
+
+        plans = []
+        for doc in docs:
+            data = doc.to_dict()
+            plan_date = _as_date(data.get("date"))
+            if plan_date is not None:
+                plans.append({**data, "date": plan_date})
+        plans.sort(key=lambda plan: plan["date"])
+        return plans
+
+    def _workouts_between(self, start: date, end: date) -> List[Dict[str, Any]]:
+        """Sessões de treino (dias sem descanso) no intervalo"""
+        return [
+            plan for plan in self.workout_plans
+            if start <= plan["date"] <= end and not plan.get("rest_day", False)
+        ]
+
+    def adherence_metrics(self) -> Optional[dict]:
+        """Aderência dos últimos 7 dias (planos de dieta criados / 7)"""
+        if not self.diet_plans:
+            return None
+        # Simular aderência baseada em dados disponíveis
+        return {"current": min(0.9, len(self.diet_plans) / float(WINDOW_DAYS))}  # Máximo 90%
+
+    def calorie_metrics(self) -> Optional[dict]:
+        """Média calórica dos planos dos últimos 7 dias"""
+        if not self.diet_plans:
+            return None
+        calories = [plan["total_calories"] for plan in self.diet_plans]
+        return {
+            "average": sum(calories) / len(calories),
+            "target": calories[-1],  # Última meta
+            "trend": "stable"
+        }
+
+    def workout_frequency(self) -> Optional[dict]:
+        """Treinos da semana corrente (segunda-feira até a data alvo)"""
+        if self.workout_plans is None:
+            return None
+        week_start = self.target_date - timedelta(days=self.target_date.weekday())
+        return {
+            "current": len(self._workouts_between(week_start, self.target_date)),
+            "target": WEEKLY_WORKOUT_TARGET
+        }
+
+    def weekly_data(self) -> Optional[dict]:
+        """Dados do resumo semanal (últimos 7 dias)"""
+        if self.workout_plans is None:
+            return None
+        return {
+            "workouts_completed": len(self._workouts_between(self.start_date, self.target_date)),
+            "diet_adherence": 0.8,  # Simular 80% de aderência
+            "weight_change": None  # Seria calculado com dados reais
+        }
@@ -0,0 +1,127 @@
+"""
+Cronograma semanal em streaming (NDJSON ou SSE), enviando cada dia assim que fica pronto
+"""
+
+import asyncio
+import json
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Dict, Optional
+import structlog
+
+from config.settings import get_settings
+from models.plan import algorithm_config_from_user
+
+logger = structlog.get_logger(__name__)
+
+# Formatos suportados e seus media types
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream"
+}
+
+
+def week_start_for(value: Optional[str]) -> date:
+    """Segunda-feira da semana informada (YYYY-MM-DD) ou da semana atual"""
+    reference = date.fromisoformat(value) if value else date.today()
+    return reference - timedelta(days=reference.weekday())
+
+
+def encode_event(event: Dict[str, Any], stream_format: str) -> bytes:
+    """Serializa um evento como linha NDJSON ou mensagem SSE"""
+    payload = json.dumps(event, default=str, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event['event']}\ndata: {payload}\n\n".encode("utf-8")
+    return (payload + "\n").encode("utf-8")
+
+
+class WeeklyPlanStream:
+    """
+    Gera os sete dias da semana em paralelo e emite cada um ao terminar
+
+    Eventos (na ordem em que ficam prontos; cada dia traz a própria data):
+    ``start``, um ``day`` (ou ``day_error``) por dia e ``end``. Cada dia é
+    serializado e descartado ao ser enviado, então a memória da requisição
+    não cresce com a semana inteira. Se o cliente desconectar, as gerações
+    pendentes são canceladas.
+
+    Os dias são gerados pelo mesmo caminho de ``/plan/diet`` e ``/plan/workout``
+    (cache, planos existentes, gravação); a penalidade de repetição entre dias
+    da geração semanal em lote não se aplica aqui.
+    """
+
+    def __init__(
+        self,
+        diet_generator,
+        workout_generator,
+        firebase_service,
+        max_concurrent_days: Optional[int] = None
+    ):
+        self.diet_generator = diet_generator
+        self.workout_generator = workout_generator
+        self.firebase_service = firebase_service
+        self.max_concurrent_days = (
+            max_concurrent_days or get_settings().weekly_stream_config["max_concurrent_days"]
+        )
+
+    async def encode(self, user_id: str, week_start: date, stream_format: str) -> AsyncIterator[bytes]:
+        """Eventos já serializados no formato pedido (corpo do StreamingResponse)"""
+        async for event in self.events(user_id, week_start):
+            yield encode_event(event, stream_format)
+
+    async def events(self, user_id: str, week_start: date) -> AsyncIterator[Dict[str, Any]]:
+        """Eventos do cronograma semanal"""
+        user_data = await self._get_user_data(user_id)
+        config = algorithm_config_from_user(user_id, user_data)
+        if config is None:
+            yield {"event": "error", "error": "Configuração de planos do usuário não encontrada"}
+            return
+
+        dates = [week_start + timedelta(days=offset) for offset in range(7)]
+        yield {"event": "start", "user_id": user_id, "week_start": week_start, "days": len(dates)}
+
+        slots = asyncio.Semaphore(self.max_concurrent_days)
+        tasks = [
+            asyncio.create_task(self._generate_day(user_id, day, config, slots))
+            for day in dates
+        ]
+        failed = 0
+        try:
+            for next_day in asyncio.as_completed(tasks):
+                event = await next_day
+                failed += event["event"] == "day_error"
+                yield event
+
+            yield {"event": "end", "days": len(dates), "failed": failed}
+            logger.info("Cronograma semanal transmitido", user_id=user_id, failed=failed)
+
+        finally:
+            # Cliente desconectado: não continuar gerando dias que ninguém vai ler
+            for task in tasks:
+                task.cancel()
+
+    async def _generate_day(self, user_id: str, day: date, config, slots: asyncio.Semaphore) -> Dict[str, Any]:
+        """Planos de dieta e treino de um dia (erros viram evento, sem interromper a semana)"""
+        async with slots:
+            try:
+                diet_plan, workout_plan = await asyncio.gather(
+                    self.diet_generator.generate_diet_plan(user_id, day, config),
+                    self.workout_generator.generate_workout_plan(user_id, day, config)
+                )
+                return {
+                    "event": "day",
+                    "date": day,
+                    "diet_plan": diet_plan.dict(),
+                    "workout_plan": workout_plan.dict()
+                }
+            except Exception as e:
+                logger.error("Erro ao gerar dia do cronograma", user_id=user_id, date=day, error=str(e))
+                return {"event": "day_error", "date": day, "error": "Erro ao gerar planos do dia"}
+
+    async def _get_user_data(self, user_id: str) -> dict:
+        """Documento do usuário (uma leitura para a semana inteira)"""
+        try:
+            doc = await self.firebase_service.db.collection("users").document(user_id).get()
+            return doc.to_dict() if doc.exists else {}
+        except Exception as e:
+            logger.error("Erro ao obter dados do usuário", user_id=user_id, error=str(e))
+            return {}
@@ -0,0 +1,336 @@
+"""
+Configuração global para testes do Plans Service
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import date
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from algorithms.diet_generator import DietGenerator
+from algorithms.workout_generator import WorkoutGenerator
+from models.plan import AlgorithmConfig, DietPreferences, WorkoutPreferences
+from services.exercise_library import ExerciseLibrary
+from services.food_catalog import FoodCatalog
+from services.plan_cache import PlanCache
+from services.plan_executor import PlanExecutor
+
+TACO_GROUPS = ["CEREAIS E DERIVADOS", "CARNES E DERIVADOS", "FRUTAS E DERIVADOS",
+               "VERDURAS E LEGUMES", "LEGUMINOSAS", "OLEAGINOSAS", "LATICÍNIOS"]
+TACO_NAMES = ["arroz", "feijão", "frango", "carne", "pão", "aveia", "banana",
+              "maçã", "castanha", "leite", "queijo", "soja", "alface", "peixe"]
+MUSCLES = ["peito", "costas", "ombros", "biceps", "triceps", "quadriceps",
+           "posterior", "gluteos", "panturrilhas", "core", "antebracos"]
+
+
+class FakeContentService:
+    """Content Service com catálogo TACO e biblioteca de exercícios sintéticos"""
+
+    def __init__(self, foods: int = 120, exercises: int = 120, seed: int = 3):
+        rng = random.Random(seed)
+        self.food_calls = 0
+        self.exercise_calls = 0
+        self.foods = [
+            {
+                "codigo": str(i),
+                "nome": f"{rng.choice(TACO_NAMES)} {i}",
+                "grupo": rng.choice(TACO_GROUPS),
+                "composicao": {
+                    "Energia": {"valor": rng.uniform(30, 600)},
+                    "Proteína": {"valor": rng.uniform(0, 35)},
+                    "Carboidrato total": {"valor": rng.uniform(0, 80)},
+                    "Lipídios": {"valor": rng.uniform(0, 40)}
+                }
+            }
+            for i in range(foods)
+        ]
+        self.exercises = [
+            {
+                "id": f"ex{i}",
+                "name": f"Exercício {i}",
+                "muscle_groups": rng.sample(MUSCLES, rng.randint(1, 3)),
+                "equipment": rng.choice(["bodyweight", "barbell", "dumbbell", "machine"]),
+                "difficulty": rng.choice(["beginner", "intermediate", "advanced", "expert"]),
+                "movement_pattern": rng.choice(["compound", "isolation", "cardio"]),
+                "safety_rating": rng.uniform(0.5, 1.0),
+                "effectiveness_rating": rng.uniform(0.5, 1.0),
+                "location_compatibility": rng.choice([["gym"], ["gym", "home"]])
+            }
+            for i in range(exercises)
+        ]
+
+    async def search_foods(self, query: str = ""):
+        self.food_calls += 1
+        return {"data": self.foods, "version": "tests"}
+
+    async def get_exercises(self):
+        self.exercise_calls += 1
+        return {"exercises": self.exercises}
+
+
+class FakeDocument:
+    """Snapshot de documento do Firestore"""
+
+    def __init__(self, doc_id: str, data):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocumentRef:
+    def __init__(self, db: "FakeFirestore", collection: str, doc_id: str):
+        self.db = db
+        self.collection = collection
+        self.id = doc_id
+
+    async def get(self):
+        return FakeDocument(self.id, self.db.data.get(self.collection, {}).get(self.id))
+
+    async def set(self, data, merge: bool = False):
+        documents = self.db.data.setdefault(self.collection, {})
+        documents[self.id] = {**documents.get(self.id, {}), **data} if merge else dict(data)
+
+    async def update(self, data):
+        self.db.updates.append((self.collection, self.id, dict(data)))
+        self.db.data[self.collection][self.id].update(data)
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeFirestore", collection: str, filters=()):
+        self.db = db
+        self.collection = collection
+        self.filters = filters
+
+    def where(self, field, op, value):
+        return FakeQuery(self.db, self.collection, self.filters + ((field, op, value),))
+
+    def order_by(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def _matches(self, data) -> bool:
+        for field, op, value in self.filters:
+            current = data.get(field)
+            if op == "==" and current != value:
+                return False
+            if op == ">=" and not (current is not None and current >= value):
+                return False
+            if op == "<=" and not (current is not None and current <= value):
+                return False
+            if op == "in" and current not in value:
+                return False
+        return True
+
+    async def get(self):
+        documents = self.db.data.get(self.collection, {})
+        return [FakeDocument(doc_id, data) for doc_id, data in documents.items() if self._matches(data)]
+
+    async def stream(self):
+        for document in await self.get():
+            yield document
+
+
+class FakeCollection(FakeQuery):
+    def document(self, doc_id: str) -> FakeDocumentRef:
+        return FakeDocumentRef(self.db, self.collection, doc_id)
+
+
+class FakeBatch:
+    def __init__(self, db: "FakeFirestore"):
+        self.db = db
+        self.writes = []
+
+    def set(self, ref: FakeDocumentRef, data, merge: bool = False):
+        self.writes.append((ref, data, merge))
+
+    async def commit(self):
+        self.db.commits += 1
+        if self.db.fail_commits:
+            self.db.fail_commits -= 1
+            raise RuntimeError("commit recusado")
+        for ref, data, merge in self.writes:
+            await ref.set(data, merge=merge)
+
+
+class FakeFirestore:
+    """Firestore assíncrono em memória (coleção -> id -> documento)"""
+
+    def __init__(self):
+        self.data = {}
+        self.updates = []
+        self.commits = 0
+        self.fail_commits = 0
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    async def get_all(self, refs):
+        for ref in refs:
+            yield await ref.get()
+
+
+class FakeFirebaseService:
+    def __init__(self, db=None):
+        self.db = db or FakeFirestore()
+
+
+class FakeClock:
+    """Relógio monotônico controlado pelo teste"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FakePipeline:
+    """Pipeline Redis que executa os comandos enfileirados em ordem"""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        def enqueue(*args):
+            self.commands.append((name, args))
+            return self
+        return enqueue
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args) for name, args in self.commands]
+
+
+class FakeRedis:
+    """Redis assíncrono em memória (strings, conjuntos e publicações)"""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.ttls = {}
+        self.published = []
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.values[key] = value
+        self.ttls[key] = ttl
+
+    async def delete(self, *keys):
+        return sum(int(self.values.pop(key, None) is not None or self.sets.pop(key, None) is not None)
+                   for key in keys)
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.fixture
+def algorithm_config() -> AlgorithmConfig:
+    return AlgorithmConfig(
+        user_id="user-1",
+        goal="perder_peso",
+        experience_level="intermediate",
+        diet_preferences=DietPreferences(),
+        workout_preferences=WorkoutPreferences(available_days=["monday", "wednesday", "friday"]),
+        target_calories=2000,
+        target_protein=150,
+        target_carbs=200,
+        target_fat=65
+    )
+
+
+@pytest.fixture
+def content_service() -> FakeContentService:
+    return FakeContentService()
+
+
+@pytest.fixture
+def food_catalog(content_service) -> FoodCatalog:
+    catalog = FoodCatalog(content_service)
+    asyncio.run(catalog.load())
+    return catalog
+
+
+@pytest.fixture
+def snapshot(food_catalog):
+    return asyncio.run(food_catalog.get_snapshot())
+
+
+@pytest.fixture
+def firebase_service() -> FakeFirebaseService:
+    return FakeFirebaseService()
+
+
+@pytest.fixture
+def diet_generator(content_service, firebase_service, food_catalog) -> DietGenerator:
+    return DietGenerator(
+        content_service, firebase_service,
+        food_catalog=food_catalog, plan_cache=PlanCache(), plan_executor=PlanExecutor(max_workers=0)
+    )
+
+
+@pytest.fixture
+def workout_generator(content_service, firebase_service) -> WorkoutGenerator:
+    return WorkoutGenerator(
+        content_service, firebase_service,
+        exercise_library=ExerciseLibrary(content_service),
+        plan_cache=PlanCache(), plan_executor=PlanExecutor(max_workers=0)
+    )
+
+
+@pytest.fixture
+def redis_client() -> FakeRedis:
+    return FakeRedis()
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    """Substitui time.monotonic (os testes não devem aguardar timers do asyncio)"""
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def target_date() -> date:
+    return date(2026, 1, 5)
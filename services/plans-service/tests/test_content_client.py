@@ -0,0 +1,133 @@
+"""
+Testes para o cliente do Content Service (coalescência e requisições condicionais)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from services.content_client import ContentClient
+from services.food_catalog import FoodCatalog
+
+FOODS = [{"codigo": "1", "nome": "arroz"}, {"codigo": "2", "nome": "feijão"}]
+
+
+class FakeContentServer:
+    """Content Service simulado: catálogo com ETag (``etag=None``: sem ETag) e respostas 304"""
+
+    def __init__(self):
+        self.etag = '"v1"'
+        self.requests = []
+        self.failures = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        await asyncio.sleep(0.01)
+        if self.failures:
+            self.failures -= 1
+            raise httpx.ConnectError("conexão recusada", request=request)
+        if request.url.path == "/foods":
+            if self.etag is None:
+                return httpx.Response(200, json={"data": FOODS})
+            if request.headers.get("if-none-match") == self.etag:
+                return httpx.Response(304)
+            return httpx.Response(200, json={"data": FOODS}, headers={"ETag": self.etag})
+        return httpx.Response(200, json={"exercises": []})
+
+
+@pytest.fixture
+def server() -> FakeContentServer:
+    return FakeContentServer()
+
+
+@pytest.fixture
+def client(server) -> ContentClient:
+    return ContentClient(base_url="http://content", transport=httpx.MockTransport(server.handle))
+
+
+def run(client: ContentClient, coroutine):
+    async def scenario():
+        try:
+            return await coroutine()
+        finally:
+            await client.close()
+    return asyncio.run(scenario())
+
+
+class TestContentClient:
+    """Testes para ContentClient"""
+
+    def test_identical_requests_are_coalesced(self, client, server):
+        """GETs idênticos simultâneos compartilham uma requisição"""
+        async def burst():
+            return await asyncio.gather(
+                *(client.search_foods() for _ in range(5)),
+                client.search_foods("arroz"),
+                client.get_exercises()
+            )
+
+        results = run(client, burst)
+
+        assert len(server.requests) == 3
+        assert all(result is results[0] for result in results[:5])
+        assert results[0]["version"] == '"v1"'
+        assert server.requests[1].url.params["search"] == "arroz"
+        assert client.get_stats()["coalesced"] == 4
+        assert client.get_stats()["in_flight"] == 0
+
+    def test_not_modified_returns_the_cached_payload(self, client, server):
+        """A revalidação envia If-None-Match e um 304 devolve o payload já recebido"""
+        async def revalidate():
+            first = await client.search_foods()
+            second = await client.search_foods()
+            server.etag = '"v2"'
+            third = await client.search_foods()
+            return first, second, third
+
+        first, second, third = run(client, revalidate)
+
+        assert "if-none-match" not in server.requests[0].headers
+        assert server.requests[1].headers["if-none-match"] == '"v1"'
+        assert second is first
+        assert third is not first and third["version"] == '"v2"'
+        assert client.stats == {"requests": 3, "coalesced": 0, "not_modified": 1}
+
+    def test_cancelled_caller_does_not_cancel_the_request(self, client, server):
+        """Cancelar um chamador não interrompe a requisição aguardada pelos demais"""
+        async def cancel_one():
+            first = asyncio.create_task(client.get_exercises())
+            second = asyncio.create_task(client.get_exercises())
+            await asyncio.sleep(0)
+            first.cancel()
+            return first, await second
+
+        first, result = run(client, cancel_one)
+
+        assert first.cancelled()
+        assert result == {"exercises": []}
+        assert len(server.requests) == 1
+
+    def test_transport_errors_are_retried(self, client, server):
+        """Falhas de transporte são repetidas até max_retries"""
+        server.failures = client.max_retries
+        assert run(client, client.get_exercises) == {"exercises": []}
+        assert len(server.requests) == client.max_retries + 1
+
+        server.failures = client.max_retries + 1
+        with pytest.raises(httpx.ConnectError):
+            run(client, client.get_exercises)
+
+    @pytest.mark.parametrize("etag", ['"v1"', None])
+    def test_catalog_refresh_fetches_once(self, client, server, etag):
+        """A atualização do catálogo faz uma só requisição (304 com ETag, download único sem)"""
+        server.etag = etag
+        catalog = FoodCatalog(client)
+
+        async def load_and_refresh():
+            await catalog.load()
+            return await catalog.refresh()
+
+        assert run(client, load_and_refresh) is False
+        assert len(server.requests) == 2
+        assert client.stats["not_modified"] == (1 if etag else 0)
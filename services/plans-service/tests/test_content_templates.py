@@ -0,0 +1,129 @@
+"""
+Testes para o carregamento das tabelas de textos (consulta por objetivo / refeição e versão)
+"""
+
+import json
+import random
+
+import pytest
+
+from models.plan import GoalType, MealType
+from services.content_templates import (
+    DEFAULT_TEMPLATES_PATH, PLAN_TEXTS_ARCHIVE_NAME, GoalTips, archive_plan_texts, load_content_templates
+)
+
+
+@pytest.fixture
+def raw_templates():
+    with open(DEFAULT_TEMPLATES_PATH, encoding="utf-8") as templates_file:
+        return json.load(templates_file)
+
+
+def write_templates(directory, raw):
+    path = directory / "content_templates.json"
+    path.write_text(json.dumps(raw, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+class TestTemplateLookup:
+    """Testes para as tabelas indexadas por objetivo e tipo de refeição"""
+
+    def test_tables_are_keyed_by_enums(self):
+        templates = load_content_templates(DEFAULT_TEMPLATES_PATH)
+
+        assert set(templates.motivational_messages) == set(GoalType)
+        assert set(templates.meal_instructions) == set(MealType)
+        assert templates.meal_tips[MealType.CEIA] == ("Opte por proteínas de digestão lenta", "Mantenha porções pequenas")
+
+    def test_templates_are_compiled_once(self):
+        templates = load_content_templates(DEFAULT_TEMPLATES_PATH)
+
+        summary = templates.daily_summaries["diet_only"].render(
+            diet_calories=2000, meal_count=5, goal_description="manter o peso"
+        )
+        message = templates.motivational_messages[GoalType.PERDER_PESO][0].render(name="Ana")
+
+        assert summary.startswith("Seu plano nutricional de hoje inclui 2000 calorias em 5 refeições")
+        assert message.startswith("Olá Ana!")
+        assert "{{" not in templates.encouragements["steady"][0].render(name="Ana")
+
+    def test_missing_goal_falls_back_to_maintenance(self, tmp_path, raw_templates):
+        del raw_templates["milestones"][GoalType.AUMENTAR_FORCA.value]
+        templates = load_content_templates(write_templates(tmp_path, raw_templates))
+
+        fallback = templates.for_goal(templates.milestones, GoalType.AUMENTAR_FORCA)
+
+        assert fallback == templates.milestones[GoalType.MANTER_PESO]
+        assert templates.for_goal(templates.milestones, GoalType.GANHAR_MASSA) == tuple(
+            raw_templates["milestones"][GoalType.GANHAR_MASSA.value]
+        )
+
+    def test_tables_are_read_only(self):
+        templates = load_content_templates(DEFAULT_TEMPLATES_PATH)
+
+        with pytest.raises(TypeError):
+            templates.milestones[GoalType.PERDER_PESO] = ()
+        with pytest.raises(TypeError):
+            templates.plan_text_tables["outra"] = ()
+        assert isinstance(templates.meal_tips[MealType.ALMOCO], tuple)
+
+    def test_tips_are_split_by_priority(self):
+        templates = load_content_templates(DEFAULT_TEMPLATES_PATH)
+        tips = templates.daily_tips[GoalType.PERDER_PESO]
+
+        selected = tips.select(random.Random(1))
+
+        assert all(tip.priority == 1 for tip in tips.high_priority)
+        assert all(tip.priority == 2 for tip in tips.low_priority)
+        assert [tip.priority for tip in selected] == [1, 2]
+        assert selected == tips.select(random.Random(1))
+        assert GoalTips((), ()).select(random.Random(1)) == []
+
+
+class TestPlanTextsVersion:
+    """Testes para a versão (hash) da tabela de textos copiados para os planos"""
+
+    def test_version_is_deterministic(self, tmp_path, raw_templates):
+        current = load_content_templates(DEFAULT_TEMPLATES_PATH)
+        reordered = dict(reversed(list(raw_templates.items())))
+        copy = load_content_templates(write_templates(tmp_path, reordered))
+
+        assert copy.plan_texts_version == current.plan_texts_version
+        assert copy.plan_texts == current.plan_texts
+        assert len(current.plan_texts_version) == 16
+        assert list(current.plan_texts) == sorted(set(current.plan_texts))
+
+    def test_only_plan_texts_change_the_version(self, tmp_path, raw_templates):
+        current = load_content_templates(DEFAULT_TEMPLATES_PATH)
+        raw_templates["milestones"][GoalType.PERDER_PESO.value].append("Novo marco")
+        unrelated = load_content_templates(write_templates(tmp_path, raw_templates))
+
+        raw_templates["meal_tips"][MealType.CEIA.value].append("Evite telas antes de dormir")
+        edited = load_content_templates(write_templates(tmp_path, raw_templates))
+
+        assert unrelated.plan_texts_version == current.plan_texts_version
+        assert edited.plan_texts_version != current.plan_texts_version
+        assert "Evite telas antes de dormir" in edited.plan_texts
+
+    def test_archive_keeps_previous_versions(self, tmp_path, raw_templates):
+        """Versões arquivadas continuam nas tabelas depois de editar os textos"""
+        path = write_templates(tmp_path, raw_templates)
+        previous = archive_plan_texts(path)
+
+        raw_templates["meal_instructions"][MealType.JANTAR.value] = "Jante até as 20h."
+        write_templates(tmp_path, raw_templates)
+        edited = load_content_templates(path)
+
+        assert edited.plan_texts_version != previous
+        assert set(edited.plan_text_tables) == {previous, edited.plan_texts_version}
+        assert "Jante até as 20h." not in edited.plan_text_tables[previous]
+        assert edited.plan_text_tables[edited.plan_texts_version] == edited.plan_texts
+
+        assert archive_plan_texts(path) == edited.plan_texts_version
+        with open(tmp_path / PLAN_TEXTS_ARCHIVE_NAME, encoding="utf-8") as archive_file:
+            assert set(json.load(archive_file)) == {previous, edited.plan_texts_version}
+
+    def test_without_archive_only_the_current_table(self, tmp_path, raw_templates):
+        templates = load_content_templates(write_templates(tmp_path, raw_templates))
+
+        assert dict(templates.plan_text_tables) == {templates.plan_texts_version: templates.plan_texts}
@@ -0,0 +1,81 @@
+"""
+Testes para a geração semanal de dietas (hash dos dias penalizados pela variedade)
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from algorithms.seeding import plan_input_hash, week_input_hash
+from models.plan import DietPreferences
+from services.plan_cache import PlanCache
+
+
+@pytest.fixture
+def varied_config(algorithm_config):
+    return algorithm_config.copy(update={"diet_preferences": DietPreferences(style="varied")})
+
+
+@pytest.fixture
+def consistent_config(algorithm_config):
+    return algorithm_config.copy(update={"diet_preferences": DietPreferences(style="consistent")})
+
+
+def week_dates(week_start):
+    return [week_start + timedelta(days=offset) for offset in range(7)]
+
+
+class TestDietWeek:
+    """Testes para compose_diet_week"""
+
+    def test_varied_days_are_hashed_with_the_week(self, diet_generator, varied_config, snapshot, target_date):
+        """Dias penalizados recebem hash derivado da semana, distinto do dia isolado"""
+        plans, new_plans = diet_generator.compose_diet_week(
+            "user-1", week_dates(target_date), varied_config, {}, {}, snapshot
+        )
+
+        assert len(new_plans) == 7
+        for plan in plans:
+            day_hash = plan_input_hash("diet", "user-1", plan.date, varied_config, snapshot.version)
+            assert plan.input_hash == week_input_hash(day_hash, target_date)
+
+        single_day = diet_generator.compose_diet_plan("user-1", target_date + timedelta(days=3), varied_config, {}, snapshot)
+        assert single_day.input_hash != plans[3].input_hash
+
+    def test_unpenalized_week_matches_single_days(self, diet_generator, consistent_config, snapshot, target_date):
+        """Sem penalidade de variedade, cada dia da semana é o mesmo plano do dia isolado"""
+        plans, _ = diet_generator.compose_diet_week(
+            "user-1", week_dates(target_date), consistent_config, {}, {}, snapshot
+        )
+
+        for plan in plans:
+            single_day = diet_generator.compose_diet_plan("user-1", plan.date, consistent_config, {}, snapshot)
+            assert plan.input_hash == single_day.input_hash
+            assert plan.meals == single_day.meals
+
+    def test_week_plans_are_reused_for_single_days(self, diet_generator, varied_config, snapshot, target_date):
+        """Um dia gerado na semana continua válido para o mesmo dia pedido isoladamente"""
+        plans, _ = diet_generator.compose_diet_week(
+            "user-1", week_dates(target_date), varied_config, {}, {}, snapshot
+        )
+        plan = plans[4]
+        day_hash = plan_input_hash("diet", "user-1", plan.date, varied_config, snapshot.version)
+        assert not diet_generator._should_regenerate_plan(plan, varied_config, day_hash)
+
+        changed = varied_config.copy(update={"target_calories": varied_config.target_calories + 300})
+        changed_hash = plan_input_hash("diet", "user-1", plan.date, changed, snapshot.version)
+        assert diet_generator._should_regenerate_plan(plan, changed, changed_hash)
+
+    def test_week_plans_do_not_take_the_single_day_cache_key(self, diet_generator, varied_config, snapshot, target_date):
+        """O cache guarda o dia da semana sob o próprio hash, não sob a chave do dia isolado"""
+        plans, _ = diet_generator.compose_diet_week(
+            "user-1", week_dates(target_date), varied_config, {}, {}, snapshot
+        )
+        cache = PlanCache()
+
+        async def store_and_lookup():
+            await cache.set("diet", plans[0], varied_config)
+            return await cache.get("diet", "user-1", target_date, varied_config, snapshot.version)
+
+        assert asyncio.run(store_and_lookup()) is None
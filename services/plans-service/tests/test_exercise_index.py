@@ -0,0 +1,104 @@
+"""
+Testes para o índice de exercícios por movimento, músculo e dificuldade
+"""
+
+import random
+
+import pytest
+
+from algorithms.exercise_index import DIFFICULTY_ORDER, ExerciseIndex, allowed_difficulties
+from algorithms.workout_generator import ExerciseCandidate
+from models.plan import DifficultyLevel
+
+MUSCLES = ["peito", "costas", "ombros", "biceps", "triceps", "quadriceps", "posterior", "core"]
+PATTERNS = ["compound", "isolation", "cardio"]
+
+
+def random_candidates(rng: random.Random, count: int):
+    """Candidatos com notas de poucos valores possíveis, para forçar empates"""
+    candidates = []
+    for i in range(count):
+        muscles = rng.sample(MUSCLES, rng.randint(1, 3))
+        candidates.append(ExerciseCandidate(
+            exercise_id=f"ex{i}",
+            name=f"Exercício {i}",
+            muscle_groups=muscles,
+            primary_muscle=muscles[0],
+            secondary_muscles=muscles[1:],
+            equipment="bodyweight",
+            difficulty=rng.choice(list(DifficultyLevel)),
+            movement_pattern=rng.choice(PATTERNS),
+            safety_rating=rng.choice([0.6, 0.8, 1.0]),
+            effectiveness_rating=rng.choice([0.5, 0.75, 1.0]),
+            location_compatibility=["gym"],
+            time_efficiency=0.7
+        ))
+    return candidates
+
+
+def linear_scan(candidates, movement_type, muscle_groups, user_level, used_exercises):
+    """Seleção anterior ao índice: filtro completo e max() (primeiro em empates)"""
+    max_level = DIFFICULTY_ORDER[user_level] + 1
+    eligible = [
+        exercise for exercise in candidates
+        if exercise.exercise_id not in used_exercises
+        and (movement_type == "any" or exercise.movement_pattern == movement_type)
+        and any(muscle in exercise.muscle_groups for muscle in muscle_groups)
+        and DIFFICULTY_ORDER[exercise.difficulty] <= max_level
+    ]
+    if not eligible:
+        return None
+    return max(eligible, key=lambda exercise: exercise.effectiveness_rating * exercise.safety_rating)
+
+
+class TestExerciseIndex:
+    """Testes para ExerciseIndex.best_for_slot"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_the_linear_scan(self, seed):
+        """Mesmo exercício que a varredura completa, inclusive em empates e com exercícios usados"""
+        rng = random.Random(seed)
+        candidates = random_candidates(rng, 80)
+        index = ExerciseIndex(candidates)
+
+        for _ in range(300):
+            movement_type = rng.choice(PATTERNS + ["any"])
+            muscle_groups = rng.sample(MUSCLES, rng.randint(1, 3))
+            user_level = rng.choice(list(DifficultyLevel))
+            used = {f"ex{i}" for i in rng.sample(range(80), rng.randint(0, 40))}
+
+            expected = linear_scan(candidates, movement_type, muscle_groups, user_level, used)
+            assert index.best_for_slot(movement_type, muscle_groups, user_level, used) is expected
+
+    def test_filling_a_session_exhausts_the_slot(self):
+        """Slots repetidos consomem os candidatos em ordem de nota até não restar nenhum"""
+        candidates = random_candidates(random.Random(9), 40)
+        index = ExerciseIndex(candidates)
+        used = set()
+        picked = []
+
+        while True:
+            exercise = index.best_for_slot("any", ["peito"], DifficultyLevel.EXPERT, used)
+            if exercise is None:
+                break
+            assert exercise is linear_scan(candidates, "any", ["peito"], DifficultyLevel.EXPERT, used)
+            used.add(exercise.exercise_id)
+            picked.append(exercise)
+
+        assert picked == [
+            exercise for exercise in sorted(
+                candidates, key=lambda exercise: -exercise.effectiveness_rating * exercise.safety_rating
+            )
+            if "peito" in exercise.muscle_groups
+        ]
+
+    def test_empty_index(self):
+        index = ExerciseIndex([])
+        assert len(index) == 0
+        assert index.best_for_slot("any", MUSCLES, DifficultyLevel.EXPERT, set()) is None
+
+    def test_allowed_difficulties_go_one_level_above(self):
+        assert allowed_difficulties(DifficultyLevel.BEGINNER) == (
+            DifficultyLevel.BEGINNER, DifficultyLevel.INTERMEDIATE
+        )
+        assert allowed_difficulties(DifficultyLevel.EXPERT) == tuple(DifficultyLevel)
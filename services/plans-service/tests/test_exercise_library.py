@@ -0,0 +1,119 @@
+"""
+Testes para a biblioteca de exercícios compartilhada e o cache de índices por perfil
+"""
+
+import asyncio
+import dataclasses
+
+import pytest
+
+from algorithms.workout_generator import TRAINING_SPLITS, _build_exercise_index
+from models.plan import WorkoutPreferences
+
+
+@pytest.fixture
+def preferences() -> WorkoutPreferences:
+    return WorkoutPreferences(
+        available_days=["monday", "wednesday", "friday"], location="gym",
+        equipment_available=["barbell", "dumbbell", "machine"]
+    )
+
+
+def warm(workout_generator, preferences):
+    return asyncio.run(workout_generator.warm_exercise_index(preferences))
+
+
+def current_snapshot(library):
+    return asyncio.run(library.get_snapshot())
+
+
+class TestExerciseIndexCache:
+    """Testes para o cache de _build_exercise_index (snapshot, local e equipamentos)"""
+
+    def test_same_snapshot_and_profile_reuse_the_index(self, workout_generator, preferences):
+        first = warm(workout_generator, preferences)
+        reordered = preferences.copy(update={"equipment_available": list(reversed(preferences.equipment_available))})
+
+        assert warm(workout_generator, reordered) is first
+        assert warm(workout_generator, preferences.copy(update={"location": "home"})) is not first
+
+    def test_unchanged_library_keeps_the_index(self, workout_generator, content_service, preferences):
+        """Revalidar sem mudança de versão mantém o snapshot e, portanto, o índice"""
+        first = warm(workout_generator, preferences)
+        snapshot = current_snapshot(workout_generator.exercise_library)
+
+        asyncio.run(workout_generator.exercise_library.refresh())
+
+        assert current_snapshot(workout_generator.exercise_library) is snapshot
+        assert warm(workout_generator, preferences) is first
+        assert content_service.exercise_calls == 2
+
+    def test_new_library_version_builds_a_new_index(self, workout_generator, content_service, preferences):
+        first = warm(workout_generator, preferences)
+        content_service.exercises = content_service.exercises[:60]
+
+        asyncio.run(workout_generator.exercise_library.refresh())
+        second = warm(workout_generator, preferences)
+
+        assert second is not first
+        assert len(second) < len(first)
+        assert second.size == len([
+            exercise for exercise in content_service.exercises
+            if "gym" in exercise["location_compatibility"]
+        ])
+
+    def test_pool_version_triggers_revalidation(self, workout_generator, content_service, preferences):
+        """Com a versão do processo principal diferente da local, a biblioteca é revalidada"""
+        first = warm(workout_generator, preferences)
+        stale_version = current_snapshot(workout_generator.exercise_library).version
+        content_service.exercises = content_service.exercises[:60]
+
+        assert asyncio.run(workout_generator.warm_exercise_index(preferences, stale_version)) is first
+        updated = asyncio.run(workout_generator.warm_exercise_index(preferences, "versao-nova"))
+
+        assert updated is not first
+        assert current_snapshot(workout_generator.exercise_library).version != stale_version
+
+    def test_cache_is_keyed_by_snapshot_identity(self, workout_generator, preferences):
+        warm(workout_generator, preferences)
+        snapshot = current_snapshot(workout_generator.exercise_library)
+        equipment = frozenset(preferences.equipment_available)
+        hits = _build_exercise_index.cache_info().hits
+
+        _build_exercise_index(snapshot, "gym", equipment)
+        copy = dataclasses.replace(snapshot)
+        _build_exercise_index(copy, "gym", equipment)
+
+        assert _build_exercise_index.cache_info().hits == hits + 1
+        assert _build_exercise_index(copy, "gym", equipment) is not _build_exercise_index(snapshot, "gym", equipment)
+
+
+class TestExerciseLibrary:
+    """Testes para ExerciseLibrary"""
+
+    def test_empty_library_is_not_reloaded(self, workout_generator, content_service):
+        """Snapshot vazio (len 0) também é mantido quando a versão não muda"""
+        content_service.exercises = []
+        library = workout_generator.exercise_library
+        snapshot = asyncio.run(library.get_snapshot())
+
+        asyncio.run(library.refresh())
+
+        assert len(snapshot) == 0
+        assert current_snapshot(library) is snapshot
+
+
+class TestTrainingSplits:
+    """Testes para os templates de split compartilhados"""
+
+    def test_templates_are_read_only(self):
+        template = TRAINING_SPLITS[3][0]
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            template.name = "outro"
+        with pytest.raises(TypeError):
+            template.exercise_slots[0]["type"] = "any"
+        assert isinstance(template.muscle_groups_focus, tuple)
+        assert all(isinstance(slot["muscle_groups"], tuple) for slot in template.exercise_slots)
+        with pytest.raises(TypeError):
+            TRAINING_SPLITS[8] = ()
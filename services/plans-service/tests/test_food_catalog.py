@@ -0,0 +1,135 @@
+"""
+Testes para o catálogo de alimentos compartilhado (carga, atualização e snapshot imutável)
+"""
+
+import asyncio
+import copy
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from services.food_catalog import FoodCatalog, _fingerprint
+
+
+@pytest.fixture
+def content_service(content_service):
+    """Content Service do conftest com a versão do catálogo definida pelo teste (None = sem versão)"""
+    content_service.foods = content_service.foods[:20]
+    content_service.version = "v1"
+
+    async def search_foods(query: str = ""):
+        content_service.food_calls += 1
+        await asyncio.sleep(0)
+        response = {"data": content_service.foods}
+        if content_service.version is not None:
+            response["version"] = content_service.version
+        return response
+
+    content_service.search_foods = search_foods
+    return content_service
+
+
+class TestLoadLock:
+    """Testes para a carga única do catálogo"""
+
+    def test_concurrent_first_use_loads_once(self, content_service):
+        catalog = FoodCatalog(content_service)
+
+        async def scenario():
+            return await asyncio.gather(*(catalog.get_snapshot() for _ in range(10)))
+
+        snapshots = asyncio.run(scenario())
+
+        assert content_service.food_calls == 1
+        assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+    def test_refresh_waits_for_the_initial_load(self, content_service):
+        catalog = FoodCatalog(content_service)
+
+        async def scenario():
+            return await asyncio.gather(catalog.get_snapshot(), catalog.refresh())
+
+        snapshot, published = asyncio.run(scenario())
+
+        assert published is False
+        assert catalog.snapshot is snapshot
+        assert content_service.food_calls == 2
+
+
+class TestRefresh:
+    """Testes para FoodCatalog.refresh"""
+
+    @pytest.mark.parametrize("version", ["v1", None])
+    def test_unchanged_catalog_keeps_the_snapshot(self, content_service, version):
+        """Uma busca por atualização, sem reconversão (com versão no corpo ou por fingerprint)"""
+        content_service.version = version
+        catalog = FoodCatalog(content_service)
+        snapshot = asyncio.run(catalog.load())
+
+        assert asyncio.run(catalog.refresh()) is False
+        assert catalog.snapshot is snapshot
+        assert content_service.food_calls == 2
+
+    def test_new_version_publishes_a_new_snapshot(self, content_service):
+        catalog = FoodCatalog(content_service)
+        previous = asyncio.run(catalog.load())
+
+        content_service.version = "v2"
+        content_service.foods = content_service.foods[:10]
+
+        assert asyncio.run(catalog.refresh()) is True
+        assert catalog.snapshot is not previous
+        assert catalog.snapshot.version == "v2"
+        assert len(catalog.snapshot) == 10 and len(previous) == 20
+        assert content_service.food_calls == 2
+
+    def test_changed_composition_without_version_is_detected(self, content_service):
+        content_service.version = None
+        catalog = FoodCatalog(content_service)
+        previous = asyncio.run(catalog.load())
+
+        content_service.foods = copy.deepcopy(content_service.foods)
+        content_service.foods[0]["composicao"]["Energia"]["valor"] += 10
+
+        assert asyncio.run(catalog.refresh()) is True
+        assert catalog.snapshot.version != previous.version
+
+
+class TestFingerprint:
+    """Testes para a versão calculada quando o Content Service não informa uma"""
+
+    def test_deterministic(self, content_service):
+        foods = content_service.foods
+        assert _fingerprint(foods) == _fingerprint(copy.deepcopy(foods))
+        assert _fingerprint(foods).startswith("fp-20-")
+
+    def test_changes_with_codes_and_composition(self, content_service):
+        foods = content_service.foods
+        recoded = copy.deepcopy(foods)
+        recoded[3]["codigo"] = "novo"
+        changed = copy.deepcopy(foods)
+        changed[3]["composicao"]["Lipídios"]["valor"] += 1
+
+        versions = {_fingerprint(foods), _fingerprint(recoded), _fingerprint(changed), _fingerprint(foods[:19])}
+
+        assert len(versions) == 4
+
+
+class TestFrozenSnapshot:
+    """Testes para a imutabilidade do snapshot compartilhado"""
+
+    def test_snapshot_and_foods_are_read_only(self, food_catalog):
+        snapshot = food_catalog.snapshot
+        food = snapshot.foods[0]
+
+        with pytest.raises(FrozenInstanceError):
+            snapshot.version = "outra"
+        with pytest.raises(TypeError):
+            food["name"] = "outro"
+        assert isinstance(snapshot.foods, tuple)
+        for value in food.values():
+            assert not isinstance(value, (dict, list))
+        nested = [value for value in food.values() if hasattr(value, "keys")]
+        for mapping in nested:
+            with pytest.raises(TypeError):
+                mapping["extra"] = 1
@@ -0,0 +1,54 @@
+"""
+Testes para as colunas do catálogo e a matriz de candidatos
+"""
+
+import numpy as np
+import pytest
+
+from models.plan import DietPreferences, MealType
+
+
+class TestFoodMatrix:
+    """Testes para FoodColumns / FoodMatrix"""
+
+    def test_candidates_are_a_view_of_the_snapshot_columns(self, diet_generator, snapshot):
+        """Os candidatos indexam as colunas do snapshot, ordenados por preferência"""
+        columns = snapshot.food_columns
+        disliked = snapshot.foods[0]["name"]
+        food_matrix = diet_generator._candidate_foods(snapshot, DietPreferences(disliked_foods=[disliked.upper()]))
+
+        assert snapshot.food_columns is columns
+        assert food_matrix.columns is columns
+        assert 0 not in food_matrix.positions
+        assert np.array_equal(food_matrix.calories, columns.calories[food_matrix.positions])
+        assert np.all(np.diff(food_matrix.preference) <= 0)
+        for index in range(len(food_matrix)):
+            assert food_matrix.food(index) is snapshot.foods[food_matrix.positions[index]]
+
+    def test_preference_scores_match_per_food_rules(self, diet_generator, snapshot):
+        """O vetor de preferência segue as regras de bônus aplicadas alimento a alimento"""
+        preferred = snapshot.foods[3]["name"]
+        preferences = DietPreferences(
+            preferred_foods=[preferred.upper()], cooking_time_preference="quick", budget_level="low"
+        )
+        restrictions = snapshot.restriction_index.compile(preferences)
+        scores = diet_generator._preference_scores(snapshot, preferences, restrictions)
+
+        for food, score in zip(snapshot.foods, scores):
+            expected = 0.5
+            expected += 0.3 if food["name"].lower() == preferred.lower() else 0.0
+            expected += 0.1 if food.get("preparation_time", 15) <= 15 else 0.0
+            expected += 0.1 if food.get("cost_level", "medium") == "low" else 0.0
+            expected *= food.get("availability_score", 0.8)
+            assert score == pytest.approx(min(expected, 1.0))
+
+    def test_masks_are_restricted_to_candidates(self, diet_generator, snapshot):
+        """Máscaras de refeição e de IDs são as do catálogo nas posições dos candidatos"""
+        columns = snapshot.food_columns
+        food_matrix = diet_generator._candidate_foods(snapshot, DietPreferences())
+        food_ids = [food_matrix.food(0)["id"], food_matrix.food(len(food_matrix) - 1)["id"]]
+
+        assert np.array_equal(
+            food_matrix.meal_mask(MealType.ALMOCO), columns.meal_mask(MealType.ALMOCO)[food_matrix.positions]
+        )
+        assert np.flatnonzero(food_matrix.id_mask(food_ids)).tolist() == [0, len(food_matrix) - 1]
@@ -0,0 +1,153 @@
+"""
+Testes para a regeneração de uma refeição (orçamento restante e update parcial)
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from algorithms.diet_generator import MEAL_REBALANCE_BOUNDS, MEAL_UPDATE_FIELDS
+from services.plan_codec import StoredPlan, encode_compact
+from services.presentation_inputs import PRESENTATION_INPUTS_COLLECTION
+
+
+@pytest.fixture
+def diet_plan(diet_generator, algorithm_config, snapshot, target_date):
+    return diet_generator.compose_diet_plan("user-1", target_date, algorithm_config, {}, snapshot)
+
+
+def doc_id(plan) -> str:
+    return f"{plan.user_id}_{plan.date}"
+
+
+class TestRemainingMealTarget:
+    """Testes para DietGenerator._remaining_meal_target"""
+
+    @pytest.fixture
+    def split(self, diet_generator, algorithm_config, diet_plan):
+        meal = diet_plan.meals[1]
+        kept_meals = [other for other in diet_plan.meals if other is not meal]
+        nominal = diet_generator._calculate_meal_targets(algorithm_config)[meal.meal_type]
+        kept_totals = diet_generator._calculate_totals(kept_meals)
+        return kept_meals, nominal, kept_totals
+
+    def with_daily_targets(self, diet_plan, values):
+        calories, protein, carbs, fat = values
+        return diet_plan.copy(update={
+            "target_calories": calories, "target_protein": protein,
+            "target_carbs": carbs, "target_fat": fat
+        })
+
+    def test_remaining_budget_within_bounds(self, diet_generator, diet_plan, split):
+        """Dentro dos limites, a refeição recebe exatamente o que falta para as metas do dia"""
+        kept_meals, nominal, kept_totals = split
+        remaining = (nominal.calories * 1.2, nominal.protein * 0.8, nominal.carbs, nominal.fat * 1.1)
+        plan = self.with_daily_targets(diet_plan, [kept + value for kept, value in zip(kept_totals, remaining)])
+
+        target = diet_generator._remaining_meal_target(plan, kept_meals, nominal)
+
+        assert (target.calories, target.protein, target.carbs, target.fat) == pytest.approx(remaining)
+        assert target.tolerance == nominal.tolerance
+
+    def test_budget_is_clamped_around_the_nominal_target(self, diet_generator, diet_plan, split):
+        """Sobras muito grandes ou negativas ficam entre os limites da meta nominal"""
+        kept_meals, nominal, kept_totals = split
+        low, high = MEAL_REBALANCE_BOUNDS
+        nominal_values = (nominal.calories, nominal.protein, nominal.carbs, nominal.fat)
+
+        overfull = self.with_daily_targets(diet_plan, [kept + value * 5 for kept, value in zip(kept_totals, nominal_values)])
+        exhausted = self.with_daily_targets(diet_plan, [kept - value for kept, value in zip(kept_totals, nominal_values)])
+
+        high_target = diet_generator._remaining_meal_target(overfull, kept_meals, nominal)
+        low_target = diet_generator._remaining_meal_target(exhausted, kept_meals, nominal)
+
+        assert (high_target.calories, high_target.protein, high_target.carbs, high_target.fat) == \
+            pytest.approx([value * high for value in nominal_values])
+        assert (low_target.calories, low_target.protein, low_target.carbs, low_target.fat) == \
+            pytest.approx([value * low for value in nominal_values])
+
+
+class TestRegenerateMeal:
+    """Testes para DietGenerator.regenerate_meal"""
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_partial_update_keeps_other_meals(
+        self, diet_generator, firebase_service, algorithm_config, diet_plan, target_date, compact
+    ):
+        """Apenas a refeição e os totais são gravados, no formato do documento existente"""
+        documents = firebase_service.db.data.setdefault("diet_plans", {})
+        documents[doc_id(diet_plan)] = encode_compact("diet", diet_plan) if compact else diet_plan.dict()
+        meal_type = diet_plan.meals[1].meal_type
+        previous_foods = {food.food_id for food in diet_plan.meals[1].foods}
+
+        updated = asyncio.run(
+            diet_generator.regenerate_meal("user-1", target_date, meal_type, algorithm_config)
+        )
+
+        assert [meal.meal_type for meal in updated.meals] == [meal.meal_type for meal in diet_plan.meals]
+        for position, meal in enumerate(updated.meals):
+            if position != 1:
+                assert meal == diet_plan.meals[position]
+        assert previous_foods.isdisjoint(food.food_id for food in updated.meals[1].foods)
+        assert updated.total_calories == pytest.approx(sum(meal.total_calories for meal in updated.meals))
+        assert updated.input_hash == diet_plan.input_hash
+
+        (collection, updated_id, fields), = firebase_service.db.updates
+        assert (collection, updated_id) == ("diet_plans", doc_id(diet_plan))
+        if compact:
+            assert set(fields) == {
+                "total_calories", "total_protein", "total_carbs", "total_fat", "updated_at",
+                "storage_format", "body_encoding", "body", "text_version"
+            }
+        else:
+            assert set(fields) == set(MEAL_UPDATE_FIELDS) | {"updated_at"}
+
+        assert StoredPlan("diet", documents[doc_id(diet_plan)]).load().meals == updated.meals
+        assert "plans" in firebase_service.db.data[PRESENTATION_INPUTS_COLLECTION]["user-1"]
+
+        cached = asyncio.run(diet_generator.plan_cache.get(
+            "diet", "user-1", target_date, algorithm_config, diet_generator.food_catalog.snapshot.version
+        ))
+        assert cached is updated
+
+    def test_only_that_day_is_invalidated(
+        self, diet_generator, firebase_service, algorithm_config, diet_plan, target_date
+    ):
+        """Os planos de outros dias do usuário continuam em cache"""
+        next_day = diet_generator.compose_diet_plan(
+            "user-1", target_date + timedelta(days=1), algorithm_config, {}, diet_generator.food_catalog.snapshot
+        )
+        firebase_service.db.data.setdefault("diet_plans", {})[doc_id(diet_plan)] = diet_plan.dict()
+        version = diet_generator.food_catalog.snapshot.version
+
+        async def scenario():
+            await diet_generator.plan_cache.set("diet", diet_plan, algorithm_config, version)
+            await diet_generator.plan_cache.set("diet", next_day, algorithm_config, version)
+            updated = await diet_generator.regenerate_meal(
+                "user-1", target_date, diet_plan.meals[0].meal_type, algorithm_config
+            )
+            return updated, [
+                await diet_generator.plan_cache.get("diet", "user-1", day, algorithm_config, version)
+                for day in (target_date, next_day.date)
+            ]
+
+        updated, (cached_day, cached_next_day) = asyncio.run(scenario())
+
+        assert cached_day is updated
+        assert cached_next_day is next_day
+
+    def test_without_a_valid_stored_plan_the_day_is_generated(
+        self, diet_generator, firebase_service, algorithm_config, diet_plan, target_date
+    ):
+        """Sem plano gravado para a configuração atual, o dia inteiro é gerado e gravado"""
+        changed = algorithm_config.copy(update={"target_calories": 2600})
+        firebase_service.db.data["diet_plans"] = {doc_id(diet_plan): diet_plan.dict()}
+
+        plan = asyncio.run(
+            diet_generator.regenerate_meal("user-1", target_date, diet_plan.meals[0].meal_type, changed)
+        )
+
+        assert plan.target_calories == 2600
+        assert firebase_service.db.updates == []
+        assert StoredPlan("diet", firebase_service.db.data["diet_plans"][doc_id(diet_plan)]).target_calories == 2600
@@ -0,0 +1,148 @@
+"""
+Testes para as métricas Prometheus da geração de planos
+"""
+
+import asyncio
+
+import pytest
+
+from algorithms.diet_generator import DietGenerator
+from services import metrics as metrics_module
+from services.metrics import PlanMetrics
+from services.plan_cache import PlanCache
+from services.plan_executor import PlanExecutor
+
+
+@pytest.fixture
+def plan_metrics() -> PlanMetrics:
+    return PlanMetrics(enabled=True)
+
+
+def sample(plan_metrics, name, **labels):
+    return plan_metrics.registry.get_sample_value(name, labels)
+
+
+class TestStageHistograms:
+    """Testes para PlanMetrics.stage / generation"""
+
+    def test_each_stage_has_its_own_series(self, plan_metrics):
+        for _ in range(3):
+            with plan_metrics.stage("diet", "assembly"):
+                pass
+        with plan_metrics.stage("workout", "assembly"):
+            pass
+
+        assert sample(plan_metrics, "plans_generation_stage_seconds_count", plan="diet", stage="assembly") == 3
+        assert sample(plan_metrics, "plans_generation_stage_seconds_count", plan="workout", stage="assembly") == 1
+        assert sample(plan_metrics, "plans_generation_stage_seconds_count", plan="diet", stage="save") is None
+        assert sample(plan_metrics, "plans_generation_stage_seconds_sum", plan="diet", stage="assembly") >= 0
+
+    def test_stage_is_recorded_when_the_block_raises(self, plan_metrics):
+        with pytest.raises(ValueError):
+            with plan_metrics.stage("diet", "save"):
+                raise ValueError("falha ao gravar")
+
+        assert sample(plan_metrics, "plans_generation_stage_seconds_count", plan="diet", stage="save") == 1
+
+    def test_generation_is_labelled_by_outcome(self, plan_metrics):
+        generation = plan_metrics.generation("diet")
+        generation.outcome = "cache_hit"
+        generation.observe()
+        plan_metrics.generation("diet").observe()
+
+        assert sample(plan_metrics, "plans_generation_seconds_count", plan="diet", outcome="cache_hit") == 1
+        assert sample(plan_metrics, "plans_generation_seconds_count", plan="diet", outcome="generated") == 1
+
+    def test_diet_generation_records_its_stages(
+        self, content_service, firebase_service, food_catalog, algorithm_config, target_date, plan_metrics
+    ):
+        """Geração e repetição do mesmo dia: etapas medidas e resultado gerado / cache"""
+        generator = DietGenerator(
+            content_service, firebase_service, food_catalog=food_catalog, plan_cache=PlanCache(),
+            plan_executor=PlanExecutor(max_workers=0), metrics=plan_metrics
+        )
+
+        async def scenario():
+            await generator.generate_diet_plan("user-1", target_date, algorithm_config)
+            await generator.generate_diet_plan("user-1", target_date, algorithm_config)
+
+        asyncio.run(scenario())
+
+        for stage in ("catalog", "cache_lookup"):
+            assert sample(plan_metrics, "plans_generation_stage_seconds_count", plan="diet", stage=stage) == 2
+        for stage in ("existing_plan", "user_load", "save", "cache_store"):
+            assert sample(plan_metrics, "plans_generation_stage_seconds_count", plan="diet", stage=stage) == 1
+        assert sample(plan_metrics, "plans_generation_seconds_count", plan="diet", outcome="generated") == 1
+        assert sample(plan_metrics, "plans_generation_seconds_count", plan="diet", outcome="cache_hit") == 1
+
+
+class TestCacheCollector:
+    """Testes para os contadores e a taxa de acerto dos caches"""
+
+    def test_counters_are_read_at_scrape_time(self, plan_metrics):
+        stats = {"memory_hits": 3, "redis_hits": 1, "misses": 4, "memory_entries": 10}
+        plan_metrics.track_cache(
+            "plan", lambda: stats,
+            hits=("memory_hits", "redis_hits"), lookups=("memory_hits", "redis_hits", "misses")
+        )
+
+        assert sample(plan_metrics, "plans_cache_events_total", cache="plan", event="memory_hits") == 3
+        assert sample(plan_metrics, "plans_cache_events_total", cache="plan", event="misses") == 4
+        assert sample(plan_metrics, "plans_cache_events_total", cache="plan", event="memory_entries") is None
+        assert sample(plan_metrics, "plans_cache_hit_ratio", cache="plan") == pytest.approx(0.5)
+
+        stats.update(misses=0)
+        assert sample(plan_metrics, "plans_cache_hit_ratio", cache="plan") == pytest.approx(1.0)
+
+    def test_hits_outside_the_lookups(self, plan_metrics):
+        """Acertos que não contam como consulta (coalescidas, 304) também viram eventos"""
+        plan_metrics.track_cache(
+            "content", lambda: {"requests": 6, "coalesced": 2, "not_modified": 2},
+            hits=("coalesced", "not_modified"), lookups=("requests", "coalesced")
+        )
+
+        assert sample(plan_metrics, "plans_cache_events_total", cache="content", event="not_modified") == 2
+        assert sample(plan_metrics, "plans_cache_hit_ratio", cache="content") == pytest.approx(0.5)
+
+    def test_no_lookups_yet(self, plan_metrics):
+        plan_metrics.track_cache("plan", dict, hits=("memory_hits",), lookups=("memory_hits", "misses"))
+
+        assert sample(plan_metrics, "plans_cache_hit_ratio", cache="plan") == 0.0
+
+    def test_render_uses_the_exposition_format(self, plan_metrics):
+        plan_metrics.track_cache("plan", lambda: {"misses": 1}, hits=(), lookups=("misses",))
+        with plan_metrics.stage("diet", "catalog"):
+            pass
+
+        text = plan_metrics.render().decode()
+
+        assert 'plans_generation_stage_seconds_bucket{le="0.0005",plan="diet",stage="catalog"}' in text
+        assert 'plans_cache_events_total{cache="plan",event="misses"} 1.0' in text
+        assert plan_metrics.content_type.startswith("text/plain")
+
+
+class TestDisabledMetrics:
+    """Testes para o modo sem efeito (desabilitado ou sem prometheus_client)"""
+
+    def test_disabled_timers_are_a_shared_noop(self):
+        plan_metrics = PlanMetrics(enabled=False)
+
+        stage = plan_metrics.stage("diet", "assembly")
+        generation = plan_metrics.generation("diet")
+        with stage:
+            pass
+        generation.outcome = "error"
+        generation.observe()
+        plan_metrics.track_cache("plan", dict, hits=(), lookups=())
+
+        assert stage is generation is plan_metrics.stage("workout", "save")
+        assert plan_metrics.registry is None
+        assert plan_metrics.render() == b""
+
+    def test_missing_prometheus_client_disables_the_metrics(self, monkeypatch):
+        monkeypatch.setattr(metrics_module, "PROMETHEUS_AVAILABLE", False)
+
+        plan_metrics = PlanMetrics(enabled=True)
+
+        assert not plan_metrics.enabled
+        assert plan_metrics.render() == b""
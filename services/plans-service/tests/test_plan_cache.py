@@ -0,0 +1,191 @@
+"""
+Testes para o cache de planos em dois níveis (memória + Redis)
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+
+from services.plan_cache import PlanCache, day_invalidation_message, plan_cache_key
+
+
+@pytest.fixture
+def make_plan(diet_generator, algorithm_config, snapshot, target_date):
+    def make(user_id="user-1", offset=0, config=algorithm_config):
+        return diet_generator.compose_diet_plan(user_id, target_date + timedelta(days=offset), config, {}, snapshot)
+    return make
+
+
+@pytest.fixture
+def version(snapshot) -> str:
+    """Versão do catálogo com que os planos de teste são gerados"""
+    return snapshot.version
+
+
+class TestPlanCacheMemory:
+    """Testes para o nível local do PlanCache"""
+
+    def test_memory_hit_returns_the_same_object(self, make_plan, algorithm_config, target_date, version):
+        """O nível local devolve o próprio plano, sem reconstruir o modelo"""
+        cache = PlanCache()
+        plan = make_plan()
+
+        async def scenario():
+            await cache.set("diet", plan, algorithm_config)
+            return (
+                await cache.get("diet", "user-1", target_date, algorithm_config, version),
+                await cache.get("workout", "user-1", target_date, algorithm_config, version)
+            )
+
+        cached, other_kind = asyncio.run(scenario())
+
+        assert cached is plan
+        assert other_kind is None
+        assert cache.stats == {"memory_hits": 1, "redis_hits": 0, "misses": 1}
+
+    def test_changed_config_misses(self, make_plan, algorithm_config, target_date, version):
+        """Outra configuração gera outro hash de entrada e, portanto, outra chave"""
+        cache = PlanCache()
+        changed = algorithm_config.copy(update={"target_calories": 2400})
+
+        async def scenario():
+            await cache.set("diet", make_plan(), algorithm_config)
+            return await cache.get("diet", "user-1", target_date, changed, version)
+
+        assert asyncio.run(scenario()) is None
+
+    def test_lru_and_ttl(self, make_plan, algorithm_config, target_date, clock, version):
+        """Acima do limite sai o menos usado; entradas vencidas não são servidas"""
+        cache = PlanCache(max_entries=2, memory_ttl=60)
+        plans = [make_plan(offset=offset) for offset in range(3)]
+
+        async def lookup(offset):
+            return await cache.get("diet", "user-1", target_date + timedelta(days=offset), algorithm_config, version)
+
+        async def scenario():
+            await cache.set("diet", plans[0], algorithm_config)
+            await cache.set("diet", plans[1], algorithm_config)
+            assert await lookup(0) is plans[0]
+            await cache.set("diet", plans[2], algorithm_config)
+            assert await lookup(1) is None
+            assert await lookup(0) is plans[0]
+
+            clock.now += 60
+            assert await lookup(2) is None
+
+        asyncio.run(scenario())
+        assert cache.get_stats()["memory_entries"] == 1
+        assert len(cache._user_keys["user-1"]) == 1
+
+    def test_invalidate_user_removes_only_that_user(self, make_plan, algorithm_config, target_date, version):
+        """invalidate_user remove os planos do usuário e mantém os dos demais"""
+        cache = PlanCache()
+        other_config = algorithm_config.copy(update={"user_id": "user-2"})
+
+        async def scenario():
+            await cache.set("diet", make_plan(), algorithm_config)
+            await cache.set("diet", make_plan(offset=1), algorithm_config)
+            await cache.set("diet", make_plan("user-2", config=other_config), other_config)
+            removed = await cache.invalidate_user("user-1")
+            return (
+                removed,
+                await cache.get("diet", "user-1", target_date, algorithm_config, version),
+                await cache.get("diet", "user-2", target_date, other_config, version)
+            )
+
+        removed, invalidated, kept = asyncio.run(scenario())
+
+        assert removed == 2
+        assert invalidated is None
+        assert kept is not None and kept.user_id == "user-2"
+
+
+class TestPlanCacheRedis:
+    """Testes para o nível Redis do PlanCache"""
+
+    def test_redis_entry_is_shared_between_instances(
+        self, make_plan, algorithm_config, target_date, redis_client, version
+    ):
+        """Outra instância lê o plano do Redis e o guarda no próprio nível local"""
+        writer, reader = PlanCache(), PlanCache()
+        writer.redis_client = reader.redis_client = redis_client
+        plan = make_plan()
+
+        async def scenario():
+            await writer.set("diet", plan, algorithm_config)
+            first = await reader.get("diet", "user-1", target_date, algorithm_config, version)
+            second = await reader.get("diet", "user-1", target_date, algorithm_config, version)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+
+        key = plan_cache_key("diet", "user-1", target_date, algorithm_config, version)
+        assert json.loads(redis_client.values[key])["input_hash"] == plan.input_hash
+        assert redis_client.sets["plan-keys:user-1"] == {key}
+        assert first == plan and first is not plan
+        assert second is first
+        assert reader.stats == {"memory_hits": 1, "redis_hits": 1, "misses": 0}
+
+    def test_invalidate_user_clears_redis_and_notifies(
+        self, make_plan, algorithm_config, target_date, redis_client, version
+    ):
+        """invalidate_user apaga as chaves do usuário no Redis e publica o aviso às instâncias"""
+        cache, other_instance = PlanCache(), PlanCache()
+        cache.redis_client = other_instance.redis_client = redis_client
+
+        async def scenario():
+            await cache.set("diet", make_plan(), algorithm_config)
+            await other_instance.get("diet", "user-1", target_date, algorithm_config, version)
+            removed = await cache.invalidate_user("user-1")
+
+            # O listener das demais instâncias descarta o usuário ao receber a mensagem
+            for channel, user_id in redis_client.published:
+                if channel == other_instance.channel:
+                    other_instance._forget_user(user_id)
+            return removed, await other_instance.get("diet", "user-1", target_date, algorithm_config, version)
+
+        removed, after = asyncio.run(scenario())
+
+        assert removed == 2  # entrada local + chave no Redis
+        assert redis_client.values == {} and redis_client.sets == {}
+        assert redis_client.published == [("plans:invalidate", "user-1")]
+        assert after is None
+
+    def test_invalidate_day_keeps_the_other_days(
+        self, make_plan, algorithm_config, target_date, redis_client, version
+    ):
+        """invalidate_day apaga só as chaves do dia e as demais instâncias descartam só esse dia"""
+        cache, other_instance = PlanCache(), PlanCache()
+        cache.redis_client = other_instance.redis_client = redis_client
+        next_day = target_date + timedelta(days=1)
+
+        async def scenario():
+            await cache.set("diet", make_plan(), algorithm_config)
+            await cache.set("diet", make_plan(offset=1), algorithm_config)
+            for day in (target_date, next_day):
+                await other_instance.get("diet", "user-1", day, algorithm_config, version)
+            removed = await cache.invalidate_day("diet", "user-1", target_date)
+
+            for channel, message in redis_client.published:
+                if channel == other_instance.channel:
+                    other_instance._apply_invalidation(message)
+            other_instance.redis_client = None
+            return (
+                removed,
+                await other_instance.get("diet", "user-1", target_date, algorithm_config, version),
+                await other_instance.get("diet", "user-1", next_day, algorithm_config, version)
+            )
+
+        removed, invalidated, kept = asyncio.run(scenario())
+
+        next_key = plan_cache_key("diet", "user-1", next_day, algorithm_config, version)
+        assert removed == 2  # entrada local + chave no Redis
+        assert set(redis_client.values) == {next_key}
+        assert redis_client.sets["plan-keys:user-1"] == {next_key}
+        assert redis_client.published == [
+            ("plans:invalidate", day_invalidation_message("diet", "user-1", target_date))
+        ]
+        assert invalidated is None
+        assert kept is not None and kept.date == next_day
@@ -0,0 +1,131 @@
+"""
+Testes para a leitura de planos gravados (StoredPlan)
+"""
+
+import asyncio
+import json
+from dataclasses import replace
+from types import MappingProxyType
+
+import msgpack
+import pytest
+from pydantic import ValidationError
+
+from algorithms.seeding import plan_input_hash
+from services import plan_codec
+from services.content_templates import (
+    DEFAULT_TEMPLATES_PATH, PLAN_TEXTS_ARCHIVE_NAME, get_content_templates, load_content_templates
+)
+from services.plan_codec import PlanCodecError, StoredPlan, encode_compact
+
+
+@pytest.fixture
+def diet_plan(diet_generator, algorithm_config, target_date):
+    return asyncio.run(diet_generator.build_diet_plan("user-1", target_date, algorithm_config, {}))
+
+
+class TestStoredPlan:
+    """Testes para o StoredPlan"""
+
+    def test_legacy_full_document_without_input_hash(self, diet_generator, diet_plan, algorithm_config, target_date):
+        """Documentos completos gravados antes do hash das entradas não quebram a leitura"""
+        document = diet_plan.dict()
+        document.pop("input_hash")
+
+        stored = StoredPlan("diet", document)
+        assert stored.input_hash is None
+
+        input_hash = plan_input_hash("diet", "user-1", target_date, algorithm_config)
+        assert diet_generator._should_regenerate_plan(stored, algorithm_config, input_hash) is False
+        assert stored.load() == diet_plan.copy(update={"input_hash": None})
+
+    def test_legacy_document_with_other_targets_is_regenerated(self, diet_generator, diet_plan, algorithm_config, target_date):
+        """Sem hash gravado, a regeneração volta a comparar metas e objetivo"""
+        document = diet_plan.dict()
+        document.pop("input_hash")
+        document["target_calories"] = algorithm_config.target_calories + 500
+
+        input_hash = plan_input_hash("diet", "user-1", target_date, algorithm_config)
+        assert diet_generator._should_regenerate_plan(StoredPlan("diet", document), algorithm_config, input_hash)
+
+    def test_header_fields_from_compact_document(self, diet_plan):
+        """Documentos compactos expõem o cabeçalho sem decodificar o corpo"""
+        stored = StoredPlan("diet", encode_compact("diet", diet_plan))
+
+        assert stored.compact
+        assert stored.input_hash == diet_plan.input_hash
+        assert stored.target_calories == diet_plan.target_calories
+        assert stored.load() == diet_plan
+
+    def test_repeated_reads_reuse_the_decoded_body(self, diet_plan):
+        """Releituras do mesmo corpo não decodificam de novo; o cabeçalho segue o documento"""
+        document = encode_compact("diet", diet_plan)
+        first = StoredPlan("diet", document).load()
+        second = StoredPlan("diet", {**document, "total_calories": 1234.0}).load()
+
+        assert second.meals[0] is first.meals[0]
+        assert second.total_calories == 1234.0 and first == diet_plan
+
+    def test_fields_missing_from_older_bodies_use_defaults(self, diet_plan):
+        """Campos adicionados ao final do modelo assumem o padrão em corpos antigos"""
+        document = encode_compact("diet", diet_plan.copy(update={"notes": "Beba água"}), compression="none")
+        strings, values = msgpack.unpackb(document["body"], raw=False)
+        document["body"] = msgpack.packb([strings, values[:-1]], use_bin_type=True)
+
+        assert StoredPlan("diet", document).load().notes is None
+
+    def test_unknown_attribute_raises(self, diet_plan):
+        """Atributos que não são campos do plano continuam levantando AttributeError"""
+        stored = StoredPlan("diet", diet_plan.dict())
+
+        with pytest.raises(AttributeError):
+            stored.not_a_field
+
+
+class TestTemplateVersions:
+    """Testes para planos compactos gravados com outra versão dos templates de texto"""
+
+    @pytest.fixture
+    def edited_templates(self):
+        """Templates com as dicas de refeição editadas após a gravação dos planos"""
+        current = get_content_templates()
+        plan_texts = tuple(sorted(current.plan_texts + ("Mastigue devagar",)))
+        edited = replace(
+            current,
+            plan_texts=plan_texts,
+            plan_texts_version="edited",
+            plan_text_tables=MappingProxyType({**current.plan_text_tables, "edited": plan_texts})
+        )
+        return edited
+
+    def test_current_version_is_archived(self):
+        """A tabela de textos atual está no arquivo (rode ``python -m services.content_templates``)"""
+        templates = load_content_templates(DEFAULT_TEMPLATES_PATH)
+        with open(DEFAULT_TEMPLATES_PATH.parent / PLAN_TEXTS_ARCHIVE_NAME, encoding="utf-8") as archive_file:
+            archive = json.load(archive_file)
+
+        assert tuple(archive[templates.plan_texts_version]) == templates.plan_texts
+
+    def test_previous_version_stays_readable(self, diet_plan, edited_templates, monkeypatch):
+        """Planos gravados antes da edição dos templates são lidos com a tabela arquivada"""
+        document = encode_compact("diet", diet_plan)
+        monkeypatch.setattr(plan_codec, "get_content_templates", lambda: edited_templates)
+
+        assert document["text_version"] != edited_templates.plan_texts_version
+        assert encode_compact("diet", diet_plan)["text_version"] == "edited"
+
+        assert StoredPlan("diet", document).load() == diet_plan
+
+    def test_unknown_version_is_rejected(self, diet_plan):
+        """Versão ausente do arquivo não pode ser resolvida"""
+        document = {**encode_compact("diet", diet_plan), "text_version": "desconhecida"}
+
+        with pytest.raises(PlanCodecError):
+            StoredPlan("diet", document)
+
+    def test_header_is_validated(self, diet_plan):
+        """O corpo é montado sem revalidação, mas o cabeçalho é validado"""
+        document = {**encode_compact("diet", diet_plan), "target_calories": -1}
+
+        with pytest.raises(ValidationError):
+            StoredPlan("diet", document)
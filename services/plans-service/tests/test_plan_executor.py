@@ -0,0 +1,65 @@
+"""
+Testes para o pool de processos da geração de planos (tempo limite e recriação)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.plan_executor import PlanComputeContext, PlanExecutor
+
+
+async def empty_context() -> PlanComputeContext:
+    """Contexto dos workers de teste (as tarefas não usam os geradores)"""
+    return PlanComputeContext(None, None)
+
+
+@pytest.fixture
+def executor():
+    executor = PlanExecutor(max_workers=1, context_factory=empty_context)
+    asyncio.run(executor.start())
+    yield executor
+    executor.shutdown(wait=False)
+
+
+class TestTaskTimeout:
+    """Testes para PlanExecutor._submit com tempo esgotado"""
+
+    def test_running_task_is_terminated_and_the_queue_resubmitted(self, executor):
+        """A tarefa travada é encerrada com o pool; a que aguardava roda no pool novo"""
+        executor.task_timeout = 2.0
+        stuck_pool = executor._pool
+        workers = list(stuck_pool._processes.values())
+
+        async def scenario():
+            stuck = asyncio.create_task(executor._submit(time.sleep, 60))
+            await asyncio.sleep(0.5)
+            queued = asyncio.create_task(executor._submit(abs, -3))
+            with pytest.raises(asyncio.TimeoutError):
+                await stuck
+            return await queued
+
+        start = time.perf_counter()
+        assert asyncio.run(scenario()) == 3
+        assert time.perf_counter() - start < 10
+
+        assert executor._pool is not stuck_pool
+        for worker in workers:
+            worker.join(timeout=5)
+            assert not worker.is_alive()
+        assert executor.get_stats()["timeouts"] == 1
+        assert executor.get_stats()["restarts"] == 1
+        assert executor.get_stats()["failures"] == 0
+
+    def test_after_a_timeout_the_pool_keeps_serving(self, executor):
+        executor.task_timeout = 1.0
+
+        async def scenario():
+            with pytest.raises(asyncio.TimeoutError):
+                await executor._submit(time.sleep, 60)
+            executor.task_timeout = 30.0
+            return await executor._submit(max, 2, 7)
+
+        assert asyncio.run(scenario()) == 7
+        assert executor.active
@@ -0,0 +1,73 @@
+"""
+Testes para a pré-computação em lote (PlanPrecomputer no próprio loop)
+"""
+
+import asyncio
+
+import pytest
+
+from services.plan_codec import StoredPlan
+from services.plan_precompute import PlanPrecomputer, PlanWorkerContext
+from services.presentation_inputs import PRESENTATION_INPUTS_COLLECTION
+
+ACTIVE_USERS = ["ana", "bruno", "carla"]
+
+
+@pytest.fixture
+def precomputer(firebase_service, diet_generator, workout_generator, algorithm_config):
+    users = firebase_service.db.data.setdefault("users", {})
+    config_data = algorithm_config.dict(exclude={"user_id"})
+    for user_id in ACTIVE_USERS:
+        users[user_id] = {"is_active": True, "algorithm_config": config_data}
+    users["sem-config"] = {"is_active": True}
+    users["config-invalida"] = {"is_active": True, "algorithm_config": {**config_data, "goal": "inexistente"}}
+    users["inativo"] = {"is_active": False, "algorithm_config": config_data}
+
+    async def context_factory():
+        return PlanWorkerContext(diet_generator, workout_generator)
+
+    return PlanPrecomputer(
+        firebase_service, context_factory=context_factory,
+        max_workers=0, shard_size=2, max_in_flight=2, batch_size=3
+    )
+
+
+class TestPlanPrecomputer:
+    """Testes para o PlanPrecomputer"""
+
+    def test_inline_run_counts_and_writes_plans(self, precomputer, firebase_service, target_date):
+        """Gera os planos dos usuários ativos com configuração e grava os documentos"""
+        stats = asyncio.run(precomputer.run(target_date))
+
+        assert stats.users_seen == 5
+        assert stats.users_generated == 3
+        assert stats.users_skipped == 1
+        assert stats.users_failed == 1
+        assert stats.documents_written == 9
+        assert stats.finished_at is not None
+
+        data = firebase_service.db.data
+        for user_id in ACTIVE_USERS:
+            doc_id = f"{user_id}_{target_date.isoformat()}"
+            diet_plan = StoredPlan("diet", data["diet_plans"][doc_id])
+            workout_plan = StoredPlan("workout", data["workout_plans"][doc_id])
+            assert diet_plan.user_id == user_id and diet_plan.input_hash
+            assert workout_plan.user_id == user_id and workout_plan.input_hash
+            assert user_id in data[PRESENTATION_INPUTS_COLLECTION]
+
+        assert len(data["diet_plans"]) == len(ACTIVE_USERS)
+
+    def test_rejected_batch_fails_only_its_users(self, precomputer, firebase_service, target_date):
+        """Um batch recusado não é regravado e conta como falha apenas dos usuários que continha"""
+        firebase_service.db.fail_commits = 1
+
+        stats = asyncio.run(precomputer.run(target_date))
+
+        # batch_size=3: cada batch contém exatamente os documentos de um usuário
+        assert firebase_service.db.commits == 3
+        assert stats.batches_committed == 2
+        assert stats.documents_written == 6
+        assert stats.users_generated == 2
+        assert stats.users_failed == 2
+        assert stats.users_skipped == 1
+        assert len(firebase_service.db.data["diet_plans"]) == 2
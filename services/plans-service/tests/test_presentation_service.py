@@ -0,0 +1,200 @@
+"""
+Testes para as apresentações materializadas (seções desatualizadas e atualização parcial)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from algorithms.seeding import ALGORITHM_VERSION
+from models.plan import GoalType, PlanPresentation
+from services.presentation_inputs import PRESENTATION_SECTIONS, mark_presentation_inputs_changed
+from services.presentation_service import PresentationService
+
+VERSIONS = {"profile": "p1", "plans": "d1", "metrics": "m1"}
+
+
+@pytest.fixture
+def service(firebase_service) -> PresentationService:
+    return PresentationService(firebase_service)
+
+
+@pytest.fixture
+def stored(target_date) -> PlanPresentation:
+    return PlanPresentation(
+        user_id="user-1",
+        date=target_date,
+        goal=GoalType.PERDER_PESO,
+        motivational_message="Bom dia",
+        daily_summary="Resumo",
+        diet_highlights=[],
+        workout_highlights=[],
+        progress_metrics=[],
+        daily_tips=[],
+        encouragement_note="Continue"
+    )
+
+
+def materialized(**overrides):
+    return {
+        "section_versions": dict(VERSIONS),
+        "algorithm_version": ALGORITHM_VERSION,
+        "materialized_at": time.time(),
+        **overrides
+    }
+
+
+class TestStaleSections:
+    """Testes para PresentationService._stale_sections"""
+
+    def test_up_to_date(self, service, stored):
+        """Versões iguais às da materialização: nada a refazer"""
+        assert service._stale_sections(stored, materialized(), dict(VERSIONS)) == set()
+
+    def test_changed_section_is_stale(self, service, stored):
+        """Apenas as seções com versão nova são refeitas"""
+        assert service._stale_sections(stored, materialized(), {**VERSIONS, "plans": "d2"}) == {"plans"}
+        assert service._stale_sections(stored, materialized(), {**VERSIONS, "metrics": None}) == {"metrics"}
+
+    def test_profile_change_rebuilds_everything(self, service, stored):
+        """O perfil alimenta todas as seções"""
+        stale = service._stale_sections(stored, materialized(), {**VERSIONS, "profile": "p2"})
+        assert stale == set(PRESENTATION_SECTIONS)
+
+    def test_degraded_sources_are_retried(self, service, stored):
+        """Seções montadas com fontes indisponíveis são refeitas"""
+        degraded = stored.copy(update={"degraded_sources": ["weight"]})
+        assert service._stale_sections(degraded, materialized(), dict(VERSIONS)) == {"metrics"}
+
+    @pytest.mark.parametrize("meta", [
+        {"algorithm_version": "0"},
+        {"materialized_at": 0},
+        {"materialized_at": None},
+    ])
+    def test_expired_or_other_version_rebuilds_everything(self, service, stored, meta):
+        """Materialização vencida ou de outra versão do algoritmo é refeita por inteiro"""
+        assert service._stale_sections(stored, materialized(**meta), dict(VERSIONS)) == set(PRESENTATION_SECTIONS)
+
+    def test_missing_presentation(self, service):
+        """Sem apresentação materializada, todas as seções são montadas"""
+        assert service._stale_sections(None, {}, dict(VERSIONS)) == set(PRESENTATION_SECTIONS)
+
+
+class TestPartialRefresh:
+    """Testes para generate_plan_presentation com a apresentação materializada"""
+
+    def test_only_stale_sources_are_loaded(self, service, firebase_service, target_date, monkeypatch):
+        """A apresentação é servida materializada e, após mudança nos planos, só as fontes de planos são lidas"""
+        firebase_service.db.data["users"] = {"user-1": {"name": "Ana Souza", "goal": "perder_peso"}}
+        loaded = []
+
+        def track(name):
+            original = getattr(service, name)
+
+            async def wrapper(*args):
+                loaded.append(name)
+                return await original(*args)
+            monkeypatch.setattr(service, name, wrapper)
+
+        for name in ("_get_user_data", "_get_diet_plan", "_get_workout_plan", "_get_weight_progress"):
+            track(name)
+
+        async def scenario():
+            first = await service.generate_plan_presentation("user-1", target_date)
+            full_load = sorted(loaded)
+            loaded.clear()
+
+            served = await service.generate_plan_presentation("user-1", target_date)
+            served_load = list(loaded)
+
+            await mark_presentation_inputs_changed(firebase_service.db, "user-1", ["plans"])
+            refreshed = await service.generate_plan_presentation("user-1", target_date)
+            return first, full_load, served, served_load, refreshed
+
+        first, full_load, served, served_load, refreshed = asyncio.run(scenario())
+
+        assert full_load == ["_get_diet_plan", "_get_user_data", "_get_weight_progress", "_get_workout_plan"]
+        assert first.user_name == "Ana"
+        assert served_load == []
+        assert served.motivational_message == first.motivational_message
+        assert sorted(loaded) == ["_get_diet_plan", "_get_workout_plan"]
+        assert refreshed.motivational_message == first.motivational_message
+        assert refreshed.progress_metrics == first.progress_metrics
+
+
+class TestLoadSources:
+    """Testes para PresentationService._load_sources"""
+
+    def test_sources_load_concurrently(self, service):
+        """Todas as fontes estão em andamento ao mesmo tempo (carga sequencial não terminaria)"""
+        names = ("user_data", "diet_plan", "weight")
+        started = []
+        all_started = asyncio.Event()
+
+        def loader(name):
+            async def load():
+                started.append(name)
+                if len(started) == len(names):
+                    all_started.set()
+                await all_started.wait()
+                return name.upper()
+            return load
+
+        results, degraded = asyncio.run(service._load_sources({name: (loader(name), None) for name in names}))
+
+        assert results == {name: name.upper() for name in names}
+        assert degraded == []
+
+    def test_timeout_degrades_only_that_source(self, service, monkeypatch):
+        """Fonte acima do seu timeout assume o valor padrão; as demais seguem"""
+        monkeypatch.setitem(service.presentation_config["source_timeouts"], "weight", 0.01)
+
+        async def slow():
+            await asyncio.sleep(5)
+
+        async def fast():
+            return {"name": "Ana"}
+
+        results, degraded = asyncio.run(service._load_sources({
+            "user_data": (fast, {}),
+            "weight": (slow, None)
+        }))
+
+        assert results == {"user_data": {"name": "Ana"}, "weight": None}
+        assert degraded == ["weight"]
+
+    def test_error_degrades_only_that_source(self, service):
+        """Erro de uma fonte assume o valor padrão; as demais seguem"""
+        async def broken():
+            raise RuntimeError("firestore indisponível")
+
+        async def fast():
+            return None
+
+        results, degraded = asyncio.run(service._load_sources({
+            "user_data": (broken, {}),
+            "diet_plan": (fast, None)
+        }))
+
+        assert results == {"user_data": {}, "diet_plan": None}
+        assert degraded == ["user_data"]
+
+    def test_loader_errors_reach_the_presentation(self, service, firebase_service, target_date, monkeypatch):
+        """Os loaders propagam o erro e a apresentação registra as fontes degradadas"""
+        firebase_service.db.data["users"] = {"user-1": {"name": "Ana Souza", "goal": "perder_peso"}}
+        firebase_service.db.data["weight_measurements"] = {"w1": {"user_id": "user-1", "date": str(target_date)}}
+        monkeypatch.setitem(service.presentation_config["source_timeouts"], "diet_plan", 0.01)
+
+        async def slow_diet_plan(user_id, target_date):
+            await asyncio.sleep(5)
+
+        monkeypatch.setattr(service, "_get_diet_plan", slow_diet_plan)
+
+        with pytest.raises(KeyError):
+            asyncio.run(service._get_weight_progress("user-1", target_date))
+        presentation = asyncio.run(service.generate_plan_presentation("user-1", target_date))
+
+        assert sorted(presentation.degraded_sources) == ["diet_plan", "weight"]
+        assert presentation.user_name == "Ana"
+        assert presentation.diet_highlights == []
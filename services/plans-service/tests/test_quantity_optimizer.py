@@ -0,0 +1,90 @@
+"""
+Testes para o otimizador de quantidades (mínimos quadrados limitados)
+"""
+
+import random
+
+import numpy as np
+import pytest
+from scipy.optimize import lsq_linear
+
+from algorithms.quantity_optimizer import QuantityOptimizer, practical_step
+
+CATEGORIES = ["carnes", "cereais", "frutas", "laticínios", "oleaginosas", "vegetais"]
+
+
+def random_meal(rng: random.Random, count: int):
+    macros = np.array([
+        [0.0, rng.uniform(0, 30), rng.uniform(0, 60), rng.uniform(0, 40)] for _ in range(count)
+    ])
+    macros[:, 0] = 4 * macros[:, 1] + 4 * macros[:, 2] + 9 * macros[:, 3] + 1
+    calories = rng.uniform(200, 800)
+    targets = (calories, calories * 0.3 / 4, calories * 0.45 / 4, calories * 0.25 / 9)
+    return macros, rng.sample(CATEGORIES, count), targets
+
+
+def scaled_system(optimizer, macros, targets):
+    scale = np.array(optimizer.macro_weights) / np.maximum(targets, 1.0)
+    return (macros.T / 100.0) * scale[:, None], np.asarray(targets) * scale
+
+
+class TestQuantityOptimizer:
+    """Testes para QuantityOptimizer"""
+
+    @pytest.mark.parametrize("count", [1, 2, 3, 4])
+    def test_continuous_solution_matches_bvls(self, count):
+        """O conjunto ativo em forma fechada chega ao ótimo do BVLS"""
+        optimizer = QuantityOptimizer()
+        rng = random.Random(count)
+        for _ in range(50):
+            macros, categories, targets = random_meal(rng, count)
+            matrix, goal = scaled_system(optimizer, macros, targets)
+            lower = np.array([float(practical_step(category)) for category in categories])
+            upper = np.maximum(np.floor(optimizer.max_portion_grams / lower) * lower, lower)
+
+            grams = np.array(optimizer._solve(matrix.T.tolist(), goal.tolist(), lower.tolist(), upper.tolist()))
+            reference = lsq_linear(matrix, goal, bounds=(lower, upper), method="bvls").x
+
+            assert np.all(grams >= lower - 1e-9) and np.all(grams <= upper + 1e-9)
+            error = np.sum((matrix @ grams - goal) ** 2)
+            reference_error = np.sum((matrix @ reference - goal) ** 2)
+            assert error <= reference_error + 1e-9
+
+    def test_portions_are_practical_and_bounded(self):
+        """Quantidades finais são múltiplos práticos entre uma porção e o máximo"""
+        optimizer = QuantityOptimizer()
+        rng = random.Random(7)
+        for _ in range(200):
+            macros, categories, targets = random_meal(rng, rng.randint(1, 4))
+            grams = optimizer.optimize(macros, categories, targets)
+            steps = np.array([practical_step(category) for category in categories])
+
+            assert np.allclose(grams % steps, 0)
+            assert np.all(grams >= steps) and np.all(grams <= optimizer.max_portion_grams)
+
+    def test_greedy_search_is_skipped_within_tolerance(self):
+        """Se o arredondamento já deixa todos os macros na tolerância, a busca gulosa não roda"""
+        optimizer = QuantityOptimizer()
+        rng = random.Random(11)
+        tolerance = 0.15
+        skipped = refined = 0
+        for _ in range(300):
+            macros, categories, targets = random_meal(rng, rng.randint(2, 4))
+            matrix, goal = scaled_system(optimizer, macros, targets)
+            steps = np.array([float(practical_step(category)) for category in categories])
+            upper = np.maximum(np.floor(optimizer.max_portion_grams / steps) * steps, steps)
+            continuous = np.array(optimizer._solve(matrix.T.tolist(), goal.tolist(), steps.tolist(), upper.tolist()))
+            rounded = np.clip(np.round(continuous / steps) * steps, steps, upper)
+            relative_errors = np.abs(macros.T @ rounded / 100 - targets) / np.asarray(targets)
+
+            tolerant = optimizer.optimize(macros, categories, targets, tolerance=tolerance)
+            if np.all(relative_errors <= tolerance):
+                assert tolerant.tolist() == rounded.tolist()
+                skipped += 1
+                refined += int(optimizer.optimize(macros, categories, targets).tolist() != rounded.tolist())
+
+        assert skipped and refined
+
+    def test_empty_meal(self):
+        """Sem alimentos não há quantidades"""
+        assert QuantityOptimizer().optimize(np.zeros((0, 4)), [], (400, 30, 40, 10)).size == 0
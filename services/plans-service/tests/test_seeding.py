@@ -0,0 +1,104 @@
+"""
+Testes para a semeadura determinística (hash das entradas e reprodutibilidade)
+"""
+
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+
+from algorithms.seeding import config_hash, plan_input_hash
+from config.settings import get_settings
+
+
+@pytest.fixture
+def unseeded(monkeypatch):
+    monkeypatch.setattr(get_settings(), "seeded_generation", False)
+
+
+def build_workout(workout_generator, target_date, config):
+    async def build():
+        snapshot = await workout_generator.exercise_library.get_snapshot()
+        return await workout_generator.build_workout_plan("user-1", target_date, config, {}, snapshot), snapshot
+    return asyncio.run(build())
+
+
+class TestInputHash:
+    """Testes para config_hash e plan_input_hash"""
+
+    def test_config_hash_ignores_timestamps(self, algorithm_config):
+        """Datas de criação/atualização não fazem parte das entradas"""
+        touched = algorithm_config.copy(update={"created_at": datetime(2020, 1, 1), "updated_at": datetime.utcnow()})
+        assert config_hash(touched) == config_hash(algorithm_config)
+        assert config_hash(None) == "-"
+
+    @pytest.mark.parametrize("change", ["kind", "user", "date", "config", "content_version"])
+    def test_every_input_changes_the_hash(self, algorithm_config, target_date, change):
+        """Tipo, usuário, data, configuração e versão do conteúdo entram no hash"""
+        inputs = {
+            "kind": "diet", "user_id": "user-1", "target_date": target_date,
+            "config": algorithm_config, "content_version": "v1"
+        }
+        changed = dict(inputs)
+        if change == "kind":
+            changed["kind"] = "workout"
+        elif change == "user":
+            changed["user_id"] = "user-2"
+        elif change == "date":
+            changed["target_date"] = target_date + timedelta(days=1)
+        elif change == "config":
+            changed["config"] = algorithm_config.copy(update={"target_protein": 151})
+        else:
+            changed["content_version"] = "v2"
+
+        assert plan_input_hash(**changed) != plan_input_hash(**inputs)
+
+
+class TestDeterminism:
+    """Testes para a reprodutibilidade dos planos"""
+
+    def test_same_inputs_same_diet_plan(self, diet_generator, algorithm_config, snapshot, target_date):
+        """Mesmas entradas geram o mesmo plano de dieta"""
+        first = diet_generator.compose_diet_plan("user-1", target_date, algorithm_config, {}, snapshot)
+        second = diet_generator.compose_diet_plan("user-1", target_date, algorithm_config, {}, snapshot)
+
+        assert first.input_hash == plan_input_hash("diet", "user-1", target_date, algorithm_config, snapshot.version)
+        assert first.meals == second.meals
+
+    def test_same_inputs_same_workout_plan(self, workout_generator, algorithm_config, target_date):
+        """Mesmas entradas geram o mesmo plano de treino"""
+        first, snapshot = build_workout(workout_generator, target_date, algorithm_config)
+        second, _ = build_workout(workout_generator, target_date, algorithm_config)
+
+        assert first.sessions and first.sessions == second.sessions
+        assert first.input_hash == plan_input_hash("workout", "user-1", target_date, algorithm_config, snapshot.version)
+
+    def test_catalog_refresh_regenerates_the_day(self, diet_generator, algorithm_config, snapshot, target_date):
+        """Um novo catálogo muda o hash e o plano gravado deixa de ser reutilizado"""
+        plan = diet_generator.compose_diet_plan("user-1", target_date, algorithm_config, {}, snapshot)
+        refreshed = replace(snapshot, version="v2")
+
+        current_hash = plan_input_hash("diet", "user-1", target_date, algorithm_config, snapshot.version)
+        refreshed_hash = plan_input_hash("diet", "user-1", target_date, algorithm_config, refreshed.version)
+
+        assert not diet_generator._should_regenerate_plan(plan, algorithm_config, current_hash)
+        assert diet_generator._should_regenerate_plan(plan, algorithm_config, refreshed_hash)
+        assert diet_generator.compose_diet_plan(
+            "user-1", target_date, algorithm_config, {}, refreshed
+        ).input_hash == refreshed_hash
+
+    def test_unseeded_plans_record_no_hash(
+        self, diet_generator, workout_generator, algorithm_config, snapshot, target_date, unseeded
+    ):
+        """Sem semeadura nenhum hash é gravado e a regeneração volta a comparar as metas"""
+        diet_plan = diet_generator.compose_diet_plan("user-1", target_date, algorithm_config, {}, snapshot)
+        workout_plan, _ = build_workout(workout_generator, target_date, algorithm_config)
+        input_hash = plan_input_hash("diet", "user-1", target_date, algorithm_config, snapshot.version)
+
+        assert diet_plan.input_hash is None
+        assert workout_plan.input_hash is None
+        assert not diet_generator._should_regenerate_plan(diet_plan, algorithm_config, input_hash)
+
+        changed = algorithm_config.copy(update={"target_calories": algorithm_config.target_calories + 300})
+        assert diet_generator._should_regenerate_plan(diet_plan, changed, input_hash)
@@ -0,0 +1,69 @@
+"""
+Testes para a assinatura dos eventos de perfil (users-service)
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from services.plan_cache import PlanCache
+from services.user_events import UserEventsSubscriber
+
+
+@pytest.fixture
+def diet_plan(diet_generator, algorithm_config, snapshot, target_date):
+    return diet_generator.compose_diet_plan("user-1", target_date, algorithm_config, {}, snapshot)
+
+
+class FakeMessage:
+    def __init__(self, payload):
+        self.data = json.dumps(payload).encode("utf-8") if isinstance(payload, dict) else payload
+        self.message_id = "m-1"
+        self.acked = False
+        self.nacked = False
+
+    def ack(self):
+        self.acked = True
+
+    def nack(self):
+        self.nacked = True
+
+
+class TestUserEventsSubscriber:
+    """Testes para UserEventsSubscriber._on_message"""
+
+    def test_callback_acks_without_waiting_for_the_invalidation(self, firebase_service, diet_plan, algorithm_config, target_date):
+        """A mensagem é confirmada na hora e a invalidação roda no loop da aplicação"""
+        plan_cache = PlanCache()
+        subscriber = UserEventsSubscriber(plan_cache, firebase_service)
+
+        async def scenario():
+            await plan_cache.set("diet", diet_plan, algorithm_config)
+            subscriber._loop = asyncio.get_running_loop()
+            message = FakeMessage({"event_type": "user_updated", "user_id": "user-1"})
+
+            # Chamado na thread do loop: se aguardasse a invalidação, ela não poderia rodar
+            subscriber._on_message(message)
+            acked_before_invalidation = message.acked and "user-1" in plan_cache._user_keys
+            for _ in range(10):
+                await asyncio.sleep(0)
+            return message, acked_before_invalidation
+
+        message, acked_before_invalidation = asyncio.run(scenario())
+
+        assert acked_before_invalidation
+        assert not message.nacked
+        assert "user-1" not in plan_cache._user_keys
+        assert asyncio.run(plan_cache.get("diet", "user-1", target_date, algorithm_config)) is None
+
+    def test_other_and_invalid_events_are_acked(self, firebase_service):
+        """Eventos irrelevantes ou malformados são apenas confirmados"""
+        subscriber = UserEventsSubscriber(PlanCache(), firebase_service)
+        ignored = FakeMessage({"event_type": "login", "user_id": "user-1"})
+        invalid = FakeMessage(b"{")
+
+        subscriber._on_message(ignored)
+        subscriber._on_message(invalid)
+
+        assert ignored.acked and invalid.acked
@@ -0,0 +1,133 @@
+"""
+Testes para a janela semanal de planos do usuário (intervalos e métricas derivadas)
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from services.user_week_window import WEEKLY_WORKOUT_TARGET, UserWeekWindow, _as_date
+
+# Quinta-feira: a semana corrente começa na segunda (05/01) e a janela em 02/01
+THURSDAY = date(2026, 1, 8)
+
+
+def store(firebase_service, collection, user_id, plan_date, **fields):
+    documents = firebase_service.db.data.setdefault(collection, {})
+    documents[f"{user_id}_{plan_date.isoformat()}"] = {"user_id": user_id, "date": plan_date, **fields}
+
+
+def loaded_window(firebase_service, target_date=THURSDAY, user_id="user-1") -> UserWeekWindow:
+    window = UserWeekWindow(firebase_service, user_id, target_date)
+
+    async def scenario():
+        await asyncio.gather(window.load_diet_plans(), window.load_workout_plans())
+
+    asyncio.run(scenario())
+    return window
+
+
+class TestWindowRange:
+    """Testes para o intervalo consultado (data alvo e os 6 dias anteriores)"""
+
+    def test_start_date_is_six_days_before_the_target(self, firebase_service):
+        window = UserWeekWindow(firebase_service, "user-1", THURSDAY)
+
+        assert window.start_date == date(2026, 1, 2)
+        assert (window.target_date - window.start_date).days == 6
+
+    def test_only_plans_inside_the_window_are_loaded(self, firebase_service):
+        for offset in range(-2, 10):
+            store(firebase_service, "diet_plans", "user-1", date(2026, 1, 1) + timedelta(days=offset),
+                  total_calories=2000)
+        store(firebase_service, "diet_plans", "user-2", THURSDAY, total_calories=1800)
+
+        window = loaded_window(firebase_service)
+
+        assert [plan["date"] for plan in window.diet_plans] == [
+            date(2026, 1, 2) + timedelta(days=offset) for offset in range(7)
+        ]
+        assert all(plan["user_id"] == "user-1" for plan in window.diet_plans)
+
+    def test_plans_are_sorted_by_date(self, firebase_service):
+        for day in (7, 2, 5):
+            store(firebase_service, "diet_plans", "user-1", date(2026, 1, day), total_calories=1500 + day)
+
+        window = loaded_window(firebase_service)
+
+        assert [plan["date"].day for plan in window.diet_plans] == [2, 5, 7]
+        assert window.calorie_metrics()["target"] == 1507
+
+
+class TestDerivedMetrics:
+    """Testes para as métricas calculadas a partir da janela em memória"""
+
+    def test_workout_frequency_counts_from_monday(self, firebase_service):
+        """Treinos de sexta e sábado ficam na janela, mas fora da semana corrente"""
+        for day in (2, 3, 5, 7):
+            store(firebase_service, "workout_plans", "user-1", date(2026, 1, day), rest_day=False)
+        store(firebase_service, "workout_plans", "user-1", date(2026, 1, 6), rest_day=True)
+
+        window = loaded_window(firebase_service)
+
+        assert window.workout_frequency() == {"current": 2, "target": WEEKLY_WORKOUT_TARGET}
+        assert window.weekly_data()["workouts_completed"] == 4
+
+    def test_monday_target_counts_only_that_day(self, firebase_service):
+        for day in (1, 4, 5):
+            store(firebase_service, "workout_plans", "user-1", date(2026, 1, day))
+
+        window = loaded_window(firebase_service, target_date=date(2026, 1, 5))
+
+        assert window.workout_frequency()["current"] == 1
+        assert window.weekly_data()["workouts_completed"] == 3
+
+    def test_adherence_is_capped(self, firebase_service):
+        for day in range(2, 9):
+            store(firebase_service, "diet_plans", "user-1", date(2026, 1, day), total_calories=2000 + day * 10)
+
+        window = loaded_window(firebase_service)
+
+        assert window.adherence_metrics() == {"current": 0.9}
+        assert window.calorie_metrics()["average"] == pytest.approx(2050)
+        assert window.calorie_metrics()["target"] == 2080
+
+    def test_partial_week_adherence(self, firebase_service):
+        for day in (3, 4, 8):
+            store(firebase_service, "diet_plans", "user-1", date(2026, 1, day), total_calories=2000)
+
+        window = loaded_window(firebase_service)
+
+        assert window.adherence_metrics()["current"] == pytest.approx(3 / 7)
+
+    def test_empty_window(self, firebase_service):
+        window = loaded_window(firebase_service)
+
+        assert window.adherence_metrics() is None
+        assert window.calorie_metrics() is None
+        assert window.workout_frequency() == {"current": 0, "target": WEEKLY_WORKOUT_TARGET}
+        assert window.weekly_data()["workouts_completed"] == 0
+
+    def test_collections_not_loaded(self, firebase_service):
+        """Coleção não carregada (timeout ou erro) deixa as métricas dela como None"""
+        window = UserWeekWindow(firebase_service, "user-1", THURSDAY)
+
+        assert window.adherence_metrics() is None
+        assert window.calorie_metrics() is None
+        assert window.workout_frequency() is None
+        assert window.weekly_data() is None
+
+
+class TestAsDate:
+    """Testes para a normalização do campo date dos documentos"""
+
+    @pytest.mark.parametrize("value", [
+        date(2026, 1, 8), datetime(2026, 1, 8, 23, 59), "2026-01-08", "2026-01-08T10:00:00Z"
+    ])
+    def test_supported_formats(self, value):
+        assert _as_date(value) == date(2026, 1, 8)
+
+    @pytest.mark.parametrize("value", [None, "", "08/01/2026", 20260108])
+    def test_invalid_values(self, value):
+        assert _as_date(value) is None
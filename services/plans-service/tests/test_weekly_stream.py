@@ -0,0 +1,148 @@
+"""
+Testes para o cronograma semanal em streaming
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+
+from services.weekly_stream import WeeklyPlanStream, encode_event
+
+
+class FakePlan:
+    def __init__(self, kind, day):
+        self.kind = kind
+        self.day = day
+
+    def dict(self):
+        return {"kind": self.kind, "date": self.day}
+
+
+class FakeGenerator:
+    """Gerador cujos dias terminam depois de um atraso (ou nunca, sem atraso definido)"""
+
+    def __init__(self, kind, delays, failing=()):
+        self.kind = kind
+        self.delays = delays
+        self.failing = set(failing)
+        self.started = []
+        self.cancelled = []
+        self.running = 0
+        self.peak = 0
+
+    async def _generate(self, day):
+        self.started.append(day)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            delay = self.delays.get(day)
+            if delay is None:
+                await asyncio.Event().wait()
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(day)
+            raise
+        finally:
+            self.running -= 1
+        if day in self.failing:
+            raise RuntimeError("falha na geração")
+        return FakePlan(self.kind, day)
+
+    async def generate_diet_plan(self, user_id, day, config):
+        return await self._generate(day)
+
+    async def generate_workout_plan(self, user_id, day, config):
+        return await self._generate(day)
+
+
+@pytest.fixture
+def week(target_date):
+    return [target_date + timedelta(days=offset) for offset in range(7)]
+
+
+@pytest.fixture
+def user_with_config(firebase_service, algorithm_config):
+    firebase_service.db.data["users"] = {"user-1": {"algorithm_config": algorithm_config.dict(exclude={"user_id"})}}
+    return "user-1"
+
+
+def collect(stream, user_id, week_start):
+    async def consume():
+        return [event async for event in stream.events(user_id, week_start)]
+    return asyncio.run(consume())
+
+
+class TestWeeklyPlanStream:
+    """Testes para WeeklyPlanStream"""
+
+    def test_days_are_emitted_as_they_finish(self, firebase_service, user_with_config, week):
+        """Os dias saem na ordem em que terminam, entre start e end; falhas viram day_error"""
+        delays = {day: 0.005 * (7 - index) for index, day in enumerate(week)}
+        diet = FakeGenerator("diet", delays, failing=[week[2]])
+        workout = FakeGenerator("workout", delays)
+        stream = WeeklyPlanStream(diet, workout, firebase_service, max_concurrent_days=7)
+
+        events = collect(stream, user_with_config, week[0])
+
+        assert events[0] == {"event": "start", "user_id": "user-1", "week_start": week[0], "days": 7}
+        assert events[-1] == {"event": "end", "days": 7, "failed": 1}
+        days = events[1:-1]
+        assert [event["date"] for event in days] == list(reversed(week))
+        assert [event["event"] for event in days].count("day_error") == 1
+        for event in days:
+            if event["event"] == "day":
+                assert event["diet_plan"] == {"kind": "diet", "date": event["date"]}
+                assert event["workout_plan"] == {"kind": "workout", "date": event["date"]}
+
+    def test_concurrency_is_bounded(self, firebase_service, user_with_config, week):
+        """No máximo max_concurrent_days dias são gerados ao mesmo tempo"""
+        delays = {day: 0.002 for day in week}
+        diet = FakeGenerator("diet", delays)
+        workout = FakeGenerator("workout", delays)
+        stream = WeeklyPlanStream(diet, workout, firebase_service, max_concurrent_days=2)
+
+        events = collect(stream, user_with_config, week[0])
+
+        assert events[-1] == {"event": "end", "days": 7, "failed": 0}
+        assert diet.peak == workout.peak == 2
+        assert sorted(diet.started) == week
+
+    def test_disconnect_cancels_pending_days(self, firebase_service, user_with_config, week):
+        """Fechar o stream (cliente desconectado) cancela as gerações pendentes"""
+        diet = FakeGenerator("diet", {week[0]: 0})
+        workout = FakeGenerator("workout", {week[0]: 0})
+        stream = WeeklyPlanStream(diet, workout, firebase_service, max_concurrent_days=7)
+
+        async def disconnect_after_first_day():
+            events = stream.events(user_with_config, week[0])
+            received = [await events.__anext__(), await events.__anext__()]
+            await events.aclose()
+            await asyncio.sleep(0)
+            return received
+
+        received = asyncio.run(disconnect_after_first_day())
+
+        assert [event["event"] for event in received] == ["start", "day"]
+        assert sorted(diet.cancelled) == week[1:]
+        assert sorted(workout.cancelled) == week[1:]
+
+    def test_missing_config_emits_error(self, firebase_service, week):
+        """Usuário sem configuração recebe um único evento de erro"""
+        stream = WeeklyPlanStream(FakeGenerator("diet", {}), FakeGenerator("workout", {}), firebase_service)
+
+        events = collect(stream, "sem-config", week[0])
+
+        assert [event["event"] for event in events] == ["error"]
+
+    def test_encode_event_formats(self, target_date):
+        """NDJSON: uma linha JSON por evento; SSE: nome do evento e linha data"""
+        event = {"event": "day", "date": target_date}
+
+        ndjson = encode_event(event, "ndjson").decode("utf-8")
+        sse = encode_event(event, "sse").decode("utf-8")
+
+        assert ndjson.endswith("\n") and json.loads(ndjson) == {"event": "day", "date": target_date.isoformat()}
+        assert sse.startswith("event: day\ndata: ") and sse.endswith("\n\n")
+        assert json.loads(sse.split("data: ", 1)[1]) == json.loads(ndjson)
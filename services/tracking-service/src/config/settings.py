@@ -34,6 +34,14 @@ class Settings(BaseSettings):
     redis_url: Optional[str] = Field(default=None, env="REDIS_URL")
     cache_ttl_seconds: int = Field(default=300, env="CACHE_TTL_SECONDS")  # 5 minutos
     
+    # Cache em memória (L1 na frente do Redis ou cache único sem Redis)
+    memory_cache_config: Dict[str, Any] = {
+        "max_entries": 1000,
+        "max_bytes": 32 * 1024 * 1024,
+        "l1_ttl_seconds": 30,               # Validade da cópia local quando há Redis
+        "invalidation_channel": "tracking-cache-invalidation"
+    }
+    
     # Configurações de logging
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     log_format: str = Field(default="json", env="LOG_FORMAT")
@@ -51,7 +59,9 @@ class Settings(BaseSettings):
             "default_met_value": 3.5  # Valor MET padrão se não encontrado
         },
         "dashboard_config": {
-            "cache_duration_minutes": 5,
+            "cache_duration_minutes": 5,   # Metas e planos; o consumo é atualizado a cada log (write-through)
+            "stale_while_revalidate_minutes": 10,  # Vencido: servido enquanto recalcula
+            "plan_events_channel": "plans:invalidate",  # Planos/perfil alterados no plans-service
             "max_retries": 3,
             "timeout_seconds": 10
         },
@@ -45,16 +45,16 @@ async def lifespan(app: FastAPI):
     logger.info("Iniciando Tracking Service", version=settings.app_version)
     
     try:
-        # Inicializar Firebase
-        firebase_service = FirebaseService()
-        await firebase_service.initialize()
-        logger.info("Firebase inicializado com sucesso")
-        
         # Inicializar Cache
         cache_service = CacheService()
         await cache_service.initialize()
         logger.info("Cache inicializado com sucesso")
         
+        # Inicializar Firebase (edições e remoções de logs descartam dashboards em cache)
+        firebase_service = FirebaseService(cache_service=cache_service)
+        await firebase_service.initialize()
+        logger.info("Firebase inicializado com sucesso")
+        
         # Adicionar serviços ao estado da aplicação
         app.state.firebase = firebase_service
         app.state.cache = cache_service
@@ -230,10 +230,13 @@ async def health_check():
 async def metrics():
     """Endpoint de métricas para monitoramento"""
     # Implementar métricas customizadas se necessário
+    cache = getattr(app.state, 'cache', None)
     return {
         "requests_total": "TODO",
         "request_duration_seconds": "TODO",
-        "active_connections": "TODO"
+        "active_connections": "TODO",
+        "cache": cache.get_stats() if cache else None,
+        "dashboard_computations": dashboard_routes.dashboard_flights.get_stats()
     }
 
 
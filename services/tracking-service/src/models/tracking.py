@@ -3,6 +3,9 @@ Modelos de dados para o Tracking Service
 """
 
 from datetime import datetime, date
+# Campos chamados ``date`` são anotados pelo alias: no corpo da classe o nome
+# ``date`` já é o próprio campo quando a anotação é avaliada
+from datetime import date as datetime_date
 from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 from pydantic import BaseModel, Field, validator
@@ -76,7 +79,7 @@ class DailyLog(BaseModel):
     user_id: str = Field(..., description="ID do usuário")
     log_type: LogType = Field(..., description="Tipo do log")
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="Timestamp do log")
-    date: date = Field(default_factory=date.today, description="Data do log")
+    date: datetime_date = Field(default_factory=date.today, description="Data do log")
     value: Dict[str, Any] = Field(..., description="Dados específicos do log")
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Metadados adicionais")
     
@@ -87,6 +90,36 @@ class DailyLog(BaseModel):
         }
 
 
+class DailyAggregate(BaseModel):
+    """Totais do dia de um usuário, mantidos a cada log gravado"""
+    user_id: str = Field(..., description="ID do usuário")
+    date: str = Field(..., description="Data (YYYY-MM-DD)")
+    calories_consumed: float = Field(0, description="Calorias consumidas")
+    protein_consumed: float = Field(0, description="Proteína consumida (g)")
+    carbs_consumed: float = Field(0, description="Carboidratos consumidos (g)")
+    fat_consumed: float = Field(0, description="Gordura consumida (g)")
+    water_consumed_ml: float = Field(0, description="Água consumida (ml)")
+    meal_checkins: int = Field(0, description="Check-ins de refeição")
+    meal_types: Dict[str, int] = Field(default_factory=dict, description="Check-ins por tipo de refeição")
+    sets_logged: int = Field(0, description="Séries registradas")
+    volume_kg: float = Field(0, description="Volume total (peso x reps)")
+    exercises: Dict[str, int] = Field(default_factory=dict, description="Registros por exercício")
+    workout_sessions: int = Field(0, description="Sessões de treino finalizadas")
+    workout_minutes: int = Field(0, description="Minutos de treino")
+    calories_burned: float = Field(0, description="Calorias queimadas em treinos")
+    logs_count: int = Field(0, description="Total de logs do dia")
+    
+    @property
+    def meals_completed(self) -> int:
+        """Tipos de refeição distintos com check-in"""
+        return sum(1 for count in self.meal_types.values() if count > 0)
+    
+    @property
+    def exercises_completed(self) -> int:
+        """Exercícios distintos com séries ou sessão registrada"""
+        return sum(1 for count in self.exercises.values() if count > 0)
+
+
 # Modelos de resposta (dashboard)
 
 class NutritionalSummary(BaseModel):
@@ -146,7 +179,7 @@ class DashboardResponse(BaseModel):
     """Resposta do dashboard principal"""
     user_id: str = Field(..., description="ID do usuário")
     user_name: Optional[str] = Field(None, description="Nome/nickname do usuário")
-    date: date = Field(..., description="Data do dashboard")
+    date: datetime_date = Field(..., description="Data do dashboard")
     nutritional_summary: NutritionalSummary = Field(..., description="Resumo nutricional")
     workout_summary: WorkoutSummary = Field(..., description="Resumo de treino")
     energy_balance: EnergyBalance = Field(..., description="Balanço energético")
@@ -166,7 +199,7 @@ class DashboardResponse(BaseModel):
 
 class WeightDataPoint(BaseModel):
     """Ponto de dados de peso"""
-    date: date = Field(..., description="Data da medição")
+    date: datetime_date = Field(..., description="Data da medição")
     weight_kg: float = Field(..., description="Peso em kg")
     body_fat_percentage: Optional[float] = Field(None, description="Percentual de gordura")
     muscle_mass_kg: Optional[float] = Field(None, description="Massa muscular")
@@ -174,7 +207,7 @@ class WeightDataPoint(BaseModel):
 
 class StrengthDataPoint(BaseModel):
     """Ponto de dados de força"""
-    date: date = Field(..., description="Data do treino")
+    date: datetime_date = Field(..., description="Data do treino")
     exercise_id: str = Field(..., description="ID do exercício")
     exercise_name: str = Field(..., description="Nome do exercício")
     max_weight_kg: float = Field(..., description="Peso máximo levantado")
@@ -3,7 +3,7 @@ Rotas para logging de atividades do usuário
 """
 
 from datetime import datetime, date
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import structlog
 
 from fastapi import APIRouter, Depends, HTTPException, Request
@@ -16,6 +16,8 @@ from models.tracking import (
 from services.firebase_service import FirebaseService
 from services.calorie_service import CalorieService
 from services.service_client import ServiceClient
+from services.cache_service import CacheService
+from services.dashboard_cache import refresh_cached_dashboard
 from middleware.auth import get_current_user
 
 logger = structlog.get_logger(__name__)
@@ -43,11 +45,40 @@ def get_service_client(request: Request) -> ServiceClient:
     return request.app.state.service_client
 
 
+def get_cache_service(request: Request) -> CacheService:
+    """Dependency para obter serviço de cache"""
+    return request.app.state.cache
+
+
+async def _write_through_caches(
+    cache_service: CacheService,
+    calorie_service: CalorieService,
+    daily_aggregate: Dict[str, Any],
+    firebase_service: Optional[FirebaseService] = None
+):
+    """
+    Aplica o novo log ao dashboard do dia em cache e descarta o progresso do usuário
+    
+    O progresso é derivado do histórico inteiro do período, então não é
+    atualizado no lugar. Se a atualização falhar, todo o cache do usuário é
+    invalidado.
+    """
+    user_id = daily_aggregate["user_id"]
+    try:
+        await refresh_cached_dashboard(cache_service, calorie_service, daily_aggregate, firebase_service)
+        await cache_service.invalidate_progress_cache(user_id)
+    except Exception as e:
+        logger.warning("Erro ao atualizar cache após log, invalidando", user_id=user_id, error=str(e))
+        await cache_service.invalidate_user_cache(user_id)
+
+
 @router.post("/meal-checkin", response_model=SuccessResponse)
 async def log_meal_checkin(
     meal_data: MealCheckinRequest,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    calorie_service: CalorieService = Depends(get_calorie_service),
+    cache_service: CacheService = Depends(get_cache_service)
 ):
     """
     Registra o consumo de uma refeição completa
@@ -100,7 +131,10 @@ async def log_meal_checkin(
         )
         
         # Salvar no Firestore
-        log_id = await firebase_service.save_daily_log(log_data.dict())
+        log_id, daily_aggregate = await firebase_service.save_daily_log_with_aggregate(log_data.dict())
+        
+        # Atualizar dashboard em cache com o novo log
+        await _write_through_caches(cache_service, calorie_service, daily_aggregate)
         
         logger.info("Refeição registrada com sucesso", 
                    user_id=user_id,
@@ -132,7 +166,9 @@ async def log_meal_checkin(
 async def log_set(
     set_data: SetRequest,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    calorie_service: CalorieService = Depends(get_calorie_service),
+    cache_service: CacheService = Depends(get_cache_service)
 ):
     """
     Registra uma série de treino realizada
@@ -183,7 +219,10 @@ async def log_set(
         )
         
         # Salvar no Firestore
-        log_id = await firebase_service.save_daily_log(log_data.dict())
+        log_id, daily_aggregate = await firebase_service.save_daily_log_with_aggregate(log_data.dict())
+        
+        # Atualizar dashboard em cache (séries mudam os destaques de força)
+        await _write_through_caches(cache_service, calorie_service, daily_aggregate, firebase_service)
         
         logger.info("Série registrada com sucesso", 
                    user_id=user_id,
@@ -219,7 +258,9 @@ async def log_set(
 async def log_body_weight(
     weight_data: BodyWeightRequest,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    calorie_service: CalorieService = Depends(get_calorie_service),
+    cache_service: CacheService = Depends(get_cache_service)
 ):
     """
     Registra uma nova pesagem do usuário
@@ -268,7 +309,13 @@ async def log_body_weight(
         )
         
         # Salvar no Firestore
-        log_id = await firebase_service.save_daily_log(log_data.dict())
+        log_id, daily_aggregate = await firebase_service.save_daily_log_with_aggregate(log_data.dict())
+        
+        # Atualizar dashboard em cache (pesagem muda os destaques de peso)
+        await _write_through_caches(cache_service, calorie_service, daily_aggregate, firebase_service)
+        
+        # Nova pesagem desatualiza as métricas da apresentação do dia
+        await firebase_service.mark_presentation_inputs_changed(user_id, ["metrics"])
         
         logger.info("Peso registrado com sucesso", 
                    user_id=user_id,
@@ -303,7 +350,8 @@ async def log_workout_session_end(
     current_user: Dict[str, Any] = Depends(get_current_user),
     firebase_service: FirebaseService = Depends(get_firebase_service),
     calorie_service: CalorieService = Depends(get_calorie_service),
-    service_client: ServiceClient = Depends(get_service_client)
+    service_client: ServiceClient = Depends(get_service_client),
+    cache_service: CacheService = Depends(get_cache_service)
 ):
     """
     Registra o fim de uma sessão de treino
@@ -385,7 +433,10 @@ async def log_workout_session_end(
         )
         
         # Salvar no Firestore
-        log_id = await firebase_service.save_daily_log(log_data.dict())
+        log_id, daily_aggregate = await firebase_service.save_daily_log_with_aggregate(log_data.dict())
+        
+        # Atualizar dashboard em cache com o novo log
+        await _write_through_caches(cache_service, calorie_service, daily_aggregate)
         
         logger.info("Sessão de treino registrada com sucesso", 
                    user_id=user_id,
@@ -3,9 +3,10 @@ Serviço de cache para otimização de performance
 """
 
 import json
+import uuid
 import asyncio
-from typing import Any, Optional, Dict
-from datetime import datetime, timedelta
+import fnmatch
+from typing import Any, Optional, Dict, List
 import structlog
 
 try:
@@ -15,19 +16,72 @@ except ImportError:
     REDIS_AVAILABLE = False
 
 from config.settings import get_settings
+from services.memory_cache import MemoryCache
 
 logger = structlog.get_logger(__name__)
 
+# Substitui o dashboard em cache só se a entrada ainda existir e refletir menos logs
+# (leitura, comparação e escrita atômicas no Redis)
+# KEYS[1]: chave do dashboard; ARGV: payload, logs_count, TTL, canal, aviso de invalidação
+REPLACE_DASHBOARD_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return 0
+end
+local ok, cached = pcall(cjson.decode, current)
+if not ok or type(cached['daily_aggregate']) ~= 'table' then
+    return 0
+end
+if (tonumber(cached['daily_aggregate']['logs_count']) or 0) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('SETEX', KEYS[1], ARGV[3], ARGV[1])
+redis.call('PUBLISH', ARGV[4], ARGV[5])
+return 1
+"""
+
+
+def _cached_logs_count(payload: Optional[str]) -> Optional[int]:
+    """``logs_count`` do agregado gravado no dashboard em cache (None se ausente)"""
+    if payload is None:
+        return None
+    aggregate = json.loads(payload).get("daily_aggregate")
+    if not isinstance(aggregate, dict):
+        return None
+    return aggregate.get("logs_count") or 0
+
 
 class CacheService:
-    """Serviço de cache com fallback para cache em memória"""
+    """
+    Serviço de cache em dois níveis: memória do processo (L1) + Redis
+    
+    Sem Redis, o nível em memória é o próprio cache, com o TTL pedido. Com
+    Redis, o L1 guarda as leituras e escritas recentes por no máximo
+    ``l1_ttl_seconds``; escritas e remoções são publicadas no canal de
+    invalidação para que as demais instâncias descartem suas cópias locais.
+    """
     
     def __init__(self):
         self.settings = get_settings()
+        memory_config = self.settings.memory_cache_config
         self.redis_client: Optional[aioredis.Redis] = None
-        self.memory_cache: Dict[str, Dict[str, Any]] = {}
+        self.memory = MemoryCache(memory_config["max_entries"], memory_config["max_bytes"])
+        self.l1_ttl = memory_config["l1_ttl_seconds"]
+        self.channel = memory_config["invalidation_channel"]
+        self.instance_id = uuid.uuid4().hex
         self.use_redis = REDIS_AVAILABLE and self.settings.redis_url is not None
         self.default_ttl = self.settings.cache_ttl_seconds
+        dashboard_config = self.settings.tracking_config["dashboard_config"]
+        self.dashboard_ttl = dashboard_config["cache_duration_minutes"] * 60
+        # Tempo extra em que um dashboard vencido ainda é servido enquanto é recalculado
+        self.dashboard_stale_ttl = dashboard_config["stale_while_revalidate_minutes"] * 60
+        # Usuários cujos planos/metas mudaram no plans-service (dashboards descartados)
+        self.plan_events_channel = dashboard_config["plan_events_channel"]
+        # Validade mínima do conjunto de chaves de um usuário no Redis (>= TTL das entradas por usuário)
+        self.user_keys_ttl = max(self.default_ttl, self.dashboard_ttl + self.dashboard_stale_ttl, 900)
+        self.scan_batch_size = 500
+        self.stats = {"redis_hits": 0, "redis_misses": 0}
+        self._listener: Optional[asyncio.Task] = None
         
     async def initialize(self):
         """Inicializa o serviço de cache"""
@@ -42,6 +96,7 @@ class CacheService:
                 
                 # Testar conexão
                 await self.redis_client.ping()
+                self._listener = asyncio.create_task(self._listen_invalidations())
                 logger.info("Cache Redis inicializado", url=self.settings.redis_url)
             else:
                 logger.info("Usando cache em memória (Redis não disponível)")
@@ -55,6 +110,8 @@ class CacheService:
     async def close(self):
         """Fecha conexões do cache"""
         try:
+            if self._listener:
+                self._listener.cancel()
             if self.redis_client:
                 await self.redis_client.close()
                 logger.info("Cache Redis finalizado")
@@ -74,32 +131,38 @@ class CacheService:
             logger.error("Health check do cache falhou", error=str(e))
             return False
     
-    async def get(self, key: str) -> Optional[Any]:
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de acerto, evicção e ocupação dos dois níveis"""
+        return {
+            "memory": self.memory.get_stats(),
+            **self.stats,
+            "redis": self.redis_client is not None
+        }
+    
+    async def get(self, key: str, user_id: Optional[str] = None) -> Optional[Any]:
         """
         Obtém valor do cache
         
         Args:
             key: Chave do cache
+            user_id: Usuário dono da entrada, para indexar a cópia local (opcional)
             
         Returns:
             Any: Valor armazenado ou None se não encontrado
         """
         try:
+            payload = self.memory.get(key)
+            if payload is not None:
+                return json.loads(payload)
+            
             if self.use_redis and self.redis_client:
-                # Usar Redis
-                value = await self.redis_client.get(key)
-                if value:
-                    return json.loads(value)
-            else:
-                # Usar cache em memória
-                cache_entry = self.memory_cache.get(key)
-                if cache_entry:
-                    # Verificar se não expirou
-                    if datetime.utcnow() < cache_entry["expires_at"]:
-                        return cache_entry["value"]
-                    else:
-                        # Remover entrada expirada
-                        del self.memory_cache[key]
+                # Usar Redis e manter cópia local
+                payload = await self.redis_client.get(key)
+                if payload:
+                    self.stats["redis_hits"] += 1
+                    self.memory.set(key, payload, self.l1_ttl, user_id)
+                    return json.loads(payload)
+                self.stats["redis_misses"] += 1
             
             return None
             
@@ -111,7 +174,8 @@ class CacheService:
         self, 
         key: str, 
         value: Any, 
-        ttl_seconds: Optional[int] = None
+        ttl_seconds: Optional[int] = None,
+        user_id: Optional[str] = None
     ) -> bool:
         """
         Armazena valor no cache
@@ -120,31 +184,30 @@ class CacheService:
             key: Chave do cache
             value: Valor a armazenar
             ttl_seconds: Tempo de vida em segundos (opcional)
+            user_id: Usuário dono da entrada; registra a chave no conjunto do
+                usuário para invalidate_user_cache (opcional)
             
         Returns:
             bool: True se armazenado com sucesso
         """
         try:
             ttl = ttl_seconds or self.default_ttl
+            payload = json.dumps(value, default=str)
             
             if self.use_redis and self.redis_client:
-                # Usar Redis
-                await self.redis_client.setex(
-                    key, 
-                    ttl, 
-                    json.dumps(value, default=str)
-                )
+                # Usar Redis (valor, índice do usuário e aviso às instâncias em um único round-trip)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(key, ttl, payload)
+                if user_id:
+                    index_key = self._user_keys_key(user_id)
+                    pipe.sadd(index_key, key)
+                    pipe.expire(index_key, max(ttl, self.user_keys_ttl))
+                self._publish_invalidation(pipe, keys=[key])
+                await pipe.execute()
+                self.memory.set(key, payload, min(ttl, self.l1_ttl), user_id)
             else:
                 # Usar cache em memória
-                expires_at = datetime.utcnow() + timedelta(seconds=ttl)
-                self.memory_cache[key] = {
-                    "value": value,
-                    "expires_at": expires_at
-                }
-                
-                # Limpar cache em memória se ficar muito grande
-                if len(self.memory_cache) > 1000:
-                    await self._cleanup_memory_cache()
+                self.memory.set(key, payload, ttl, user_id)
             
             logger.debug("Valor armazenado no cache", key=key, ttl=ttl)
             return True
@@ -164,12 +227,14 @@ class CacheService:
             bool: True se removido com sucesso
         """
         try:
+            self.memory.delete(key)
+            
             if self.use_redis and self.redis_client:
                 # Usar Redis
-                await self.redis_client.delete(key)
-            else:
-                # Usar cache em memória
-                self.memory_cache.pop(key, None)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.delete(key)
+                self._publish_invalidation(pipe, keys=[key])
+                await pipe.execute()
             
             logger.debug("Valor removido do cache", key=key)
             return True
@@ -189,14 +254,11 @@ class CacheService:
             bool: True se existe
         """
         try:
+            if self.memory.get(key) is not None:
+                return True
             if self.use_redis and self.redis_client:
                 return bool(await self.redis_client.exists(key))
-            else:
-                cache_entry = self.memory_cache.get(key)
-                if cache_entry:
-                    # Verificar se não expirou
-                    return datetime.utcnow() < cache_entry["expires_at"]
-                return False
+            return False
                 
         except Exception as e:
             logger.error("Erro ao verificar existência no cache", key=key, error=str(e))
@@ -213,23 +275,23 @@ class CacheService:
             int: Número de chaves removidas
         """
         try:
-            count = 0
+            count = self._memory_clear_pattern(pattern)
             
             if self.use_redis and self.redis_client:
-                # Usar Redis
-                keys = await self.redis_client.keys(pattern)
-                if keys:
-                    count = await self.redis_client.delete(*keys)
-            else:
-                # Usar cache em memória
-                import fnmatch
-                keys_to_remove = [
-                    key for key in self.memory_cache.keys()
-                    if fnmatch.fnmatch(key, pattern)
-                ]
-                for key in keys_to_remove:
-                    del self.memory_cache[key]
-                count = len(keys_to_remove)
+                # Usar Redis (SCAN incremental em vez de KEYS, que bloqueia o servidor)
+                count = 0
+                batch = []
+                async for key in self.redis_client.scan_iter(match=pattern, count=self.scan_batch_size):
+                    batch.append(key)
+                    if len(batch) >= self.scan_batch_size:
+                        count += await self.redis_client.unlink(*batch)
+                        batch = []
+                if batch:
+                    count += await self.redis_client.unlink(*batch)
+                
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._publish_invalidation(pipe, pattern=pattern)
+                await pipe.execute()
             
             logger.info("Chaves removidas por padrão", pattern=pattern, count=count)
             return count
@@ -238,45 +300,202 @@ class CacheService:
             logger.error("Erro ao limpar por padrão", pattern=pattern, error=str(e))
             return 0
     
-    async def _cleanup_memory_cache(self):
-        """Limpa entradas expiradas do cache em memória"""
+    def _user_keys_key(self, user_id: str) -> str:
+        """Chave do conjunto (Redis) com as chaves de cache de um usuário"""
+        return f"user_keys:{user_id}"
+    
+    async def clear_user_keys(self, user_id: str, prefix: Optional[str] = None) -> int:
+        """
+        Remove as chaves de cache registradas para um usuário
+        
+        Usa o conjunto de chaves mantido em set(), sem varrer o keyspace; se o
+        conjunto não puder ser lido, recorre à varredura por padrão (SCAN).
+        
+        Args:
+            user_id: ID do usuário
+            prefix: Remove apenas as chaves com este prefixo (ex: "progress:")
+            
+        Returns:
+            int: Número de chaves removidas
+        """
         try:
-            now = datetime.utcnow()
-            expired_keys = [
-                key for key, entry in self.memory_cache.items()
-                if now >= entry["expires_at"]
-            ]
+            count = self._memory_clear_user(user_id, prefix)
             
-            for key in expired_keys:
-                del self.memory_cache[key]
+            if self.use_redis and self.redis_client:
+                index_key = self._user_keys_key(user_id)
+                keys: List[str] = list(await self.redis_client.smembers(index_key))
+                if prefix:
+                    keys = [key for key in keys if key.startswith(prefix)]
+                
+                # Entradas, índice e aviso às instâncias em um único round-trip
+                pipe = self.redis_client.pipeline(transaction=False)
+                if keys:
+                    pipe.unlink(*keys)
+                    if prefix:
+                        pipe.srem(index_key, *keys)
+                    else:
+                        pipe.unlink(index_key)
+                self._publish_invalidation(pipe, user_id=user_id, prefix=prefix)
+                results = await pipe.execute()
+                count = results[0] if keys else 0
             
-            logger.debug("Cache em memória limpo", expired_count=len(expired_keys))
+            logger.info("Chaves do usuário removidas", user_id=user_id, prefix=prefix, count=count)
+            return count
             
         except Exception as e:
-            logger.error("Erro ao limpar cache em memória", error=str(e))
+            logger.warning("Erro ao limpar chaves do usuário, usando varredura", user_id=user_id, error=str(e))
+            pattern = f"{prefix}{user_id}:*" if prefix else f"*:{user_id}:*"
+            return await self.clear_pattern(pattern)
+    
+    def _memory_clear_pattern(self, pattern: str) -> int:
+        """Remove do nível local as chaves que correspondem ao padrão"""
+        keys = [key for key in self.memory.keys() if fnmatch.fnmatch(key, pattern)]
+        for key in keys:
+            self.memory.delete(key)
+        return len(keys)
+    
+    def _memory_clear_user(self, user_id: str, prefix: Optional[str] = None) -> int:
+        """Remove do nível local as chaves de um usuário (índice, sem varredura)"""
+        keys = self.memory.user_keys(user_id, prefix)
+        for key in keys:
+            self.memory.delete(key)
+        return len(keys)
+    
+    def _publish_invalidation(self, pipe, **message):
+        """Enfileira no pipeline o aviso de invalidação para as demais instâncias"""
+        pipe.publish(self.channel, json.dumps({"origin": self.instance_id, **message}))
+    
+    async def _listen_invalidations(self):
+        """
+        Descarta do nível local as chaves alteradas por outras instâncias
+        
+        Também ouve o canal de invalidação do plans-service (ver
+        ``_handle_plan_event``).
+        """
+        pubsub = self.redis_client.pubsub()
+        try:
+            await pubsub.subscribe(self.channel, self.plan_events_channel)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                
+                if message.get("channel") == self.plan_events_channel:
+                    await self._handle_plan_event(message["data"])
+                    continue
+                
+                invalidation = json.loads(message["data"])
+                if invalidation.get("origin") == self.instance_id:
+                    continue
+                
+                for key in invalidation.get("keys", ()):
+                    self.memory.delete(key)
+                if invalidation.get("user_id"):
+                    self._memory_clear_user(invalidation["user_id"], invalidation.get("prefix"))
+                if invalidation.get("pattern"):
+                    self._memory_clear_pattern(invalidation["pattern"])
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Listener de invalidação do cache encerrado", error=str(e))
+        finally:
+            await pubsub.close()
+    
+    async def _handle_plan_event(self, data: str):
+        """
+        Aplica uma invalidação publicada pelo plans-service
+        
+        A mensagem é o ID do usuário (metas e planos mudaram: todos os
+        dashboards do usuário são removidos) ou o JSON ``{"user_id", "kind",
+        "date"}`` quando só o plano de um dia mudou (apenas o dashboard desse
+        dia é removido).
+        """
+        if data.startswith("{"):
+            day = json.loads(data)
+            await self.delete_dashboard_cache(day["user_id"], day["date"])
+        else:
+            await self.invalidate_dashboard_cache(data)
     
     # Métodos específicos para o tracking service
     
     async def get_dashboard_cache(self, user_id: str, date: str) -> Optional[Dict[str, Any]]:
         """Obtém dashboard do cache"""
         key = f"dashboard:{user_id}:{date}"
-        return await self.get(key)
+        return await self.get(key, user_id=user_id)
     
     async def set_dashboard_cache(
         self, 
         user_id: str, 
         date: str, 
-        dashboard_data: Dict[str, Any]
+        dashboard_data: Dict[str, Any],
+        ttl_seconds: Optional[int] = None
     ) -> bool:
-        """Armazena dashboard no cache"""
+        """
+        Armazena dashboard no cache (atualizado pelos logs do dia, ver refresh_cached_dashboard)
+        
+        A entrada fica armazenada além da validade pelo período de
+        stale-while-revalidate; o dashboard decide se ela está vencida pelo
+        ``cached_at`` gravado junto.
+        """
         key = f"dashboard:{user_id}:{date}"
-        # Cache de dashboard por 5 minutos
-        return await self.set(key, dashboard_data, ttl_seconds=300)
+        ttl = ttl_seconds or self.dashboard_ttl + self.dashboard_stale_ttl
+        return await self.set(key, dashboard_data, ttl_seconds=ttl, user_id=user_id)
+    
+    async def replace_dashboard_cache(
+        self,
+        user_id: str,
+        date: str,
+        dashboard_data: Dict[str, Any],
+        logs_count: int,
+        ttl_seconds: int
+    ) -> bool:
+        """
+        Substitui o dashboard em cache se ele ainda existir e tiver menos logs que ``logs_count``
+        
+        Leitura, comparação e escrita são atômicas (script Lua no Redis; sem
+        Redis, não há ``await`` entre elas): uma atualização concorrente com
+        um log posterior, ou a remoção da entrada, não é sobrescrita.
+        
+        Returns:
+            bool: True se a entrada foi substituída
+        """
+        key = f"dashboard:{user_id}:{date}"
+        try:
+            payload = json.dumps(dashboard_data, default=str)
+            
+            if self.use_redis and self.redis_client:
+                invalidation = json.dumps({"origin": self.instance_id, "keys": [key]})
+                replaced = await self.redis_client.eval(
+                    REPLACE_DASHBOARD_SCRIPT, 1, key, payload, logs_count, ttl_seconds, self.channel, invalidation
+                )
+                if not replaced:
+                    self.memory.delete(key)
+                    return False
+                self.memory.set(key, payload, min(ttl_seconds, self.l1_ttl), user_id)
+                return True
+            
+            cached_logs_count = _cached_logs_count(self.memory.get(key))
+            if cached_logs_count is None or cached_logs_count >= logs_count:
+                return False
+            self.memory.set(key, payload, ttl_seconds, user_id)
+            return True
+            
+        except Exception as e:
+            logger.error("Erro ao substituir dashboard no cache", key=key, error=str(e))
+            return False
+    
+    async def delete_dashboard_cache(self, user_id: str, date: str) -> bool:
+        """Remove dashboard do cache"""
+        key = f"dashboard:{user_id}:{date}"
+        return await self.delete(key)
+    
+    async def invalidate_dashboard_cache(self, user_id: str) -> int:
+        """Invalida os dashboards de um usuário (todas as datas)"""
+        return await self.clear_user_keys(user_id, prefix="dashboard:")
     
     async def get_progress_cache(self, user_id: str, days: int) -> Optional[Dict[str, Any]]:
         """Obtém dados de progresso do cache"""
         key = f"progress:{user_id}:{days}"
-        return await self.get(key)
+        return await self.get(key, user_id=user_id)
     
     async def set_progress_cache(
         self, 
@@ -287,12 +506,15 @@ class CacheService:
         """Armazena dados de progresso no cache"""
         key = f"progress:{user_id}:{days}"
         # Cache de progresso por 15 minutos
-        return await self.set(key, progress_data, ttl_seconds=900)
+        return await self.set(key, progress_data, ttl_seconds=900, user_id=user_id)
+    
+    async def invalidate_progress_cache(self, user_id: str) -> int:
+        """Invalida os dados de progresso de um usuário (todos os períodos)"""
+        return await self.clear_user_keys(user_id, prefix="progress:")
     
     async def invalidate_user_cache(self, user_id: str) -> int:
         """Invalida todo o cache de um usuário"""
-        pattern = f"*:{user_id}:*"
-        return await self.clear_pattern(pattern)
+        return await self.clear_user_keys(user_id)
     
     async def get_service_data_cache(
         self, 
@@ -302,7 +524,7 @@ class CacheService:
     ) -> Optional[Dict[str, Any]]:
         """Obtém dados de serviço do cache"""
         key = f"service:{service}:{endpoint}:{user_id}"
-        return await self.get(key)
+        return await self.get(key, user_id=user_id)
     
     async def set_service_data_cache(
         self,
@@ -314,5 +536,5 @@ class CacheService:
     ) -> bool:
         """Armazena dados de serviço no cache"""
         key = f"service:{service}:{endpoint}:{user_id}"
-        return await self.set(key, data, ttl_seconds=ttl_seconds)
+        return await self.set(key, data, ttl_seconds=ttl_seconds, user_id=user_id)
 
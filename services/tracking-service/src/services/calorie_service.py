@@ -8,6 +8,7 @@ import structlog
 import math
 
 from config.settings import get_settings
+from models.tracking import DailyAggregate
 
 logger = structlog.get_logger(__name__)
 
@@ -90,7 +91,8 @@ class CalorieService:
         target_date: date,
         user_bmr: float,
         user_tdee: float,
-        daily_logs: List[Dict[str, Any]]
+        daily_logs: Optional[List[Dict[str, Any]]] = None,
+        daily_aggregate: Optional[DailyAggregate] = None
     ) -> Dict[str, Any]:
         """
         Calcula o balanço energético do dia
@@ -101,6 +103,7 @@ class CalorieService:
             user_bmr: Taxa metabólica basal
             user_tdee: Gasto energético total diário
             daily_logs: Logs do dia
+            daily_aggregate: Totais do dia (DailyAggregate); dispensa percorrer os logs
             
         Returns:
             Dict: Balanço energético detalhado
@@ -110,8 +113,12 @@ class CalorieService:
             calories_consumed = 0.0
             calories_burned_exercise = 0.0
             
+            if daily_aggregate is not None:
+                calories_consumed = daily_aggregate.calories_consumed
+                calories_burned_exercise = daily_aggregate.calories_burned
+            
             # Processar logs do dia
-            for log in daily_logs:
+            for log in daily_logs or []:
                 log_type = log.get("log_type")
                 log_value = log.get("value", {})
                 
@@ -0,0 +1,126 @@
+"""
+Agregados diários por usuário (daily_aggregates/{user_id}_{date}), mantidos na gravação dos logs
+"""
+
+from typing import Any, Dict, Iterable, Tuple
+
+AGGREGATES_COLLECTION = "daily_aggregates"
+
+# Contadores numéricos do documento agregado
+COUNTER_FIELDS = (
+    "calories_consumed",
+    "protein_consumed",
+    "carbs_consumed",
+    "fat_consumed",
+    "water_consumed_ml",
+    "meal_checkins",
+    "sets_logged",
+    "volume_kg",
+    "workout_sessions",
+    "workout_minutes",
+    "calories_burned",
+    "logs_count"
+)
+
+# Contadores por chave (tipo de refeição / exercício)
+MAP_FIELDS = ("meal_types", "exercises")
+
+
+def aggregate_doc_id(user_id: str, date_str: str) -> str:
+    """ID do documento agregado de um usuário em uma data"""
+    return f"{user_id}_{date_str}"
+
+
+def log_deltas(log: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Incrementos que um log aplica ao agregado do dia
+
+    Args:
+        log: Documento do log (como gravado em daily_logs)
+
+    Returns:
+        Dict: Contadores numéricos e mapas ``meal_types``/``exercises`` (apenas os não nulos)
+    """
+    log_type = log.get("log_type")
+    value = log.get("value") or {}
+    deltas: Dict[str, Any] = {"logs_count": 1}
+
+    if log_type == "meal_checkin":
+        nutritional = value.get("nutritional_summary") or {}
+        deltas["calories_consumed"] = nutritional.get("total_calories", 0) or 0
+        deltas["protein_consumed"] = nutritional.get("total_protein", 0) or 0
+        deltas["carbs_consumed"] = nutritional.get("total_carbs", 0) or 0
+        deltas["fat_consumed"] = nutritional.get("total_fat", 0) or 0
+        deltas["meal_checkins"] = 1
+        if value.get("meal_type"):
+            deltas["meal_types"] = {value["meal_type"]: 1}
+
+    elif log_type == "water_intake":
+        deltas["water_consumed_ml"] = value.get("amount_ml", 0) or 0
+
+    elif log_type == "set":
+        deltas["sets_logged"] = 1
+        deltas["volume_kg"] = (value.get("weight_kg") or 0) * (value.get("reps_done") or 0)
+        if value.get("exercise_id"):
+            deltas["exercises"] = {value["exercise_id"]: 1}
+
+    elif log_type == "workout_session":
+        deltas["workout_sessions"] = 1
+        deltas["workout_minutes"] = value.get("duration_minutes", 0) or 0
+        deltas["calories_burned"] = value.get("calories_burned", 0) or 0
+        exercises: Dict[str, int] = {}
+        for exercise_id in value.get("exercises_performed") or []:
+            exercises[exercise_id] = exercises.get(exercise_id, 0) + 1
+        if exercises:
+            deltas["exercises"] = exercises
+
+    return deltas
+
+
+def combine_deltas(*weighted: Tuple[Dict[str, Any], int]) -> Dict[str, Any]:
+    """
+    Soma ponderada de incrementos, ex: ``combine_deltas((novo, 1), (antigo, -1))``
+
+    Entradas que se anulam são removidas, para não gravar incrementos vazios.
+    """
+    combined: Dict[str, Any] = {}
+    for deltas, factor in weighted:
+        for field, delta in deltas.items():
+            if field in MAP_FIELDS:
+                counts = combined.setdefault(field, {})
+                for key, count in delta.items():
+                    counts[key] = counts.get(key, 0) + count * factor
+            else:
+                combined[field] = combined.get(field, 0) + delta * factor
+
+    for field in MAP_FIELDS:
+        if field in combined:
+            combined[field] = {key: count for key, count in combined[field].items() if count}
+    return {field: delta for field, delta in combined.items() if delta}
+
+
+def aggregate_logs(user_id: str, date_str: str, logs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Documento agregado completo a partir dos logs do dia (backfill de dias sem agregado)"""
+    aggregate: Dict[str, Any] = {field: 0 for field in COUNTER_FIELDS}
+    aggregate.update({field: {} for field in MAP_FIELDS})
+
+    for field, delta in combine_deltas(*((log_deltas(log), 1) for log in logs)).items():
+        aggregate[field] = delta
+
+    aggregate["user_id"] = user_id
+    aggregate["date"] = date_str
+    return aggregate
+
+
+def apply_deltas(aggregate: Dict[str, Any], deltas: Dict[str, Any]) -> Dict[str, Any]:
+    """Agregado resultante de aplicar incrementos (o que o Firestore grava com Increment)"""
+    updated = dict(aggregate)
+    for field, delta in deltas.items():
+        if field in MAP_FIELDS:
+            counts = dict(updated.get(field) or {})
+            for key, count in delta.items():
+                counts[key] = counts.get(key, 0) + count
+            updated[field] = counts
+        else:
+            updated[field] = (updated.get(field) or 0) + delta
+    return updated
@@ -0,0 +1,296 @@
+"""
+Dashboard em cache: partes derivadas do agregado do dia e atualização após cada log
+"""
+
+from datetime import datetime, date
+from typing import Any, Dict, Optional
+import structlog
+
+from models.tracking import DailyAggregate, DashboardResponse, NutritionalSummary, WorkoutSummary, ProgressMetric
+from services.cache_service import CacheService
+from services.calorie_service import CalorieService
+from services.firebase_service import FirebaseService
+
+logger = structlog.get_logger(__name__)
+
+
+async def aggregate_unchanged(
+    firebase_service: FirebaseService,
+    dashboard_date: date,
+    daily_aggregate: DailyAggregate
+) -> bool:
+    """
+    Confere, antes de gravar o dashboard no cache, se o agregado do dia ainda é o usado
+    
+    Um log gravado durante o cálculo já atualizou a entrada em cache
+    (write-through); gravar o dashboard calculado com o agregado anterior
+    sobrescreveria essa atualização. Nesse caso o dashboard é retornado sem
+    ser guardado. Exclusões também alteram o agregado (``logs_count`` diminui),
+    por isso a comparação é feita com o documento inteiro.
+    """
+    try:
+        latest = await firebase_service.get_daily_aggregate(daily_aggregate.user_id, dashboard_date)
+    except Exception as e:
+        logger.warning("Erro ao reler agregado diário", error=str(e))
+        return True
+    
+    if DailyAggregate(**latest) == daily_aggregate:
+        return True
+    
+    logger.info("Agregado alterado durante o cálculo; dashboard não armazenado",
+               user_id=daily_aggregate.user_id,
+               date=daily_aggregate.date)
+    return False
+
+
+def nutrition_progress(daily_aggregate: DailyAggregate, calories_target: float) -> Dict[str, Any]:
+    """Campos de consumo do resumo nutricional (a partir do agregado do dia)"""
+    return {
+        "calories_consumed": round(daily_aggregate.calories_consumed, 1),
+        "calories_remaining": round(max(0, calories_target - daily_aggregate.calories_consumed), 1),
+        "protein_consumed": round(daily_aggregate.protein_consumed, 1),
+        "carbs_consumed": round(daily_aggregate.carbs_consumed, 1),
+        "fat_consumed": round(daily_aggregate.fat_consumed, 1),
+        "water_consumed_ml": round(daily_aggregate.water_consumed_ml, 1),
+        "meals_completed": daily_aggregate.meals_completed
+    }
+
+
+def workout_progress(daily_aggregate: DailyAggregate) -> Dict[str, Any]:
+    """Campos de execução do resumo de treino (a partir do agregado do dia)"""
+    return {
+        "workout_completed": daily_aggregate.workout_sessions > 0,
+        "duration_actual_minutes": daily_aggregate.workout_minutes,
+        "calories_burned": round(daily_aggregate.calories_burned, 1),
+        "exercises_completed": daily_aggregate.exercises_completed
+    }
+
+
+async def build_progress_highlights(
+    firebase_service: FirebaseService,
+    user_id: str
+) -> list:
+    """Constrói destaques de progresso"""
+    
+    progress_highlights = []
+    
+    try:
+        # Obter últimas medições de peso
+        weight_history = await firebase_service.get_weight_history(user_id, days=7)
+        if len(weight_history) >= 2:
+            latest_weight = weight_history[-1]["weight_kg"]
+            previous_weight = weight_history[-2]["weight_kg"]
+            weight_change = latest_weight - previous_weight
+            
+            progress_highlights.append(ProgressMetric(
+                metric_name="Peso Corporal",
+                current_value=latest_weight,
+                previous_value=previous_weight,
+                change_value=weight_change,
+                change_percentage=(weight_change / previous_weight * 100) if previous_weight > 0 else 0,
+                trend="down" if weight_change < -0.1 else "up" if weight_change > 0.1 else "stable",
+                unit="kg",
+                last_updated=datetime.utcnow()
+            ))
+        
+        # Obter progresso de força (exercício mais recente)
+        strength_progress = await firebase_service.get_strength_progress(user_id, days=30)
+        if strength_progress:
+            # Agrupar por exercício e pegar o mais recente
+            exercise_progress = {}
+            for entry in strength_progress:
+                exercise_id = entry["exercise_id"]
+                if exercise_id not in exercise_progress:
+                    exercise_progress[exercise_id] = []
+                exercise_progress[exercise_id].append(entry)
+            
+            # Pegar exercício com mais progresso recente
+            for exercise_id, entries in exercise_progress.items():
+                if len(entries) >= 2:
+                    entries.sort(key=lambda x: x["date"])
+                    latest = entries[-1]
+                    previous = entries[-2]
+                    
+                    weight_change = latest["weight_kg"] - previous["weight_kg"]
+                    if abs(weight_change) > 0.5:  # Mudança significativa
+                        progress_highlights.append(ProgressMetric(
+                            metric_name=f"Força - {latest['exercise_name']}",
+                            current_value=latest["weight_kg"],
+                            previous_value=previous["weight_kg"],
+                            change_value=weight_change,
+                            change_percentage=(weight_change / previous["weight_kg"] * 100) if previous["weight_kg"] > 0 else 0,
+                            trend="up" if weight_change > 0 else "down",
+                            unit="kg",
+                            last_updated=datetime.utcnow()
+                        ))
+                        break  # Apenas um destaque de força
+        
+    except Exception as e:
+        logger.error("Erro ao construir destaques de progresso", error=str(e))
+    
+    return progress_highlights
+
+
+def generate_motivation_message(
+    nutritional_summary: NutritionalSummary,
+    workout_summary: WorkoutSummary,
+    daily_streak: int
+) -> str:
+    """Gera mensagem motivacional personalizada"""
+    
+    messages = []
+    
+    # Mensagens baseadas em streak
+    if daily_streak >= 7:
+        messages.append(f"🔥 Incrível! {daily_streak} dias consecutivos seguindo seu plano!")
+    elif daily_streak >= 3:
+        messages.append(f"💪 Ótimo! {daily_streak} dias de consistência!")
+    elif daily_streak >= 1:
+        messages.append("🌟 Continue assim! Consistência é a chave do sucesso!")
+    else:
+        messages.append("🚀 Hoje é um novo dia para alcançar seus objetivos!")
+    
+    # Mensagens baseadas no progresso nutricional
+    calories_percentage = (nutritional_summary.calories_consumed / nutritional_summary.calories_target * 100) if nutritional_summary.calories_target > 0 else 0
+    
+    if calories_percentage >= 90:
+        messages.append("🎯 Meta calórica quase atingida!")
+    elif calories_percentage >= 70:
+        messages.append("📈 Bom progresso nas calorias hoje!")
+    elif calories_percentage < 50:
+        messages.append("🍽️ Lembre-se de se alimentar adequadamente!")
+    
+    # Mensagens baseadas no treino
+    if workout_summary.workout_completed:
+        messages.append("💪 Treino concluído! Excelente trabalho!")
+    elif workout_summary.workout_planned:
+        messages.append("🏋️ Seu treino está te esperando!")
+    
+    return " ".join(messages)
+
+
+def get_next_milestone(
+    nutritional_summary: NutritionalSummary,
+    workout_summary: WorkoutSummary,
+    progress_highlights: list
+) -> str:
+    """Determina o próximo marco do usuário"""
+    
+    # Verificar próximo marco nutricional
+    calories_percentage = (nutritional_summary.calories_consumed / nutritional_summary.calories_target * 100) if nutritional_summary.calories_target > 0 else 0
+    
+    if calories_percentage < 25:
+        return "Próximo: Completar café da manhã"
+    elif calories_percentage < 50:
+        return "Próximo: Atingir 50% das calorias diárias"
+    elif calories_percentage < 75:
+        return "Próximo: Completar almoço"
+    elif calories_percentage < 100:
+        return "Próximo: Atingir meta calórica do dia"
+    
+    # Verificar próximo marco de treino
+    if workout_summary.workout_planned and not workout_summary.workout_completed:
+        return "Próximo: Completar treino do dia"
+    elif workout_summary.exercises_completed < workout_summary.total_exercises:
+        remaining = workout_summary.total_exercises - workout_summary.exercises_completed
+        return f"Próximo: Completar {remaining} exercícios restantes"
+    
+    # Marco padrão
+    return "Próximo: Manter consistência amanhã"
+
+
+async def refresh_cached_dashboard(
+    cache_service: CacheService,
+    calorie_service: CalorieService,
+    daily_aggregate: Dict[str, Any],
+    firebase_service: Optional[FirebaseService] = None
+) -> bool:
+    """
+    Atualiza o dashboard em cache com o agregado do dia após um novo log (write-through)
+    
+    Metas, planos, destaques de progresso e streak são mantidos; consumo,
+    execução do treino, balanço energético e mensagens passam a refletir o
+    agregado. Quando a entrada não pode ser atualizada com exatidão (formato
+    antigo, primeiro check-in de refeição do dia, que muda o streak), ela é
+    descartada e o próximo acesso recalcula o dashboard.
+    
+    Args:
+        cache_service: Serviço de cache
+        calorie_service: Serviço de cálculo calórico
+        daily_aggregate: Agregado do dia já com o novo log
+        firebase_service: Quando informado, recalcula os destaques de progresso
+            (logs de peso e séries mudam os destaques)
+        
+    Returns:
+        bool: True se o dashboard em cache foi atualizado
+    """
+    user_id = daily_aggregate["user_id"]
+    date_str = daily_aggregate["date"]
+    
+    cached = await cache_service.get_dashboard_cache(user_id, date_str)
+    if not cached:
+        return False
+    
+    aggregate = DailyAggregate(**daily_aggregate)
+    if not cached.get("daily_aggregate") or not cached.get("cached_at"):
+        await cache_service.delete_dashboard_cache(user_id, date_str)
+        return False
+    
+    previous = DailyAggregate(**cached["daily_aggregate"])
+    if previous.logs_count >= aggregate.logs_count:
+        # A entrada já reflete este log (ou um posterior)
+        return False
+    
+    # A entrada mantém a validade original: metas e planos também envelhecem
+    age_seconds = (datetime.utcnow() - datetime.fromisoformat(cached["cached_at"])).total_seconds()
+    remaining_ttl = int(cache_service.dashboard_ttl + cache_service.dashboard_stale_ttl - age_seconds)
+    if remaining_ttl <= 0 or (previous.meal_checkins == 0 and aggregate.meal_checkins > 0):
+        await cache_service.delete_dashboard_cache(user_id, date_str)
+        return False
+    
+    dashboard = DashboardResponse(**cached)
+    nutritional_summary = dashboard.nutritional_summary.copy(
+        update=nutrition_progress(aggregate, dashboard.nutritional_summary.calories_target)
+    )
+    workout_summary = dashboard.workout_summary.copy(update=workout_progress(aggregate))
+    
+    energy = dashboard.energy_balance
+    calories_out = energy.bmr + energy.activity_calories + aggregate.calories_burned
+    net_balance = aggregate.calories_consumed - calories_out
+    energy_balance = energy.copy(update={
+        "calories_in": round(aggregate.calories_consumed, 1),
+        "calories_out": round(calories_out, 1),
+        "exercise_calories": round(aggregate.calories_burned, 1),
+        "net_balance": round(net_balance, 1),
+        "balance_status": calorie_service._determine_balance_status(net_balance)
+    })
+    
+    progress_highlights = dashboard.progress_highlights
+    if firebase_service is not None:
+        progress_highlights = await build_progress_highlights(firebase_service, user_id)
+    
+    dashboard = dashboard.copy(update={
+        "progress_highlights": progress_highlights,
+        "nutritional_summary": nutritional_summary,
+        "workout_summary": workout_summary,
+        "energy_balance": energy_balance,
+        "motivation_message": generate_motivation_message(
+            nutritional_summary, workout_summary, dashboard.daily_streak
+        ),
+        "next_milestone": get_next_milestone(
+            nutritional_summary, workout_summary, progress_highlights
+        )
+    })
+    
+    # Só grava se a entrada ainda existir com menos logs (outra atualização ou remoção não é desfeita)
+    replaced = await cache_service.replace_dashboard_cache(user_id, date_str, {
+        **dashboard.dict(),
+        "daily_aggregate": aggregate.dict(),
+        "cached_at": cached["cached_at"]
+    }, aggregate.logs_count, ttl_seconds=remaining_ttl)
+    if not replaced:
+        logger.info("Dashboard em cache alterado durante a atualização", user_id=user_id, date=date_str)
+        return False
+    
+    logger.info("Dashboard em cache atualizado", user_id=user_id, date=date_str)
+    return True
@@ -4,15 +4,20 @@ Serviço de integração com Firebase/Firestore
 
 import os
 import json
-from typing import Optional, Dict, Any, List
+import uuid
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, date
 import structlog
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.api_core.exceptions import AlreadyExists
 from google.cloud.firestore import Client, DocumentReference, CollectionReference
 
 from config.settings import get_settings
+from services.daily_aggregates import (
+    AGGREGATES_COLLECTION, MAP_FIELDS, aggregate_doc_id, aggregate_logs, apply_deltas, combine_deltas, log_deltas
+)
 
 logger = structlog.get_logger(__name__)
 
@@ -20,10 +25,12 @@ logger = structlog.get_logger(__name__)
 class FirebaseService:
     """Serviço para interação com Firebase/Firestore"""
     
-    def __init__(self):
+    def __init__(self, cache_service=None):
         self.db: Optional[Client] = None
         self.app: Optional[firebase_admin.App] = None
         self.settings = get_settings()
+        # Cache cujos dashboards são descartados quando um log é editado ou removido
+        self.cache_service = cache_service
         
     async def initialize(self):
         """Inicializa a conexão com Firebase"""
@@ -114,6 +121,19 @@ class FirebaseService:
         Returns:
             str: ID do documento criado
         """
+        log_id, _ = await self.save_daily_log_with_aggregate(log_data)
+        return log_id
+    
+    async def save_daily_log_with_aggregate(self, log_data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Salva um log diário e retorna também o agregado do dia já com o log
+        
+        Args:
+            log_data: Dados do log
+            
+        Returns:
+            Tuple[str, Dict]: ID do documento criado e agregado do dia após a gravação
+        """
         try:
             # Preparar dados para salvamento
             save_data = log_data.copy()
@@ -129,16 +149,39 @@ class FirebaseService:
             save_data['created_at'] = datetime.utcnow()
             save_data['updated_at'] = datetime.utcnow()
             
-            # Salvar no Firestore
+            # Salvar log e agregado do dia na mesma transação
             doc_ref = self.db.collection('daily_logs').document()
-            doc_ref.set(save_data)
+            agg_ref = self._aggregate_ref(save_data['user_id'], save_data['date'])
+            
+            @firestore.transactional
+            def save_with_aggregate(transaction):
+                aggregate = agg_ref.get(transaction=transaction)
+                if aggregate.exists:
+                    deltas = log_deltas(save_data)
+                    transaction.set(agg_ref, _increments(deltas), merge=True)
+                    updated = apply_deltas(aggregate.to_dict(), deltas)
+                else:
+                    # Primeiro log do dia com agregado (ou dia anterior à agregação): recalcular
+                    previous_logs = [
+                        log.to_dict()
+                        for log in self._daily_logs_query(save_data['user_id'], save_data['date'])
+                        .stream(transaction=transaction)
+                    ]
+                    updated = aggregate_logs(
+                        save_data['user_id'], save_data['date'], previous_logs + [save_data]
+                    )
+                    transaction.set(agg_ref, updated)
+                transaction.set(doc_ref, save_data)
+                return updated
+            
+            daily_aggregate = save_with_aggregate(self.db.transaction())
             
             logger.info("Log salvo com sucesso", 
                        log_id=doc_ref.id,
                        user_id=log_data.get('user_id'),
                        log_type=log_data.get('log_type'))
             
-            return doc_ref.id
+            return doc_ref.id, daily_aggregate
             
         except Exception as e:
             logger.error("Erro ao salvar log", error=str(e), log_data=log_data)
@@ -163,9 +206,7 @@ class FirebaseService:
         """
         try:
             # Construir query
-            query = (self.db.collection('daily_logs')
-                    .where('user_id', '==', user_id)
-                    .where('date', '==', target_date.isoformat()))
+            query = self._daily_logs_query(user_id, target_date.isoformat())
             
             # Filtrar por tipos se especificado
             if log_types:
@@ -197,6 +238,48 @@ class FirebaseService:
                         date=target_date.isoformat())
             raise
     
+    async def get_daily_aggregate(self, user_id: str, target_date: date) -> Dict[str, Any]:
+        """
+        Obtém os totais do dia de um usuário (documento daily_aggregates)
+        
+        Dias sem agregado (anteriores à agregação na gravação) são calculados a
+        partir dos logs e gravados, para que as próximas leituras sejam diretas.
+        
+        Args:
+            user_id: ID do usuário
+            target_date: Data alvo
+            
+        Returns:
+            Dict: Documento agregado do dia
+        """
+        try:
+            date_str = target_date.isoformat()
+            agg_ref = self._aggregate_ref(user_id, date_str)
+            
+            snapshot = agg_ref.get()
+            if snapshot.exists:
+                return snapshot.to_dict()
+            
+            logs = await self.get_daily_logs(user_id, target_date)
+            aggregate = aggregate_logs(user_id, date_str, logs)
+            
+            if logs:
+                try:
+                    agg_ref.create(aggregate)
+                    logger.info("Agregado diário reconstruído", user_id=user_id, date=date_str)
+                except AlreadyExists:
+                    # Um log gravado em paralelo já criou o agregado (que é o mais recente)
+                    return agg_ref.get().to_dict()
+            
+            return aggregate
+            
+        except Exception as e:
+            logger.error("Erro ao obter agregado diário", 
+                        error=str(e),
+                        user_id=user_id,
+                        date=target_date.isoformat())
+            raise
+    
     async def get_logs_by_date_range(
         self,
         user_id: str,
@@ -437,9 +520,35 @@ class FirebaseService:
             # Adicionar timestamp de atualização
             updates['updated_at'] = datetime.utcnow()
             
-            # Atualizar documento
+            # Atualizar documento e ajustar o agregado do dia pela diferença
             doc_ref = self.db.collection('daily_logs').document(log_id)
-            doc_ref.update(updates)
+            affected_days = set()
+            
+            @firestore.transactional
+            def update_with_aggregate(transaction):
+                snapshot = doc_ref.get(transaction=transaction)
+                if not snapshot.exists:
+                    transaction.update(doc_ref, updates)  # Falha como o update direto
+                    return
+                
+                current = snapshot.to_dict()
+                updated = {**current, **updates}
+                affected_days.update({_aggregate_key(current), _aggregate_key(updated)})
+                if _aggregate_key(updated) == _aggregate_key(current):
+                    adjustments = [
+                        (current, combine_deltas((log_deltas(updated), 1), (log_deltas(current), -1)))
+                    ]
+                else:
+                    # Log movido para outro dia: sai de um agregado e entra no outro
+                    adjustments = [
+                        (current, combine_deltas((log_deltas(current), -1))),
+                        (updated, log_deltas(updated))
+                    ]
+                self._adjust_aggregates(transaction, adjustments)
+                transaction.update(doc_ref, updates)
+            
+            update_with_aggregate(self.db.transaction())
+            await self._invalidate_cached_dashboards(affected_days)
             
             logger.info("Log atualizado", log_id=log_id)
             return True
@@ -460,7 +569,19 @@ class FirebaseService:
         """
         try:
             doc_ref = self.db.collection('daily_logs').document(log_id)
-            doc_ref.delete()
+            affected_days = set()
+            
+            @firestore.transactional
+            def delete_with_aggregate(transaction):
+                snapshot = doc_ref.get(transaction=transaction)
+                if snapshot.exists:
+                    current = snapshot.to_dict()
+                    affected_days.add(_aggregate_key(current))
+                    self._adjust_aggregates(transaction, [(current, combine_deltas((log_deltas(current), -1)))])
+                transaction.delete(doc_ref)
+            
+            delete_with_aggregate(self.db.transaction())
+            await self._invalidate_cached_dashboards(affected_days)
             
             logger.info("Log removido", log_id=log_id)
             return True
@@ -468,4 +589,92 @@ class FirebaseService:
         except Exception as e:
             logger.error("Erro ao remover log", error=str(e), log_id=log_id)
             return False
+    
+    async def mark_presentation_inputs_changed(self, user_id: str, sections: List[str]) -> bool:
+        """
+        Marca seções da apresentação materializada do plans-service como desatualizadas
+        
+        Args:
+            user_id: ID do usuário
+            sections: Seções afetadas (ex: ["metrics"] após uma pesagem)
+            
+        Returns:
+            bool: Sucesso da operação
+        """
+        try:
+            token = uuid.uuid4().hex
+            doc_ref = self.db.collection('presentation_inputs').document(user_id)
+            doc_ref.set({section: token for section in sections}, merge=True)
+            return True
+            
+        except Exception as e:
+            logger.warning("Erro ao versionar entradas da apresentação", error=str(e), user_id=user_id)
+            return False
+    
+    async def _invalidate_cached_dashboards(self, days: set):
+        """
+        Descarta os dashboards em cache dos dias (usuário, data) cujo agregado mudou
+        
+        Edições e remoções não são aplicadas no lugar como os novos logs
+        (``refresh_cached_dashboard``): ``logs_count`` não cresce, então uma
+        atualização concorrente não poderia ser ordenada. O próximo acesso
+        recalcula o dashboard; o progresso do usuário também é descartado.
+        """
+        if self.cache_service is None:
+            return
+        for user_id in {user_id for user_id, _ in days}:
+            await self.cache_service.invalidate_progress_cache(user_id)
+        for user_id, date_str in days:
+            await self.cache_service.delete_dashboard_cache(user_id, date_str)
+    
+    def _daily_logs_query(self, user_id: str, date_str: str):
+        """Query dos logs de um usuário em uma data"""
+        return (self.db.collection('daily_logs')
+                .where('user_id', '==', user_id)
+                .where('date', '==', date_str))
+    
+    def _aggregate_ref(self, user_id: str, date_str: str) -> DocumentReference:
+        """Referência do documento agregado do dia"""
+        return self.db.collection(AGGREGATES_COLLECTION).document(aggregate_doc_id(user_id, date_str))
+    
+    def _adjust_aggregates(self, transaction, adjustments: List[tuple]):
+        """
+        Aplica incrementos aos agregados diários dentro de uma transação
+        
+        Args:
+            transaction: Transação em andamento (ainda sem escritas)
+            adjustments: Pares (log, incrementos); o log indica usuário e data
+        
+        Dias que ainda não têm agregado são ignorados: ele será calculado a
+        partir dos logs na primeira leitura.
+        """
+        # Todas as leituras antes das escritas, como a transação exige
+        pending = [
+            (self._aggregate_ref(*_aggregate_key(log_data)), deltas)
+            for log_data, deltas in adjustments
+            if deltas
+        ]
+        existing = [agg_ref.get(transaction=transaction).exists for agg_ref, _ in pending]
+        
+        for (agg_ref, deltas), exists in zip(pending, existing):
+            if exists:
+                transaction.set(agg_ref, _increments(deltas), merge=True)
+
+
+def _aggregate_key(log_data: Dict[str, Any]) -> tuple:
+    """Usuário e data (YYYY-MM-DD) do agregado de um log"""
+    log_date = log_data.get('date')
+    if isinstance(log_date, date):
+        log_date = log_date.isoformat()
+    return log_data.get('user_id'), log_date
+
 
+def _increments(deltas: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte incrementos em firestore.Increment (mapas viram campos aninhados)"""
+    payload: Dict[str, Any] = {
+        field: ({key: firestore.Increment(count) for key, count in delta.items()}
+                if field in MAP_FIELDS else firestore.Increment(delta))
+        for field, delta in deltas.items()
+    }
+    payload['updated_at'] = datetime.utcnow()
+    return payload
@@ -0,0 +1,129 @@
+"""
+Cache em memória limitado (LRU + TTL), usado como L1 do CacheService
+"""
+
+import heapq
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class MemoryCache:
+    """
+    Cache LRU com validade por entrada e limites de entradas e de bytes
+
+    Os valores são guardados serializados (o mesmo JSON gravado no Redis): o
+    tamanho de cada entrada é exato e cada leitura devolve uma cópia nova.
+    A validade usa relógio monotônico; entradas vencidas saem na leitura e,
+    a cada escrita, pelo topo de um heap de expiração, sem varrer o cache.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        # chave -> (expira_em, payload, user_id), da menos para a mais recentemente usada
+        self._entries: "OrderedDict[str, Tuple[float, str, Optional[str]]]" = OrderedDict()
+        self._expiry: List[Tuple[float, str]] = []
+        self._user_keys: Dict[str, Set[str]] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        """Payload da chave, ou None se ausente/expirada"""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() >= entry[0]:
+            self._remove(key)
+            self.stats["expirations"] += 1
+            entry = None
+
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def set(self, key: str, payload: str, ttl_seconds: float, user_id: Optional[str] = None):
+        """Armazena um payload, removendo vencidos e as entradas menos usadas além dos limites"""
+        now = time.monotonic()
+        self._purge_expired(now)
+        self._remove(key)
+
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+
+        expires_at = now + ttl_seconds
+        self._entries[key] = (expires_at, payload, user_id)
+        self.size_bytes += size
+        heapq.heappush(self._expiry, (expires_at, key))
+        if user_id:
+            self._user_keys.setdefault(user_id, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+        # Regravações deixam itens obsoletos no heap; reconstruir quando dominarem
+        if len(self._expiry) > 2 * len(self._entries) + 64:
+            self._expiry = [(entry[0], entry_key) for entry_key, entry in self._entries.items()]
+            heapq.heapify(self._expiry)
+
+    def delete(self, key: str) -> bool:
+        """Remove uma chave; True se ela existia"""
+        return self._remove(key)
+
+    def keys(self) -> List[str]:
+        """Chaves armazenadas (inclusive ainda não purgadas por expiração)"""
+        return list(self._entries)
+
+    def user_keys(self, user_id: str, prefix: Optional[str] = None) -> List[str]:
+        """Chaves registradas para um usuário, opcionalmente filtradas por prefixo"""
+        return [
+            key for key in self._user_keys.get(user_id, ())
+            if not prefix or key.startswith(prefix)
+        ]
+
+    def clear(self):
+        """Remove todas as entradas"""
+        self._entries.clear()
+        self._expiry.clear()
+        self._user_keys.clear()
+        self.size_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de acerto, evicção e ocupação"""
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes
+        }
+
+    def _purge_expired(self, now: float):
+        """Remove as entradas vencidas no topo do heap de expiração"""
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == expires_at:
+                self._remove(key)
+                self.stats["expirations"] += 1
+
+    def _remove(self, key: str) -> bool:
+        """Remove uma entrada e a tira do índice do seu usuário"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+
+        self.size_bytes -= len(entry[1])
+        user_id = entry[2]
+        if user_id and user_id in self._user_keys:
+            self._user_keys[user_id].discard(key)
+            if not self._user_keys[user_id]:
+                del self._user_keys[user_id]
+        return True
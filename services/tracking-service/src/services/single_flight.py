@@ -0,0 +1,67 @@
+"""
+Coalescência de computações concorrentes por chave (single-flight)
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class SingleFlight:
+    """
+    Garante no máximo uma computação em andamento por chave no processo
+
+    Chamadores simultâneos de ``run`` com a mesma chave aguardam a mesma
+    tarefa; ``run_in_background`` dispara a computação (se ainda não houver
+    uma) sem esperar o resultado, para revalidar entradas de cache vencidas.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"started": 0, "coalesced": 0, "background": 0, "failed": 0}
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Resultado da computação da chave, iniciando-a apenas se não houver uma em andamento"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start(key, factory)
+        else:
+            self.stats["coalesced"] += 1
+
+        # shield: o cancelamento de um chamador não interrompe a computação dos demais
+        return await asyncio.shield(task)
+
+    def run_in_background(self, key: str, factory: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Inicia a computação da chave sem aguardá-la
+
+        Returns:
+            bool: True se uma nova computação foi iniciada
+        """
+        if key in self._inflight:
+            return False
+        self._start(key, factory)
+        self.stats["background"] += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de computações iniciadas, coalescidas e em andamento"""
+        return {**self.stats, "in_flight": len(self._inflight)}
+
+    def _start(self, key: str, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Cria a tarefa da chave e a remove do registro ao terminar"""
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        self.stats["started"] += 1
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task):
+        """Libera a chave e registra falhas (inclusive de revalidações sem ninguém aguardando)"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["failed"] += 1
+            logger.warning("Computação single-flight falhou", key=key, error=str(task.exception()))
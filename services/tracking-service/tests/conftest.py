@@ -0,0 +1,144 @@
+"""
+Configuração global para testes do Tracking Service
+"""
+
+import fnmatch
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.cache_service import REPLACE_DASHBOARD_SCRIPT, CacheService
+
+
+class FakeClock:
+    """Relógio monotônico controlado pelo teste"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FakePipeline:
+    """Pipeline que executa os comandos enfileirados em ordem"""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def enqueue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return enqueue
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Redis assíncrono em memória com os comandos usados pelo CacheService"""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.ttls = {}
+        self.published = []
+        self.fail = set()
+
+    def _check(self, command: str):
+        if command in self.fail:
+            raise ConnectionError(f"{command} indisponível")
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def get(self, key):
+        self._check("get")
+        return self.values.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.values[key] = value
+        self.ttls[key] = ttl
+        return True
+
+    async def exists(self, key):
+        return int(key in self.values or key in self.sets)
+
+    async def delete(self, *keys):
+        return await self.unlink(*keys)
+
+    async def unlink(self, *keys):
+        count = 0
+        for key in keys:
+            count += int(self.values.pop(key, None) is not None or self.sets.pop(key, None) is not None)
+        return count
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+        return len(members)
+
+    async def srem(self, key, *members):
+        current = self.sets.get(key, set())
+        removed = len(current.intersection(members))
+        current.difference_update(members)
+        return removed
+
+    async def smembers(self, key):
+        self._check("smembers")
+        return set(self.sets.get(key, set()))
+
+    async def expire(self, key, ttl):
+        self.ttls[key] = ttl
+        return True
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        """Scripts Lua do CacheService, reproduzidos em Python"""
+        assert script == REPLACE_DASHBOARD_SCRIPT
+        (key,), (payload, logs_count, ttl, channel, message) = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        current = self.values.get(key)
+        aggregate = json.loads(current).get("daily_aggregate") if current else None
+        if not isinstance(aggregate, dict) or (aggregate.get("logs_count") or 0) >= int(logs_count):
+            return 0
+        await self.setex(key, int(ttl), payload)
+        await self.publish(channel, message)
+        return 1
+
+    async def scan_iter(self, match="*", count=None):
+        self._check("scan_iter")
+        for key in list(self.values):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    """Substitui time.monotonic (os testes não devem aguardar timers do asyncio)"""
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def redis_client() -> FakeRedis:
+    return FakeRedis()
+
+
+@pytest.fixture
+def cache_service(redis_client) -> CacheService:
+    """CacheService com Redis (em memória), sem o listener de invalidações"""
+    service = CacheService()
+    service.use_redis = True
+    service.redis_client = redis_client
+    return service
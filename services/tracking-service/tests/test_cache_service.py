@@ -0,0 +1,118 @@
+"""
+Testes para a remoção das chaves de um usuário (índice user_keys e eventos do plans-service)
+"""
+
+import asyncio
+import json
+
+
+def populate(cache_service):
+    async def fill():
+        await cache_service.set_dashboard_cache("ana", "2026-01-05", {"calories": 1800})
+        await cache_service.set_dashboard_cache("ana", "2026-01-06", {"calories": 1900})
+        await cache_service.set_progress_cache("ana", 30, {"weight": 70})
+        await cache_service.set_progress_cache("bruno", 30, {"weight": 82})
+        await cache_service.set("summary:ana:2026-01-05", {"logs": 3})
+    asyncio.run(fill())
+
+
+class TestClearUserKeys:
+    """Testes para CacheService.clear_user_keys"""
+
+    def test_set_registers_keys_for_the_user(self, cache_service, redis_client):
+        """set() com user_id registra a chave no conjunto do usuário no Redis"""
+        populate(cache_service)
+
+        assert redis_client.sets["user_keys:ana"] == {
+            "dashboard:ana:2026-01-05", "dashboard:ana:2026-01-06", "progress:ana:30"
+        }
+        assert redis_client.ttls["user_keys:ana"] >= cache_service.user_keys_ttl
+        assert redis_client.sets["user_keys:bruno"] == {"progress:bruno:30"}
+
+    def test_prefix_removes_only_matching_keys(self, cache_service, redis_client):
+        """Com prefixo, remove só as chaves do prefixo e as tira do conjunto"""
+        populate(cache_service)
+        redis_client.fail.add("scan_iter")
+
+        count = asyncio.run(cache_service.clear_user_keys("ana", prefix="progress:"))
+
+        assert count == 1
+        assert "progress:ana:30" not in redis_client.values
+        assert "progress:ana:30" not in cache_service.memory.keys()
+        assert "dashboard:ana:2026-01-05" in redis_client.values
+        assert "progress:bruno:30" in redis_client.values
+        assert redis_client.sets["user_keys:ana"] == {"dashboard:ana:2026-01-05", "dashboard:ana:2026-01-06"}
+
+        channel, message = redis_client.published[-1]
+        assert channel == cache_service.channel
+        assert json.loads(message) == {"origin": cache_service.instance_id, "user_id": "ana", "prefix": "progress:"}
+
+    def test_without_prefix_removes_all_user_keys(self, cache_service, redis_client):
+        """Sem prefixo, remove todas as chaves registradas e o próprio conjunto"""
+        populate(cache_service)
+        redis_client.fail.add("scan_iter")
+
+        count = asyncio.run(cache_service.invalidate_user_cache("ana"))
+
+        assert count == 3
+        assert "user_keys:ana" not in redis_client.sets
+        assert not any(key.startswith(("dashboard:ana", "progress:ana")) for key in redis_client.values)
+        assert "summary:ana:2026-01-05" in redis_client.values
+        assert "progress:bruno:30" in redis_client.values
+        assert cache_service.memory.user_keys("ana") == []
+
+    def test_unreadable_index_falls_back_to_pattern_scan(self, cache_service, redis_client):
+        """Se o conjunto não puder ser lido, recorre à varredura por padrão"""
+        populate(cache_service)
+        redis_client.fail.add("smembers")
+        patterns = []
+        clear_pattern = cache_service.clear_pattern
+
+        async def recording_clear_pattern(pattern):
+            patterns.append(pattern)
+            return await clear_pattern(pattern)
+
+        cache_service.clear_pattern = recording_clear_pattern
+
+        count = asyncio.run(cache_service.invalidate_dashboard_cache("ana"))
+
+        assert patterns == ["dashboard:ana:*"]
+        assert count == 2
+        assert not any(key.startswith("dashboard:ana") for key in redis_client.values)
+        assert "progress:ana:30" in redis_client.values
+
+    def test_memory_only_uses_the_local_index(self, cache_service):
+        """Sem Redis, remove as chaves do índice local do usuário"""
+        cache_service.use_redis = False
+        cache_service.redis_client = None
+        populate(cache_service)
+
+        count = asyncio.run(cache_service.invalidate_progress_cache("ana"))
+
+        assert count == 1
+        assert sorted(cache_service.memory.keys()) == [
+            "dashboard:ana:2026-01-05", "dashboard:ana:2026-01-06", "progress:bruno:30", "summary:ana:2026-01-05"
+        ]
+
+
+class TestPlanEvents:
+    """Testes para as invalidações publicadas pelo plans-service"""
+
+    def test_user_event_drops_all_dashboards_of_the_user(self, cache_service, redis_client):
+        populate(cache_service)
+
+        asyncio.run(cache_service._handle_plan_event("ana"))
+
+        assert not any(key.startswith("dashboard:ana") for key in redis_client.values)
+        assert "progress:ana:30" in redis_client.values
+
+    def test_day_event_drops_only_that_dashboard(self, cache_service, redis_client):
+        """Refeição regenerada: só o dashboard do dia muda"""
+        populate(cache_service)
+        event = json.dumps({"user_id": "ana", "kind": "diet", "date": "2026-01-05"})
+
+        asyncio.run(cache_service._handle_plan_event(event))
+
+        assert "dashboard:ana:2026-01-05" not in redis_client.values
+        assert "dashboard:ana:2026-01-05" not in cache_service.memory.keys()
+        assert "dashboard:ana:2026-01-06" in redis_client.values
@@ -0,0 +1,238 @@
+"""
+Testes para os agregados diários mantidos na gravação dos logs
+"""
+
+import pytest
+
+from services.daily_aggregates import (
+    COUNTER_FIELDS, MAP_FIELDS, aggregate_logs, apply_deltas, combine_deltas, log_deltas
+)
+
+USER_ID = "user-1"
+DAY = "2026-01-05"
+NEXT_DAY = "2026-01-06"
+
+
+def meal(meal_type, calories, protein=10.0, carbs=20.0, fat=5.0, day=DAY):
+    return {
+        "user_id": USER_ID, "date": day, "log_type": "meal_checkin",
+        "value": {
+            "meal_type": meal_type,
+            "nutritional_summary": {
+                "total_calories": calories, "total_protein": protein,
+                "total_carbs": carbs, "total_fat": fat
+            }
+        }
+    }
+
+
+def water(amount_ml, day=DAY):
+    return {"user_id": USER_ID, "date": day, "log_type": "water_intake", "value": {"amount_ml": amount_ml}}
+
+
+def workout_set(exercise_id, weight_kg, reps_done, day=DAY):
+    return {
+        "user_id": USER_ID, "date": day, "log_type": "set",
+        "value": {"exercise_id": exercise_id, "weight_kg": weight_kg, "reps_done": reps_done}
+    }
+
+
+def session(minutes, calories, exercises, day=DAY):
+    return {
+        "user_id": USER_ID, "date": day, "log_type": "workout_session",
+        "value": {"duration_minutes": minutes, "calories_burned": calories, "exercises_performed": exercises}
+    }
+
+
+def legacy_totals(logs):
+    """Totais como o dashboard calculava antes, somando os logs do dia um a um"""
+    totals = {
+        "calories_consumed": 0.0, "protein_consumed": 0.0, "carbs_consumed": 0.0,
+        "fat_consumed": 0.0, "water_consumed_ml": 0.0, "workout_minutes": 0, "calories_burned": 0.0
+    }
+    meal_types = set()
+    exercise_ids = set()
+    workout_completed = False
+
+    for log in logs:
+        value = log.get("value", {})
+        if log.get("log_type") == "meal_checkin":
+            nutritional = value.get("nutritional_summary", {})
+            totals["calories_consumed"] += nutritional.get("total_calories", 0)
+            totals["protein_consumed"] += nutritional.get("total_protein", 0)
+            totals["carbs_consumed"] += nutritional.get("total_carbs", 0)
+            totals["fat_consumed"] += nutritional.get("total_fat", 0)
+            if value.get("meal_type"):
+                meal_types.add(value["meal_type"])
+        elif log.get("log_type") == "water_intake":
+            totals["water_consumed_ml"] += value.get("amount_ml", 0)
+        elif log.get("log_type") == "workout_session":
+            workout_completed = True
+            totals["workout_minutes"] += value.get("duration_minutes", 0)
+            totals["calories_burned"] += value.get("calories_burned", 0)
+            exercise_ids.update(value.get("exercises_performed", []))
+        elif log.get("log_type") == "set":
+            if value.get("exercise_id"):
+                exercise_ids.add(value["exercise_id"])
+
+    totals["meals_completed"] = len(meal_types)
+    totals["exercises_completed"] = len(exercise_ids)
+    totals["workout_completed"] = workout_completed
+    totals["logs_count"] = len(logs)
+    return totals
+
+
+def aggregate_totals(aggregate):
+    """Os mesmos totais lidos do documento agregado"""
+    totals = {field: aggregate[field] for field in (
+        "calories_consumed", "protein_consumed", "carbs_consumed", "fat_consumed",
+        "water_consumed_ml", "workout_minutes", "calories_burned", "logs_count"
+    )}
+    totals["meals_completed"] = sum(1 for count in aggregate["meal_types"].values() if count > 0)
+    totals["exercises_completed"] = sum(1 for count in aggregate["exercises"].values() if count > 0)
+    totals["workout_completed"] = aggregate["workout_sessions"] > 0
+    return totals
+
+
+def assert_same_aggregate(actual, expected):
+    """Compara agregados, ignorando contadores de mapas zerados (o Increment os mantém)"""
+    for field in COUNTER_FIELDS:
+        assert actual.get(field, 0) == pytest.approx(expected.get(field, 0)), field
+    for field in MAP_FIELDS:
+        counts = {key: count for key, count in (actual.get(field) or {}).items() if count}
+        assert counts == expected.get(field, {}), field
+
+
+@pytest.fixture
+def day_logs():
+    return [
+        meal("cafe_manha", 420.5, protein=22.0),
+        meal("almoco", 710.0, protein=48.5, carbs=80.0, fat=21.0),
+        meal("almoco", 120.0),
+        water(500),
+        water(250),
+        workout_set("supino", 60, 10),
+        workout_set("supino", 62.5, 8),
+        workout_set("agachamento", 80, 6),
+        session(55, 410.0, ["supino", "remada", "supino"])
+    ]
+
+
+class TestLogDeltas:
+    """Testes para log_deltas"""
+
+    def test_meal_checkin(self):
+        """Check-in soma calorias, macros e o tipo da refeição"""
+        deltas = log_deltas(meal("jantar", 600.0, protein=40.0, carbs=55.0, fat=18.0))
+
+        assert deltas == {
+            "logs_count": 1, "calories_consumed": 600.0, "protein_consumed": 40.0,
+            "carbs_consumed": 55.0, "fat_consumed": 18.0, "meal_checkins": 1,
+            "meal_types": {"jantar": 1}
+        }
+
+    def test_set(self):
+        """Série soma volume (peso x repetições) e o exercício"""
+        assert log_deltas(workout_set("supino", 62.5, 8)) == {
+            "logs_count": 1, "sets_logged": 1, "volume_kg": 500.0, "exercises": {"supino": 1}
+        }
+
+    def test_session(self):
+        """Sessão soma duração, calorias e cada exercício realizado"""
+        assert log_deltas(session(45, 320.0, ["supino", "remada", "supino"])) == {
+            "logs_count": 1, "workout_sessions": 1, "workout_minutes": 45,
+            "calories_burned": 320.0, "exercises": {"supino": 2, "remada": 1}
+        }
+
+    def test_water_and_missing_values(self):
+        """Água soma o volume; valores ausentes ou nulos contam como zero"""
+        assert log_deltas(water(300)) == {"logs_count": 1, "water_consumed_ml": 300}
+        assert log_deltas({"log_type": "water_intake", "value": None}) == {"logs_count": 1, "water_consumed_ml": 0}
+        assert log_deltas({"log_type": "weight"}) == {"logs_count": 1}
+
+
+class TestCombineAndApply:
+    """Testes para combine_deltas / apply_deltas"""
+
+    def test_edit_applies_only_the_difference(self, day_logs):
+        """Editar um log aplica a diferença; o agregado fica igual ao recalculado"""
+        aggregate = aggregate_logs(USER_ID, DAY, day_logs)
+        current = day_logs[1]
+        updated = meal("jantar", 650.0, protein=48.5, carbs=80.0, fat=21.0)
+
+        deltas = combine_deltas((log_deltas(updated), 1), (log_deltas(current), -1))
+
+        assert "logs_count" not in deltas and "meal_checkins" not in deltas
+        assert deltas["calories_consumed"] == pytest.approx(-60.0)
+        assert deltas["meal_types"] == {"almoco": -1, "jantar": 1}
+        assert_same_aggregate(
+            apply_deltas(aggregate, deltas),
+            aggregate_logs(USER_ID, DAY, [updated if log is current else log for log in day_logs])
+        )
+
+    def test_identical_deltas_cancel_out(self):
+        """Incrementos que se anulam não geram escrita"""
+        deltas = log_deltas(session(30, 200.0, ["remada"]))
+        assert combine_deltas((deltas, 1), (deltas, -1)) == {}
+
+    def test_delete_removes_the_log(self, day_logs):
+        """Remover um log subtrai seus incrementos"""
+        aggregate = aggregate_logs(USER_ID, DAY, day_logs)
+        removed = day_logs[5]
+
+        updated = apply_deltas(aggregate, combine_deltas((log_deltas(removed), -1)))
+
+        assert_same_aggregate(updated, aggregate_logs(USER_ID, DAY, [log for log in day_logs if log is not removed]))
+
+    def test_log_moved_between_days(self, day_logs):
+        """Um log movido de dia sai de um agregado e entra no outro"""
+        next_day_logs = [water(400, day=NEXT_DAY)]
+        aggregates = {
+            DAY: aggregate_logs(USER_ID, DAY, day_logs),
+            NEXT_DAY: aggregate_logs(USER_ID, NEXT_DAY, next_day_logs)
+        }
+        current = day_logs[0]
+        moved = {**current, "date": NEXT_DAY}
+
+        # Mesmos ajustes que update_log aplica quando a data do log muda
+        adjustments = [
+            (current, combine_deltas((log_deltas(current), -1))),
+            (moved, log_deltas(moved))
+        ]
+        for log, deltas in adjustments:
+            aggregates[log["date"]] = apply_deltas(aggregates[log["date"]], deltas)
+
+        assert_same_aggregate(aggregates[DAY], aggregate_logs(USER_ID, DAY, day_logs[1:]))
+        assert_same_aggregate(aggregates[NEXT_DAY], aggregate_logs(USER_ID, NEXT_DAY, next_day_logs + [moved]))
+        assert aggregates[DAY]["meal_types"]["cafe_manha"] == 0
+
+    def test_incremental_writes_match_the_backfill(self, day_logs):
+        """Gravar log a log (Increment) chega ao mesmo documento do backfill"""
+        aggregate = aggregate_logs(USER_ID, DAY, [])
+        for log in day_logs:
+            aggregate = apply_deltas(aggregate, log_deltas(log))
+
+        assert_same_aggregate(aggregate, aggregate_logs(USER_ID, DAY, day_logs))
+
+
+class TestAggregateLogs:
+    """Testes para aggregate_logs"""
+
+    def test_matches_legacy_per_log_summation(self, day_logs):
+        """Os totais do agregado são os que o dashboard somava a partir dos logs"""
+        aggregate = aggregate_logs(USER_ID, DAY, day_logs)
+        expected = legacy_totals(day_logs)
+
+        actual = aggregate_totals(aggregate)
+        assert actual.keys() == expected.keys()
+        for field, value in expected.items():
+            assert actual[field] == pytest.approx(value), field
+
+    def test_empty_day(self):
+        """Dia sem logs tem todos os contadores zerados"""
+        aggregate = aggregate_logs(USER_ID, DAY, [])
+
+        assert aggregate["user_id"] == USER_ID and aggregate["date"] == DAY
+        assert all(aggregate[field] == 0 for field in COUNTER_FIELDS)
+        assert all(aggregate[field] == {} for field in MAP_FIELDS)
+        assert aggregate_totals(aggregate) == legacy_totals([])
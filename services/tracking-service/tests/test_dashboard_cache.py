@@ -0,0 +1,302 @@
+"""
+Testes para o dashboard em cache atualizado pelos logs do dia (write-through)
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from models.tracking import DailyAggregate, DashboardResponse, EnergyBalance, NutritionalSummary, WorkoutSummary
+from services import firebase_service as firebase_module
+from services.calorie_service import CalorieService
+from services.dashboard_cache import aggregate_unchanged, refresh_cached_dashboard
+from services.firebase_service import FirebaseService
+
+USER_ID = "user-1"
+DAY = "2026-01-05"
+KEY = f"dashboard:{USER_ID}:{DAY}"
+
+
+def aggregate(logs_count, **totals):
+    return DailyAggregate(user_id=USER_ID, date=DAY, logs_count=logs_count, **totals)
+
+
+def dashboard(daily_aggregate: DailyAggregate, age_seconds: float = 0):
+    """Dashboard no formato gravado por get_dashboard"""
+    response = DashboardResponse(
+        user_id=USER_ID,
+        date=date.fromisoformat(DAY),
+        nutritional_summary=NutritionalSummary(
+            calories_target=2000, calories_consumed=daily_aggregate.calories_consumed, total_meals=5
+        ),
+        workout_summary=WorkoutSummary(workout_planned=True, total_exercises=4),
+        energy_balance=EnergyBalance(bmr=1600, activity_calories=400, calories_out=2000),
+        daily_streak=3
+    )
+    return {
+        **response.dict(),
+        "daily_aggregate": daily_aggregate.dict(),
+        "cached_at": (datetime.utcnow() - timedelta(seconds=age_seconds)).isoformat()
+    }
+
+
+@pytest.fixture
+def calorie_service() -> CalorieService:
+    return CalorieService()
+
+
+@pytest.fixture
+def memory_cache_service(cache_service):
+    """CacheService sem Redis (o nível em memória é o próprio cache)"""
+    cache_service.use_redis = False
+    cache_service.redis_client = None
+    return cache_service
+
+
+def store(cache_service, daily_aggregate, age_seconds=0):
+    asyncio.run(cache_service.set_dashboard_cache(USER_ID, DAY, dashboard(daily_aggregate, age_seconds)))
+
+
+def cached(cache_service):
+    return asyncio.run(cache_service.get_dashboard_cache(USER_ID, DAY))
+
+
+class TestRefreshCachedDashboard:
+    """Testes para refresh_cached_dashboard"""
+
+    def test_rebuilds_nutrition_workout_and_energy(self, cache_service, calorie_service):
+        """Consumo, treino e balanço energético passam a refletir o novo agregado; metas e streak ficam"""
+        store(cache_service, aggregate(2, calories_consumed=500, meal_checkins=1, meal_types={"almoco": 1}))
+        latest = aggregate(
+            3, calories_consumed=800, protein_consumed=60, meal_checkins=1, meal_types={"almoco": 1},
+            workout_sessions=1, workout_minutes=45, calories_burned=300, exercises={"supino": 1}
+        )
+
+        assert asyncio.run(refresh_cached_dashboard(cache_service, calorie_service, latest.dict()))
+
+        entry = cached(cache_service)
+        assert entry["nutritional_summary"]["calories_consumed"] == 800
+        assert entry["nutritional_summary"]["calories_remaining"] == 1200
+        assert entry["nutritional_summary"]["calories_target"] == 2000
+        assert entry["workout_summary"]["workout_completed"] is True
+        assert entry["workout_summary"]["duration_actual_minutes"] == 45
+        assert entry["workout_summary"]["exercises_completed"] == 1
+        assert entry["energy_balance"]["calories_in"] == 800
+        assert entry["energy_balance"]["calories_out"] == 1600 + 400 + 300
+        assert entry["energy_balance"]["net_balance"] == 800 - 2300
+        assert entry["energy_balance"]["balance_status"] == calorie_service._determine_balance_status(-1500)
+        assert entry["daily_streak"] == 3
+        assert entry["daily_aggregate"]["logs_count"] == 3
+
+    def test_replayed_log_is_skipped(self, cache_service, calorie_service):
+        """Agregado com logs_count igual ou menor que o da entrada não a altera"""
+        store(cache_service, aggregate(3, calories_consumed=800, meal_checkins=1))
+        before = cached(cache_service)
+
+        for logs_count in (3, 2):
+            replay = aggregate(logs_count, calories_consumed=100, meal_checkins=1)
+            assert not asyncio.run(refresh_cached_dashboard(cache_service, calorie_service, replay.dict()))
+
+        assert cached(cache_service) == before
+
+    def test_first_meal_checkin_drops_the_entry(self, cache_service, calorie_service):
+        """O primeiro check-in de refeição do dia muda o streak: a entrada é descartada"""
+        store(cache_service, aggregate(1, water_consumed_ml=500))
+        latest = aggregate(2, water_consumed_ml=500, calories_consumed=400, meal_checkins=1)
+
+        assert not asyncio.run(refresh_cached_dashboard(cache_service, calorie_service, latest.dict()))
+        assert cached(cache_service) is None
+
+    def test_remaining_ttl_is_kept(self, cache_service, redis_client, calorie_service):
+        """A entrada atualizada vence quando a original venceria"""
+        store(cache_service, aggregate(2, meal_checkins=1), age_seconds=600)
+        full_ttl = cache_service.dashboard_ttl + cache_service.dashboard_stale_ttl
+        assert redis_client.ttls[KEY] == full_ttl
+
+        asyncio.run(refresh_cached_dashboard(cache_service, calorie_service, aggregate(3, meal_checkins=1).dict()))
+
+        assert full_ttl - 601 <= redis_client.ttls[KEY] <= full_ttl - 600
+
+    def test_expired_entry_is_dropped(self, cache_service, calorie_service):
+        """Entrada além da validade não é atualizada"""
+        age = cache_service.dashboard_ttl + cache_service.dashboard_stale_ttl + 1
+        store(cache_service, aggregate(2, meal_checkins=1), age_seconds=age)
+
+        assert not asyncio.run(
+            refresh_cached_dashboard(cache_service, calorie_service, aggregate(3, meal_checkins=1).dict())
+        )
+        assert cached(cache_service) is None
+
+    def test_concurrent_newer_update_is_not_overwritten(self, cache_service, calorie_service):
+        """Atualização com um log posterior gravada entre a leitura e a escrita prevalece"""
+        store(cache_service, aggregate(2, calories_consumed=500, meal_checkins=1))
+        read = cache_service.get_dashboard_cache
+        newer = aggregate(4, calories_consumed=1100, meal_checkins=1)
+
+        async def read_then_race(user_id, date_str):
+            entry = await read(user_id, date_str)
+            cache_service.get_dashboard_cache = read
+            await refresh_cached_dashboard(cache_service, calorie_service, newer.dict())
+            return entry
+
+        cache_service.get_dashboard_cache = read_then_race
+        older = aggregate(3, calories_consumed=800, meal_checkins=1)
+
+        assert not asyncio.run(refresh_cached_dashboard(cache_service, calorie_service, older.dict()))
+        entry = cached(cache_service)
+        assert entry["daily_aggregate"]["logs_count"] == 4
+        assert entry["nutritional_summary"]["calories_consumed"] == 1100
+
+
+class TestReplaceDashboardCache:
+    """Testes para CacheService.replace_dashboard_cache (comparação de logs_count atômica)"""
+
+    @pytest.mark.parametrize("mode", ["redis", "memory"])
+    def test_replaces_only_older_existing_entries(self, cache_service, memory_cache_service, mode):
+        service = cache_service if mode == "redis" else memory_cache_service
+        replacement = dashboard(aggregate(5))
+
+        async def scenario():
+            missing = await service.replace_dashboard_cache(USER_ID, DAY, replacement, 5, 60)
+            await service.set_dashboard_cache(USER_ID, DAY, dashboard(aggregate(5)))
+            same = await service.replace_dashboard_cache(USER_ID, DAY, dashboard(aggregate(5)), 5, 60)
+            newer = await service.replace_dashboard_cache(USER_ID, DAY, dashboard(aggregate(6)), 6, 60)
+            return missing, same, newer, await service.get_dashboard_cache(USER_ID, DAY)
+
+        missing, same, newer, entry = asyncio.run(scenario())
+
+        assert (missing, same, newer) == (False, False, True)
+        assert entry["daily_aggregate"]["logs_count"] == 6
+
+    def test_other_instances_are_notified(self, cache_service, redis_client):
+        """A substituição publica a invalidação da chave, como as demais escritas"""
+        store(cache_service, aggregate(1))
+        redis_client.published.clear()
+
+        asyncio.run(cache_service.replace_dashboard_cache(USER_ID, DAY, dashboard(aggregate(2)), 2, 60))
+
+        assert len(redis_client.published) == 1
+        assert KEY in redis_client.published[0][1]
+
+
+class FakeFirebase:
+    """FirebaseService mínimo para aggregate_unchanged"""
+
+    def __init__(self, latest=None, error=None):
+        self.latest = latest
+        self.error = error
+
+    async def get_daily_aggregate(self, user_id, target_date):
+        if self.error:
+            raise self.error
+        return self.latest
+
+
+class TestAggregateUnchanged:
+    """Testes para aggregate_unchanged (dashboard calculado só é guardado se o agregado não mudou)"""
+
+    def test_unchanged(self):
+        used = aggregate(2, calories_consumed=500)
+        assert asyncio.run(aggregate_unchanged(FakeFirebase(used.dict()), date.fromisoformat(DAY), used))
+
+    def test_log_written_during_the_computation(self):
+        used = aggregate(2, calories_consumed=500)
+        latest = aggregate(3, calories_consumed=700)
+        assert not asyncio.run(aggregate_unchanged(FakeFirebase(latest.dict()), date.fromisoformat(DAY), used))
+
+    def test_deleted_log_is_detected(self):
+        """Exclusões diminuem o agregado: a comparação não é só por logs_count crescente"""
+        used = aggregate(2, calories_consumed=500)
+        latest = aggregate(1, calories_consumed=200)
+        assert not asyncio.run(aggregate_unchanged(FakeFirebase(latest.dict()), date.fromisoformat(DAY), used))
+
+    def test_read_error_keeps_the_dashboard(self):
+        used = aggregate(2)
+        firebase = FakeFirebase(error=ConnectionError("firestore indisponível"))
+        assert asyncio.run(aggregate_unchanged(firebase, date.fromisoformat(DAY), used))
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeDocumentRef:
+    def __init__(self, db, collection, doc_id):
+        self.db, self.collection, self.doc_id = db, collection, doc_id
+
+    def get(self, transaction=None):
+        return FakeSnapshot(self.db.docs.get((self.collection, self.doc_id)))
+
+
+class FakeTransaction:
+    def __init__(self, db):
+        self.db = db
+
+    def update(self, ref, data):
+        self.db.docs[(ref.collection, ref.doc_id)].update(data)
+
+    def delete(self, ref):
+        self.db.docs.pop((ref.collection, ref.doc_id), None)
+
+    def set(self, ref, data, merge=False):
+        pass
+
+
+class FakeFirestore:
+    """Logs por ID; os agregados não existem (os ajustes são ignorados)"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def collection(self, name):
+        db = self
+
+        class Collection:
+            def document(self, doc_id):
+                return FakeDocumentRef(db, name, doc_id)
+        return Collection()
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+
+class TestLogEditsInvalidateTheDashboard:
+    """Testes para FirebaseService.update_log / delete_log com o dashboard em cache"""
+
+    @pytest.fixture
+    def firebase_service(self, cache_service, monkeypatch):
+        monkeypatch.setattr(firebase_module.firestore, "transactional", lambda function: function)
+        service = FirebaseService(cache_service=cache_service)
+        service.db = FakeFirestore({
+            ("daily_logs", "log-1"): {
+                "user_id": USER_ID, "date": DAY, "log_type": "water_intake", "value": {"amount_ml": 300}
+            }
+        })
+        return service
+
+    def test_update_drops_the_cached_dashboards_of_both_days(self, firebase_service, cache_service):
+        next_day = "2026-01-06"
+        store(cache_service, aggregate(1, water_consumed_ml=300))
+        asyncio.run(cache_service.set_dashboard_cache(USER_ID, next_day, dashboard(aggregate(0))))
+
+        assert asyncio.run(firebase_service.update_log("log-1", {"date": next_day}))
+
+        assert cached(cache_service) is None
+        assert asyncio.run(cache_service.get_dashboard_cache(USER_ID, next_day)) is None
+
+    def test_delete_drops_the_cached_dashboard(self, firebase_service, cache_service):
+        store(cache_service, aggregate(1, water_consumed_ml=300))
+
+        assert asyncio.run(firebase_service.delete_log("log-1"))
+
+        assert cached(cache_service) is None
+        assert firebase_service.db.docs == {}
@@ -0,0 +1,100 @@
+"""
+Testes para o cache em memória (L1) com limites de entradas/bytes e validade
+"""
+
+from services.memory_cache import MemoryCache
+
+
+class TestMemoryCache:
+    """Testes para MemoryCache"""
+
+    def test_evicts_least_recently_used_by_count(self, clock):
+        """Acima de max_entries sai a entrada usada há mais tempo"""
+        cache = MemoryCache(max_entries=3, max_bytes=1024)
+        for key in ("a", "b", "c"):
+            cache.set(key, key * 4, 60)
+
+        assert cache.get("a") == "aaaa"
+        cache.set("d", "dddd", 60)
+
+        assert cache.keys() == ["c", "a", "d"]
+        assert cache.get("b") is None
+        assert cache.stats["evictions"] == 1
+
+    def test_evicts_by_bytes(self, clock):
+        """O total de bytes é mantido abaixo de max_bytes; payload maior que o limite não é guardado"""
+        cache = MemoryCache(max_entries=100, max_bytes=10)
+        cache.set("a", "x" * 4, 60)
+        cache.set("b", "y" * 4, 60)
+        cache.set("c", "z" * 4, 60)
+
+        assert cache.keys() == ["b", "c"]
+        assert cache.size_bytes == 8
+
+        cache.set("b", "w" * 2, 60)
+        assert cache.size_bytes == 6
+
+        cache.set("big", "x" * 11, 60)
+        assert cache.get("big") is None
+        assert cache.keys() == ["c", "b"]
+
+    def test_expired_entry_is_dropped_on_read(self, clock):
+        """Entrada vencida não é retornada e sai do cache na leitura"""
+        cache = MemoryCache(max_entries=10, max_bytes=1024)
+        cache.set("a", "1", 30)
+
+        clock.now += 29
+        assert cache.get("a") == "1"
+        clock.now += 1
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert cache.stats["expirations"] == 1
+
+    def test_expired_entries_are_purged_through_the_heap(self, clock):
+        """Uma escrita remove as entradas vencidas do topo do heap, sem tocar nas válidas"""
+        cache = MemoryCache(max_entries=10, max_bytes=1024)
+        cache.set("short", "1", 10, user_id="ana")
+        cache.set("long", "2", 100, user_id="ana")
+        cache.set("short", "3", 50)  # regravação: o item antigo do heap fica obsoleto
+
+        clock.now += 20
+        cache.set("other", "4", 10)
+        assert sorted(cache.keys()) == ["long", "other", "short"]
+
+        clock.now += 40
+        cache.set("new", "5", 10)
+        assert sorted(cache.keys()) == ["long", "new"]
+        assert cache.stats["expirations"] == 2
+        assert cache.size_bytes == 2
+
+    def test_stale_heap_items_are_compacted(self, clock):
+        """Regravações sucessivas não fazem o heap crescer sem limite"""
+        cache = MemoryCache(max_entries=10, max_bytes=1024)
+        for index in range(500):
+            cache.set("a", str(index), 60)
+
+        assert len(cache._expiry) <= 2 * len(cache) + 65
+
+    def test_user_index_follows_deletes_and_expiration(self, clock):
+        """O índice por usuário perde as chaves removidas, vencidas ou despejadas"""
+        cache = MemoryCache(max_entries=3, max_bytes=1024)
+        cache.set("dashboard:ana:1", "1", 10, user_id="ana")
+        cache.set("progress:ana:30", "2", 100, user_id="ana")
+        cache.set("progress:bruno:30", "3", 100, user_id="bruno")
+
+        assert sorted(cache.user_keys("ana")) == ["dashboard:ana:1", "progress:ana:30"]
+        assert cache.user_keys("ana", prefix="progress:") == ["progress:ana:30"]
+
+        clock.now += 10
+        assert cache.get("dashboard:ana:1") is None
+        assert cache.user_keys("ana") == ["progress:ana:30"]
+
+        assert cache.delete("progress:ana:30")
+        assert not cache.delete("progress:ana:30")
+        assert cache.user_keys("ana") == []
+        assert "ana" not in cache._user_keys
+
+        for index in range(3):
+            cache.set(f"summary:{index}", "x", 100)
+        assert cache.user_keys("bruno") == []
+        assert cache._user_keys == {}
@@ -0,0 +1,122 @@
+"""
+Testes para a coalescência de computações por chave (single-flight)
+"""
+
+import asyncio
+
+from services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Testes para SingleFlight"""
+
+    def test_concurrent_callers_share_one_computation(self):
+        """Chamadas simultâneas da mesma chave executam a computação uma vez"""
+        flights = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append("dashboard")
+            await asyncio.sleep(0.01)
+            return {"calories": 1800}
+
+        async def scenario():
+            results = await asyncio.gather(*(flights.run("ana:2026-01-05", compute) for _ in range(5)))
+            other = await flights.run("bruno:2026-01-05", compute)
+            return results, other
+
+        results, other = asyncio.run(scenario())
+
+        assert calls == ["dashboard", "dashboard"]
+        assert all(result == {"calories": 1800} for result in results)
+        assert other == {"calories": 1800}
+        assert flights.get_stats() == {"started": 2, "coalesced": 4, "background": 0, "failed": 0, "in_flight": 0}
+
+    def test_cancelled_caller_does_not_cancel_the_shared_task(self):
+        """Cancelar um chamador não interrompe a computação aguardada pelos demais"""
+        flights = SingleFlight()
+
+        async def scenario():
+            gate = asyncio.Event()
+
+            async def compute():
+                await gate.wait()
+                return "pronto"
+
+            first = asyncio.create_task(flights.run("key", compute))
+            second = asyncio.create_task(flights.run("key", compute))
+            await asyncio.sleep(0)
+
+            first.cancel()
+            await asyncio.sleep(0)
+            gate.set()
+            return first, await second
+
+        first, result = asyncio.run(scenario())
+
+        assert first.cancelled()
+        assert result == "pronto"
+        assert flights.stats["started"] == 1
+        assert flights.get_stats()["in_flight"] == 0
+
+    def test_errors_reach_every_caller_and_release_the_key(self):
+        """Uma falha chega a todos os chamadores e a chave pode ser computada de novo"""
+        flights = SingleFlight()
+        attempts = []
+
+        async def compute():
+            attempts.append(1)
+            await asyncio.sleep(0)
+            if len(attempts) == 1:
+                raise RuntimeError("serviço indisponível")
+            return "ok"
+
+        async def scenario():
+            results = await asyncio.gather(
+                flights.run("key", compute), flights.run("key", compute), return_exceptions=True
+            )
+            return results, await flights.run("key", compute)
+
+        results, retry = asyncio.run(scenario())
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert retry == "ok"
+        assert flights.stats["failed"] == 1
+
+    def test_background_run_is_deduplicated_and_released_on_failure(self):
+        """Revalidações em segundo plano não se acumulam e uma falha libera a chave"""
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("falhou")
+
+        async def scenario():
+            started = [flights.run_in_background("key", failing) for _ in range(3)]
+            in_flight = flights.get_stats()["in_flight"]
+            await asyncio.sleep(0.01)
+            return started, in_flight
+
+        started, in_flight = asyncio.run(scenario())
+
+        assert started == [True, False, False]
+        assert in_flight == 1
+        assert flights.get_stats() == {"started": 1, "coalesced": 0, "background": 1, "failed": 1, "in_flight": 0}
+
+    def test_caller_joins_a_background_run(self):
+        """Um chamador que chega durante a revalidação aguarda a mesma computação"""
+        flights = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 42
+
+        async def scenario():
+            assert flights.run_in_background("key", compute)
+            return await flights.run("key", compute)
+
+        assert asyncio.run(scenario()) == 42
+        assert calls == [1]
+        assert flights.stats["coalesced"] == 1
@@ -61,6 +61,7 @@ class Settings(BaseSettings):
     # Pub/Sub (para comunicação entre serviços)
     pubsub_topic_onboarding: str = "onboarding-completed"
     pubsub_subscription_plans: str = "plans-service-subscription"
+    pubsub_topic: Optional[str] = os.getenv("PUBSUB_TOPIC_USER_EVENTS")  # Eventos de perfil (onboarding, atualizações)
     
     # Serviços externos
     content_service_url: str = os.getenv("CONTENT_SERVICE_URL", "http://localhost:8081")
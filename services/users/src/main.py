@@ -382,6 +382,7 @@ async def get_onboarding_status(
 async def recalculate_calories(
     user_service: UserService = Depends(get_user_service),
     calorie_service: CalorieService = Depends(get_calorie_service),
+    communication_service: CommunicationService = Depends(get_communication_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Recalcular metas calóricas"""
@@ -409,6 +410,13 @@ async def recalculate_calories(
         # Atualizar no perfil
         await user_service.update_calorie_calculation(user_id, calorie_calculation)
         
+        # Notificar serviços dependentes (planos em cache usam as metas calóricas)
+        await communication_service.notify_user_updated(
+            user_id,
+            "calorie_calculation",
+            calorie_calculation.dict()
+        )
+        
         return {
             "message": "Calorias recalculadas com sucesso",
             "calorie_calculation": calorie_calculation.dict()
@@ -2,6 +2,7 @@
 Serviço de comunicação entre microserviços
 """
 
+import asyncio
 import json
 import httpx
 from datetime import datetime
@@ -12,6 +13,12 @@ from config.settings import get_settings
 from models.user import FitnessGoals, CalorieCalculation
 from services.firebase_service import FirebaseService
 
+try:
+    from google.cloud import pubsub_v1
+    PUBSUB_AVAILABLE = True
+except ImportError:
+    PUBSUB_AVAILABLE = False
+
 logger = structlog.get_logger()
 settings = get_settings()
 
@@ -21,6 +28,7 @@ class CommunicationService:
     def __init__(self):
         self.firebase_service = None
         self.http_client = httpx.AsyncClient(timeout=30.0)
+        self.publisher = None
         
     async def set_firebase_service(self, firebase_service: FirebaseService):
         """Definir serviço Firebase"""
@@ -242,18 +250,25 @@ class CommunicationService:
     async def _publish_to_pubsub(self, event_data: Dict[str, Any]) -> bool:
         """Publicar evento no Google Pub/Sub"""
         try:
-            # Implementação simplificada - em produção usar biblioteca oficial
             pubsub_topic = settings.pubsub_topic
             
-            if not pubsub_topic:
+            if not pubsub_topic or not PUBSUB_AVAILABLE:
                 logger.info("Tópico Pub/Sub não configurado")
                 return False
             
-            # Para implementação completa, usar google-cloud-pubsub
-            # from google.cloud import pubsub_v1
+            if self.publisher is None:
+                self.publisher = pubsub_v1.PublisherClient()
             
-            logger.info("Pub/Sub não implementado nesta versão")
-            return False
+            topic_path = self.publisher.topic_path(settings.firebase_project_id, pubsub_topic)
+            future = self.publisher.publish(
+                topic_path,
+                json.dumps(event_data, default=str).encode("utf-8"),
+                event_type=event_data["event_type"]
+            )
+            message_id = await asyncio.wrap_future(future)
+            
+            logger.info("Evento publicado no Pub/Sub", event_type=event_data["event_type"], message_id=message_id)
+            return True
             
         except Exception as e:
             logger.error("Erro ao publicar no Pub/Sub", error=str(e))
@@ -288,6 +303,9 @@ class CommunicationService:
             # Sempre notificar analytics
             await self._notify_analytics_service(event_data)
             
+            # Publicar no Pub/Sub (invalida planos em cache no plans-service)
+            await self._publish_to_pubsub(event_data)
+            
             logger.info("Notificação de atualização enviada", user_id=user_id, update_type=update_type)
             return True
             
@@ -312,6 +330,7 @@ class CommunicationService:
             await self._notify_plans_service(event_data)
             await self._notify_notifications_service(event_data)
             await self._notify_analytics_service(event_data)
+            await self._publish_to_pubsub(event_data)
             
             logger.info("Notificação de desativação enviada", user_id=user_id)
             return True
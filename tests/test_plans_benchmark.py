@@ -0,0 +1,835 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Plans-Service
+Compara o cálculo de quantidades antigo (proporcional + reajuste global)
+com o otimizador por mínimos quadrados limitados, mede o custo por
+requisição da geração de treino com I/O externo simulado, as alocações
+dos textos de uma apresentação (tabelas por chamada vs tabelas carregadas),
+a latência do loop sob gerações concorrentes (no loop vs pool de processos)
+e o tamanho / reconstrução dos planos gravados (completo vs compacto)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+from jinja2 import Template
+from pydantic import ValidationError
+
+# Adicionar path do plans-service
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services', 'plans-service', 'src'))
+
+from algorithms.diet_generator import DietGenerator, NutritionalTarget
+from algorithms.workout_generator import WorkoutGenerator, _build_exercise_index
+from models.plan import (
+    AlgorithmConfig, DailyTip, DietPreferences, FoodItem, GoalType, Meal, MealType, WorkoutPreferences
+)
+from services.content_templates import DEFAULT_TEMPLATES_PATH, get_content_templates
+from services.exercise_library import ExerciseLibrary
+from services.food_catalog import FoodCatalog
+from services.plan_cache import PlanCache
+from services.plan_codec import StoredPlan, _decode_body, encode_compact
+from services.plan_executor import PlanComputeContext, PlanExecutor
+from services.presentation_service import PresentationService
+
+MEALS = 2000
+MEALS_PER_PLAN = 5
+PLAN_MEAL_TYPES = (MealType.CAFE_DA_MANHA, MealType.LANCHE_MANHA, MealType.ALMOCO, MealType.LANCHE_TARDE, MealType.JANTAR)
+# Regressão aceita no tempo por plano: a razão proporcional do código anterior não
+# resolve nada (~0.04 ms por refeição), o ajuste limitado custa ~0.1 ms por refeição
+QUANTITY_TIME_BUDGET = 6.0
+WORKOUT_REQUESTS = 500
+EXERCISES = 600
+PRESENTATIONS = 2000
+CONCURRENT_PLANS = 24
+TACO_FOODS = 400
+EXECUTOR_WORKERS = 2
+PROBE_INTERVAL = 0.005
+MACRO_NAMES = ("calories", "protein", "carbs", "fat")
+# 1ª leitura do formato compacto vs validação do dict completo: a montagem em Python
+# de ~20 modelos por plano custa ~2.7x a validação do pydantic-core; releituras usam o cache
+CODEC_COLD_LOAD_MARGIN = 4.0
+
+# Tempos e tamanhos vão para o log (pytest: --log-cli-level=INFO; script: stdout)
+logger = logging.getLogger("plans_benchmark")
+
+# Perfis típicos (por 100g): calorias, proteína, carboidratos, gordura
+FOOD_PROFILES = {
+    "carnes": (190, 28, 0, 8),
+    "cereais": (130, 3, 28, 0.5),
+    "laticínios": (120, 8, 5, 8),
+    "frutas": (60, 1, 15, 0.2),
+    "vegetais": (25, 2, 4, 0.3),
+    "oleaginosas": (600, 20, 20, 50),
+}
+
+# Distribuição de macros por refeição (proteína, carboidratos, gordura)
+MEAL_MACROS = [(0.20, 0.50, 0.30), (0.35, 0.45, 0.20), (0.40, 0.35, 0.25), (0.50, 0.20, 0.30)]
+
+
+def random_meal(rng: random.Random):
+    """Gera uma refeição sintética com 2 a 4 alimentos"""
+    categories = rng.sample(list(FOOD_PROFILES), rng.randint(2, 4))
+    macros = np.array([
+        [value * rng.uniform(0.8, 1.2) for value in FOOD_PROFILES[category]]
+        for category in categories
+    ])
+    macros[:, 0] = 4 * macros[:, 1] + 4 * macros[:, 2] + 9 * macros[:, 3]
+
+    calories = rng.uniform(200, 800)
+    protein_share, carbs_share, fat_share = rng.choice(MEAL_MACROS)
+    targets = (calories, calories * protein_share / 4, calories * carbs_share / 4, calories * fat_share / 9)
+    preferences = [rng.uniform(0.3, 1.0) for _ in categories]
+    return macros, categories, targets, preferences
+
+
+@dataclass
+class LegacyFood:
+    """Candidato no formato lido pelo cálculo anterior (FoodCandidate)"""
+    food_id: str
+    name: str
+    category: str
+    calories_per_100g: float
+    protein_per_100g: float
+    carbs_per_100g: float
+    fat_per_100g: float
+    preference_score: float
+
+
+class LegacyQuantities:
+    """
+    Cálculo de quantidades anterior ao otimizador, copiado sem alterações de
+    DietGenerator (commit 4c2b649^): _optimize_quantities,
+    _round_to_practical_quantity, _needs_adjustment e _adjust_plan
+    """
+
+    def __init__(self, diet_config):
+        self.diet_config = diet_config
+
+    def _optimize_quantities(
+        self, 
+        selected_foods: List[LegacyFood], 
+        target: NutritionalTarget
+    ) -> List[FoodItem]:
+        """Otimiza as quantidades dos alimentos selecionados"""
+        if not selected_foods:
+            return []
+        
+        food_items = []
+        
+        # Algoritmo simples de otimização
+        # Para cada alimento, calcular quantidade baseada na contribuição proporcional
+        total_priority_score = sum(food.preference_score for food in selected_foods)
+        
+        for food in selected_foods:
+            # Calcular contribuição proporcional baseada no score
+            proportion = food.preference_score / total_priority_score if total_priority_score > 0 else 1.0 / len(selected_foods)
+            
+            # Calcular quantidade inicial baseada nas calorias alvo
+            target_calories_for_food = target.calories * proportion
+            quantity_grams = (target_calories_for_food / food.calories_per_100g) * 100
+            
+            # Ajustar para quantidades práticas
+            quantity_grams = self._round_to_practical_quantity(quantity_grams, food.category)
+            
+            # Calcular valores nutricionais finais
+            multiplier = quantity_grams / 100
+            
+            food_item = FoodItem(
+                food_id=food.food_id,
+                name=food.name,
+                quantity=quantity_grams,
+                unit="gramas",
+                calories=food.calories_per_100g * multiplier,
+                protein=food.protein_per_100g * multiplier,
+                carbs=food.carbs_per_100g * multiplier,
+                fat=food.fat_per_100g * multiplier
+            )
+            
+            food_items.append(food_item)
+        
+        return food_items
+    
+    def _round_to_practical_quantity(self, quantity: float, category: str) -> float:
+        """Arredonda para quantidades práticas baseadas na categoria"""
+        practical_rounds = {
+            "frutas": 50,      # Múltiplos de 50g
+            "vegetais": 50,    # Múltiplos de 50g
+            "carnes": 25,      # Múltiplos de 25g
+            "cereais": 25,     # Múltiplos de 25g
+            "laticínios": 50,  # Múltiplos de 50g
+            "oleaginosas": 10, # Múltiplos de 10g
+            "default": 25      # Padrão
+        }
+        
+        round_to = practical_rounds.get(category, practical_rounds["default"])
+        return round(quantity / round_to) * round_to
+    
+    def _needs_adjustment(self, actual_calories: float, target_calories: float) -> bool:
+        """Verifica se o plano precisa de ajuste"""
+        tolerance = self.diet_config["tolerance"]["calories"]
+        difference = abs(actual_calories - target_calories) / target_calories
+        return difference > tolerance
+    
+    async def _adjust_plan(
+        self, 
+        meals: List[Meal], 
+        config: AlgorithmConfig,
+        available_foods: List[LegacyFood]
+    ) -> List[Meal]:
+        """Ajusta o plano para atingir os alvos nutricionais"""
+        # Implementação simplificada - ajustar quantidades proporcionalmente
+        current_calories = sum(meal.total_calories for meal in meals)
+        target_calories = config.target_calories
+        
+        adjustment_factor = target_calories / current_calories if current_calories > 0 else 1.0
+        
+        adjusted_meals = []
+        for meal in meals:
+            adjusted_foods = []
+            for food in meal.foods:
+                # Ajustar quantidade
+                new_quantity = food.quantity * adjustment_factor
+                new_quantity = self._round_to_practical_quantity(new_quantity, "default")
+                
+                # Recalcular valores nutricionais
+                multiplier = new_quantity / 100
+                adjusted_food = FoodItem(
+                    food_id=food.food_id,
+                    name=food.name,
+                    quantity=new_quantity,
+                    unit=food.unit,
+                    calories=food.calories * adjustment_factor,
+                    protein=food.protein * adjustment_factor,
+                    carbs=food.carbs * adjustment_factor,
+                    fat=food.fat * adjustment_factor
+                )
+                adjusted_foods.append(adjusted_food)
+            
+            # Recalcular totais da refeição
+            total_calories = sum(item.calories for item in adjusted_foods)
+            total_protein = sum(item.protein for item in adjusted_foods)
+            total_carbs = sum(item.carbs for item in adjusted_foods)
+            total_fat = sum(item.fat for item in adjusted_foods)
+            
+            adjusted_meal = Meal(
+                meal_type=meal.meal_type,
+                name=meal.name,
+                time_suggestion=meal.time_suggestion,
+                foods=adjusted_foods,
+                total_calories=total_calories,
+                total_protein=total_protein,
+                total_carbs=total_carbs,
+                total_fat=total_fat,
+                preparation_time=meal.preparation_time,
+                instructions=meal.instructions,
+                tips=meal.tips
+            )
+            adjusted_meals.append(adjusted_meal)
+        
+        return adjusted_meals
+
+
+class SyntheticMeal:
+    """Alimentos de uma refeição sintética no formato lido por DietGenerator._optimize_quantities"""
+
+    def __init__(self, position, macros, categories, preferences):
+        self.foods = [{"id": f"{position}-{index}", "name": category} for index, category in enumerate(categories)]
+        self.macros = macros
+        self.categories = categories
+        self.legacy_foods = [
+            LegacyFood(food["id"], food["name"], category, *food_macros, preference)
+            for food, category, food_macros, preference in zip(self.foods, categories, macros.tolist(), preferences)
+        ]
+
+    def food(self, index):
+        return self.foods[index]
+
+    def category(self, index):
+        return self.categories[index]
+
+
+def build_meal(meal_type: MealType, food_items: List[FoodItem]) -> Meal:
+    """Monta a refeição com os totais, como em _generate_meal"""
+    return Meal(
+        meal_type=meal_type,
+        name=meal_type.value,
+        foods=food_items,
+        total_calories=sum(item.calories for item in food_items),
+        total_protein=sum(item.protein for item in food_items),
+        total_carbs=sum(item.carbs for item in food_items),
+        total_fat=sum(item.fat for item in food_items)
+    )
+
+
+def synthetic_plans(rng: random.Random):
+    """Dias de MEALS_PER_PLAN refeições sintéticas com os alvos de cada refeição"""
+    plans = []
+    for plan_index in range(MEALS // MEALS_PER_PLAN):
+        plan = []
+        for meal_type in PLAN_MEAL_TYPES:
+            macros, categories, targets, preferences = random_meal(rng)
+            meal = SyntheticMeal(f"{plan_index}-{meal_type.value}", macros, categories, preferences)
+            plan.append((meal_type, meal, NutritionalTarget(*targets, tolerance=0.05)))
+        plans.append(plan)
+    return plans
+
+
+def meal_errors(meal: Meal, target: NutritionalTarget):
+    """Erro relativo de cada macro da refeição"""
+    totals = np.array([meal.total_calories, meal.total_protein, meal.total_carbs, meal.total_fat])
+    targets = np.array([target.calories, target.protein, target.carbs, target.fat])
+    return np.abs(totals - targets) / targets
+
+
+def measure_quantities(name, build_plan, plans):
+    """Monta todos os dias com um método; dias que falham na validação são contados à parte"""
+    errors = []
+    failed = 0
+
+    async def build_all():
+        nonlocal failed
+        for plan in plans:
+            try:
+                meals = await build_plan(plan)
+            except ValidationError:
+                failed += 1
+                continue
+            errors.extend(meal_errors(meal, target) for meal, (_, _, target) in zip(meals, plan))
+
+    start = time.perf_counter()
+    asyncio.run(build_all())
+    per_plan = (time.perf_counter() - start) / len(plans)
+
+    errors = np.array(errors)
+    logger.info(f"\n📊 {name}")
+    logger.info(f"   tempo por plano ({MEALS_PER_PLAN} refeições): {per_plan * 1000:.3f} ms")
+    for position, macro in enumerate(MACRO_NAMES):
+        logger.info(f"   erro médio {macro}: {errors[:, position].mean() * 100:.1f}% "
+                    f"(p90 {np.percentile(errors[:, position], 90) * 100:.1f}%)")
+    logger.info(f"   planos inválidos (porção de 0g): {failed}")
+    return errors, per_plan, failed
+
+
+def test_quantity_optimizer_benchmark():
+    """Compara erro nutricional e tempo por plano do cálculo anterior e do otimizador"""
+    logger.info("🧪 BENCHMARK DE QUANTIDADES - PLANS-SERVICE")
+    logger.info("=" * 60)
+
+    rng = random.Random(42)
+    plans = synthetic_plans(rng)
+    generator = DietGenerator(
+        MockTacoContentService(TACO_FOODS), MockFirebaseService(),
+        food_catalog=FoodCatalog(MockTacoContentService(TACO_FOODS)),
+        plan_cache=PlanCache(), plan_executor=PlanExecutor(max_workers=0)
+    )
+    legacy = LegacyQuantities(generator.diet_config)
+
+    async def legacy_plan(plan):
+        meals = [
+            build_meal(meal_type, legacy._optimize_quantities(meal.legacy_foods, target))
+            for meal_type, meal, target in plan
+        ]
+        target_calories = sum(target.calories for _, _, target in plan)
+        if legacy._needs_adjustment(sum(meal.total_calories for meal in meals), target_calories):
+            meals = await legacy._adjust_plan(meals, SimpleNamespace(target_calories=target_calories), [])
+        return meals
+
+    async def optimized_plan(plan):
+        return [
+            build_meal(meal_type, generator._optimize_quantities(meal, list(range(len(meal.foods))), target))
+            for meal_type, meal, target in plan
+        ]
+
+    legacy_errors, legacy_time, legacy_failed = measure_quantities(
+        "Proporcional + reajuste global (código anterior)", legacy_plan, plans
+    )
+    optimized_errors, optimized_time, optimized_failed = measure_quantities(
+        "Mínimos quadrados limitados", optimized_plan, plans
+    )
+
+    legacy_mean = statistics.mean(legacy_errors.mean(axis=1))
+    optimized_mean = statistics.mean(optimized_errors.mean(axis=1))
+    logger.info(f"\nErro médio (4 macros): {legacy_mean * 100:.1f}% -> {optimized_mean * 100:.1f}%; "
+                f"tempo por plano: {legacy_time * 1000:.3f} ms -> {optimized_time * 1000:.3f} ms")
+    assert optimized_failed == 0, "Otimizador gerou porções inválidas"
+    assert optimized_mean <= legacy_mean, "Otimizador pior que o método anterior"
+    assert optimized_time <= legacy_time * QUANTITY_TIME_BUDGET, (
+        f"Plano acima do orçamento de tempo ({optimized_time * 1000:.3f} ms vs {legacy_time * 1000:.3f} ms)"
+    )
+
+
+class MockContentService:
+    """Mock do Content Service com biblioteca sintética de exercícios"""
+
+    def __init__(self, count: int):
+        rng = random.Random(7)
+        muscles = ["peito", "costas", "ombros", "biceps", "triceps", "quadriceps",
+                   "posterior", "gluteos", "panturrilhas", "core", "antebracos"]
+        self.calls = 0
+        self.exercises = [
+            {
+                "id": f"ex{i}",
+                "name": f"Exercício {i}",
+                "muscle_groups": rng.sample(muscles, rng.randint(1, 3)),
+                "equipment": rng.choice(["bodyweight", "barbell", "dumbbell", "machine"]),
+                "difficulty": rng.choice(["beginner", "intermediate", "advanced", "expert"]),
+                "movement_pattern": rng.choice(["compound", "isolation", "cardio"]),
+                "safety_rating": rng.uniform(0.5, 1.0),
+                "effectiveness_rating": rng.uniform(0.5, 1.0),
+                "location_compatibility": rng.choice([["gym"], ["gym", "home"]])
+            }
+            for i in range(count)
+        ]
+
+    async def get_exercises(self):
+        self.calls += 1
+        return {"exercises": self.exercises}
+
+
+class MockDocument:
+    exists = False
+
+    def to_dict(self):
+        return {}
+
+
+class MockQuery:
+    def where(self, *args, **kwargs):
+        return self
+
+    def order_by(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        return self
+
+    async def get(self):
+        return []
+
+
+class MockFirestore:
+    """Mock mínimo do Firestore (leituras vazias, escritas descartadas)"""
+
+    def collection(self, name):
+        return self
+
+    def where(self, *args, **kwargs):
+        return MockQuery()
+
+    def document(self, doc_id):
+        return self
+
+    async def get(self):
+        return MockDocument()
+
+    async def set(self, data):
+        pass
+
+
+class MockTacoContentService:
+    """Mock do Content Service com catálogo TACO sintético"""
+
+    def __init__(self, count: int):
+        rng = random.Random(3)
+        groups = ["CEREAIS E DERIVADOS", "CARNES E DERIVADOS", "FRUTAS E DERIVADOS",
+                  "VERDURAS E LEGUMES", "LEGUMINOSAS", "OLEAGINOSAS", "LATICÍNIOS"]
+        names = ["arroz", "feijão", "frango", "carne", "pão", "aveia", "banana",
+                 "maçã", "castanha", "leite", "queijo", "soja", "alface", "peixe"]
+        self.foods = [
+            {
+                "codigo": str(i),
+                "nome": f"{rng.choice(names)} {i}",
+                "grupo": rng.choice(groups),
+                "composicao": {
+                    "Energia": {"valor": rng.uniform(30, 600)},
+                    "Proteína": {"valor": rng.uniform(0, 35)},
+                    "Carboidrato total": {"valor": rng.uniform(0, 80)},
+                    "Lipídios": {"valor": rng.uniform(0, 40)}
+                }
+            }
+            for i in range(count)
+        ]
+
+    async def search_foods(self, query: str = ""):
+        return {"data": self.foods, "version": "benchmark"}
+
+
+class MockFirebaseService:
+    def __init__(self):
+        self.db = MockFirestore()
+
+
+def test_workout_generation_benchmark():
+    """Mede construção do gerador e geração de treino por requisição"""
+    logger.info("\n🧪 BENCHMARK DE TREINO - PLANS-SERVICE")
+    logger.info("=" * 60)
+
+    content_service = MockContentService(EXERCISES)
+    firebase_service = MockFirebaseService()
+    config = AlgorithmConfig(
+        user_id="benchmark",
+        goal="ganhar_massa",
+        experience_level="intermediate",
+        diet_preferences=DietPreferences(),
+        workout_preferences=WorkoutPreferences(
+            available_days=["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"],
+            equipment_available=["barbell", "dumbbell"]
+        ),
+        target_calories=2500,
+        target_protein=160,
+        target_carbs=300,
+        target_fat=70
+    )
+
+    start = time.perf_counter()
+    for _ in range(WORKOUT_REQUESTS):
+        WorkoutGenerator(content_service, firebase_service)
+    construction = (time.perf_counter() - start) / WORKOUT_REQUESTS
+
+    async def generate_all():
+        # Um usuário por requisição: o cache de planos não deve mascarar a geração
+        for i in range(WORKOUT_REQUESTS):
+            generator = WorkoutGenerator(content_service, firebase_service)
+            await generator.generate_workout_plan(f"benchmark-{i}", date(2026, 1, 5 + i % 7), config)
+
+    start = time.perf_counter()
+    asyncio.run(generate_all())
+    per_request = (time.perf_counter() - start) / WORKOUT_REQUESTS
+
+    cache_info = _build_exercise_index.cache_info()
+    logger.info(f"\n📊 {EXERCISES} exercícios, {WORKOUT_REQUESTS} requisições")
+    logger.info(f"   construção do gerador: {construction * 1_000_000:.1f} µs")
+    logger.info(f"   generate_workout_plan: {per_request * 1000:.3f} ms por requisição")
+    logger.info(f"   buscas no Content Service: {content_service.calls}")
+    logger.info(f"   cache de índices: {cache_info.hits} acertos / {cache_info.misses} construções")
+    assert content_service.calls == 1, "Biblioteca de exercícios buscada mais de uma vez"
+
+
+def legacy_presentation_texts(raw, goal: GoalType, name: str, rng: random.Random):
+    """Textos de uma apresentação como antes: tabelas montadas e templates compilados a cada chamada"""
+    motivational = {
+        GoalType(key): [Template(text) for text in texts]
+        for key, texts in raw["motivational_messages"].items()
+    }
+    summaries = {key: Template(text) for key, text in raw["daily_summaries"].items()}
+    tips = {GoalType(key): [DailyTip(**tip) for tip in values] for key, values in raw["daily_tips"].items()}
+    milestones = {GoalType(key): list(values) for key, values in raw["milestones"].items()}
+    encouragements = [Template(text) for text in raw["encouragements"]["steady"]]
+
+    goal_tips = tips.get(goal, tips[GoalType.MANTER_PESO])
+    high_priority = [tip for tip in goal_tips if tip.priority == 1]
+    low_priority = [tip for tip in goal_tips if tip.priority == 2]
+    return (
+        rng.choice(motivational.get(goal, motivational[GoalType.MANTER_PESO])).render(name=name),
+        summaries["no_plans"].render(),
+        [rng.choice(high_priority), rng.choice(low_priority)],
+        rng.choice(milestones.get(goal, milestones[GoalType.MANTER_PESO])),
+        rng.choice(encouragements).render(name=name)
+    )
+
+
+def loaded_presentation_texts(service: PresentationService, goal: GoalType, name: str, rng: random.Random):
+    """Textos de uma apresentação pelos métodos do serviço (tabelas carregadas uma vez)"""
+    return (
+        service._generate_motivational_message(name, goal, {}, rng),
+        service._generate_daily_summary(None, None, goal),
+        service._generate_daily_tips(goal, date(2026, 1, 5), {}, rng),
+        service._generate_next_milestone(goal, {}, [], rng),
+        service._generate_encouragement_note(goal, [], name, rng)
+    )
+
+
+def measure_texts(name, build):
+    """Tempo e pico de memória alocada por apresentação"""
+    goals = list(GoalType)
+    rng = random.Random(11)
+    build(goals[0], rng)  # Aquecimento (imports, caches do Jinja)
+
+    start = time.perf_counter()
+    for i in range(PRESENTATIONS):
+        build(goals[i % len(goals)], rng)
+    elapsed = (time.perf_counter() - start) / PRESENTATIONS
+
+    peaks = []
+    for goal in goals:
+        tracemalloc.start()
+        build(goal, rng)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    peak = statistics.mean(peaks)
+    logger.info(f"\n📊 {name}")
+    logger.info(f"   tempo por apresentação: {elapsed * 1_000_000:.1f} µs")
+    logger.info(f"   pico alocado por apresentação: {peak / 1024:.1f} KiB")
+    return elapsed, peak
+
+
+def test_content_templates_benchmark():
+    """Compara alocações dos textos da apresentação com as tabelas por chamada e carregadas"""
+    logger.info("\n🧪 BENCHMARK DE TEXTOS DA APRESENTAÇÃO - PLANS-SERVICE")
+    logger.info("=" * 60)
+
+    with open(DEFAULT_TEMPLATES_PATH, encoding="utf-8") as templates_file:
+        raw = json.load(templates_file)
+
+    get_content_templates()
+    service = PresentationService(MockFirebaseService())
+
+    legacy_time, legacy_peak = measure_texts(
+        "Tabelas montadas por chamada",
+        lambda goal, rng: legacy_presentation_texts(raw, goal, "Ana", rng)
+    )
+    loaded_time, loaded_peak = measure_texts(
+        "Tabelas carregadas uma vez",
+        lambda goal, rng: loaded_presentation_texts(service, goal, "Ana", rng)
+    )
+
+    logger.info(f"\nTempo: {legacy_time * 1_000_000:.1f} µs -> {loaded_time * 1_000_000:.1f} µs; "
+                f"pico alocado: {legacy_peak / 1024:.1f} KiB -> {loaded_peak / 1024:.1f} KiB")
+    assert loaded_peak < legacy_peak, "Textos da apresentação alocam mais que o método anterior"
+
+
+def benchmark_config() -> AlgorithmConfig:
+    return AlgorithmConfig(
+        user_id="benchmark",
+        goal="perder_peso",
+        experience_level="intermediate",
+        diet_preferences=DietPreferences(),
+        workout_preferences=WorkoutPreferences(available_days=["monday", "wednesday", "friday"]),
+        target_calories=2000,
+        target_protein=150,
+        target_carbs=200,
+        target_fat=65
+    )
+
+
+async def benchmark_compute_context() -> PlanComputeContext:
+    """Contexto dos workers do benchmark (mesmos dados sintéticos do processo principal)"""
+    import logging
+    import structlog
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+    content_service = MockTacoContentService(TACO_FOODS)
+    food_catalog = FoodCatalog(content_service)
+    exercise_library = ExerciseLibrary(MockContentService(EXERCISES))
+    await food_catalog.load()
+    inline = PlanExecutor(max_workers=0)
+    return PlanComputeContext(
+        DietGenerator(content_service, None, food_catalog=food_catalog, plan_executor=inline),
+        WorkoutGenerator(content_service, None, exercise_library=exercise_library, plan_executor=inline)
+    )
+
+
+async def run_concurrent_plans(executor: PlanExecutor, food_catalog: FoodCatalog):
+    """
+    Dispara gerações concorrentes e, em paralelo, uma requisição leve a cada
+    5 ms (plano já em cache, atendido pelo mesmo loop), medindo a latência de
+    cada uma desde a chegada
+    """
+    firebase_service = MockFirebaseService()
+    config = benchmark_config()
+    request_latencies = []
+    done = asyncio.Event()
+
+    cached_generator = DietGenerator(
+        None, firebase_service,
+        food_catalog=food_catalog, plan_cache=PlanCache(), plan_executor=executor
+    )
+    await cached_generator.generate_diet_plan("cached", date(2026, 1, 5), config)
+
+    async def light_requests():
+        while not done.is_set():
+            arrived_at = time.perf_counter() + PROBE_INTERVAL
+            await asyncio.sleep(PROBE_INTERVAL)
+            await cached_generator.generate_diet_plan("cached", date(2026, 1, 5), config)
+            request_latencies.append(time.perf_counter() - arrived_at)
+
+    async def plan_request(i: int, arrived_at: float):
+        # Cache próprio por requisição: toda chamada passa pela geração
+        generator = DietGenerator(
+            None, firebase_service,
+            food_catalog=food_catalog, plan_cache=PlanCache(), plan_executor=executor
+        )
+        await generator.generate_diet_plan(f"concurrent-{i}", date(2026, 1, 5), config)
+        return time.perf_counter() - arrived_at
+
+    requests_task = asyncio.create_task(light_requests())
+    await asyncio.sleep(PROBE_INTERVAL)
+    start = time.perf_counter()
+    plan_latencies = await asyncio.gather(*(plan_request(i, start) for i in range(CONCURRENT_PLANS)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await requests_task
+    return plan_latencies, request_latencies, elapsed
+
+
+def report_concurrency(name, plan_latencies, request_latencies, elapsed):
+    """Registra as latências e retorna o p99 dos planos e o das requisições leves"""
+    logger.info(f"\n📊 {name}")
+    logger.info(f"   {CONCURRENT_PLANS} planos em {elapsed:.2f} s")
+    logger.info(f"   latência dos planos: p50 {np.percentile(plan_latencies, 50) * 1000:.0f} ms, "
+                f"p99 {np.percentile(plan_latencies, 99) * 1000:.0f} ms")
+    logger.info(f"   latência das requisições em cache: p50 {np.percentile(request_latencies, 50) * 1000:.1f} ms, "
+                f"p99 {np.percentile(request_latencies, 99) * 1000:.1f} ms, "
+                f"máx {max(request_latencies) * 1000:.1f} ms")
+    return float(np.percentile(plan_latencies, 99)), float(np.percentile(request_latencies, 99))
+
+
+def test_plan_executor_concurrency_benchmark():
+    """Compara a latência das requisições com a montagem dos planos no loop e no pool de processos"""
+    logger.info("\n🧪 BENCHMARK DE CONCORRÊNCIA - PLANS-SERVICE")
+    logger.info("=" * 60)
+
+    async def run_both():
+        food_catalog = FoodCatalog(MockTacoContentService(TACO_FOODS))
+        await food_catalog.load()
+
+        inline_plans, inline_requests = report_concurrency(
+            "Montagem no loop da aplicação",
+            *await run_concurrent_plans(PlanExecutor(max_workers=0), food_catalog)
+        )
+
+        executor = PlanExecutor(max_workers=EXECUTOR_WORKERS, context_factory=benchmark_compute_context)
+        await executor.start()
+        try:
+            pooled_plans, pooled_requests = report_concurrency(
+                f"Pool de processos ({EXECUTOR_WORKERS} workers)",
+                *await run_concurrent_plans(executor, food_catalog)
+            )
+        finally:
+            executor.shutdown()
+
+        # O p99 dos planos depende dos núcleos livres para o pool; o critério é o das requisições do loop
+        logger.info(f"\np99 dos planos: {inline_plans * 1000:.0f} ms -> {pooled_plans * 1000:.0f} ms")
+        logger.info(f"p99 das requisições em cache: {inline_requests * 1000:.1f} ms -> "
+                    f"{pooled_requests * 1000:.1f} ms ({os.cpu_count()} CPUs)")
+        assert pooled_requests < inline_requests, "Pool de processos não reduziu o p99 das requisições"
+
+    asyncio.run(run_both())
+
+
+def firestore_size(value) -> int:
+    """Tamanho de armazenamento de um valor pelas regras do Firestore"""
+    if isinstance(value, dict):
+        return sum(len(key.encode("utf-8")) + 1 + firestore_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(firestore_size(item) for item in value)
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if value is None or isinstance(value, bool):
+        return 1
+    return 8
+
+
+def firestore_values(value) -> int:
+    """Valores que o cliente do Firestore converte um a um na leitura"""
+    if isinstance(value, dict):
+        return sum(firestore_values(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(firestore_values(item) for item in value)
+    return 1
+
+
+def time_per_call(fn, repeat: int = 500) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def test_plan_codec_benchmark():
+    """Compara os documentos de plano no formato completo e no compacto"""
+    logger.info("\n🧪 BENCHMARK DE ARMAZENAMENTO DE PLANOS - PLANS-SERVICE")
+    logger.info("=" * 60)
+
+    async def build_week():
+        context = await benchmark_compute_context()
+        config = benchmark_config()
+        week_start = date(2024, 1, 1)
+        diet = [
+            await context.diet_generator.build_diet_plan("benchmark", week_start + timedelta(days=offset), config, {})
+            for offset in range(7)
+        ]
+        workout_generator = context.workout_generator
+        exercise_index = await workout_generator.warm_exercise_index(config.workout_preferences)
+        workout = [
+            workout_generator.compose_workout_plan(
+                "benchmark", week_start + timedelta(days=offset), config, {}, exercise_index
+            )
+            for offset in range(7)
+        ]
+        return {"diet": diet, "workout": [plan for plan in workout if not plan.rest_day]}
+
+    plans_by_kind = asyncio.run(build_week())
+    for kind, plans in plans_by_kind.items():
+        full_docs = [plan.dict() for plan in plans]
+        compact_docs = [encode_compact(kind, plan) for plan in plans]
+
+        for plan, document in zip(plans, compact_docs):
+            assert StoredPlan(kind, document).load() == plan, f"Plano de {kind} diferente após a leitura"
+
+        full_size = statistics.mean(firestore_size(document) for document in full_docs)
+        compact_size = statistics.mean(firestore_size(document) for document in compact_docs)
+        model = type(plans[0])
+        validate_time = statistics.mean(time_per_call(lambda: model(**document)) for document in full_docs)
+        cold_load_time = statistics.mean(
+            time_per_call(lambda: (_decode_body.cache_clear(), StoredPlan(kind, document).load()))
+            for document in compact_docs
+        )
+        load_time = statistics.mean(
+            time_per_call(lambda: StoredPlan(kind, document).load()) for document in compact_docs
+        )
+        header_time = statistics.mean(
+            time_per_call(lambda: StoredPlan(kind, document).input_hash) for document in compact_docs
+        )
+
+        logger.info(f"\n📊 Planos de {kind} ({len(plans)} dias, corpo {compact_docs[0]['body_encoding']})")
+        logger.info(f"   documento: {full_size:.0f} B -> {compact_size:.0f} B; "
+                    f"valores convertidos pelo Firestore: "
+                    f"{statistics.mean(firestore_values(d) for d in full_docs):.0f} -> "
+                    f"{statistics.mean(firestore_values(d) for d in compact_docs):.0f}")
+        logger.info(f"   reconstrução: {validate_time * 1_000_000:.1f} µs (dict) / "
+                    f"{cold_load_time * 1_000_000:.1f} µs (compacto, 1ª leitura) / "
+                    f"{load_time * 1_000_000:.1f} µs (compacto, corpo em cache); "
+                    f"só cabeçalho: {header_time * 1_000_000:.1f} µs")
+        assert compact_size < full_size, f"Formato compacto maior que o completo ({kind})"
+        assert cold_load_time <= validate_time * CODEC_COLD_LOAD_MARGIN, f"1ª leitura compacta lenta ({kind})"
+        assert load_time < validate_time, f"Leitura compacta em cache mais lenta que a validação ({kind})"
+
+
+if __name__ == "__main__":
+    import structlog
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
+    checks = [
+        (test_quantity_optimizer_benchmark, "Otimizador melhor ou igual ao método anterior"),
+        (test_workout_generation_benchmark, "Biblioteca de exercícios reaproveitada entre requisições"),
+        (test_content_templates_benchmark, "Textos da apresentação sem tabelas por chamada"),
+        (test_plan_executor_concurrency_benchmark, "Loop responsivo com a montagem no pool de processos"),
+        (test_plan_codec_benchmark, "Planos compactos menores e idênticos após a leitura"),
+    ]
+    failures = 0
+    for check, message in checks:
+        try:
+            check()
+            logger.info(f"\n✅ {message}")
+        except AssertionError as error:
+            failures += 1
+            logger.error(f"\n❌ {error}")
+
+    sys.exit(1 if failures else 0)